@@ -0,0 +1,8 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks for tpQtLib library widgets. Run them from repository root with:
+>>> python -m benchmarks.run --sizes 1000 10000 100000 --output results.json
+>>> python -m benchmarks.imports --limit 20
+"""
@@ -0,0 +1,54 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that reports the time taken to initialize tpQtLib and to import each of its modules
+>>> python -m benchmarks.imports --limit 20
+>>> python -m benchmarks.imports --output imports.json
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import sys
+import json
+import argparse
+
+# Imports are measured headless, so the offscreen platform must be set before Qt is imported
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source'))
+
+from Qt.QtWidgets import *
+
+import tpQtLib
+from tpQtLib.core import lazyimport
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Reports the import time of tpQtLib modules')
+    parser.add_argument('--limit', type=int, help='Maximum number of modules shown')
+    parser.add_argument('--output', help='Path of the JSON file where the report is written')
+    args = parser.parse_args(args)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    # Modules are imported lazily, so the report measures what the eager initialization would import
+    tpQtLib.init(lazy=True)
+    init_times = tpQtLib.init_times()
+    report = tpQtLib.import_report()
+
+    for step, seconds in init_times.items():
+        print('init {}: {:.1f} ms'.format(step, seconds * 1000.0))
+    print(lazyimport.format_import_report(report, limit=args.limit))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'init': init_times, 'modules': report}, f, indent=2)
+
+    app.processEvents()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
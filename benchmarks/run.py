@@ -0,0 +1,527 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that runs the library benchmarks on synthetic libraries and writes machine-readable results
+>>> python -m benchmarks.run --sizes 1000 10000 --output results.json
+>>> python -m benchmarks.run --sizes 1000 --compare results.json
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from collections import OrderedDict
+
+# Benchmarks are run headless, so the offscreen platform must be set before Qt is imported
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source'))
+
+from Qt.QtWidgets import *
+
+import tpQtLib
+from tpQtLib.__version__ import __version__
+
+from benchmarks import synthetic
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.2
+THEME_SUBSCRIBERS = 16
+THEME_WIDGETS_PER_GROUP = 50
+EFFECTS_MAX_IMAGES = 1000
+EFFECTS_IMAGE_SIZE = 32
+
+_BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """
+    Decorator that registers the decorated function as a benchmark
+    Benchmark functions receive a BenchmarkContext and return the function to time
+    :param name: str
+    """
+
+    def _register(fn):
+        _BENCHMARKS[name] = fn
+        return fn
+
+    return _register
+
+
+def timeit(fn, repeat):
+    """
+    Calls the given function the given number of times and returns the timing statistics in seconds
+    :param fn: fn()
+    :param repeat: int
+    :return: dict
+    """
+
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter() if hasattr(time, 'perf_counter') else time.time()
+        fn()
+        end = time.perf_counter() if hasattr(time, 'perf_counter') else time.time()
+        timings.append(end - start)
+
+    timings.sort()
+    middle = len(timings) // 2
+    median = timings[middle] if len(timings) % 2 else (timings[middle - 1] + timings[middle]) / 2
+
+    return {
+        'repeat': repeat,
+        'min': timings[0],
+        'max': timings[-1],
+        'mean': sum(timings) / len(timings),
+        'median': median
+    }
+
+
+class BenchmarkContext(object):
+    """
+    Holds the synthetic library and the objects shared by the benchmarks of a library size
+    """
+
+    def __init__(self, root, size, storage_extension='.json'):
+        super(BenchmarkContext, self).__init__()
+
+        from tpQtLib.widgets.library import manager
+
+        self.root = root
+        self.size = size
+        self.data = synthetic.generate_library(os.path.join(root, 'library'), size)
+        self.manager = manager.LibraryManager()
+        self.manager.register_item(_benchmark_item_class())
+        self.window = BenchmarkWindow(self.manager)
+        self.library = _benchmark_library_class()(
+            path=os.path.join(root, 'library'), library_window=self.window,
+            data_path=os.path.join(root, 'library' + storage_extension))
+        self.library.sync(incremental=False)
+        self._viewer = None
+        self._theme_root = None
+
+    def viewer(self):
+        """
+        Returns the viewer that displays the benchmark library. It is created the first time it is requested
+        :return: LibraryViewer
+        """
+
+        if self._viewer is None:
+            from tpQtLib.widgets.library import viewer
+            self._viewer = viewer.LibraryViewer()
+            self._viewer.resize(1280, 720)
+            self._viewer.set_library(self.library)
+            self._viewer.show()
+
+        return self._viewer
+
+    def theme_root(self):
+        """
+        Returns a widget with as many descendant widgets as library items, where only a few of them consume
+        theme colors and are registered as theme subscribers. It is created the first time it is requested
+        :return: QWidget
+        """
+
+        if self._theme_root is None:
+            from tpQtLib.core import theme
+            subscriber_class = _benchmark_theme_widget_class()
+            self._theme_root = QWidget()
+            step = max(1, self.size // THEME_SUBSCRIBERS)
+            group = None
+            for i in range(self.size):
+                if i % THEME_WIDGETS_PER_GROUP == 0:
+                    group = QWidget(self._theme_root)
+                if i % step == 0:
+                    theme.subscribe(subscriber_class(group))
+                else:
+                    QWidget(group)
+
+        return self._theme_root
+
+    def close(self):
+        """
+        Closes the benchmark viewer and removes the library from disk
+        """
+
+        if self._viewer is not None:
+            self._viewer.close()
+            self._viewer.deleteLater()
+            self._viewer = None
+        if self._theme_root is not None:
+            self._theme_root.deleteLater()
+            self._theme_root = None
+        QApplication.processEvents()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class BenchmarkWindow(object):
+    """
+    Minimal library window used by benchmarks. Libraries only need it to access the manager
+    """
+
+    def __init__(self, manager):
+        super(BenchmarkWindow, self).__init__()
+
+        self._manager = manager
+        manager.set_library_window(self)
+
+    def manager(self):
+        return self._manager
+
+
+def _benchmark_item_class():
+    """
+    Internal function that returns the item class matching synthetic library items
+    Classes are defined lazily because tpQtLib must be initialized before library modules are imported
+    :return: class
+    """
+
+    from tpQtLib.widgets.library import items
+
+    class BenchmarkItem(items.LibraryItem):
+        Extensions = [synthetic.ITEM_EXTENSION]
+        EnableNestedItems = False
+
+        def context_menu(self, menu):
+            pass
+
+    return BenchmarkItem
+
+
+def _benchmark_theme_widget_class():
+    """
+    Internal function that returns the widget class that consumes theme colors used by benchmarks
+    :return: class
+    """
+
+    class BenchmarkThemeWidget(QWidget):
+        def set_text_color(self, color):
+            self._text_color = color
+
+        def set_text_selected_color(self, color):
+            self._text_selected_color = color
+
+        def set_background_color(self, color):
+            self._background_color = color
+
+        def set_background_hover_color(self, color):
+            self._background_hover_color = color
+
+        def set_background_selected_color(self, color):
+            self._background_selected_color = color
+
+    return BenchmarkThemeWidget
+
+
+def _benchmark_library_class():
+    """
+    Internal function that returns the library class used by benchmarks
+    :return: class
+    """
+
+    from tpQtLib.widgets.library import library
+
+    class BenchmarkLibrary(library.Library):
+        def __init__(self, path=None, library_window=None, data_path=None):
+            self._benchmark_data_path = data_path
+            super(BenchmarkLibrary, self).__init__(path=path, library_window=library_window)
+
+        def data_path(self):
+            return self._benchmark_data_path
+
+    return BenchmarkLibrary
+
+
+"""
+##########################################################################################
+BENCHMARKS
+##########################################################################################
+"""
+
+
+@benchmark('utils.save_json')
+def bench_save_json(context):
+    from tpQtLib.widgets.library import utils
+
+    path = os.path.join(context.root, 'save.json')
+    return lambda: utils.save_json(path, context.data)
+
+
+@benchmark('utils.read_json')
+def bench_read_json(context):
+    from tpQtLib.widgets.library import utils
+
+    path = os.path.join(context.root, 'read.json')
+    utils.save_json(path, context.data)
+    return lambda: utils.read_json(path)
+
+
+@benchmark('LibraryManager.find_items')
+def bench_find_items(context):
+    return lambda: list(context.manager.find_items(context.library.path(), depth=context.library.recursive_depth()))
+
+
+@benchmark('Library.sync.full')
+def bench_sync_full(context):
+    return lambda: context.library.sync(incremental=False)
+
+
+@benchmark('Library.sync.incremental')
+def bench_sync_incremental(context):
+    return lambda: context.library.sync(incremental=True)
+
+
+@benchmark('Library.search')
+def bench_search(context):
+    def _search():
+        context.library.set_sort_by(['name:asc'])
+        context.library.set_group_by(list())
+        context.library.search()
+
+    return _search
+
+
+@benchmark('Library.search.sorted_grouped')
+def bench_search_sorted_grouped(context):
+    def _search():
+        context.library.set_sort_by(['category:asc', 'name:dsc'])
+        context.library.set_group_by(['type', 'category'])
+        context.library.search()
+
+    return _search
+
+
+@benchmark('Library.search.filtered')
+def bench_search_filtered(context):
+    query = {'name': 'benchmark', 'operator': 'and', 'filters': [('name', 'contains', 'walk')]}
+
+    def _search():
+        context.library.add_query(query)
+        try:
+            context.library.search()
+        finally:
+            context.library.remove_query(query['name'])
+
+    return _search
+
+
+@benchmark('LibraryViewer.update_items')
+def bench_update_items(context):
+    viewer = context.viewer()
+    context.library.set_lazy(False)
+    context.library.search()
+
+    def _update():
+        viewer.update_items()
+        QApplication.processEvents()
+
+    return _update
+
+
+@benchmark('LibraryViewer.update_items.lazy')
+def bench_update_items_lazy(context):
+    viewer = context.viewer()
+    context.library.set_lazy(True)
+    context.library.search()
+
+    def _update():
+        viewer.update_items()
+        QApplication.processEvents()
+
+    return _update
+
+
+
+@benchmark('reload_stylesheet.walk')
+def bench_reload_stylesheet_walk(context):
+    from Qt.QtCore import QObject
+    from tpQtLib.core import color, theme
+
+    root = context.theme_root()
+    options = theme.Theme().options()
+
+    # Previous implementation, which probes all the children of the window
+    def _reload():
+        colors = dict((option, color.Color.from_string(options[option])) for _, option in theme.SUBSCRIBER_SETTERS)
+        for w in root.findChildren(QObject):
+            found = False
+            for name, option in theme.SUBSCRIBER_SETTERS:
+                if hasattr(w, name):
+                    getattr(w, name)(colors[option])
+                    found = True
+            if found:
+                w.update()
+        QApplication.processEvents()
+
+    return _reload
+
+
+@benchmark('reload_stylesheet.subscribers')
+def bench_reload_stylesheet_subscribers(context):
+    from tpQtLib.core import theme
+
+    root = context.theme_root()
+    options = theme.Theme().options()
+
+    def _reload():
+        theme.subscribers().publish(options, root=root)
+        QApplication.processEvents()
+
+    return _reload
+
+
+def _colorize_images_benchmark(context, use_numpy):
+    """
+    Internal function that returns the function that colorizes a set of icon sized images
+    :param context: BenchmarkContext
+    :param use_numpy: bool, whether images are colorized with NumPy or with QPainter
+    :return: fn()
+    """
+
+    from Qt.QtGui import QImage, QColor
+    from tpQtLib.core import effects
+
+    source = QImage(EFFECTS_IMAGE_SIZE, EFFECTS_IMAGE_SIZE, effects.IMAGE_FORMAT)
+    source.fill(QColor(0, 0, 0, 128))
+    images = [QImage(source) for _ in range(min(context.size, EFFECTS_MAX_IMAGES))]
+    colors = [QColor(i % 256, 100, 200) for i in range(len(images))]
+
+    def _colorize():
+        effects.set_numpy_enabled(use_numpy)
+        try:
+            effects.colorize_images(images, colors)
+        finally:
+            effects.set_numpy_enabled(True)
+
+    return _colorize
+
+
+@benchmark('effects.colorize_images.numpy')
+def bench_colorize_images_numpy(context):
+    return _colorize_images_benchmark(context, True)
+
+
+@benchmark('effects.colorize_images.painter')
+def bench_colorize_images_painter(context):
+    return _colorize_images_benchmark(context, False)
+
+
+"""
+##########################################################################################
+RUNNER
+##########################################################################################
+"""
+
+
+def run(sizes, repeat=DEFAULT_REPEAT, names=None, storage_extension='.json'):
+    """
+    Runs the benchmarks with synthetic libraries of the given sizes
+    :param sizes: list(int)
+    :param repeat: int
+    :param names: list(str) or None, names of the benchmarks to run. If None, all benchmarks are run
+    :param storage_extension: str, extension of the library data base, which defines the storage backend
+    :return: dict
+    """
+
+    results = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'storage': storage_extension,
+        'results': list()
+    }
+
+    for size in sizes:
+        root = tempfile.mkdtemp(prefix='tpqtlib_bench_')
+        print('Generating library with {} items ...'.format(size))
+        start = time.time()
+        context = BenchmarkContext(root, size, storage_extension=storage_extension)
+        print('Library generated in {:.2f}s'.format(time.time() - start))
+        try:
+            for name, fn in _BENCHMARKS.items():
+                if names and name not in names:
+                    continue
+                stats = timeit(fn(context), repeat)
+                stats.update({'name': name, 'size': size})
+                results['results'].append(stats)
+                print('{:<40} {:>8} items  min {:>9.4f}s  median {:>9.4f}s'.format(
+                    name, size, stats['min'], stats['median']))
+        finally:
+            context.close()
+
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares the given results with baseline ones and returns the benchmarks that are slower than the threshold
+    Minimum timings are compared because they are the least affected by system noise
+    :param results: dict
+    :param baseline: dict
+    :param threshold: float, ratio between current and baseline timings considered a regression
+    :return: list(dict)
+    """
+
+    baseline_timings = dict(((r['name'], r['size']), r['min']) for r in baseline.get('results', list()))
+
+    regressions = list()
+    for result in results.get('results', list()):
+        base = baseline_timings.get((result['name'], result['size']))
+        if not base:
+            continue
+        ratio = result['min'] / base
+        if ratio > threshold:
+            regressions.append({'name': result['name'], 'size': result['size'], 'ratio': ratio})
+
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Runs tpQtLib library benchmarks on synthetic libraries')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Number of library items')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Number of times each benchmark runs')
+    parser.add_argument('--benchmark', action='append', dest='names', help='Name of a benchmark to run')
+    parser.add_argument('--storage', default='.json', choices=['.json', '.db'], help='Library data base extension')
+    parser.add_argument('--output', help='Path of the JSON file where results are written')
+    parser.add_argument('--compare', help='Path of baseline JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Regression ratio threshold')
+    parser.add_argument('--list', action='store_true', help='Lists available benchmarks')
+    args = parser.parse_args(args)
+
+    if args.list:
+        for name in _BENCHMARKS:
+            print(name)
+        return 0
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    tpQtLib.init()
+
+    results = run(args.sizes, repeat=args.repeat, names=args.names, storage_extension=args.storage)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, threshold=args.threshold)
+        for regression in regressions:
+            print('REGRESSION {name} ({size} items): {ratio:.2f}x slower'.format(**regression))
+        if regressions:
+            return 1
+
+    app.processEvents()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
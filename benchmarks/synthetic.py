@@ -0,0 +1,158 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains functions to generate synthetic libraries used by benchmarks
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import zlib
+import struct
+import random
+
+ITEM_EXTENSION = '.bench'
+ITEM_TYPES = ['anim', 'pose', 'mirror', 'selection', 'camera']
+ITEM_CATEGORIES = ['body', 'face', 'hands', 'props', 'cameras', 'crowd', 'fx']
+ITEM_WORDS = ['walk', 'run', 'idle', 'jump', 'attack', 'fall', 'turn', 'wave', 'sit', 'crouch', 'climb', 'push']
+
+
+def png_bytes(width, height, color):
+    """
+    Returns the bytes of a PNG image of the given size filled with a horizontal gradient of the given color
+    Written by hand so libraries can be generated without a Qt application
+    :param width: int
+    :param height: int
+    :param color: tuple(int, int, int)
+    :return: bytes
+    """
+
+    def _chunk(chunk_type, data):
+        chunk = chunk_type + data
+        return struct.pack('>I', len(data)) + chunk + struct.pack('>I', zlib.crc32(chunk) & 0xffffffff)
+
+    rows = list()
+    for _ in range(height):
+        row = bytearray([0])
+        for x in range(width):
+            shade = x * 255 // max(1, width - 1)
+            row.extend([(color[0] + shade) % 256, (color[1] + shade) % 256, color[2]])
+        rows.append(bytes(row))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _chunk(b'IHDR', header),
+        _chunk(b'IDAT', zlib.compress(b''.join(rows), 9)),
+        _chunk(b'IEND', b'')])
+
+
+def item_name(index, rng):
+    """
+    Returns a readable unique item name for the given index
+    :param index: int
+    :param rng: random.Random
+    :return: str
+    """
+
+    return '{}_{}_{:06d}{}'.format(rng.choice(ITEM_WORDS), rng.choice(ITEM_WORDS), index, ITEM_EXTENSION)
+
+
+def folder_paths(root, count, depth=3, folders_per_level=4):
+    """
+    Returns the nested folders where items are distributed
+    :param root: str
+    :param count: int, number of items, used to limit the number of folders created for small libraries
+    :param depth: int
+    :param folders_per_level: int
+    :return: list(str)
+    """
+
+    folders = [root]
+    level_folders = [root]
+    for level in range(depth):
+        next_folders = list()
+        for parent in level_folders:
+            for i in range(folders_per_level):
+                next_folders.append('{}/folder{}_{}'.format(parent, level, i))
+        if len(next_folders) > max(1, count // 10):
+            break
+        folders.extend(next_folders)
+        level_folders = next_folders
+
+    return folders
+
+
+def generate_data(root, count, depth=3, folders_per_level=4, seed=0):
+    """
+    Returns library data for a synthetic library without writing anything to disk
+    :param root: str
+    :param count: int
+    :param depth: int
+    :param folders_per_level: int
+    :param seed: int
+    :return: dict(str, dict)
+    """
+
+    rng = random.Random(seed)
+    root = root.replace('\\', '/')
+    folders = folder_paths(root, count, depth=depth, folders_per_level=folders_per_level)
+
+    data = dict()
+    for i in range(count):
+        folder = rng.choice(folders)
+        name = item_name(i, rng)
+        path = '{}/{}'.format(folder, name)
+        data[path] = {
+            'name': name,
+            'path': path,
+            'type': rng.choice(ITEM_TYPES),
+            'folder': folder,
+            'category': rng.choice(ITEM_CATEGORIES),
+            'ctime': 1500000000 + rng.randint(0, 10000000),
+            'user': 'user{}'.format(rng.randint(0, 20)),
+            'description': ' '.join(rng.choice(ITEM_WORDS) for _ in range(rng.randint(2, 8)))
+        }
+
+    return data
+
+
+def generate_library(root, count, depth=3, folders_per_level=4, thumbnails=True, sequence_every=20, frames=10,
+                     thumbnail_size=64, seed=0):
+    """
+    Writes a synthetic library to disk. Each item is a folder with the item extension that can contain a thumbnail
+    and an image sequence
+    :param root: str
+    :param count: int
+    :param depth: int
+    :param folders_per_level: int
+    :param thumbnails: bool, whether to write a thumbnail for each item or not
+    :param sequence_every: int, one out of every given number of items gets an image sequence, 0 to disable
+    :param frames: int, number of frames of each image sequence
+    :param thumbnail_size: int
+    :param seed: int
+    :return: dict(str, dict), library data of the generated items
+    """
+
+    data = generate_data(root, count, depth=depth, folders_per_level=folders_per_level, seed=seed)
+    rng = random.Random(seed)
+    thumbnail = png_bytes(thumbnail_size, thumbnail_size, (rng.randint(0, 255), rng.randint(0, 255), 128))
+    frame_images = [png_bytes(thumbnail_size, thumbnail_size, (i * 20, 80, 160)) for i in range(frames)]
+
+    for i, path in enumerate(sorted(data)):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        if thumbnails:
+            with open(os.path.join(path, 'thumbnail.png'), 'wb') as f:
+                f.write(thumbnail)
+        if sequence_every and i % sequence_every == 0:
+            sequence_path = os.path.join(path, 'sequence')
+            if not os.path.isdir(sequence_path):
+                os.makedirs(sequence_path)
+            for frame, image in enumerate(frame_images):
+                with open(os.path.join(sequence_path, 'frame.{:04d}.png'.format(frame + 1)), 'wb') as f:
+                    f.write(image)
+
+    return data
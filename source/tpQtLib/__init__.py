@@ -10,9 +10,10 @@ from __future__ import print_function, division, absolute_import
 import os
 import sys
 import inspect
+from collections import OrderedDict
 
 from tpPyUtils import importer
-from tpQtLib.core import resource as resource_utils
+from tpQtLib.core import resource as resource_utils, lazyimport
 from tpQtLib.resources import res
 
 main = __import__('__main__')
@@ -22,6 +23,20 @@ main = __import__('__main__')
 logger = None
 resource = None
 
+# Packages imported by init and modules that define the classes they register
+_PACKAGES = ['tpQtLib.core', 'tpQtLib.widgets']
+_SKIP_MODULES = ['tpQtLib.externals']
+_REGISTERED_CLASSES = {
+    'Window': 'tpQtLib.core.window',
+    'Dialog': 'tpQtLib.core.dialog',
+    'OpenFileDialog': 'tpQtLib.core.dialog',
+    'SaveFileDialog': 'tpQtLib.core.dialog',
+    'SelectFolderDialog': 'tpQtLib.core.dialog',
+    'NativeDialog': 'tpQtLib.core.dialog'
+}
+
+_init_times = OrderedDict()
+
 # =================================================================================
 
 
@@ -73,12 +88,17 @@ class tpQtLib(importer.Importer, object):
         return os.path.join(self.get_module_path(), 'externals')
 
 
-def init(do_reload=False):
+def init(do_reload=False, lazy=False):
     """
     Initializes module
     :param do_reload: bool, Whether to reload modules or not
+    :param lazy: bool, Whether tpQtLib.core and tpQtLib.widgets modules are imported the first time they are
+        accessed instead of importing all of them now. Requires Python 3.5 or newer, otherwise modules are imported
     """
 
+    _init_times.clear()
+    start = lazyimport.clock()
+
     tpqtlib_importer = importer.init_importer(importer_class=tpQtLib, do_reload=False)
     tpqtlib_importer.update_paths()
 
@@ -86,13 +106,67 @@ def init(do_reload=False):
     global resource
     logger = tpqtlib_importer.logger
     resource = tpQtLibResource
-
-    tpqtlib_importer.import_modules(skip_modules=['tpQtLib.externals'])
-    tpqtlib_importer.import_packages(only_packages=True, skip_modules=['tpQtLib.externals'], order=['tpQtLib.core', 'tpQtLib.widgets'])
+    _init_times['importer'] = lazyimport.clock() - start
+
+    if lazy and not init_lazy():
+        logger.warning('Lazy initialization is not supported by this Python version, importing all modules!')
+        lazy = False
+    if not lazy:
+        start = lazyimport.clock()
+        tpqtlib_importer.import_modules(skip_modules=_SKIP_MODULES)
+        _init_times['modules'] = lazyimport.clock() - start
+        start = lazyimport.clock()
+        tpqtlib_importer.import_packages(only_packages=True, skip_modules=_SKIP_MODULES, order=_PACKAGES)
+        _init_times['packages'] = lazyimport.clock() - start
     if do_reload:
         tpqtlib_importer.reload_all()
 
+    start = lazyimport.clock()
     init_dcc(do_reload=do_reload)
+    _init_times['dcc'] = lazyimport.clock() - start
+
+
+def init_lazy():
+    """
+    Makes tpQtLib, tpQtLib.core and tpQtLib.widgets import their modules the first time they are accessed
+    Classes registered by modules, such as tpQtLib.Window, are also resolved the first time they are accessed
+    :return: bool, whether lazy import is supported or not
+    """
+
+    if not lazyimport.install(__name__, skip_modules=_SKIP_MODULES, attributes=_REGISTERED_CLASSES):
+        return False
+    for package_name in _PACKAGES:
+        lazyimport.install(package_name, skip_modules=_SKIP_MODULES)
+
+    return True
+
+
+def init_times():
+    """
+    Returns the time, in seconds, taken by each step of the last init call
+    :return: OrderedDict(str, float)
+    """
+
+    return OrderedDict(_init_times)
+
+
+def import_report(limit=None, as_text=False):
+    """
+    Imports all tpQtLib.core and tpQtLib.widgets modules and returns the time taken to import each one
+    Modules already imported take no time, so it should be called after a lazy init to know what the eager
+    initialization costs
+    >>> tpQtLib.init(lazy=True)
+    >>> print(tpQtLib.import_report(limit=20, as_text=True))
+    :param limit: int or None, maximum number of modules shown if as_text is True
+    :param as_text: bool, whether to return the report as text, from the slowest module to the fastest one
+    :return: list(dict) or str
+    """
+
+    report = lazyimport.import_report(_PACKAGES, skip_modules=_SKIP_MODULES)
+    if as_text:
+        return lazyimport.format_import_report(report, limit=limit)
+
+    return report
 
 
 def init_dcc(do_reload=False):
@@ -133,5 +207,9 @@ def register_class(cls_name, cls, is_unique=False):
         if cls_name in sys.modules[__name__].__dict__:
             setattr(sys.modules[__name__], cls_name, getattr(sys.modules[__name__], cls_name))
     else:
+        # Modules imported lazily do not replace classes already registered, such as DCC specific ones, because
+        # they would have been registered before them when initializing eagerly
+        if lazyimport.is_importing() and cls_name in sys.modules[__name__].__dict__:
+            return
         # print('>>> Registering class {} with value {}'.format(cls_name, cls))
         sys.modules[__name__].__dict__[cls_name] = cls
@@ -18,7 +18,7 @@ from Qt.QtGui import *
 
 import tpQtLib
 import tpDccLib as tp
-from tpQtLib.core import qtutils, color, animation, theme, dragger
+from tpQtLib.core import qtutils, animation, theme, dragger, resource
 from tpQtLib.widgets import splitters
 
 
@@ -247,7 +247,8 @@ class Dialog(QDialog, object):
         """
 
         self._theme = theme
-        self._theme.updated.connect(self.reload_stylesheet)
+        self._theme.updated.connect(self._on_theme_updated)
+        resource.ResourceCache.clear()
         self.reload_stylesheet()
 
     def set_theme_settings(self, settings):
@@ -270,36 +271,18 @@ class Dialog(QDialog, object):
         options = current_theme.options()
         stylesheet = current_theme.stylesheet()
 
-        all_widgets = self.main_layout.findChildren(QObject)
+        self.setStyleSheet(stylesheet)
 
-        text_color = color.Color.from_string(options["ITEM_TEXT_COLOR"])
-        text_selected_color = color.Color.from_string(options["ITEM_TEXT_SELECTED_COLOR"])
-        background_color = color.Color.from_string(options["ITEM_BACKGROUND_COLOR"])
-        background_hover_color = color.Color.from_string(options["ITEM_BACKGROUND_HOVER_COLOR"])
-        background_selected_color = color.Color.from_string(options["ITEM_BACKGROUND_SELECTED_COLOR"])
+        theme.subscribers().publish(options, root=self)
 
-        self.setStyleSheet(stylesheet)
+    def _on_theme_updated(self):
+        """
+        Internal callback function that is called when the colors of the current theme change
+        Cached icons and pixmaps are released, because they may have been colored with the previous theme colors
+        """
 
-        for w in all_widgets:
-            found = False
-            if hasattr(w, 'set_text_color'):
-                w.set_text_color(text_color)
-                found = True
-            if hasattr(w, 'set_text_selected_color'):
-                w.set_text_selected_color(text_selected_color)
-                found = True
-            if hasattr(w, 'set_background_color'):
-                w.set_background_color(background_color)
-                found = True
-            if hasattr(w, 'set_background_hover_color'):
-                w.set_background_hover_color(background_hover_color)
-                found = True
-            if hasattr(w, 'set_background_selected_color'):
-                w.set_background_selected_color(background_selected_color)
-                found = True
-
-            if found:
-                w.update()
+        resource.ResourceCache.clear()
+        self.reload_stylesheet()
     
     def setup_signals(self):
         pass
@@ -0,0 +1,476 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains effects applied to images, such as colorizing, tinting or converting them to grayscale
+Effects are applied to the pixels of each image through a NumPy array that shares its memory, so images are
+modified in place without copying them. If NumPy is not available, effects are applied with QPainter
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+
+from Qt.QtCore import *
+from Qt.QtGui import *
+
+from tpPyUtils.externals import six
+
+from tpQtLib.core import color as color_utils
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Position of each channel in the bytes of 32 bit images, which store pixels as native endian 0xAARRGGBB integers
+if sys.byteorder == 'little':
+    _B, _G, _R, _A = 0, 1, 2, 3
+else:
+    _A, _R, _G, _B = 0, 1, 2, 3
+
+IMAGE_FORMAT = QImage.Format_ARGB32_Premultiplied
+
+_numpy_enabled = [True]
+
+
+def is_numpy_enabled():
+    """
+    Returns whether effects are applied with NumPy or not
+    :return: bool
+    """
+
+    return numpy is not None and _numpy_enabled[0]
+
+
+def set_numpy_enabled(flag):
+    """
+    Sets whether effects are applied with NumPy, if available, or with QPainter
+    :param flag: bool
+    """
+
+    _numpy_enabled[0] = bool(flag)
+
+
+def to_image(source):
+    """
+    Returns the given pixmap or image as an image in the format effects work with
+    Images that already have that format are returned as they are, so effects modify them in place
+    :param source: QPixmap or QImage
+    :return: QImage
+    """
+
+    image = source.toImage() if isinstance(source, QPixmap) else source
+    if image.format() != IMAGE_FORMAT:
+        image = image.convertToFormat(IMAGE_FORMAT)
+
+    return image
+
+
+def image_array(image):
+    """
+    Returns a NumPy array that shares the memory of the given image, with (height, width, channel) shape
+    Channels are stored in native endian order, use channel_indices function to know their position
+    :param image: QImage, image in the format returned by to_image function
+    :return: numpy.ndarray or None, None if NumPy is not available or image memory cannot be written
+    """
+
+    if numpy is None or image.isNull():
+        return None
+
+    bits = image.bits()
+    if bits is None:
+        return None
+    if hasattr(bits, 'setsize'):
+        bits.setsize(image.bytesPerLine() * image.height())
+
+    array = numpy.ndarray(
+        (image.height(), image.width(), 4), dtype=numpy.uint8, buffer=bits, strides=(image.bytesPerLine(), 4, 1))
+    if not array.flags.writeable:
+        return None
+
+    return array
+
+
+def channel_indices():
+    """
+    Returns the position of the red, green, blue and alpha channels in the arrays returned by image_array
+    :return: tuple(int, int, int, int)
+    """
+
+    return _R, _G, _B, _A
+
+
+def colorize_images(images, colors):
+    """
+    Colorizes the given images with the given colors based on their alpha channel
+    :param images: list(QImage or QPixmap)
+    :param colors: list(QColor or str or tuple or None), color of each image. Images without color are not modified
+    :return: list(QImage), colorized images. Images in the format returned by to_image are modified in place
+    """
+
+    images = [to_image(image) for image in images]
+    values = dict((i, _to_color(clr)) for i, clr in enumerate(colors[:len(images)]) if clr is not None)
+
+    remaining = sorted(values)
+    if is_numpy_enabled():
+        arrays, remaining = _image_arrays(images, remaining)
+        for i, array in arrays:
+            _colorize_array(array, numpy.array(_premultiplied(values[i]), dtype=numpy.float32))
+
+    for i in remaining:
+        _colorize_painter(images[i], values[i])
+
+    return images
+
+
+def colorize_image(image, color):
+    """
+    Colorizes the given image with the given color based on its alpha channel
+    :param image: QImage or QPixmap
+    :param color: QColor or str or tuple
+    :return: QImage
+    """
+
+    return colorize_images([image], [color])[0]
+
+
+def tint_images(images, tint_color=(255, 255, 255, 100), composition_mode=QPainter.CompositionMode_Plus):
+    """
+    Composites the given color over the shape of the given images
+    NumPy is only used with the plus composition mode, other modes are applied with QPainter
+    :param images: list(QImage or QPixmap)
+    :param tint_color: QColor or str or tuple
+    :param composition_mode: QPainter.CompositionMode
+    :return: list(QImage), tinted images. Images in the format returned by to_image are modified in place
+    """
+
+    images = [to_image(image) for image in images]
+    tint_color = _to_color(tint_color)
+
+    remaining = range(len(images))
+    if is_numpy_enabled() and composition_mode == QPainter.CompositionMode_Plus:
+        arrays, remaining = _image_arrays(images, remaining)
+        value = numpy.array(_premultiplied(tint_color), dtype=numpy.float32)
+        for _, array in arrays:
+            _tint_array(array, value)
+
+    for i in remaining:
+        _tint_painter(images[i], tint_color, composition_mode)
+
+    return images
+
+
+def tint_image(image, tint_color=(255, 255, 255, 100), composition_mode=QPainter.CompositionMode_Plus):
+    """
+    Composites the given color over the shape of the given image
+    :param image: QImage or QPixmap
+    :param tint_color: QColor or str or tuple
+    :param composition_mode: QPainter.CompositionMode
+    :return: QImage
+    """
+
+    return tint_images([image], tint_color=tint_color, composition_mode=composition_mode)[0]
+
+
+def grayscale_images(images):
+    """
+    Converts the given images into grayscale keeping their alpha channel
+    :param images: list(QImage or QPixmap)
+    :return: list(QImage), grayscale images. Images in the format returned by to_image are modified in place
+    """
+
+    images = [to_image(image) for image in images]
+
+    remaining = range(len(images))
+    if is_numpy_enabled():
+        arrays, remaining = _image_arrays(images, remaining)
+        for _, array in arrays:
+            _grayscale_array(array)
+
+    for i in remaining:
+        images[i] = _grayscale_painter(images[i])
+
+    return images
+
+
+def grayscale_image(image):
+    """
+    Converts the given image into grayscale keeping its alpha channel
+    :param image: QImage or QPixmap
+    :return: QImage
+    """
+
+    return grayscale_images([image])[0]
+
+
+def overlay_images(images, over_images, colors=None, align=Qt.AlignCenter):
+    """
+    Draws each one of the given over images on top of the image with the same index
+    :param images: list(QImage or QPixmap)
+    :param over_images: list(QImage or QPixmap)
+    :param colors: list(QColor or str or tuple or None) or None, color used to colorize each over image
+    :param align: Qt.AlignmentFlag or None, over images are centered with Qt.AlignCenter or drawn at the top left
+    :return: list(QImage), images with the over images drawn. Images in the format returned by to_image are
+        modified in place
+    """
+
+    images = [to_image(image) for image in images]
+    over_images = [to_image(image) for image in over_images]
+    if colors:
+        # Over images are copied, so colorizing them does not modify the given ones
+        over_images = colorize_images([QImage(image) for image in over_images], colors)
+
+    use_numpy = is_numpy_enabled()
+    for image, over_image in zip(images, over_images):
+        x, y = _overlay_offset(image, over_image, align)
+        if use_numpy:
+            array = image_array(image)
+            over_array = image_array(over_image)
+            if array is not None and over_array is not None:
+                _overlay_array(array, over_array, x, y)
+                continue
+        _overlay_painter(image, over_image, x, y)
+
+    return images
+
+
+def overlay_image(image, over_image, color=None, align=Qt.AlignCenter):
+    """
+    Draws the given over image on top of the given image
+    :param image: QImage or QPixmap
+    :param over_image: QImage or QPixmap
+    :param color: QColor or str or tuple or None, color used to colorize the over image
+    :param align: Qt.AlignmentFlag or None
+    :return: QImage
+    """
+
+    return overlay_images([image], [over_image], colors=[color], align=align)[0]
+
+
+def layer_images(images, colors=None):
+    """
+    Colorizes the given layer images and draws all of them, centered, on top of the first one
+    :param images: list(QImage or QPixmap), layers from the bottom to the top
+    :param colors: list(QColor or str or tuple or None) or None, color of each layer
+    :return: QImage
+    """
+
+    images = [to_image(image) for image in images]
+    if colors:
+        images = colorize_images(images, colors)
+
+    base = images[0]
+    for over_image in images[1:]:
+        base = overlay_images([base], [over_image])[0]
+
+    return base
+
+
+"""
+##########################################################################################
+INTERNAL
+##########################################################################################
+"""
+
+
+def _to_color(value):
+    """
+    Internal function that returns the given color value as a QColor
+    :param value: QColor or str or tuple
+    :return: QColor
+    """
+
+    if isinstance(value, QColor):
+        return value
+    if isinstance(value, six.string_types):
+        return color_utils.Color.from_string(value)
+
+    return QColor(*value)
+
+
+def _premultiplied(clr):
+    """
+    Internal function that returns the channel values of the given color premultiplied by its alpha,
+    in the order of the arrays returned by image_array
+    :param clr: QColor
+    :return: list(float)
+    """
+
+    alpha = clr.alpha()
+    value = [0.0] * 4
+    value[_R] = clr.red() * alpha / 255.0
+    value[_G] = clr.green() * alpha / 255.0
+    value[_B] = clr.blue() * alpha / 255.0
+    value[_A] = float(alpha)
+
+    return value
+
+
+def _image_arrays(images, indices):
+    """
+    Internal function that returns the arrays that view the memory of the given images, so they are modified in place
+    without copying them. Null images are skipped
+    :param images: list(QImage)
+    :param indices: list(int), indices of the images to return
+    :return: tuple(list(tuple(int, numpy.ndarray)), list(int)), indices of the images with their arrays and
+        indices of the images whose memory cannot be accessed with NumPy
+    """
+
+    arrays = list()
+    remaining = list()
+    for i in indices:
+        image = images[i]
+        if image.isNull():
+            continue
+        array = image_array(image)
+        if array is None:
+            remaining.append(i)
+            continue
+        arrays.append((i, array))
+
+    return arrays, remaining
+
+
+def _colorize_array(array, clr):
+    """
+    Internal function that replaces the color of the pixels of the given image keeping their alpha channel
+    Equivalent to filling the image with the source in composition mode
+    :param array: numpy.ndarray, array returned by image_array
+    :param clr: numpy.ndarray, premultiplied color with (channel) shape
+    """
+
+    alpha = array[..., _A:_A + 1].astype(numpy.float32) / 255.0
+    data = alpha * clr
+    data += 0.5
+    array[...] = data
+
+
+def _tint_array(array, tint_color):
+    """
+    Internal function that adds the given color to the pixels of the given image based on their alpha channel
+    Equivalent to drawing the color, with the shape of the image, with the plus composition mode
+    :param array: numpy.ndarray, array returned by image_array
+    :param tint_color: numpy.ndarray, premultiplied color with (channel) shape
+    """
+
+    alpha = array[..., _A:_A + 1].astype(numpy.float32) / 255.0
+    data = (alpha * tint_color + 0.5).astype(numpy.uint16)
+    data += array
+    numpy.minimum(data, 255, out=data)
+    array[...] = data
+
+
+def _grayscale_array(array):
+    """
+    Internal function that converts the pixels of the given image into grayscale keeping their alpha channel
+    Uses the same weights as qGray. Premultiplied values stay premultiplied, because the conversion is linear
+    :param array: numpy.ndarray, array returned by image_array
+    """
+
+    gray = array[..., _R].astype(numpy.uint16) * 11
+    gray += array[..., _G].astype(numpy.uint16) * 16
+    gray += array[..., _B].astype(numpy.uint16) * 5
+    gray //= 32
+    array[..., _R] = gray
+    array[..., _G] = gray
+    array[..., _B] = gray
+
+
+def _overlay_offset(image, over_image, align):
+    """
+    Internal function that returns the position where the given over image is drawn
+    :param image: QImage
+    :param over_image: QImage
+    :param align: Qt.AlignmentFlag or None
+    :return: tuple(int, int)
+    """
+
+    if align == Qt.AlignCenter:
+        return int((image.width() - over_image.width()) / 2), int((image.height() - over_image.height()) / 2)
+
+    return 0, 0
+
+
+def _overlay_array(array, over_array, x, y):
+    """
+    Internal function that draws the given over array on top of the given array with the source over composition
+    Parts of the over array outside the array are clipped
+    :param array: numpy.ndarray
+    :param over_array: numpy.ndarray
+    :param x: int
+    :param y: int
+    """
+
+    height, width = array.shape[:2]
+    over_height, over_width = over_array.shape[:2]
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + over_width, width), min(y + over_height, height)
+    if left >= right or top >= bottom:
+        return
+
+    target = array[top:bottom, left:right]
+    source = over_array[top - y:bottom - y, left - x:right - x]
+    inverse_alpha = 1.0 - source[..., _A:_A + 1].astype(numpy.float32) / 255.0
+    data = source + target * inverse_alpha + 0.5
+    target[...] = numpy.minimum(data, 255).astype(numpy.uint8)
+
+
+def _colorize_painter(image, clr):
+    """
+    Internal function that colorizes the given image with QPainter
+    :param image: QImage
+    :param clr: QColor
+    """
+
+    painter = QPainter(image)
+    painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
+    painter.fillRect(image.rect(), clr)
+    painter.end()
+
+
+def _tint_painter(image, tint_color, composition_mode):
+    """
+    Internal function that tints the given image with QPainter
+    :param image: QImage
+    :param tint_color: QColor
+    :param composition_mode: QPainter.CompositionMode
+    """
+
+    over_image = QImage(image)
+    _colorize_painter(over_image, tint_color)
+    painter = QPainter(image)
+    painter.setCompositionMode(composition_mode)
+    painter.drawImage(0, 0, over_image)
+    painter.end()
+
+
+def _grayscale_painter(image):
+    """
+    Internal function that returns a grayscale copy of the given image using Qt image conversions
+    :param image: QImage
+    :return: QImage
+    """
+
+    image = image.convertToFormat(QImage.Format_ARGB32)
+    alpha = image.alphaChannel()
+    gray = image.convertToFormat(QImage.Format_Grayscale8)
+    image = gray.convertToFormat(QImage.Format_ARGB32)
+    image.setAlphaChannel(alpha)
+
+    return image.convertToFormat(IMAGE_FORMAT)
+
+
+def _overlay_painter(image, over_image, x, y):
+    """
+    Internal function that draws the given over image on top of the given image with QPainter
+    :param image: QImage
+    :param over_image: QImage
+    :param x: int
+    :param y: int
+    """
+
+    painter = QPainter(image)
+    painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+    painter.drawImage(x, y, over_image)
+    painter.end()
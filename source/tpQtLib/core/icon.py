@@ -12,7 +12,7 @@ import copy
 from Qt.QtCore import *
 from Qt.QtGui import *
 
-from tpQtLib.core import color, qtutils, pixmap as px
+from tpQtLib.core import color, qtutils, effects, pixmap as px
 
 
 class Icon(QIcon, object):
@@ -282,28 +282,25 @@ def colorize_layered_icon(icons, size, colors=None, icon_scaling=None, tint_colo
         icon_scaling = icon_scaling or list()
         icon_scaling += [default_size] * (len(icons) - len(icon_scaling))
 
-    icon_largest = icons.pop(0)
+    # Layers are rendered directly at the final size, unless that requires upscaling the largest icon
+    orig_size = icons[0].availableSizes()[0]
+    target_size = orig_size.scaled(QSize(size, size), Qt.KeepAspectRatio)
+    if target_size.width() <= orig_size.width() and target_size.height() <= orig_size.height():
+        orig_size = target_size
 
-    orig_size = icon_largest.availableSizes()[0]
-    col = colors.pop(0)
-    scale = icon_scaling.pop(0)
-    if col is not None:
-        pixmap = px.colorize_pixmap(icon_largest.pixmap(orig_size * scale), col)
-    else:
-        pixmap = icon_largest.pixmap(orig_size * scale)
-
-    for i in range(len(icons)):
-        overlay_pixmap = icons[i].pixmap(orig_size * icon_scaling[i])
-        px.overlay_pixmap(pixmap, overlay_pixmap, colors[i])
+    layers = [icons[i].pixmap(orig_size * icon_scaling[i]) for i in range(len(icons))]
+    image = effects.layer_images(layers, colors=colors[:len(icons)])
 
     if tint_color is not None:
-        px.tint_pixmap(pixmap, tint_color, composition_mode=tint_composition)
+        image = effects.tint_image(image, tint_color, composition_mode=tint_composition)
 
-    pixmap = pixmap.scaled(QSize(size, size), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if image.width() != target_size.width() or image.height() != target_size.height():
+        image = image.scaled(QSize(size, size), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    pixmap = QPixmap.fromImage(image)
 
     icon = Icon(pixmap)
     if grayscale:
-        pixmap = px.grayscale_pixmap(pixmap)
+        pixmap = QPixmap.fromImage(effects.grayscale_image(image))
         icon = Icon(pixmap)
         icon.addPixmap(icon.pixmap(size, QIcon.Disabled))   # TODO: Use tint instead
 
@@ -9,7 +9,10 @@ from __future__ import print_function, division, absolute_import
 
 import os
 import re
+import mmap
+import struct
 import base64
+from collections import OrderedDict
 
 from Qt.QtCore import *
 from Qt.QtGui import *
@@ -53,9 +56,210 @@ class ImageWorker(QRunnable, object):
             tpQtLib.logger.error('Cannot load thumbnail image!')
 
 
+class ImageSequencePack(object):
+    """
+    Single file that stores all the frames of an image sequence
+    Frames are stored with their original encoding after a small index, so opening the sequence is one file open
+    and reading a frame is a slice of the memory mapped file
+    Layout: magic, frame count, and for each frame its offset, size and name, followed by the frames data
+    """
+
+    MAGIC = b'TPQTSEQ1'
+    EXTENSION = '.tpseq'
+
+    _HEADER = struct.Struct('<8sI')
+    _ENTRY = struct.Struct('<QIH')
+
+    def __init__(self, path):
+        super(ImageSequencePack, self).__init__()
+
+        self._path = path
+        self._file = None
+        self._map = None
+        self._entries = list()
+
+        self._open()
+
+    @classmethod
+    def is_pack(cls, path):
+        """
+        Returns whether the given path is an image sequence pack file or not
+        :param path: str
+        :return: bool
+        """
+
+        return bool(path) and path.lower().endswith(cls.EXTENSION) and os.path.isfile(path)
+
+    @classmethod
+    def write(cls, path, frame_paths):
+        """
+        Writes the given frame files into a pack file
+        :param path: str, pack file path
+        :param frame_paths: list(str), frame files in playback order
+        :return: str, pack file path
+        """
+
+        names = [os.path.basename(frame_path).encode('utf-8') for frame_path in frame_paths]
+        sizes = [os.path.getsize(frame_path) for frame_path in frame_paths]
+
+        offset = cls._HEADER.size + sum(cls._ENTRY.size + len(name) for name in names)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(cls._HEADER.pack(cls.MAGIC, len(frame_paths)))
+            for name, size in zip(names, sizes):
+                f.write(cls._ENTRY.pack(offset, size, len(name)))
+                f.write(name)
+                offset += size
+            for frame_path in frame_paths:
+                with open(frame_path, 'rb') as frame_file:
+                    f.write(frame_file.read())
+
+        # Pack is written in a temporary file, so readers never map a partially written pack
+        if os.path.isfile(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+
+        return path
+
+    @classmethod
+    def write_from_dirname(cls, dirname, name='sequence'):
+        """
+        Writes a pack file with the image files of the given folder, sorted in natural order
+        :param dirname: str
+        :param name: str, name of the pack file without extension
+        :return: str or None, pack file path or None if the folder does not contain images
+        """
+
+        frame_paths = sequence_frame_paths(dirname)
+        if not frame_paths:
+            return None
+
+        return cls.write(os.path.join(dirname, name + cls.EXTENSION), frame_paths)
+
+    def path(self):
+        """
+        Returns the path of the pack file
+        :return: str
+        """
+
+        return self._path
+
+    def frame_count(self):
+        """
+        Returns the number of frames stored in the pack
+        :return: int
+        """
+
+        return len(self._entries)
+
+    def frame_names(self):
+        """
+        Returns the file names of the frames stored in the pack
+        :return: list(str)
+        """
+
+        return [entry[2] for entry in self._entries]
+
+    def frame_data(self, frame):
+        """
+        Returns the encoded data of the given frame
+        :param frame: int
+        :return: bytes
+        """
+
+        offset, size, _ = self._entries[frame]
+
+        return self._map[offset:offset + size]
+
+    def close(self):
+        """
+        Closes the pack file
+        """
+
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        """
+        Internal function that maps the pack file and reads its frame index
+        """
+
+        self._file = open(self._path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = self._HEADER.unpack_from(self._map, 0)
+            if magic != self.MAGIC:
+                raise ValueError('File is not an image sequence pack: {}'.format(self._path))
+            position = self._HEADER.size
+            for _ in range(count):
+                offset, size, name_size = self._ENTRY.unpack_from(self._map, position)
+                position += self._ENTRY.size
+                name = self._map[position:position + name_size].decode('utf-8')
+                position += name_size
+                self._entries.append((offset, size, name))
+        except Exception:
+            self.close()
+            raise
+
+
+class ImageSequenceFrameWorker(QRunnable, object):
+    """
+    Class that decodes an image sequence frame at a given size in a thread
+    """
+
+    class ImageSequenceFrameWorkerSignals(QObject, object):
+        triggered = Signal(object, int, object)
+
+    def __init__(self, path, frame, size=None, generation=None, data=None):
+        super(ImageSequenceFrameWorker, self).__init__()
+
+        self._path = path
+        self._data = data
+        self._frame = frame
+        self._size = size
+        self._generation = generation
+        self.signals = ImageSequenceFrameWorker.ImageSequenceFrameWorkerSignals()
+
+    def run(self):
+        """
+        Overrides base QRunnable run function
+        This is the starting point for the thread
+        """
+
+        image = None
+        try:
+            if self._data is not None:
+                image = read_image_data(self._data, self._size)
+            else:
+                image = read_image(self._path, self._size)
+        except Exception as exc:
+            tpQtLib.logger.error('Cannot decode image sequence frame "{}": {}'.format(self._path, exc))
+        self.signals.triggered.emit(self._generation, self._frame, image)
+
+
 class ImageSequence(QObject, object):
+    """
+    Plays the images of a folder, or of an image sequence pack, as an animation
+    If the folder contains a pack file named PACK_NAME, frames are read from it instead of from individual files
+    Pack file is closed when the sequence is stopped, so it is not locked, and it is opened again when started
+    Frames are decoded at the frame size in a thread pool ahead of the current frame and are kept in a cache of
+    up to CACHE_SIZE frames and CACHE_MAX_BYTES bytes, so playing does not read images from disk in the main thread.
+    If a frame is not decoded in time, playback keeps advancing and the previous frame is displayed until a decoded
+    frame is available
+    """
 
     DEFAULT_FPS = 24
+    CACHE_SIZE = 48
+    CACHE_MAX_BYTES = 32 * 1024 * 1024
+    MAX_PENDING_FRAMES = 4
+
+    PACK_NAME = 'sequence' + ImageSequencePack.EXTENSION
+
+    ThreadPool = QThreadPool()
 
     frameChanged = Signal(int)
 
@@ -67,7 +271,16 @@ class ImageSequence(QObject, object):
         self._frame = 0
         self._frames = list()
         self._dirname = None
+        self._pack = None
+        self._pack_path = None
         self._paused = False
+        self._frame_size = None
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._pending = dict()
+        self._generation = 0
+        self._current_pixmap = None
+        self._dropped_frames = 0
 
         if path:
             self.set_dirname(path)
@@ -80,6 +293,9 @@ class ImageSequence(QObject, object):
 
         self._frame = 0
         self._frames = [path]
+        self._close_pack()
+        self._pack_path = None
+        self.clear_cache()
 
     def dirname(self):
         """
@@ -92,23 +308,103 @@ class ImageSequence(QObject, object):
     def set_dirname(self, dirname):
         """
         Set the location where image sequence files are located
-        :param dirname: str
+        :param dirname: str, folder with the frame files or image sequence pack file
         """
 
-        def natural_sort_items(items):
-            """
-            Sort the given list in the expected way
-            :param items: list(str)
-            """
+        self._dirname = dirname
+        self._close_pack()
+        self._pack_path = None
 
-            convert = lambda text: int(text) if text.isdigit() else text
-            alphanum_key = lambda key: [convert(c) for c in re.split('([0-9]+)', key)]
-            items.sort(key=alphanum_key)
+        pack_path = dirname if ImageSequencePack.is_pack(dirname) else os.path.join(dirname, self.PACK_NAME)
+        if os.path.isfile(pack_path):
+            self._pack_path = pack_path
+            if self._open_pack():
+                folder = os.path.dirname(pack_path)
+                self._frames = [folder + '/' + name for name in self._pack.frame_names()]
+            else:
+                self._pack_path = None
+        if self._pack is None and os.path.isdir(dirname):
+            self._frames = sequence_frame_paths(dirname)
+        self.clear_cache()
 
-        self._dirname = dirname
-        if os.path.isdir(dirname):
-            self._frames = [dirname + '/' + filename for filename in os.listdir(dirname)]
-            natural_sort_items(self._frames)
+    def pack(self):
+        """
+        Returns the pack frames are read from
+        :return: ImageSequencePack or None, None if frames are not read from a pack or if it is closed
+        """
+
+        return self._pack
+
+    def frame_size(self):
+        """
+        Returns the size frames are decoded at
+        :return: QSize or None
+        """
+
+        return self._frame_size
+
+    def set_frame_size(self, size):
+        """
+        Sets the size frames are decoded at, which should be the size they are displayed at
+        If None, frames are decoded at their original size
+        :param size: QSize or None
+        """
+
+        size = QSize(size) if size is not None else None
+        if size == self._frame_size:
+            return
+
+        self._frame_size = size
+        self.clear_cache()
+
+    def clear_cache(self):
+        """
+        Removes all the decoded frames. Frames being decoded are ignored when they finish
+        """
+
+        self._generation += 1
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._pending = dict()
+        self._current_pixmap = None
+
+    def cache_bytes(self):
+        """
+        Returns the number of bytes used by the decoded frames
+        :return: int
+        """
+
+        return self._cache_bytes
+
+    def cache_capacity(self):
+        """
+        Returns the number of decoded frames that fit in the cache. Until a frame is decoded, its size is unknown,
+        so CACHE_SIZE is returned
+        :return: int
+        """
+
+        if not self._cache:
+            return self.CACHE_SIZE
+
+        frame_bytes = max(1, self._cache_bytes // len(self._cache))
+
+        return max(1, min(self.CACHE_SIZE, self.CACHE_MAX_BYTES // frame_bytes))
+
+    def cached_frames(self):
+        """
+        Returns the frame numbers that are decoded
+        :return: list(int)
+        """
+
+        return list(self._cache.keys())
+
+    def dropped_frames(self):
+        """
+        Returns the number of frames that were skipped during playback because they were not decoded in time
+        :return: int
+        """
+
+        return self._dropped_frames
 
     def start(self):
         """
@@ -116,6 +412,8 @@ class ImageSequence(QObject, object):
         """
 
         self.reset()
+        self._open_pack()
+        self.prefetch()
         if self._timer:
             self._timer.start(1000.0 / self._fps)
 
@@ -138,10 +436,12 @@ class ImageSequence(QObject, object):
 
     def stop(self):
         """
-        Stop the image sequence
+        Stop the image sequence and closes its pack file
         """
 
-        self._timer.stop()
+        if self._timer:
+            self._timer.stop()
+        self._close_pack()
 
     def reset(self):
         """
@@ -211,15 +511,26 @@ class ImageSequence(QObject, object):
         :return: QIcon
         """
 
-        return QIcon(self.current_filename())
+        pixmap = self.current_pixmap()
+        if pixmap is None:
+            return QIcon()
+
+        return QIcon(pixmap)
 
     def current_pixmap(self):
         """
         Returns the current frame as QPixmap
-        :return: QPixmap
+        If the current frame is not decoded yet, the last displayed frame is returned
+        :return: QPixmap or None, None if no frame has been decoded yet
         """
 
-        return QPixmap(self.current_filename())
+        pixmap = self._cache.get(self._frame)
+        if pixmap is not None:
+            self._current_pixmap = pixmap
+        else:
+            self.prefetch()
+
+        return self._current_pixmap
 
     def jump_to_frame(self, frame):
         """
@@ -230,22 +541,191 @@ class ImageSequence(QObject, object):
         if frame >= self.frame_count():
             frame = 0
         self._frame = frame
+        self._open_pack()
+        self.prefetch()
         self.frameChanged.emit(frame)
 
+    def prefetch(self):
+        """
+        Starts decoding the frames that follow the current one and are not decoded yet
+        If frames are read from a pack that is closed, no frames are decoded until the sequence is started again
+        """
+
+        count = self.frame_count()
+        if not count or (self._pack_path and self._pack is None):
+            return
+
+        for offset in range(min(count, self.cache_capacity())):
+            if len(self._pending) >= self.MAX_PENDING_FRAMES:
+                break
+            frame = (self._frame + offset) % count
+            if frame in self._cache or frame in self._pending:
+                continue
+            data = self._pack.frame_data(frame) if self._pack is not None else None
+            worker = ImageSequenceFrameWorker(
+                self._frames[frame], frame, size=self._frame_size, generation=self._generation, data=data)
+            worker.signals.triggered.connect(self._on_frame_decoded)
+            self._pending[frame] = worker
+            self.ThreadPool.start(worker)
+
+    def _open_pack(self):
+        """
+        Internal function that opens the pack frames are read from, if it is not opened yet
+        :return: bool, whether the pack is opened
+        """
+
+        if self._pack is None and self._pack_path:
+            try:
+                self._pack = ImageSequencePack(self._pack_path)
+            except Exception as exc:
+                tpQtLib.logger.warning('Cannot read image sequence pack "{}": {}'.format(self._pack_path, exc))
+                self._pack = None
+
+        return self._pack is not None
+
+    def _close_pack(self):
+        """
+        Internal function that closes the pack frames are read from
+        """
+
+        if self._pack is not None:
+            self._pack.close()
+            self._pack = None
+
+    @staticmethod
+    def _byte_count(pixmap):
+        """
+        Internal function that returns the number of bytes used by the given pixmap
+        :param pixmap: QPixmap
+        :return: int
+        """
+
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def _evict(self):
+        """
+        Internal function that removes the decoded frames that will be displayed later until the cache size
+        and bytes limits are reached. Frames that have just been displayed are the last ones to be needed again
+        """
+
+        count = self.frame_count()
+        while len(self._cache) > self.CACHE_SIZE or (
+                len(self._cache) > 1 and self._cache_bytes > self.CACHE_MAX_BYTES):
+            frame = max(self._cache, key=lambda f: (f - self._frame) % count)
+            self._cache_bytes -= self._byte_count(self._cache.pop(frame))
+
     def _on_frame_changed(self):
         """
         Internal callback function that is called when the current frame changes
+        Frames that are not decoded yet are skipped, so playback never waits for disk
         """
 
         if not self._frames:
             return
 
-        frame = self._frame
-        frame += 1
-        self.jump_to_frame(frame)
+        frame = self._frame + 1
+        if frame >= self.frame_count():
+            frame = 0
+        self._frame = frame
+        self.prefetch()
+        if frame in self._cache:
+            self.frameChanged.emit(frame)
+        else:
+            self._dropped_frames += 1
+
+    def _on_frame_decoded(self, generation, frame, image):
+        """
+        Internal callback function that is called when a frame has been decoded in the thread pool
+        :param generation: int
+        :param frame: int
+        :param image: QImage or None
+        """
+
+        if generation != self._generation:
+            return
+
+        self._pending.pop(frame, None)
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)
+            self._cache[frame] = pixmap
+            self._cache_bytes += self._byte_count(pixmap)
+            self._evict()
+            if frame == self._frame:
+                self.frameChanged.emit(frame)
+        self.prefetch()
 
 
 # region Public Functions
+def read_image(path, size=None):
+    """
+    Reads the image of the given path scaled to fit the given size. Can be called from any thread
+    Formats that support it (such as JPEG) are decoded directly at the scaled size
+    :param path: str
+    :param size: QSize or None, if None image is read at its original size
+    :return: QImage or None
+    """
+
+    return _read_scaled_image(QImageReader(str(path)), size)
+
+
+def read_image_data(data, size=None):
+    """
+    Reads the image encoded in the given data scaled to fit the given size. Can be called from any thread
+    :param data: bytes
+    :param size: QSize or None, if None image is read at its original size
+    :return: QImage or None
+    """
+
+    image_buffer = QBuffer()
+    image_buffer.setData(QByteArray(data))
+    image_buffer.open(QIODevice.ReadOnly)
+    try:
+        return _read_scaled_image(QImageReader(image_buffer), size)
+    finally:
+        image_buffer.close()
+
+
+def sequence_frame_paths(dirname):
+    """
+    Returns the frame files of the image sequence stored in the given folder, sorted in natural order
+    Image sequence pack files are not included
+    :param dirname: str
+    :return: list(str)
+    """
+
+    def _natural_key(key):
+        return [int(text) if text.isdigit() else text for text in re.split('([0-9]+)', key)]
+
+    frame_paths = [dirname + '/' + filename for filename in os.listdir(dirname)
+                   if ImageSequencePack.EXTENSION not in filename.lower()]
+    frame_paths.sort(key=_natural_key)
+
+    return frame_paths
+
+
+def _read_scaled_image(reader, size):
+    """
+    Internal function that reads the image of the given reader scaled to fit the given size
+    :param reader: QImageReader
+    :param size: QSize or None
+    :return: QImage or None
+    """
+
+    image_size = reader.size()
+    if size is not None and image_size.isValid() and (
+            image_size.width() > size.width() or image_size.height() > size.height()):
+        reader.setScaledSize(image_size.scaled(size, Qt.KeepAspectRatio))
+
+    image = reader.read()
+    if image.isNull():
+        return None
+
+    if size is not None and (image.width() > size.width() or image.height() > size.height()):
+        image = image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    return image
+
+
 def image_to_base64(image_path):
     """
     Converts image file to base64
@@ -0,0 +1,195 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains functions to import package modules the first time they are accessed and to measure
+how much time importing them takes
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import sys
+import time
+import types
+import pkgutil
+import importlib
+import traceback
+
+clock = time.perf_counter if hasattr(time, 'perf_counter') else time.time
+
+# Number of lazy imports in progress
+_importing = [0]
+
+
+class LazyPackage(types.ModuleType):
+    """
+    Module type assigned to lazy packages. Attributes not found in the package are resolved by its loader
+    """
+
+    def __getattr__(self, name):
+        loader = self.__dict__.get('__lazy_loader__')
+        if loader is None or name.startswith('__'):
+            raise AttributeError('module {!r} has no attribute {!r}'.format(self.__name__, name))
+
+        return loader.load(name)
+
+    def __dir__(self):
+        names = set(self.__dict__)
+        loader = self.__dict__.get('__lazy_loader__')
+        if loader is not None:
+            names.update(loader.names())
+
+        return sorted(names)
+
+
+class LazyLoader(object):
+    """
+    Resolves the attributes of a lazy package importing its submodules, or the modules that define them
+    """
+
+    def __init__(self, package_name, submodules, attributes=None):
+        super(LazyLoader, self).__init__()
+
+        self._package_name = package_name
+        self._submodules = set(submodules)
+        self._attributes = dict(attributes or dict())
+
+    def names(self):
+        """
+        Returns the names that can be resolved by the loader
+        :return: list(str)
+        """
+
+        return sorted(self._submodules | set(self._attributes))
+
+    def load(self, name):
+        """
+        Imports the submodule with the given name, or the module that defines the given attribute, and returns it
+        :param name: str
+        :return: variant
+        """
+
+        package = sys.modules[self._package_name]
+        if name in self._submodules:
+            module_name = '{}.{}'.format(self._package_name, name)
+        elif name in self._attributes:
+            module_name = self._attributes[name]
+        else:
+            raise AttributeError('module {!r} has no attribute {!r}'.format(self._package_name, name))
+
+        _importing[0] += 1
+        try:
+            module = importlib.import_module(module_name)
+        finally:
+            _importing[0] -= 1
+
+        if name in package.__dict__:
+            return package.__dict__[name]
+        if name in self._submodules:
+            return module
+
+        raise AttributeError('module {!r} has no attribute {!r}'.format(self._package_name, name))
+
+
+def is_importing():
+    """
+    Returns whether a lazy import is in progress
+    :return: bool
+    """
+
+    return _importing[0] > 0
+
+
+def submodule_names(package_name, skip_modules=None):
+    """
+    Returns the names of the modules and packages inside the given package, without importing them
+    :param package_name: str
+    :param skip_modules: list(str) or None, full names of the modules to skip
+    :return: list(str)
+    """
+
+    package = sys.modules.get(package_name) or importlib.import_module(package_name)
+    skip_modules = skip_modules or list()
+
+    names = list()
+    for _, name, _ in pkgutil.iter_modules(getattr(package, '__path__', list())):
+        if '{}.{}'.format(package_name, name) not in skip_modules:
+            names.append(name)
+
+    return names
+
+
+def install(package_name, skip_modules=None, attributes=None):
+    """
+    Makes the given package import its submodules the first time they are accessed as attributes
+    Requires Python 3.5 or newer. Modules can be imported with import statements as usual
+    :param package_name: str
+    :param skip_modules: list(str) or None, full names of the modules that are not resolved
+    :param attributes: dict(str, str) or None, attributes of the package resolved by importing the given module
+    :return: bool, whether the package is lazy or not
+    """
+
+    package = sys.modules.get(package_name) or importlib.import_module(package_name)
+    if not isinstance(package, LazyPackage):
+        try:
+            package.__class__ = LazyPackage
+        except TypeError:
+            return False
+
+    package.__lazy_loader__ = LazyLoader(
+        package_name, submodule_names(package_name, skip_modules=skip_modules), attributes=attributes)
+
+    return True
+
+
+def import_report(package_names, skip_modules=None):
+    """
+    Imports, in order, all the modules of the given packages and their subpackages and returns the time taken
+    to import each one. Modules already imported take no time, so this should be called before the modules are
+    used to know what importing them eagerly costs. Time includes the modules imported by each module
+    :param package_names: list(str)
+    :param skip_modules: list(str) or None, full names of the modules to skip
+    :return: list(dict), with the 'module' name, import 'time' in seconds and the 'error' raised, if any
+    """
+
+    report = list()
+    packages = list(package_names)
+    while packages:
+        package_name = packages.pop(0)
+        for name in submodule_names(package_name, skip_modules=skip_modules):
+            module_name = '{}.{}'.format(package_name, name)
+            error = None
+            start = clock()
+            try:
+                module = importlib.import_module(module_name)
+            except Exception:
+                module = None
+                error = traceback.format_exc().strip().splitlines()[-1]
+            report.append({'module': module_name, 'time': clock() - start, 'error': error})
+            if module is not None and hasattr(module, '__path__'):
+                packages.append(module_name)
+
+    return report
+
+
+def format_import_report(report, limit=None):
+    """
+    Returns the given import report as text, from the slowest module to the fastest one
+    :param report: list(dict), report returned by import_report
+    :param limit: int or None, maximum number of modules to show
+    :return: str
+    """
+
+    entries = sorted(report, key=lambda entry: entry['time'], reverse=True)
+    total = sum(entry['time'] for entry in report)
+    width = max([len(entry['module']) for entry in entries] or [0])
+
+    lines = ['{} modules imported in {:.1f} ms'.format(len(report), total * 1000.0)]
+    for entry in entries[:limit]:
+        percent = (entry['time'] / total * 100.0) if total else 0.0
+        line = '{}  {:8.2f} ms  {:5.1f}%'.format(entry['module'].ljust(width), entry['time'] * 1000.0, percent)
+        if entry['error']:
+            line += '  ERROR: {}'.format(entry['error'])
+        lines.append(line)
+
+    return '\n'.join(lines)
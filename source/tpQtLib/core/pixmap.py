@@ -10,7 +10,7 @@ from __future__ import print_function, division, absolute_import
 from Qt.QtCore import *
 from Qt.QtGui import *
 
-from tpQtLib.core import color
+from tpQtLib.core import color, effects
 
 
 class Pixmap(QPixmap, object):
@@ -29,12 +29,7 @@ class Pixmap(QPixmap, object):
             new_color = color.Color.from_string(new_color)
 
         if not self.isNull():
-            painter = QPainter(self)
-            painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
-            painter.setBrush(new_color)
-            painter.setPen(new_color)
-            painter.drawRect(self.rect())
-            painter.end()
+            colorize_pixmap(self, new_color)
 
         self._color = new_color
 
@@ -70,22 +65,37 @@ class Pixmap(QPixmap, object):
 
 def colorize_pixmap(pixmap, new_color):
     """
-    Colorizes the given pixmap with a new color based on its alpha map
+    Colorizes the given pixmap with a new color based on its alpha channel
     :param QPixmap pixmap: Pixmap
     :param tuple new_color: new color in tuple format (255, 255, 255)
     :return:  Pixmap
     """
 
-    if isinstance(new_color, str):
-        new_color = color.Color.from_string(new_color)
+    if pixmap.isNull():
+        return pixmap
 
-    mask = pixmap.mask()
-    pixmap.fill(new_color)
-    pixmap.setMask(mask)
+    pixmap.swap(QPixmap.fromImage(effects.colorize_image(pixmap, new_color)))
 
     return pixmap
 
 
+def colorize_pixmaps(pixmaps, colors):
+    """
+    Colorizes the given pixmaps with the given colors based on their alpha channel
+    Pixmaps are colorized in place with NumPy when it is available, which is faster than painting them
+    :param pixmaps: list(QPixmap)
+    :param colors: list(QColor or str or tuple or None), color of each pixmap
+    :return: list(QPixmap)
+    """
+
+    images = effects.colorize_images(pixmaps, colors)
+    for pixmap, image, clr in zip(pixmaps, images, colors):
+        if clr is not None and not pixmap.isNull():
+            pixmap.swap(QPixmap.fromImage(image))
+
+    return pixmaps
+
+
 def overlay_pixmap(pixmap, over_pixmap, overlay_color, align=Qt.AlignCenter):
     """
     Overlays one pixmap over the other
@@ -96,26 +106,8 @@ def overlay_pixmap(pixmap, over_pixmap, overlay_color, align=Qt.AlignCenter):
     :return:
     """
 
-    if isinstance(overlay_color, str):
-        overlay_color = color.Color.from_string(overlay_color)
-
-    if overlay_color is not None:
-        over_pixmap = colorize_pixmap(over_pixmap, overlay_color)
-
-    painter = QPainter(pixmap)
-    painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-
-    x = 0
-    y = 0
-    if align is Qt.AlignCenter:
-        x = pixmap.width() / 2 - over_pixmap.width() / 2
-        y = pixmap.height() / 2 - over_pixmap.height() / 2
-    elif align is None:
-        x = 0
-        y = 0
-
-    painter.drawPixmap(x, y, over_pixmap.width(), over_pixmap.height(), over_pixmap)
-    painter.end()
+    image = effects.overlay_image(pixmap, over_pixmap, color=overlay_color, align=align)
+    pixmap.swap(QPixmap.fromImage(image))
 
 
 def tint_pixmap(pixmap, tint_color=(255, 255, 255, 100), composition_mode=QPainter.CompositionMode_Plus):
@@ -127,14 +119,8 @@ def tint_pixmap(pixmap, tint_color=(255, 255, 255, 100), composition_mode=QPaint
     :return:
     """
 
-    tint_color = QColor(*tint_color)
-    over_pixmap = QPixmap(pixmap.width(), pixmap.height())
-    over_pixmap.fill(tint_color)
-    over_pixmap.setMask(pixmap.mask())
-    painter = QPainter(pixmap)
-    painter.setCompositionMode(composition_mode)
-    painter.drawPixmap(0, 0, over_pixmap.width(), over_pixmap.height(), over_pixmap)
-    painter.end()
+    image = effects.tint_image(pixmap, tint_color=tint_color, composition_mode=composition_mode)
+    pixmap.swap(QPixmap.fromImage(image))
 
 
 def grayscale_pixmap(pixmap):
@@ -144,10 +130,4 @@ def grayscale_pixmap(pixmap):
     :return:
     """
 
-    image = pixmap.toImage()
-    alpha = image.alphaChannel()
-    gray = image.convertToFormat(QImage.Format_Grayscale8)
-    image = gray.convertToFormat(QImage.Format_ARGB32)
-    image.setAlphaChannel(alpha)
-
-    return QPixmap(image)
+    return QPixmap.fromImage(effects.grayscale_image(pixmap))
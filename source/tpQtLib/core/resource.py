@@ -8,9 +8,168 @@ Module that defines a base class to load resources
 from __future__ import print_function, division, absolute_import
 
 import os
+import threading
+from collections import OrderedDict
+
+from Qt.QtCore import *
+from Qt.QtGui import *
 
 from tpPyUtils import folder, path
-from tpQtLib.core import qtutils, pixmap as pixmap_resource, icon as icon_resource
+from tpQtLib.core import qtutils, effects, pixmap as pixmap_resource, icon as icon_resource
+
+
+class ResourceCache(object):
+    """
+    Process wide LRU cache of the pixmaps and icons loaded by resources
+    Cached objects are never returned, callers get copies that share their data, so modifying them (for example,
+    setting a new icon color) does not modify the cache
+    """
+
+    MAX_ITEMS = 2000
+
+    _items = OrderedDict()
+    _images = dict()
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    @classmethod
+    def key(cls, kind, dirname, name, category, extension, theme, color=None, size=None):
+        """
+        Returns the cache key of the given resource
+        :param kind: str, 'pixmap' or 'icon'
+        :param dirname: str
+        :param name: str
+        :param category: str
+        :param extension: str
+        :param theme: str or None
+        :param color: QColor or str or None
+        :param size: int or None, size in pixels after DPI scaling
+        :return: tuple
+        """
+
+        if isinstance(color, QColor):
+            color = color.rgba()
+        elif isinstance(color, (list, tuple)):
+            color = tuple(color)
+
+        return kind, dirname, name, category, extension, theme, color, size
+
+    @classmethod
+    def get(cls, key):
+        """
+        Returns the cached object of the given key
+        Images preloaded in the background are converted and cached the first time they are requested
+        :param key: tuple
+        :return: QPixmap or QIcon or None
+        """
+
+        value = cls._items.pop(key, None)
+        if value is None:
+            with cls._lock:
+                image = cls._images.pop(key, None)
+            if image is not None:
+                value = QPixmap.fromImage(image)
+                if key[0] == 'icon':
+                    value = QIcon(value)
+        if value is None:
+            cls._misses += 1
+            return None
+
+        cls._hits += 1
+        cls._items[key] = value
+
+        return value
+
+    @classmethod
+    def add(cls, key, value):
+        """
+        Stores the given object with the given key, releasing the least recently used ones if the cache is full
+        :param key: tuple
+        :param value: QPixmap or QIcon
+        """
+
+        cls._items.pop(key, None)
+        cls._items[key] = value
+        while len(cls._items) > cls.MAX_ITEMS:
+            cls._items.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        """
+        Removes all the cached and preloaded objects. Must be called when the theme changes
+        """
+
+        cls._items.clear()
+        with cls._lock:
+            cls._images.clear()
+
+    @classmethod
+    def stats(cls):
+        """
+        Returns the number of cached objects, preloaded images, hits and misses
+        :return: dict
+        """
+
+        return {'items': len(cls._items), 'preloaded': len(cls._images), 'hits': cls._hits, 'misses': cls._misses}
+
+    @classmethod
+    def preload(cls, requests):
+        """
+        Loads the given images in a background thread. QPixmap cannot be created outside the main thread, so
+        images are converted the first time they are requested
+        :param requests: list(tuple(tuple, str, variant, int)), cache key, image path, color and size of each image
+        :return: threading.Thread
+        """
+
+        requests = [request for request in requests if request[0] not in cls._items]
+
+        def _load():
+            keys, images, colors = list(), list(), list()
+            for key, image_path, color, size in requests:
+                with cls._lock:
+                    if key in cls._images:
+                        continue
+                image = load_image(image_path, size=size)
+                if image.isNull():
+                    continue
+                keys.append(key)
+                images.append(image)
+                colors.append(color or None)
+
+            # Images are colorized in this thread too, so the main thread only converts them to pixmaps
+            images = effects.colorize_images(images, colors)
+            with cls._lock:
+                for key, image in zip(keys, images):
+                    cls._images.setdefault(key, image)
+
+        thread = threading.Thread(target=_load)
+        thread.daemon = True
+        thread.start()
+
+        return thread
+
+
+def load_image(image_path, color=None, size=None):
+    """
+    Loads the given image, colorizing it with the given color and scaling it to the given size
+    Only uses QImage, so it can be called from threads other than the main one
+    :param image_path: str
+    :param color: QColor or str or None
+    :param size: int or None, size in pixels
+    :return: QImage
+    """
+
+    image = QImage(image_path)
+    if image.isNull():
+        return image
+
+    if size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if color:
+        image = effects.colorize_image(image, color)
+
+    return image
 
 
 class Resource(object):
@@ -127,6 +286,39 @@ class Resource(object):
         else:
             return cls()._pixmap(*args, **kwargs)
 
+    @classmethod
+    def preload_icons(cls, names, extension='png', color=None, theme='color', size=None, dirname=None):
+        """
+        Loads the given icons in a background thread, so they are already loaded when they are requested
+        Icons are cached with the same key used by icon function, so the given options must match
+        >>> tpQtLib.resource.preload_icons(['folder', 'trash', 'search'], theme='black')
+        :param names: list(str)
+        :param extension: str
+        :param color: QColor or None
+        :param theme: str
+        :param size: int or None
+        :param dirname: str or None
+        :return: threading.Thread
+        """
+
+        resource = cls(dirname) if dirname else cls()
+        requests = list()
+        for name in names:
+            scaled_size = resource._scaled_size(size)
+            key = ResourceCache.key('icon', resource.dirname, name, 'icons', extension, theme, color, scaled_size)
+            image_path = resource.image_path(name=name, category='icons', extension=extension, theme=theme)
+            requests.append((key, image_path, color, scaled_size))
+
+        return ResourceCache.preload(requests)
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Removes all the cached icons and pixmaps
+        """
+
+        ResourceCache.clear()
+
     @classmethod
     def gui(cls, *args, **kwargs):
         """
@@ -151,34 +343,62 @@ class Resource(object):
 
         return self._path
 
-    def _icon(self, name, extension='png', color=None, theme='color'):
+    def _icon(self, name, extension='png', color=None, theme='color', size=None):
         """
         Returns a icon_resource.Icon object from the given resource name
         :param name: str, name of the icon
         :param extension: str, extension of the icon
         :param color: QColor, color of the icon
+        :param size: int, size of the icon before DPI scaling
         :return: icon_resource.Icon
         """
 
-        p = self._pixmap(name=name, category='icons', extension=extension, color=color, theme=theme)
-        return icon_resource.Icon(p)
+        key = ResourceCache.key('icon', self.dirname, name, 'icons', extension, theme, color, self._scaled_size(size))
+        icon = ResourceCache.get(key)
+        if icon is None:
+            p = self._pixmap(name=name, category='icons', extension=extension, color=color, theme=theme, size=size)
+            icon = icon_resource.Icon(p)
+            ResourceCache.add(key, QIcon(icon))
+
+        return icon_resource.Icon(icon)
 
-    def _pixmap(self, name, category='images', extension='png', color=None, theme=None):
+    def _pixmap(self, name, category='images', extension='png', color=None, theme=None, size=None):
         """
         Return a QPixmap object from the given resource anme
         :param name: str, name of the pixmap
         :param category: str, category of the pixmap
         :param extension: str, extension of the pixmap
         :param color: QColor, color of the pixmap
+        :param size: int, size of the pixmap before DPI scaling
         :return: QPixmap
         """
 
-        path = self.image_path(name=name, category=category, extension=extension, theme=theme)
-        p = pixmap_resource.Pixmap(path)
-        if color:
-            p.set_color(new_color=color)
+        scaled_size = self._scaled_size(size)
+        key = ResourceCache.key('pixmap', self.dirname, name, category, extension, theme, color, scaled_size)
+        p = ResourceCache.get(key)
+        if p is None:
+            path = self.image_path(name=name, category=category, extension=extension, theme=theme)
+            p = pixmap_resource.Pixmap(path)
+            if scaled_size:
+                p = pixmap_resource.Pixmap(
+                    p.scaled(scaled_size, scaled_size, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            if color:
+                p.set_color(new_color=color)
+            ResourceCache.add(key, QPixmap(p))
+
+        return pixmap_resource.Pixmap(p)
+
+    def _scaled_size(self, size):
+        """
+        Returns the given size scaled by the current DPI
+        :param size: int or None
+        :return: int or None
+        """
+
+        if not size:
+            return None
 
-        return p
+        return int(qtutils.dpi_scale(size))
 
     def _ui(self, name):
         """
@@ -9,10 +9,75 @@ from __future__ import print_function, division, absolute_import
 
 import os
 import re
+from collections import OrderedDict
+
+# Expressions scaled by the DPI, such as 4*DPI
+_DPI_EXPRESSION = '[0-9]+[*]DPI'
+
+
+class StyleSheetTemplate(object):
+    """
+    Style sheet text parsed once into literal segments, option slots and DPI expressions, so it can be rendered
+    with different options and DPI values with a single join
+    """
+
+    def __init__(self, text, keys=None):
+        super(StyleSheetTemplate, self).__init__()
+
+        self._keys = tuple(sorted(keys or list(), key=len, reverse=True))
+        self._parts = list()
+        self._option_slots = list()
+        self._dpi_slots = list()
+
+        # Longest keys are tried first, as when replacing them one by one
+        patterns = [_DPI_EXPRESSION] + [re.escape(key) for key in self._keys]
+        position = 0
+        for match in re.finditer('|'.join(patterns), text):
+            self._parts.append(text[position:match.start()])
+            token = match.group()
+            if token.endswith('*DPI') and token[:-4].isdigit():
+                self._dpi_slots.append((len(self._parts), int(token[:-4])))
+            else:
+                self._option_slots.append((len(self._parts), token))
+            self._parts.append(token)
+            position = match.end()
+        self._parts.append(text[position:])
+
+    def keys(self):
+        """
+        Returns the option keys replaced by the template
+        :return: tuple(str)
+        """
+
+        return self._keys
+
+    def render(self, options=None, dpi=1):
+        """
+        Returns the style sheet text with the given options and DPI
+        :param options: dict
+        :param dpi: float
+        :return: str
+        """
+
+        options = options or dict()
+        parts = list(self._parts)
+        for index, key in self._option_slots:
+            parts[index] = options.get(key, key)
+        for index, value in self._dpi_slots:
+            parts[index] = str(int(value * dpi))
+
+        return ''.join(parts)
 
 
 class StyleSheet(object):
 
+    MAX_TEMPLATES = 16
+    MAX_RESULTS = 32
+
+    _files = dict()
+    _templates = OrderedDict()
+    _results = OrderedDict()
+
     @classmethod
     def from_path(cls, path, **kwargs):
         """
@@ -23,8 +88,8 @@ class StyleSheet(object):
         """
 
         stylesheet = cls()
-        data = stylesheet.read(path)
-        data = StyleSheet.format(data, **kwargs)
+        data = stylesheet.read_cached(path)
+        data = stylesheet.format(data, **kwargs)
         stylesheet.set_data(data)
 
         return stylesheet
@@ -59,36 +124,89 @@ class StyleSheet(object):
 
         return data
 
-    @staticmethod
-    def format(data=None, options=None, dpi=1):
+    @classmethod
+    def read_cached(cls, path):
+        """
+        Reads style data from given path. File is only read again if it was modified since last read
+        :param path: str
+        :return: str
+        """
+
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return ''
+
+        cached = cls._files.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        data = cls.read(path)
+        cls._files[path] = (mtime, data)
+
+        return data
+
+    @classmethod
+    def template(cls, data, keys=None):
+        """
+        Returns the compiled template of the given style data that replaces the given option keys
+        Templates are cached, so each style data is only parsed once
+        :param data: str
+        :param keys: list(str) or None
+        :return: StyleSheetTemplate
+        """
+
+        cache_key = (data, tuple(sorted(keys or list())))
+        template = cls._templates.pop(cache_key, None)
+        if template is None:
+            template = StyleSheetTemplate(data, keys=keys)
+        cls._templates[cache_key] = template
+        while len(cls._templates) > cls.MAX_TEMPLATES:
+            cls._templates.popitem(last=False)
+
+        return template
+
+    @classmethod
+    def format(cls, data=None, options=None, dpi=1):
         """
         Returns style with proper format
+        Results are cached by style data, options and DPI
         :param data: str
         :param options: dict
         :param dpi: float
         :return: str
         """
 
-        if options:
-            keys = options.keys()
-            keys.sort(key=len, reverse=True)
-            for key in keys:
-                data = data.replace(key, options[key])
+        data = data or ''
+        options = options or dict()
+        try:
+            cache_key = (data, tuple(sorted(options.items())), dpi)
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
 
-        re_dpi = re.compile('[0-9]+[*]DPI')
-        new_data = list()
+        if cache_key is not None and cache_key in cls._results:
+            result = cls._results.pop(cache_key)
+            cls._results[cache_key] = result
+            return result
 
-        for line in data.split('\n'):
-            dpi_ = re_dpi.search(line)
-            if dpi_:
-                new = dpi_.group().replace('DPI', str(dpi))
-                val = int(eval(new))
-                line = line.replace(dpi_.group(), str(val))
-            new_data.append(line)
+        result = cls.template(data, keys=list(options.keys())).render(options, dpi=dpi)
+        if cache_key is not None:
+            cls._results[cache_key] = result
+            while len(cls._results) > cls.MAX_RESULTS:
+                cls._results.popitem(last=False)
 
-        data = '\n'.join(new_data)
+        return result
 
-        return data
+    @classmethod
+    def clear_cache(cls):
+        """
+        Removes all the cached files, templates and formatted style sheets
+        """
+
+        cls._files.clear()
+        cls._templates.clear()
+        cls._results.clear()
 
     def __init__(self):
         super(StyleSheet, self).__init__()
@@ -7,6 +7,9 @@ Module that contains theme implementation
 
 from __future__ import print_function, division, absolute_import
 
+import weakref
+from functools import partial
+
 from Qt.QtCore import *
 from Qt.QtWidgets import *
 from Qt.QtGui import *
@@ -73,6 +76,17 @@ THEME_PRESETS = [
     },
 ]
 
+# Setters called on theme subscribers and the theme option whose color they receive
+SUBSCRIBER_SETTERS = [
+    ('set_text_color', 'ITEM_TEXT_COLOR'),
+    ('set_text_selected_color', 'ITEM_TEXT_SELECTED_COLOR'),
+    ('set_background_color', 'ITEM_BACKGROUND_COLOR'),
+    ('set_background_hover_color', 'ITEM_BACKGROUND_HOVER_COLOR'),
+    ('set_background_selected_color', 'ITEM_BACKGROUND_SELECTED_COLOR'),
+]
+
+_registry = list()
+
 
 class Theme(QObject, object):
 
@@ -452,3 +466,240 @@ def theme_presets():
         themes.append(theme)
 
     return themes
+
+
+class ThemeSubscribers(QObject, object):
+    """
+    Registry of the objects that consume theme colors. Objects register once, when they are created, and theme
+    changes push the colors only to them, instead of looking up the setters of all the children of a window.
+    Each window or dialog keeps its own list of subscribers, filled the first time it publishes its colors, so
+    publishing does not check the parents of the subscribers of other windows.
+    Subscribers are weakly referenced, and repaints of multiple theme changes are coalesced into a single one
+    """
+
+    def __init__(self, parent=None):
+        super(ThemeSubscribers, self).__init__(parent)
+
+        self._subscribers = dict()
+        self._roots = dict()
+        self._unassigned = set()
+        self._pending = dict()
+
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.setInterval(0)
+        self._repaint_timer.timeout.connect(self.flush)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, obj, root=None):
+        """
+        Registers the given object. Setters defined in SUBSCRIBER_SETTERS are looked up only once
+        Objects moved to another window after their root was found must be registered again
+        :param obj: QObject
+        :param root: QObject or None, window or dialog that publishes the colors of the object. If not given, it is
+            found the first time a window or dialog that contains the object publishes its colors
+        :return: bool, whether the object defines any setter or not
+        """
+
+        setters = [(name, option) for name, option in SUBSCRIBER_SETTERS if hasattr(obj, name)]
+        if not setters:
+            return False
+
+        key = id(obj)
+        if key in self._subscribers:
+            self._unassign(key)
+        else:
+            obj.destroyed.connect(partial(self._discard, key))
+        self._subscribers[key] = (weakref.ref(obj, partial(self._discard, key)), setters)
+        if root is None:
+            self._unassigned.add(key)
+        else:
+            self._root_keys(root).add(key)
+
+        return True
+
+    def unsubscribe(self, obj):
+        """
+        Unregisters the given object
+        :param obj: QObject
+        """
+
+        self._discard(id(obj))
+
+    def is_subscribed(self, obj):
+        """
+        Returns whether the given object is registered or not
+        :param obj: QObject
+        :return: bool
+        """
+
+        entry = self._subscribers.get(id(obj))
+        return entry is not None and entry[0]() is obj
+
+    def subscribers(self, root=None):
+        """
+        Returns the registered objects
+        :param root: QObject or None, if given, only the subscribers of the given window or dialog are returned
+        :return: list(QObject)
+        """
+
+        keys = list(self._subscribers) if root is None else self._assign(root)
+        found = list()
+        for key in keys:
+            obj = self._subscribers[key][0]()
+            if obj is not None:
+                found.append(obj)
+
+        return found
+
+    def publish(self, options, root=None):
+        """
+        Pushes the colors of the given theme options to the subscribers and schedules their repaint
+        :param options: dict, options returned by Theme.options
+        :param root: QObject or None, if given, only the subscribers of the given window or dialog are updated
+        :return: int, number of updated subscribers
+        """
+
+        keys = list(self._subscribers) if root is None else self._assign(root)
+        colors = dict()
+        updated = 0
+        for key in keys:
+            ref, setters = self._subscribers[key]
+            obj = ref()
+            if obj is None:
+                continue
+            try:
+                for name, option in setters:
+                    if option not in colors:
+                        colors[option] = color.Color.from_string(options[option])
+                    getattr(obj, name)(colors[option])
+            except RuntimeError:
+                # The wrapped Qt object was already deleted
+                self._discard(key)
+                continue
+            self._pending[key] = ref
+            updated += 1
+
+        if self._pending:
+            self._repaint_timer.start()
+
+        return updated
+
+    def flush(self):
+        """
+        Repaints right away the subscribers updated since the last repaint
+        """
+
+        self._repaint_timer.stop()
+        pending = self._pending
+        self._pending = dict()
+        for ref in pending.values():
+            obj = ref()
+            if obj is None or not hasattr(obj, 'update'):
+                continue
+            try:
+                obj.update()
+            except RuntimeError:
+                pass
+
+    def _root_keys(self, root):
+        """
+        Internal function that returns the keys of the subscribers of the given root
+        :param root: QObject
+        :return: set(int)
+        """
+
+        root_key = id(root)
+        entry = self._roots.get(root_key)
+        if entry is None or entry[0]() is not root:
+            entry = self._roots[root_key] = (weakref.ref(root, partial(self._discard_root, root_key)), set())
+
+        return entry[1]
+
+    def _assign(self, root):
+        """
+        Internal function that moves the subscribers that are not assigned yet and are inside the given root to
+        the root list, and returns the keys of all the subscribers of the root
+        :param root: QObject
+        :return: list(int)
+        """
+
+        keys = self._root_keys(root)
+        for key in list(self._unassigned):
+            obj = self._subscribers[key][0]()
+            if obj is not None and _is_descendant(obj, root):
+                self._unassigned.discard(key)
+                keys.add(key)
+
+        return list(keys)
+
+    def _unassign(self, key):
+        """
+        Internal function that removes the subscriber with the given key from the list of its root
+        :param key: int
+        """
+
+        self._unassigned.discard(key)
+        for _, keys in self._roots.values():
+            keys.discard(key)
+
+    def _discard(self, key, *args):
+        """
+        Internal function that removes the subscriber with the given key
+        :param key: int
+        """
+
+        if self._subscribers.pop(key, None) is None:
+            return
+        self._pending.pop(key, None)
+        self._unassign(key)
+
+    def _discard_root(self, root_key, *args):
+        """
+        Internal function that removes the subscribers list of the root with the given key
+        :param root_key: int
+        """
+
+        self._roots.pop(root_key, None)
+
+
+def _is_descendant(obj, root):
+    """
+    Internal function that returns whether the given object is the given root or one of its descendants
+    :param obj: QObject
+    :param root: QObject
+    :return: bool
+    """
+
+    while obj is not None:
+        if obj is root:
+            return True
+        obj = obj.parent()
+
+    return False
+
+
+def subscribers():
+    """
+    Returns the registry of the objects that consume theme colors, shared by all windows and dialogs
+    :return: ThemeSubscribers
+    """
+
+    if not _registry:
+        _registry.append(ThemeSubscribers())
+
+    return _registry[0]
+
+
+def subscribe(obj, root=None):
+    """
+    Registers the given object in the theme subscribers registry, so it receives the colors of theme changes
+    Objects that consume theme colors call it when they are created
+    :param obj: QObject
+    :param root: QObject or None, window or dialog that publishes the colors of the object
+    :return: bool
+    """
+
+    return subscribers().subscribe(obj, root=root)
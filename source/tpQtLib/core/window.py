@@ -16,7 +16,7 @@ from Qt.QtGui import *
 import tpQtLib
 import tpDccLib as tp
 from tpPyUtils import path, folder
-from tpQtLib.core import qtutils, settings, animation, color, theme, statusbar, dragger
+from tpQtLib.core import qtutils, settings, animation, theme, statusbar, dragger, resource
 
 
 class MainWindow(QMainWindow, object):
@@ -496,7 +496,8 @@ class MainWindow(QMainWindow, object):
         """
 
         self._theme = theme
-        self._theme.updated.connect(self.reload_stylesheet)
+        self._theme.updated.connect(self._on_theme_updated)
+        resource.ResourceCache.clear()
         self.reload_stylesheet()
 
     def set_theme_settings(self, settings):
@@ -519,36 +520,9 @@ class MainWindow(QMainWindow, object):
         options = current_theme.options()
         stylesheet = current_theme.stylesheet()
 
-        all_widgets = self.main_layout.findChildren(QObject)
-
-        text_color = color.Color.from_string(options["ITEM_TEXT_COLOR"])
-        text_selected_color = color.Color.from_string(options["ITEM_TEXT_SELECTED_COLOR"])
-        background_color = color.Color.from_string(options["ITEM_BACKGROUND_COLOR"])
-        background_hover_color = color.Color.from_string(options["ITEM_BACKGROUND_HOVER_COLOR"])
-        background_selected_color = color.Color.from_string(options["ITEM_BACKGROUND_SELECTED_COLOR"])
-
         self.setStyleSheet(stylesheet)
 
-        for w in all_widgets:
-            found = False
-            if hasattr(w, 'set_text_color'):
-                w.set_text_color(text_color)
-                found = True
-            if hasattr(w, 'set_text_selected_color'):
-                w.set_text_selected_color(text_selected_color)
-                found = True
-            if hasattr(w, 'set_background_color'):
-                w.set_background_color(background_color)
-                found = True
-            if hasattr(w, 'set_background_hover_color'):
-                w.set_background_hover_color(background_hover_color)
-                found = True
-            if hasattr(w, 'set_background_selected_color'):
-                w.set_background_selected_color(background_selected_color)
-                found = True
-
-            if found:
-                w.update()
+        theme.subscribers().publish(options, root=self)
 
     # ============================================================================================================
     # TOOLBAR
@@ -758,6 +732,15 @@ class MainWindow(QMainWindow, object):
     # CALLBACKS
     # ============================================================================================================
 
+    def _on_theme_updated(self):
+        """
+        Internal callback function that is called when the colors of the current theme change
+        Cached icons and pixmaps are released, because they may have been colored with the previous theme colors
+        """
+
+        resource.ResourceCache.clear()
+        self.reload_stylesheet()
+
     def _on_show_settings_dialog(self):
 
         from tpQtLib.widgets import formwidget, lightbox
@@ -25,6 +25,7 @@ class LibraryItemSignals(QObject, object):
 
 
 LIBRARY_DEFAULT_NAME = 'DefaultLibrary'
+LIBRARY_DEFAULT_STREAM_RESULTS = 200
 
 DEFAULT_ICON_MODE = 'icon'
 DEFAULT_TABLE_MODE = 'table'
@@ -46,6 +47,29 @@ ITEM_DEFAULT_EXTENSION = ''
 ITEM_DEFAULT_MENU_NAME = ''
 ITEM_DEFAULT_MENU_ORDER = 10
 ITEM_DEFAULT_MENU_ICON_PATH = ''
+ITEM_CONTENT_CACHE_SIZE = 2000
+
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+THUMBNAIL_CACHE_SUFFIX = '_thumbnails'
+THUMBNAIL_CACHE_FORMAT = 'png'
+THUMBNAIL_CACHE_MAX_PATHS = 20000
+THUMBNAIL_DISK_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+THUMBNAIL_DISK_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+THUMBNAIL_DISK_CACHE_PRUNE_WRITES = 500
+THUMBNAIL_MAX_PREFETCH_ITEMS = 500
+MODEL_DEFAULT_MAX_ITEMS = 500
+TREE_WIDGET_MAX_DIFF_RATIO = 0.5
+TREE_WIDGET_MAX_TAKEN_ROWS = 32
+
+PAINT_PROFILER_MAX_FRAMES = 600
+PAINT_PROFILER_FRAME_BUDGET = 1.0 / 60.0
+PAINT_PROFILER_OVERLAY_INTERVAL = 500
+
+WATCHER_ENABLED = True
+WATCHER_COALESCE_INTERVAL = 500
+WATCHER_MAX_LATENCY = 3000
+WATCHER_POLL_INTERVAL = 3000
+WATCHER_NETWORK_FILESYSTEMS = ['nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'afpfs', 'fuse.sshfs', 'davfs', '9p']
 
 GROUP_ITEM_DEFAULT_FONT_SIZE = 24
 
@@ -79,6 +103,10 @@ TRASH_NAME = 'trash'
 TRASH_ENABLED = True
 
 DEFAULT_RECURSIVE_DEPTH = 8
+DEFAULT_SYNC_THREADS = 8
+DEFAULT_OPERATION_THREADS = 8
+SYNC_CACHE_SUFFIX = '_sync.json'
+MIGRATE_JSON_STORAGE = False
 DEFAULT_RECURSIVE_SEARCH_ENABLED = False
 
 DEFAULT_SETTINGS = {
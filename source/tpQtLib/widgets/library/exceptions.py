@@ -46,6 +46,16 @@ class RenamePathError(PathError):
     pass
 
 
+class LibraryOperationError(Exception):
+    """
+    Error raised when some file system operations of a library batch fail
+    """
+
+    def __init__(self, msg, operations=None):
+        super(LibraryOperationError, self).__init__(msg)
+        self.operations = operations or list()
+
+
 class ItemError(Exception):
     pass
 
@@ -0,0 +1,502 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains inverted index implementation used by libraries to resolve search queries
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import re
+import bisect
+import threading
+
+from tpPyUtils.externals import six
+
+from tpQtLib.widgets.library import utils, metadata
+
+TOKEN_REGEX = re.compile(r'\w+', re.UNICODE)
+
+
+class LibraryIndex(object):
+    """
+    Inverted index over library data. Stores a token -> paths map used by the wildcard ('*') filters
+    and a field -> value -> paths map used by the field filters, so queries are resolved with set operations
+    instead of matching every item data dictionary. Indexed records are kept in a columnar metadata store
+    Index is modified from the main thread and searched from search threads, so both hold the index lock
+    """
+
+    def __init__(self, store=None):
+        super(LibraryIndex, self).__init__()
+
+        self._mtime = None
+        self._version = 0
+        self._store = store if store is not None else metadata.LibraryMetadataStore()
+        self._tokens = dict()
+        self._values = dict()
+        self._keys = dict()
+        self._unhashable = dict()
+        self._field_counts = dict()
+        self._sorted_keys = dict()
+        self._cache = dict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._store)
+
+    def __contains__(self, path):
+        return path in self._store
+
+    @staticmethod
+    def lower(value):
+        """
+        Returns the value used to compare the given value in a case insensitive way
+        :param value: variant
+        :return: variant
+        """
+
+        if isinstance(value, six.string_types):
+            return value.lower()
+
+        return value
+
+    @staticmethod
+    def text(data):
+        """
+        Returns the text used by wildcard filters for the given data
+        :param data: dict
+        :return: str
+        """
+
+        return str(data).lower()
+
+    def mtime(self):
+        """
+        Returns the modification time of the data the index was last synced with
+        :return: float or None
+        """
+
+        return self._mtime
+
+    def version(self):
+        """
+        Returns a number that changes every time the indexed data changes
+        :return: int
+        """
+
+        return self._version
+
+    def lock(self):
+        """
+        Returns the lock held while the index is modified or searched. Hold it to read several values that must be
+        consistent with each other from a thread other than the main one
+        :return: threading.RLock
+        """
+
+        return self._lock
+
+    def set_mtime(self, mtime):
+        """
+        Sets the modification time of the data the index is synced with
+        :param mtime: float or None
+        """
+
+        self._mtime = mtime
+
+    def clear(self):
+        """
+        Removes all the indexed data
+        """
+
+        with self._lock:
+            self._mtime = None
+            self._version += 1
+            self._store.clear()
+            self._tokens = dict()
+            self._values = dict()
+            self._keys = dict()
+            self._unhashable = dict()
+            self._field_counts = dict()
+            self._sorted_keys = dict()
+            self._cache = dict()
+
+    def set_data(self, data):
+        """
+        Rebuilds the index from the given library data
+        :param data: dict(str, dict)
+        """
+
+        with self._lock:
+            mtime = self._mtime
+            self.clear()
+            self._mtime = mtime
+            for path, record in data.items():
+                self._add(path, record)
+
+    def paths(self):
+        """
+        Returns all the indexed paths
+        :return: set(str)
+        """
+
+        with self._lock:
+            return set(self._store.paths())
+
+    def fields(self):
+        """
+        Returns all the fields available in the indexed data
+        :return: list(str)
+        """
+
+        with self._lock:
+            return list(self._field_counts.keys())
+
+    def store(self):
+        """
+        Returns the store that holds the indexed records
+        :return: LibraryMetadataStore
+        """
+
+        return self._store
+
+    def record(self, path):
+        """
+        Returns a read only view of the indexed data for the given path
+        :param path: str
+        :return: LibraryRecord or None
+        """
+
+        with self._lock:
+            return self._store.view(path)
+
+    def value(self, path, field, default=None):
+        """
+        Returns the indexed value of the given field for the given path, without building its whole record
+        :param path: str
+        :param field: str
+        :param default: variant
+        :return: variant
+        """
+
+        return self._store.get(path, field, default)
+
+    def values(self, field):
+        """
+        Returns a dictionary with all the (non empty) values of the given field and the paths that contain them
+        :param field: str
+        :return: dict(variant, set(str))
+        """
+
+        with self._lock:
+            values = dict((value, set(paths)) for value, paths in self._values.get(field, dict()).items())
+            for path in self._unhashable.get(field, set()):
+                values.setdefault(repr(self._store.get(path, field)), set()).add(path)
+
+        return values
+
+    def update(self, path, data):
+        """
+        Updates the indexed data of the given path
+        :param path: str
+        :param data: dict
+        """
+
+        with self._lock:
+            self._remove(path)
+            self._add(path, data)
+
+    def remove(self, path):
+        """
+        Removes the given path from the index
+        :param path: str
+        """
+
+        with self._lock:
+            self._remove(path)
+
+    def rename(self, source, target):
+        """
+        Renames the given source path (and all its children paths) to the given target path.
+        Mirrors utils.rename_path_in_file, so path values stored in the data are also renamed
+        :param source: str
+        :param target: str
+        """
+
+        self.rename_paths({source: target})
+
+    def rename_paths(self, renames):
+        """
+        Renames all the given source paths (and their children paths) walking the indexed paths only once
+        :param renames: dict(str, str), source path -> target path
+        """
+
+        if not renames:
+            return
+
+        with self._lock:
+            renamed = dict()
+            for path in list(self._store.paths()):
+                new_path = utils.rename_paths_value(path, renames)
+                if new_path == path:
+                    continue
+                record = dict(
+                    (k, utils.rename_paths_value(v, renames)) for k, v in self._store.record(path).items())
+                self._remove(path)
+                renamed[new_path] = record
+
+            for path, record in renamed.items():
+                self.update(path, record)
+
+    def search(self, queries):
+        """
+        Returns the paths whose data match all the given queries
+        Follows the same rules as Library.match
+        :param queries: list(dict)
+        :return: set(str)
+        """
+
+        with self._lock:
+            results = None
+            for query in queries:
+                filters = query.get('filters')
+                operator = query.get('operator', 'and')
+                if not filters:
+                    continue
+
+                matches = None
+                for key, cond, value in filters:
+                    paths = self.filter(key, cond, value)
+                    if matches is None:
+                        matches = set(paths)
+                    elif operator == 'or':
+                        matches |= paths
+                    else:
+                        matches &= paths
+
+                results = matches if results is None else results & matches
+                if not results:
+                    return set()
+
+            if results is None:
+                return self.paths()
+
+            return results
+
+    def filter(self, key, cond, value):
+        """
+        Returns the paths that match the given filter
+        Cached results are stamped with the index version, so results of previous data are never returned
+        :param key: str
+        :param cond: str
+        :param value: variant
+        :return: set(str)
+        """
+
+        value = self.lower(value)
+        try:
+            cache_key = (key, cond, value)
+            hash(cache_key)
+        except TypeError:
+            cache_key = None
+
+        with self._lock:
+            version = self._version
+            cached = self._cache.get(cache_key) if cache_key is not None else None
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            if key == '*':
+                paths = self._filter_text(cond, value)
+            else:
+                paths = self._filter_field(key, cond, value)
+
+            if cache_key is not None and self._version == version:
+                self._cache[cache_key] = (version, paths)
+
+        return paths
+
+    def _filter_text(self, cond, value):
+        """
+        Internal function that resolves a wildcard filter
+        :param cond: str
+        :param value: variant
+        :return: set(str)
+        """
+
+        if cond in ('contains', 'not_contains') and isinstance(value, six.string_types) and \
+                TOKEN_REGEX.match(value) and TOKEN_REGEX.match(value).group() == value:
+            paths = set()
+            for token, token_paths in self._tokens.items():
+                if value in token:
+                    paths |= token_paths
+            if cond == 'not_contains':
+                paths = self.paths() - paths
+            return paths
+
+        # Values crossing token boundaries and unusual conditions are matched against the record texts, which are
+        # built when needed instead of being stored for every record
+        paths = set()
+        for path in self._store.paths():
+            if self._match_value(self.text(self._store.view(path)), cond, value):
+                paths.add(path)
+
+        return paths
+
+    def _filter_field(self, key, cond, value):
+        """
+        Internal function that resolves a field filter
+        :param key: str
+        :param cond: str
+        :param value: variant
+        :return: set(str)
+        """
+
+        values = self._values.get(key, dict())
+        keys = self._keys.get(key, dict())
+        paths = set()
+
+        # Negated conditions are resolved as the complement of their positive counterpart
+        positive_cond = {'not': 'is', 'not_contains': 'contains'}.get(cond, cond)
+
+        if positive_cond == 'is':
+            try:
+                for item_value in keys.get(value, ()):
+                    paths |= values[item_value]
+            except TypeError:
+                pass
+        elif positive_cond == 'startswith' and isinstance(value, six.string_types):
+            sorted_keys = self._sorted_string_keys(key)
+            i = bisect.bisect_left(sorted_keys, value)
+            while i < len(sorted_keys) and sorted_keys[i].startswith(value):
+                for item_value in keys[sorted_keys[i]]:
+                    paths |= values[item_value]
+                i += 1
+        else:
+            for lower_value, item_values in keys.items():
+                if self._match_value(lower_value, positive_cond, value):
+                    for item_value in item_values:
+                        paths |= values[item_value]
+
+        if cond in ('not', 'not_contains'):
+            available = set()
+            for item_paths in values.values():
+                available |= item_paths
+            paths = available - paths
+
+        for path in self._unhashable.get(key, ()):
+            if self._match_value(self._store.get(path, key), cond, value):
+                paths.add(path)
+
+        return paths
+
+    def _sorted_string_keys(self, key):
+        """
+        Internal function that returns the sorted lowered string values of the given field
+        :param key: str
+        :return: list(str)
+        """
+
+        if key not in self._sorted_keys:
+            self._sorted_keys[key] = sorted(
+                k for k in self._keys.get(key, dict()) if isinstance(k, six.string_types))
+
+        return self._sorted_keys[key]
+
+    def _match_value(self, item_value, cond, value):
+        """
+        Internal function that matches a single value following Library.match rules
+        :param item_value: variant
+        :param cond: str
+        :param value: variant
+        :return: bool
+        """
+
+        item_value = self.lower(item_value)
+        if not item_value:
+            return False
+        try:
+            if cond == 'contains':
+                return value in item_value
+            elif cond == 'not_contains':
+                return value not in item_value
+            elif cond == 'is':
+                return value == item_value
+            elif cond == 'not':
+                return value != item_value
+            elif cond == 'startswith':
+                return item_value.startswith(value)
+        except (TypeError, AttributeError):
+            return False
+
+        return False
+
+    def _add(self, path, data):
+        """
+        Internal function that adds the given path data into the index
+        :param path: str
+        :param data: dict
+        """
+
+        record = self._store.set(path, data)
+        self._cache = dict()
+        self._version += 1
+
+        for token in set(TOKEN_REGEX.findall(self.text(record))):
+            self._tokens.setdefault(token, set()).add(path)
+
+        for field, value in record.items():
+            self._field_counts[field] = self._field_counts.get(field, 0) + 1
+            if not value:
+                continue
+            try:
+                lower_value = self.lower(value)
+                self._values.setdefault(field, dict()).setdefault(value, set()).add(path)
+                self._keys.setdefault(field, dict()).setdefault(lower_value, set()).add(value)
+            except TypeError:
+                self._unhashable.setdefault(field, set()).add(path)
+                continue
+            self._sorted_keys.pop(field, None)
+
+    def _remove(self, path):
+        """
+        Internal function that removes the given path from the index
+        :param path: str
+        """
+
+        record = self._store.remove(path)
+        if record is None:
+            return
+
+        self._cache = dict()
+        self._version += 1
+
+        # Tokens do not depend on the order of the record fields, so they are the same ones found when it was added
+        for token in set(TOKEN_REGEX.findall(self.text(record))):
+            token_paths = self._tokens.get(token)
+            if token_paths is None:
+                continue
+            token_paths.discard(path)
+            if not token_paths:
+                del self._tokens[token]
+
+        for field, value in record.items():
+            self._field_counts[field] -= 1
+            if not self._field_counts[field]:
+                del self._field_counts[field]
+            if not value:
+                continue
+            unhashable = self._unhashable.get(field)
+            if unhashable and path in unhashable:
+                unhashable.discard(path)
+                continue
+            values = self._values[field]
+            values[value].discard(path)
+            if values[value]:
+                continue
+            del values[value]
+            lower_value = self.lower(value)
+            keys = self._keys[field]
+            keys[lower_value].discard(value)
+            if not keys[lower_value]:
+                del keys[lower_value]
+                self._sorted_keys.pop(field, None)
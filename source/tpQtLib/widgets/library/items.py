@@ -10,8 +10,10 @@ from __future__ import print_function, division, absolute_import
 import os
 import math
 import shutil
+import itertools
 import tempfile
 import traceback
+from collections import OrderedDict
 
 from datetime import datetime
 from functools import partial
@@ -28,7 +30,8 @@ from tpPyUtils import decorators, timedate, fileio, path as path_utils, folder a
 import tpQtLib
 from tpQtLib.core import image, qtutils
 from tpQtLib.widgets import messagebox
-from tpQtLib.widgets.library import consts, savewidget, loadwidget, exceptions, utils
+from tpQtLib.widgets.library import consts, savewidget, loadwidget, exceptions, utils, thumbnail
+from tpQtLib.widgets.library import operations as library_operations
 
 if tp.is_maya():
     from tpMayaLib.core import decorators as maya_decorators
@@ -50,8 +53,16 @@ class LibraryItem(QTreeWidgetItem, object):
     DataRole = consts.ITEM_DEFAULT_DATA_ROLE
 
     ThreadPool = QThreadPool()
+    ThumbnailCache = thumbnail.ThumbnailCache()
     DefaultThumbnailPath = tpQtLib.resource.get('icons', 'thumbnail.png')
 
+    # Pre-rendered text and icon of the painted cells, shared by all items: (cache token, column) -> (key, pixmap)
+    # Cache tokens are unique per item and never reused, unlike item ids, so entries of destroyed items are never
+    # returned for other items
+    ContentCache = OrderedDict()
+    CONTENT_CACHE_SIZE = consts.ITEM_CONTENT_CACHE_SIZE
+    CacheTokens = itertools.count(1)
+
     MAX_ICON_SIZE = consts.ITEM_DEFAULT_MAX_ICON_SIZE
     DEFAULT_FONT_SIZE = consts.ITEM_DEFAULT_FONT_SIZE
     DEFAULT_PLAYHEAD_COLOR = consts.ITEM_DEFAULT_PLAYHEAD_COLOR
@@ -87,59 +98,68 @@ class LibraryItem(QTreeWidgetItem, object):
     renamed = _libraryItemSignals.renamed
     deleted = _libraryItemSignals.deleted
 
-    def __init__(self, path='', library=None, library_window=None, *args):
-
-        self._url = None
-        self._path = None
-        self._size = None
-        self._rect = None
-        self._text_column_order = list()
-
-        self._data = dict()
-        self._item_data = dict()
-
-        self._icon = dict()
-        self._icon_path = None
-        self._thumbnail_icon = None
-        self._fonts = dict()
-        self._thread = None
-        self._pixmap = dict()
-        self._pixmap_rect = None
-        self._pixmap_scaled = None
-        self._image_sequence = None
-        self._image_sequence_path = None
-
-        self._mime_text = None
-        self._drag_enabled = True
-
-        self._under_mouse = False
-        self._search_text = None
-        self._info_widget = None
-
-        self._group_item = None
-        self._group_column = 0
-
-        self._viewer = None
-        self._stretch_to_widget = None
-
-        self._blend_value = 0.0
-        self._blend_prev_value = 0.0
-        self._blend_position = None
-        self._blending_enabled = False
-
-        self._metadata = None
-        self._type_pixmap = None
-        self._modal = None
-        self._library = None
-        self._library_window = None
+    # Default state of the items. It is stored in the class, so libraries with hundreds of thousands of items
+    # only allocate the attributes that each item changes (most of them are never painted nor edited)
+    _url = None
+    _path = None
+    _size = None
+    _rect = None
+
+    # Incremented every time something painted by the item changes, see invalidate_content
+    _revision = 0
+    _cache_token = None
+
+    # None means that item data is read from the library metadata store
+    _item_data = None
+
+    # Custom icons, pixmaps and fonts per column. Dictionaries are only created when they are set
+    _icon = None
+    _icon_path = None
+    _pixmap = None
+    _pixmap_rect = None
+    _pixmap_scaled = None
+    _fonts = None
+    _font_cache = None
+    _thumbnail_path = None
+    _thumbnail_pixmap_key = None
+    _thumbnail_worker = None
+    _image_sequence = None
+    _image_sequence_path = None
+
+    _mime_text = None
+    _drag_enabled = True
+
+    _under_mouse = False
+    _search_text = None
+    _info_widget = None
+
+    _group_item = None
+    _group_column = 0
+
+    _viewer = None
+    _stretch_to_widget = None
+
+    _blend_value = 0.0
+    _blend_prev_value = 0.0
+    _blend_position = None
+    _blending_enabled = False
+
+    _metadata = None
+    _type_pixmap = None
+    _modal = None
+    _library = None
+    _library_window = None
+
+    # Fonts and metrics of the columns that use the default font, shared by the items of each class:
+    # (class, column, pixel size) -> (pixel size, QFont, QFontMetrics)
+    FontCache = dict()
+
+    # Elided text of the painted cells, shared by all items: (cache token, column) -> (key, layout)
+    TextLayoutCache = OrderedDict()
 
+    def __init__(self, path='', library=None, library_window=None, *args):
         super(LibraryItem, self).__init__(*args)
 
-        self._worker = image.ImageWorker()
-        self._worker.setAutoDelete(False)
-        self._worker.signals.triggered.connect(self._on_thumbnail_from_image)
-        self._worker_started = False
-
         if library_window:
             self.set_library_window(library_window)
 
@@ -212,6 +232,18 @@ class LibraryItem(QTreeWidgetItem, object):
 
         return False
 
+    @classmethod
+    def match_entry(cls, path, is_dir):
+        """
+        Returns whether the given path is supported by the item when it is already known if the path is a directory
+        Used when walking folders, so items do not need to stat the path again
+        :param path: str
+        :param is_dir: bool
+        :return: bool
+        """
+
+        return cls.match(path)
+
     @decorators.abstractmethod
     def context_menu(self, menu):
         """
@@ -307,9 +339,12 @@ class LibraryItem(QTreeWidgetItem, object):
             else:
                 icon = QIcon(icon)
         if isinstance(column, (str, unicode)):
+            if self._icon is None:
+                self._icon = dict()
             self._icon[column] = icon
         else:
-            self._pixmap[column] = None
+            if self._pixmap:
+                self._pixmap.pop(column, None)
             super(LibraryItem, self).setIcon(column, icon)
 
         self.update_icon()
@@ -322,7 +357,23 @@ class LibraryItem(QTreeWidgetItem, object):
         :param font: QFont
         """
 
+        if self._fonts is None:
+            self._fonts = dict()
+            self._font_cache = dict()
         self._fonts[column] = font
+        self._font_cache.pop(column, None)
+        self.TextLayoutCache.pop(self._cache_key(column), None)
+        self.invalidate_content()
+
+    def setText(self, column, text):
+        """
+        Overrides base QTreeWidgetItem setText function
+        :param column: int
+        :param text: str
+        """
+
+        super(LibraryItem, self).setText(column, text)
+        self.invalidate_content()
 
     def textAlignment(self, column):
         """
@@ -356,7 +407,7 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: str
         """
 
-        return self.item_data().get('name')
+        return self.item_value('name')
 
     def set_name(self, text):
         """
@@ -364,9 +415,10 @@ class LibraryItem(QTreeWidgetItem, object):
         :param text: str
         """
 
-        item_data = self.item_data()
+        item_data = dict(self.item_data())
         item_data['icon'] = text
         item_data['name'] = text
+        self.set_item_data(item_data)
 
     def display_text(self, label):
         """
@@ -375,7 +427,7 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: str
         """
 
-        return str(self.item_data().get(label, ''))
+        return str(self.item_value(label, ''))
 
     def sort_text(self, label):
         """
@@ -384,7 +436,7 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: str
         """
 
-        return str(self.item_data().get(label, ''))
+        return str(self.item_value(label, ''))
 
     def dirname(self):
         """
@@ -480,6 +532,17 @@ class LibraryItem(QTreeWidgetItem, object):
             self.library().remove_path(self.path())
         self.deleted.emit(self)
 
+    def operations(self, kind, target=None):
+        """
+        Returns the file operations the library applies to move, copy or delete the item in a batch
+        Item types that keep their data in more than one path can override it to return an operation per path
+        :param kind: str, LibraryOperation.Move, LibraryOperation.Copy or LibraryOperation.Delete
+        :param target: str or None, target path of moves and copies
+        :return: list(LibraryOperation)
+        """
+
+        return [library_operations.LibraryOperation(kind, self.path(), target)]
+
     def stretch_to_widget(self):
         """
         Returns the stretch to widget widget
@@ -511,14 +574,19 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: QPixmap
         """
 
-        if not self._pixmap.get(column):
+        if column == self.DEFAULT_THUMBNAIL_COLUMN and QTreeWidgetItem.icon(self, column).isNull():
+            return self.thumbnail_pixmap()
+
+        pixmap = self._pixmap.get(column) if self._pixmap else None
+        if not pixmap:
             icon = self.icon(column)
             if icon:
                 size = QSize(self.MAX_ICON_SIZE, self.MAX_ICON_SIZE)
                 icon_size = icon.actualSize(size)
-                self._pixmap[column] = icon.pixmap(icon_size)
+                pixmap = icon.pixmap(icon_size)
+                self.set_pixmap(column, pixmap)
 
-        return self._pixmap.get(column)
+        return pixmap
 
     def set_pixmap(self, column, pixmap):
         """
@@ -527,7 +595,10 @@ class LibraryItem(QTreeWidgetItem, object):
         :param pixmap: QPixmap
         """
 
+        if self._pixmap is None:
+            self._pixmap = dict()
         self._pixmap[column] = pixmap
+        self.invalidate_content()
 
     def take_from_tree(self):
         """
@@ -753,7 +824,12 @@ class LibraryItem(QTreeWidgetItem, object):
         path = path_utils.normalize_path(path)
         self._path = path
 
-        self.update_item_data()
+        # Items created by a library read their data from its metadata store
+        if self._library is not None and path in self._library.metadata_store():
+            self._item_data = None
+            self.invalidate_content()
+        else:
+            self.update_item_data()
 
     """
     ##########################################################################################
@@ -827,18 +903,63 @@ class LibraryItem(QTreeWidgetItem, object):
     def item_data(self):
         """
         Returns the current item data
-        :return: dict
+        If no data has been set, a read only view of the data stored in the metadata store of the library is
+        returned, so no dictionary is built. Subclasses that override this function must not modify the returned
+        data, but a copy of it
+        :return: dict or LibraryRecord
+        """
+
+        if self._item_data is not None:
+            return self._item_data
+
+        library = self.library()
+        if library is not None:
+            record = library.metadata_store().view(self._path)
+            if record is not None:
+                return record
+
+        return self.create_item_data() if self._path else dict()
+
+    def item_value(self, field, default=None):
+        """
+        Returns the value of the given field of the item data without building the whole item data
+        If the item class overrides item_data, values are read from it, so overridden values are returned
+        :param field: str
+        :param default: variant
+        :return: variant
+        """
+
+        if self._item_data is not None:
+            return self._item_data.get(field, default)
+
+        if self.overrides('item_data'):
+            return self.item_data().get(field, default)
+
+        library = self.library()
+        if library is not None and self._path in library.metadata_store():
+            return library.metadata_store().get(self._path, field, default)
+
+        return self.item_data().get(field, default)
+
+    @classmethod
+    def overrides(cls, name):
+        """
+        Returns whether the given class overrides the given LibraryItem function
+        :param name: str
+        :return: bool
         """
 
-        return self._item_data
+        function = getattr(cls, name)
+        return getattr(function, '__func__', function) is not LibraryItem.__dict__[name]
 
     def set_item_data(self, data):
         """
         Sets the given dictionary as teh data for the item
-        :param data: dict
+        :param data: dict or None, if None the item data is read from the metadata store of the library
         """
 
         self._item_data = data
+        self.invalidate_content()
 
     def create_item_data(self):
         """
@@ -874,8 +995,11 @@ class LibraryItem(QTreeWidgetItem, object):
         """
 
         self.update_item_data()
-        if self.library():
-            self.library().update_item(self)
+        library = self.library()
+        if library:
+            library.update_item(self)
+            if self._path in library.metadata_store():
+                self._item_data = None
 
     """
     ##########################################################################################
@@ -890,7 +1014,7 @@ class LibraryItem(QTreeWidgetItem, object):
         """
 
         if not self._search_text:
-            self._search_text = str(self._data)
+            self._search_text = str(self.item_data())
 
         return self._search_text
 
@@ -931,6 +1055,8 @@ class LibraryItem(QTreeWidgetItem, object):
 
         if self.treeWidget():
             return self.treeWidget().column_from_label(label)
+        elif self._viewer:
+            return self._viewer.tree_widget().column_from_label(label)
 
         return None
 
@@ -943,6 +1069,8 @@ class LibraryItem(QTreeWidgetItem, object):
 
         if self.treeWidget():
             return self.treeWidget().label_from_column(column)
+        elif self._viewer:
+            return self._viewer.tree_widget().label_from_column(column)
 
         return None
 
@@ -958,12 +1086,21 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: libraryViewer
         """
 
-        viewer_widget = None
+        viewer_widget = self._viewer
         if self.treeWidget():
             viewer_widget = self.treeWidget().parent()
 
         return viewer_widget
 
+    def set_viewer(self, viewer):
+        """
+        Sets the viewer that displays the item when the item is not added to the viewer tree widget
+        Used by items created on demand by LibraryItemModel
+        :param viewer: LibraryViewer
+        """
+
+        self._viewer = viewer
+
     def dpi(self):
         """
         Return current dpi
@@ -1374,8 +1511,12 @@ class LibraryItem(QTreeWidgetItem, object):
     def reset_image_sequence(self):
         """
         Reset image sequence
+        Image sequence is stopped, so its pack file and decoded frames are released
         """
 
+        if isinstance(self._image_sequence, image.ImageSequence):
+            self._image_sequence.stop()
+            self._image_sequence.clear_cache()
         self._image_sequence = None
 
     def play(self):
@@ -1383,20 +1524,24 @@ class LibraryItem(QTreeWidgetItem, object):
         Start play image sequence
         """
 
-        self.reset_image_sequence()
         path = self.image_sequence_path() or self.thumbnail_path()
-        movie = None
-
-        if os.path.isfile(path) and path.lower().endswith('.gif'):
-            movie = QMovie(path)
-            movie.setCacheMode(QMovie.CacheAll)
-            movie.frameChanged.connect(self._on_frame_changed)
-        elif os.path.isdir(path):
-            if not self.image_sequence():
+        movie = self.image_sequence()
+
+        # Image sequences are reused, so their file list is only read once
+        if not isinstance(movie, image.ImageSequence) or movie.dirname() != path:
+            self.reset_image_sequence()
+            movie = None
+            if os.path.isfile(path) and path.lower().endswith('.gif'):
+                movie = QMovie(path)
+                movie.setCacheMode(QMovie.CacheAll)
+                movie.frameChanged.connect(self._on_frame_changed)
+            elif os.path.isdir(path) or image.ImageSequencePack.is_pack(path):
                 movie = image.ImageSequence(path)
                 movie.frameChanged.connect(self._on_frame_changed)
 
         if movie:
+            if isinstance(movie, image.ImageSequence) and self.viewer():
+                movie.set_frame_size(self.viewer().icon_size())
             self.set_image_sequence(movie)
             self.image_sequence().start()
 
@@ -1405,17 +1550,28 @@ class LibraryItem(QTreeWidgetItem, object):
         Function that updates the current frame
         """
 
-        if self.image_sequence():
-            pixmap = self.image_sequence().current_pixmap()
+        movie = self.image_sequence()
+        if not movie:
+            return
+
+        if isinstance(movie, QMovie):
+            pixmap = movie.currentPixmap()
+        else:
+            pixmap = movie.current_pixmap()
+        if pixmap is not None:
             self.setIcon(0, pixmap)
 
     def stop(self):
         """
         Stop play image sequence
+        Decoded frames and pack files are released, so only the image sequences being played use them
         """
 
-        if self.image_sequence():
-            self.image_sequence().stop()
+        movie = self.image_sequence()
+        if movie:
+            movie.stop()
+            if isinstance(movie, image.ImageSequence):
+                movie.clear_cache()
 
     def playhead_color(self):
         """
@@ -1471,10 +1627,14 @@ class LibraryItem(QTreeWidgetItem, object):
         Clears the thumbnail cache
         """
 
-        self._pixmap = dict()
+        self._pixmap = None
         self._pixmap_rect = None
         self._pixmap_scaled = None
-        self._thumbnail_icon = None
+        self._thumbnail_pixmap_key = None
+        if self._thumbnail_path:
+            self.ThumbnailCache.refresh(self._thumbnail_path)
+            self._thumbnail_path = None
+        self.invalidate_content()
 
     def update(self):
         """
@@ -1495,8 +1655,11 @@ class LibraryItem(QTreeWidgetItem, object):
                     x = event.pos().x() - self.rect().x()
                     width = self.rect().width()
                     percent = 1.0 - (float(width - x) / float(width))
-                    frame = int(self.image_sequence().frameCount() * percent)
-                    self.image_sequence().jumpToFrame(frame)
+                    movie = self.image_sequence()
+                    if isinstance(movie, QMovie):
+                        movie.jumpToFrame(int(movie.frameCount() * percent))
+                    else:
+                        movie.jump_to_frame(int(movie.frame_count() * percent))
                     self.update_frame()
 
     """ 
@@ -1518,7 +1681,44 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: QIcon
         """
 
-        return QIcon(self.default_thumbnail_path())
+        return QIcon(self.default_thumbnail_pixmap())
+
+    def default_thumbnail_pixmap(self):
+        """
+        Returns the default thumbnail pixmap
+        :return: QPixmap
+        """
+
+        path = self.default_thumbnail_path()
+        size = self.thumbnail_size()
+        pixmap = self.ThumbnailCache.pixmap(path, size)
+        if pixmap is None and self.ThumbnailCache.load(path, size):
+            pixmap = self.ThumbnailCache.pixmap(path, size)
+
+        if pixmap is None:
+            pixmap = QPixmap(path)
+
+        return pixmap
+
+    def thumbnail_size(self):
+        """
+        Returns the size thumbnails are decoded and cached at
+        :return: QSize
+        """
+
+        return QSize(self.MAX_ICON_SIZE, self.MAX_ICON_SIZE)
+
+    def thumbnail_cache_path(self):
+        """
+        Returns the folder where pre-scaled thumbnails are cached on disk
+        :return: str or None
+        """
+
+        library = self.library()
+        if not library or not library.path():
+            return None
+
+        return library.thumbnail_cache_path()
 
     def thumbnail_icon(self):
         """
@@ -1526,17 +1726,60 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: QIcon
         """
 
-        thumbnail_path = self.thumbnail_path()
-        if not self._thumbnail_icon:
-            if self.ENABLE_THUMBNAIL_THREAD and not self._worker_started:
-                self._worker_started = True
-                self._worker.set_path(thumbnail_path)
-                self.ThreadPool.start(self._worker)
-                self._thumbnail_icon = self.default_thumbnail_icon()
-            else:
-                self._thumbnail_icon = QIcon(thumbnail_path)
+        return QIcon(self.thumbnail_pixmap())
+
+    def thumbnail_pixmap(self):
+        """
+        Returns the thumbnail pixmap from the thumbnail cache
+        If the thumbnail is not loaded yet, the default thumbnail is returned while it loads in a thread
+        :return: QPixmap
+        """
+
+        if not self._thumbnail_path:
+            self._thumbnail_path = self.thumbnail_path()
+
+        thumbnail_path = self._thumbnail_path
+        size = self.thumbnail_size()
+        pixmap = self.ThumbnailCache.pixmap(thumbnail_path, size)
+        if pixmap is None:
+            if self.ENABLE_THUMBNAIL_THREAD:
+                self.load_thumbnail()
+            elif self.ThumbnailCache.load(thumbnail_path, size, cache_path=self.thumbnail_cache_path()):
+                pixmap = self.ThumbnailCache.pixmap(thumbnail_path, size)
+
+        if pixmap is None:
+            self._thumbnail_pixmap_key = None
+            return self.default_thumbnail_pixmap()
+
+        self._thumbnail_pixmap_key = pixmap.cacheKey()
+
+        return pixmap
+
+    def load_thumbnail(self):
+        """
+        Requests the thumbnail to be loaded in a thread if it is not already in the thumbnail cache
+        When the item is displayed in a viewer, the viewer thumbnail scheduler decides when the thumbnail is loaded
+        """
+
+        if not self._thumbnail_path:
+            self._thumbnail_path = self.thumbnail_path()
 
-        return self._thumbnail_icon
+        thumbnail_path = self._thumbnail_path
+        size = self.thumbnail_size()
+        if self.ThumbnailCache.contains(thumbnail_path, size) or self.ThumbnailCache.is_failed(thumbnail_path, size):
+            return
+
+        viewer = self.viewer()
+        if viewer:
+            viewer.thumbnail_scheduler().request(self, thumbnail_path, size, cache_path=self.thumbnail_cache_path())
+            return
+
+        if not self._thumbnail_worker:
+            self._thumbnail_worker = thumbnail.ThumbnailWorker(
+                self.ThumbnailCache, thumbnail_path, size, cache_path=self.thumbnail_cache_path())
+            self._thumbnail_worker.setAutoDelete(False)
+            self._thumbnail_worker.signals.triggered.connect(self._on_thumbnail_from_image)
+            self.ThreadPool.start(self._thumbnail_worker)
 
     def _thumbnail_from_image(self, image):
         """
@@ -1545,10 +1788,8 @@ class LibraryItem(QTreeWidgetItem, object):
         """
 
         self.clear_cache()
-        pixmap = QPixmap()
-        pixmap.convertFromImage(image)
-        icon = QIcon(pixmap)
-        self._thumbnail_icon = icon
+        self._thumbnail_path = self.thumbnail_path()
+        self.ThumbnailCache.insert(self._thumbnail_path, self.thumbnail_size(), image)
         if self.viewer():
             self.viewer().update()
 
@@ -1573,10 +1814,17 @@ class LibraryItem(QTreeWidgetItem, object):
         :return: QFont
         """
 
-        default = QTreeWidgetItem.font(self, column)
-        font = self._fonts.get(column, default)
-        font.setPixelSize(self.font_size() * self.dpi())
-        return font
+        # Cached fonts can be shared by many items, so a copy is returned
+        return QFont(self._cached_font(column)[1])
+
+    def font_metrics(self, column):
+        """
+        Returns the metrics of the font of the given column
+        :param column: int
+        :return: QFontMetrics
+        """
+
+        return self._cached_font(column)[2]
 
     def text_width(self, column):
         """
@@ -1586,10 +1834,35 @@ class LibraryItem(QTreeWidgetItem, object):
         """
 
         text = self.text(column)
-        font = self.font(column)
-        metrics = QFontMetrics(font)
-        text_width = metrics.width(text)
-        return text_width
+        return self.font_metrics(column).width(text)
+
+    def _cached_font(self, column):
+        """
+        Internal function that returns the font of the given column and its metrics
+        They are only computed again when the font size (which depends on DPI) changes
+        :param column: int
+        :return: tuple(int, QFont, QFontMetrics)
+        """
+
+        pixel_size = self.font_size() * self.dpi()
+        if self._fonts and column in self._fonts:
+            cache = self._font_cache
+            key = column
+        else:
+            cache = self.FontCache
+            key = (type(self), column, pixel_size)
+
+        cached = cache.get(key)
+        if cached is None or cached[0] != pixel_size:
+            if cache is self.FontCache:
+                font = QTreeWidgetItem.font(self, column)
+            else:
+                font = QFont(self._fonts[column])
+            font.setPixelSize(pixel_size)
+            cached = (pixel_size, font, QFontMetrics(font))
+            cache[key] = cached
+
+        return cached
 
     def text_color(self):
         """
@@ -1673,15 +1946,114 @@ class LibraryItem(QTreeWidgetItem, object):
         painter.save()
         try:
             self.paint_background(painter, option, index)
-            if self.is_text_visible():
-                self.paint_text(painter, option, index)
-            self.paint_icon(painter, option, index)
+            self.paint_content(painter, option, index)
             if index.column() == 0:
                 if self.image_sequence():
                     self.paint_playhead(painter, option)
         finally:
             painter.restore()
 
+    def paint_content(self, painter, option, index):
+        """
+        Paints the text and the icon of the item
+        They do not depend on mouse hover, so they are rendered once into a pixmap that is drawn while the item
+        size, selection, text, font and icon do not change
+        :param painter: QPainter
+        :param option: QStyleOptionViewItem
+        :param index: QModelIndex
+        """
+
+        rect = option.rect
+        if rect.width() <= 0 or rect.height() <= 0:
+            return
+
+        column = index.column()
+        device = painter.device()
+        ratio = device.devicePixelRatioF() if hasattr(device, 'devicePixelRatioF') else 1.0
+        key = self._content_key(option, column, ratio)
+
+        cache_key = self._cache_key(column)
+        cached = self.ContentCache.pop(cache_key, None)
+        hit = cached is not None and cached[0] == key
+        if not hit:
+            cached = (key, self._render_content(painter, option, index, ratio))
+        self.ContentCache[cache_key] = cached
+        while len(self.ContentCache) > self.CONTENT_CACHE_SIZE:
+            self.ContentCache.popitem(last=False)
+
+        painter.drawPixmap(rect.topLeft(), cached[1])
+
+        viewer = self.viewer()
+        paint_profiler = viewer.paint_profiler() if hasattr(viewer, 'paint_profiler') else None
+        if paint_profiler and paint_profiler.is_enabled():
+            paint_profiler.record_content_cache(hit)
+
+    def invalidate_content(self):
+        """
+        Increments the revision of the item, so its text and icon are rendered again next time they are painted
+        Subclasses that paint state not set through the item setters must call it when that state changes
+        """
+
+        self._revision += 1
+
+    def _cache_key(self, column):
+        """
+        Internal function that returns the key of the given column in the caches shared by all items
+        :param column: int
+        :return: tuple(int, int)
+        """
+
+        if self._cache_token is None:
+            self._cache_token = next(LibraryItem.CacheTokens)
+
+        return self._cache_token, column
+
+    def _content_key(self, option, column, ratio):
+        """
+        Internal function that returns the values that define how the text and the icon of a cell are painted
+        Item and viewer revisions change when the values painted by them change, so they are not computed here
+        Item data read from the library store is painted again when the library data changes
+        :param option: QStyleOptionViewItem
+        :param column: int
+        :param ratio: float, device pixel ratio
+        :return: tuple
+        """
+
+        rect = option.rect
+        library = self._library
+        data_version = library.index().version() if library is not None and self._item_data is None else None
+
+        return (
+            self._revision, self.viewer().content_revision(), data_version,
+            rect.width(), rect.height(), ratio, bool(option.state & QStyle.State_Selected))
+
+    def _render_content(self, painter, option, index, ratio):
+        """
+        Internal function that renders the text and the icon of a cell into a transparent pixmap
+        :param painter: QPainter, painter the pixmap will be drawn with
+        :param option: QStyleOptionViewItem
+        :param index: QModelIndex
+        :param ratio: float, device pixel ratio
+        :return: QPixmap
+        """
+
+        rect = option.rect
+        pixmap = QPixmap(int(rect.width() * ratio), int(rect.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+
+        content_painter = QPainter(pixmap)
+        try:
+            content_painter.setRenderHints(painter.renderHints())
+            content_painter.translate(-rect.x(), -rect.y())
+            if self.is_text_visible():
+                self.paint_text(content_painter, option, index)
+            self.paint_icon(content_painter, option, index)
+        finally:
+            content_painter.end()
+
+        return pixmap
+
     def paint_background(self, painter, option, index):
         """
         Draw the background for the item
@@ -1736,11 +2108,20 @@ class LibraryItem(QTreeWidgetItem, object):
         """
         Scale the given pixmap to given rect size
         The scaled pixmap is cached and its reused if its called with the same size
+        Thumbnail pixmaps are cached in the thumbnail cache, so they are shared between items
         :param pixmap: QPixmap
         :param rect: QRect
         :return: QPixmap
         """
 
+        if self._thumbnail_path and self._thumbnail_pixmap_key == pixmap.cacheKey():
+            size = rect.size()
+            scaled_pixmap = self.ThumbnailCache.pixmap(self._thumbnail_path, size)
+            if scaled_pixmap is None:
+                scaled_pixmap = pixmap.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                self.ThumbnailCache.insert(self._thumbnail_path, size, scaled_pixmap)
+            return scaled_pixmap
+
         rect_changed = True
 
         if self._pixmap_rect:
@@ -1777,14 +2158,9 @@ class LibraryItem(QTreeWidgetItem, object):
         x, y = 0, 0
         align = Qt.AlignHCenter | Qt.AlignVCenter
 
-        is_align_bottom = align == Qt.AlignBottom | Qt.AlignLeft or align == Qt.AlignBottom | Qt.AlignHCenter or align == Qt.AlignBottom | Qt.AlignRight
-        is_align_h_center = align == Qt.AlignHCenter or align == Qt.AlignCenter or align == Qt.AlignHCenter | Qt.AlignBottom or align == Qt.AlignHCenter | Qt.AlignTop
-        is_align_v_center = align == Qt.AlignVCenter or align == Qt.AlignCenter or align == Qt.AlignVCenter | Qt.AlignLeft or align == Qt.AlignVCenter | Qt.AlignRight
-        if is_align_h_center:
+        if align & Qt.AlignHCenter:
             x += float(rect.width() - pixmap.width()) / 2
-        elif is_align_v_center:
-            y += float(rect.height() - pixmap.height()) / 2
-        elif is_align_bottom:
+        elif align & (Qt.AlignVCenter | Qt.AlignBottom):
             y += float(rect.height() - pixmap.height()) / 2
 
         pixmap_rect.translate(x, y)
@@ -1821,6 +2197,50 @@ class LibraryItem(QTreeWidgetItem, object):
 
         self._paint_text(painter, option, column)
 
+    def column_text(self, column):
+        """
+        Returns the text painted in the given column
+        :param column: int
+        :return: str
+        """
+
+        if self.viewer().is_icon_view():
+            return self.name()
+
+        label = self.label_from_column(column)
+        return self.display_text(label)
+
+    def text_layout(self, column, text, width, padding):
+        """
+        Returns the given text elided to fit the given width using the font of the given column
+        Results are cached per column until the text, width or font change
+        :param column: int
+        :param text: str
+        :param width: int
+        :param padding: int
+        :return: tuple(str, bool), text to paint and whether it has been elided or not
+        """
+
+        font_key = self._cached_font(column)[0]
+        key = (text, width, padding, font_key)
+        cache_key = self._cache_key(column)
+        cached = self.TextLayoutCache.pop(cache_key, None)
+        if cached is not None and cached[0] == key:
+            self.TextLayoutCache[cache_key] = cached
+            return cached[1]
+
+        metrics = self.font_metrics(column)
+        text_width = metrics.width(text) if text else 1
+        if text_width > width - padding:
+            layout = (metrics.elidedText(text, Qt.ElideRight, width), True)
+        else:
+            layout = (text, False)
+        self.TextLayoutCache[cache_key] = (key, layout)
+        while len(self.TextLayoutCache) > self.CONTENT_CACHE_SIZE:
+            self.TextLayoutCache.popitem(last=False)
+
+        return layout
+
     def _paint_text(self, painter, option, column):
         """
         Internal function used to paint the text
@@ -1829,11 +2249,7 @@ class LibraryItem(QTreeWidgetItem, object):
         :param column: int
         """
 
-        if self.viewer().is_icon_view():
-            text = self.name()
-        else:
-            label = self.label_from_column(column)
-            text = self.display_text(label)
+        text = self.column_text(column)
 
         color = self.text_color()
         is_selected = option.state & QStyle.State_Selected
@@ -1852,13 +2268,8 @@ class LibraryItem(QTreeWidgetItem, object):
 
         font = self.font(column)
         align = self.textAlignment(column)
-        metrics = QFontMetrics(font)
-        text_width = 1
-        if text:
-            text_width = metrics.width(text)
-        if text_width > visual_rect.width() - padding:
-            visual_width = visual_rect.width()
-            text = metrics.elidedText(text, Qt.ElideRight, visual_width)
+        text, is_elided = self.text_layout(column, text, visual_rect.width(), padding)
+        if is_elided:
             align = Qt.AlignLeft
         if self.viewer().is_icon_view():
             align = align | Qt.AlignBottom
@@ -2022,16 +2433,13 @@ class LibraryItem(QTreeWidgetItem, object):
     ##########################################################################################
     """
 
-    def _on_thumbnail_from_image(self, image):
+    def _on_thumbnail_from_image(self, worker):
         """
-        Internal callback function that is called when an image object has finished loading
+        Internal callback function that is called when a thumbnail worker has finished loading
+        :param worker: ThumbnailWorker
         """
 
-        self.clear_cache()
-        pixmap = QPixmap()
-        pixmap.convertFromImage(image)
-        icon = QIcon(pixmap)
-        self._thumbnail_icon = icon
+        self._thumbnail_worker = None
         if self.viewer():
             self.viewer().update()
 
@@ -2039,6 +2447,7 @@ class LibraryItem(QTreeWidgetItem, object):
         """
         Internal callback function that is triggered when the movei object updates to the given
         frame
+        While scrubbing, frames are updated by image_sequence_event
         :return:
         """
 
@@ -2085,6 +2494,7 @@ class LibraryGroupItem(LibraryItem, object):
         super(LibraryGroupItem, self).__init__(*args)
 
         self._children = list()
+        self._level = 0
 
         self._font = self.font(0)
         self._font.setBold(True)
@@ -2120,7 +2530,7 @@ class LibraryGroupItem(LibraryItem, object):
         :return: QRect
         """
         rect = QRect(option.rect)
-        rect.setX(10 * self.dpi())
+        rect.setX((10 + 20 * self._level) * self.dpi())
         rect.setWidth(self.sizeHint().width())
         return rect
 
@@ -2141,6 +2551,14 @@ class LibraryGroupItem(LibraryItem, object):
         """
         return None
 
+    def load_thumbnail(self):
+        """
+        Overrides base LibraryItem load_thumbnail function
+        Group items do not display thumbnails
+        """
+
+        pass
+
     def paint_row(self, painter, option, index):
         """
         Overrides base paint_row icon function
@@ -2187,6 +2605,22 @@ class LibraryGroupItem(LibraryItem, object):
         painter.setBrush(QBrush(color))
         painter.drawRect(visual_rect)
 
+    def level(self):
+        """
+        Returns the nesting level of the group, 0 for top level groups
+        :return: int
+        """
+
+        return self._level
+
+    def set_level(self, level):
+        """
+        Sets the nesting level of the group
+        :param level: int
+        """
+
+        self._level = level
+
     def children(self):
         """
         Returns the children for the group
@@ -2279,6 +2713,20 @@ class LibraryFolderItem(LibraryItem, object):
 
         return False
 
+    @classmethod
+    def match_entry(cls, path, is_dir):
+        """
+        Returns whether the given path is supported by the item when it is already known if the path is a directory
+        :param path: str
+        :param is_dir: bool
+        :return: bool
+        """
+
+        if cls.match.__func__ is not LibraryFolderItem.match.__func__:
+            return cls.match(path)
+
+        return is_dir
+
     @classmethod
     def show_create_widget(cls, library_window):
         """
@@ -2371,6 +2819,7 @@ class LibraryFolderItem(LibraryItem, object):
 
         data = super(LibraryFolderItem, self).item_data()
         if data.get('path').endswith('Trash'):
+            data = dict(data)
             data['iconPath'] = self.TrashIconPath
 
         return data
@@ -10,20 +10,183 @@ from __future__ import print_function, division, absolute_import
 import os
 import time
 import copy
-from collections import OrderedDict
+import heapq
+import threading
 
 from Qt.QtCore import *
 
 from tpPyUtils import decorators, path as path_utils
+from tpPyUtils.externals import six
 
 import tpQtLib
-from tpQtLib.widgets.library import consts, utils
+from tpQtLib.widgets.library import consts, utils, exceptions, index, storage, sorter, metadata, watcher
+from tpQtLib.widgets.library import operations as library_operations
+
+
+class LibrarySyncProgress(object):
+    """
+    Class that tracks the progress of a library sync shared between all the scan threads
+    """
+
+    def __init__(self, expected=0):
+        super(LibrarySyncProgress, self).__init__()
+
+        self._lock = threading.Lock()
+        self._done = 0
+        self._pending = 0
+        self._expected = expected
+        self._percent = 0.0
+        self._canceled = threading.Event()
+
+    def add_pending(self, count):
+        """
+        Adds the given number of folders to scan
+        :param count: int
+        """
+
+        with self._lock:
+            self._pending += count
+
+    def add_done(self, count):
+        """
+        Marks the given number of pending folders as scanned
+        :param count: int
+        """
+
+        with self._lock:
+            self._done += count
+            self._pending -= count
+
+    def percent(self):
+        """
+        Returns the scanned percentage. Number of folders of the previous sync is used as the expected total
+        :return: float
+        """
+
+        with self._lock:
+            total = max(self._done + self._pending, self._expected)
+            if total:
+                self._percent = max(self._percent, min(float(self._done) / float(total), 1.0))
+
+        return self._percent
+
+    def cancel(self):
+        """
+        Requests the cancellation of the sync
+        """
+
+        self._canceled.set()
+
+    def is_canceled(self):
+        """
+        Returns whether the sync was canceled or not
+        :return: bool
+        """
+
+        return self._canceled.is_set()
+
+
+class LibrarySyncThread(QThread, object):
+    """
+    Thread that scans the library file system, so sync does not block the UI
+    Scan result must be applied from the main thread using Library.apply_scan
+    """
+
+    progressChanged = Signal(str, float)
+
+    def __init__(self, library, incremental=True, parent=None):
+        super(LibrarySyncThread, self).__init__(parent)
+
+        self._library = library
+        self._incremental = incremental
+        self._result = None
+
+        # Storage is not thread safe, so its state is taken in the main thread before the scan starts
+        self._storage_exists = library.storage().exists()
+
+    def run(self):
+        self._result = self._library.scan(
+            percent_callback=self.progressChanged.emit, incremental=self._incremental,
+            storage_exists=self._storage_exists)
+
+    def result(self):
+        """
+        Returns the result of the scan or None if it was canceled
+        :return: dict or None
+        """
+
+        return self._result
+
+    def cancel(self):
+        """
+        Cancels the scan
+        """
+
+        self._library.cancel_sync()
+
+
+class LibrarySearchThread(QThread, object):
+    """
+    Thread that resolves library search queries, so searching does not block the UI
+    First results are streamed using resultsAvailable before the whole result set is sorted and grouped
+    Results must be applied from the main thread
+    """
+
+    resultsAvailable = Signal(object, object)
+
+    def __init__(self, library, queries, sort_by=None, group_by=None, parent=None):
+        super(LibrarySearchThread, self).__init__(parent)
+
+        self._library = library
+        self._queries = queries
+        self._sort_by = sort_by or list()
+        self._group_by = group_by or list()
+        self._canceled = False
+        self._result = None
+
+    def run(self):
+        try:
+            self._result = self._library.resolve_search(
+                self._queries, self._sort_by, self._group_by,
+                is_canceled=self.is_canceled, results_callback=self.resultsAvailable.emit)
+        except Exception as exc:
+            tpQtLib.logger.error('Error while searching library: {}'.format(exc))
+            self._result = None
+
+    def result(self):
+        """
+        Returns the found paths and grouped paths or None if search was canceled
+        :return: tuple(list(str), dict) or None
+        """
+
+        return self._result
+
+    def cancel(self):
+        """
+        Cancels the search. Results of a canceled search are never applied
+        """
+
+        self._canceled = True
+
+    def is_canceled(self):
+        """
+        Returns whether the search was canceled or not
+        :return: bool
+        """
+
+        return self._canceled
 
 
 class Library(QObject, object):
 
     Name = consts.LIBRARY_DEFAULT_NAME
 
+    # Storage class used to persist the data base. If None, storage is picked using data_path() extension
+    STORAGE_CLASS = None
+
+    # If True, JSON data bases are migrated to a SQLite data base the first time they are opened
+    MIGRATE_JSON_STORAGE = consts.MIGRATE_JSON_STORAGE
+
     Fields = [
         'icon',
         'name',
@@ -47,25 +210,46 @@ class Library(QObject, object):
     ]
 
     dataChanged = Signal()
+    pathsChanged = Signal(object)
     searchStarted = Signal()
+    searchResultsAvailable = Signal()
     searchFinished = Signal()
     searchTimeFinished = Signal()
+    resultsChanged = Signal()
 
     def __init__(self, path=None, library_window=None, *args):
 
         self._path = path
         self._mtime = None
-        self._data = dict()
+        self._data_mtime = None
+        self._storage = None
+        self._storage_data_path = None
         self._items = list()
+        self._items_by_path = dict()
+        self._items_order = dict()
+        self._metadata_store = metadata.LibraryMetadataStore()
+        self._index = index.LibraryIndex(store=self._metadata_store)
+        self._sorter = sorter.LibrarySorter(self._index)
         self._fields = list()
         self._sort_by = list()
         self._group_by = list()
         self._results = list()
         self._grouped_results = dict()
+        self._result_paths = list()
+        self._grouped_result_paths = dict()
+        self._paths_order = None
+        self._lazy = False
         self._queries = dict()
         self._global_queries = dict()
         self._search_time = 0
+        self._search_start_time = 0
+        self._search_thread = None
         self._search_enabled = True
+        self._facets_cache = dict()
+        self._sync_progress = None
+        self._queued_folders = set()
+        self._watcher = None
+        self._watched_folders = list()
         self._library_window = library_window
 
         super(Library, self).__init__(*args)
@@ -73,6 +257,8 @@ class Library(QObject, object):
         self.set_path(path)
         self.set_dirty(True)
 
+        self.dataChanged.connect(self._on_data_changed)
+
     @decorators.abstractmethod
     def data_path(self):
         """
@@ -106,9 +292,9 @@ class Library(QObject, object):
                 else:
                     item_value = data.get(key)
 
-                if isinstance(value, (unicode, str)):
+                if isinstance(value, six.string_types):
                     value = value.lower()
-                if isinstance(item_value, (unicode, str)):
+                if isinstance(item_value, six.string_types):
                     item_value = item_value.lower()
                 if not item_value:
                     match = False
@@ -136,6 +322,7 @@ class Library(QObject, object):
     def sorted(items, sort_by):
         """
         Return the given data sorted using the sorty_by argument
+        All the fields are sorted in a single pass using a composite key
         :param items: list(LibraryItem)
         :param sort_by: list(str)
         :return: list(LibraryItem)
@@ -143,18 +330,8 @@ class Library(QObject, object):
 
         tpQtLib.logger.debug('Sort by: {}'.format(sort_by))
         t = time.time()
-        for field in reversed(sort_by):
-            tokens = field.split(':')
-            reverse = False
-            if len(tokens) > 1:
-                field = tokens[0]
-                reverse = tokens[1] != 'asc'
-
-            def sort_key(item):
-                default = False if reverse else ''
-                return item.item_data().get(field, default)
-
-            items = sorted(items, key=sort_key, reverse=reverse)
+        parsed_fields = sorter.parse_fields(sort_by)
+        items = sorted(items, key=lambda item: sorter.sort_key(item.item_data(), parsed_fields))
         tpQtLib.logger.debug('Sort items took {}'.format(time.time() - t))
 
         return items
@@ -162,46 +339,42 @@ class Library(QObject, object):
     @staticmethod
     def group_items(items, fields):
         """
-        Group the given items by the given field
+        Group the given items by the given fields
+        Each field adds a nesting level, so grouping by two fields returns group -> subgroup -> items
         :param items: list(LibraryItem)
         :param fields: list(str)
         :return: dict
         """
 
         tpQtLib.logger.debug('Group by: {}'.format(fields))
-
-        # TODO: Implement support for multiple grups not only top level group
-
-        if fields:
-            field = fields[0]
-        else:
-            return {'None': items}
-
         t = time.time()
-        results_ = dict()
-        tokens = field.split(':')
+        results = sorter.group(items, fields, lambda item: item.item_data())
+        tpQtLib.logger.debug('Group Items Took {}'.format(time.time() - t))
 
-        reverse = False
-        if len(tokens) > 1:
-            field = tokens[0]
-            reverse = tokens[1] != 'asc'
+        return results
 
-        for item in items:
-            value = item.item_data().get(field)
-            if value:
-                results_.setdefault(value, list())
-                results_[value].append(item)
+    def sorted_paths(self, paths, sort_by):
+        """
+        Return the given paths sorted using the sort_by argument
+        Ordering of all the library paths is cached until data or sort fields change, so no item is needed
+        :param paths: list(str)
+        :param sort_by: list(str)
+        :return: list(str)
+        """
 
-        groups = sorted(results_.keys(), reverse=reverse)
+        return self._sorter.sort(paths, sort_by)
 
-        results = OrderedDict()
-        for group in groups:
-            results[group] = results_[group]
+    def group_paths(self, paths, fields):
+        """
+        Group the given paths by the given fields
+        Same as group_items but values are read from the index, so no item is needed
+        :param paths: list(str)
+        :param fields: list(str)
+        :return: dict
+        """
 
-        tpQtLib.logger.debug('Group Items Took {}'.format(time.time() - t))
+        return self._sorter.group(paths, fields)
 
-        return results
-    
     def manager(self):
         """
         Returns data manager used by this library
@@ -236,6 +409,7 @@ class Library(QObject, object):
         """
 
         self._path = path
+        self._update_watched_paths()
 
     def settings(self):
         """
@@ -270,26 +444,48 @@ class Library(QObject, object):
         :return: list
         """
 
-        results = dict()
-        queries = queries or list()
+        return self.facets([field], queries=queries, sort_by=sort_by)[field]
+
+    def facets(self, fields, queries=None, sort_by='name'):
+        """
+        Returns all the values of the given fields and how many items matching the given queries have each value
+        Queries are resolved once for all the fields and results are cached until data changes
+        >>> facets(['type', 'category'])
+        {'type': [{'name': 'anim', 'count': 10}, ...], 'category': [...]}
+        :param fields: list(str)
+        :param queries: variant, None or list(dict)
+        :param sort_by: str
+        :return: dict(str, list(dict))
+        """
+
+        queries = list(queries or list())
         queries.extend(self._global_queries.values())
 
-        items = self.create_items()
-        if not items:
-            return results
+        if self.is_lazy():
+            item_paths = self.read()
+        else:
+            if not self.create_items():
+                return dict((field, list()) for field in fields)
+            item_paths = self._items_by_path
 
-        for item in items:
-            value = item.item_data().get(field)
-            if value:
-                results.setdefault(value, {'count': 0, 'name': value})
-                match = self.match(item.item_data(), queries)
-                if match:
-                    results[value]['count'] += 1
+        cache_key = (self._index.version(), tuple(fields), repr(queries), sort_by)
+        if cache_key in self._facets_cache:
+            return self._facets_cache[cache_key]
 
-        def sort_key(facet):
-            return facet.get(sort_by)
+        matches = self._index.search(queries)
+        results = dict()
+        for field in fields:
+            facets = list()
+            for value, paths in self._index.values(field).items():
+                paths = paths.intersection(item_paths)
+                if not paths:
+                    continue
+                facets.append({'count': len(paths.intersection(matches)), 'name': value})
+            results[field] = sorted(facets, key=lambda facet: sorter.sort_value(facet.get(sort_by)))
 
-        return sorted(results.values(), key=sort_key)
+        self._facets_cache[cache_key] = results
+
+        return results
 
     def mtime(self):
         """
@@ -297,12 +493,7 @@ class Library(QObject, object):
         :return: float or None
         """
 
-        path = self.data_path()
-        mtime = None
-        if os.path.exists(path):
-            mtime = os.path.getmtime(path)
-
-        return mtime
+        return self.storage().mtime()
 
     def sort_by(self):
         """
@@ -338,6 +529,24 @@ class Library(QObject, object):
 
         self._group_by = fields
 
+    def is_lazy(self):
+        """
+        Returns whether items are only created when they are requested or not
+        :return: bool
+        """
+
+        return self._lazy
+
+    def set_lazy(self, flag):
+        """
+        Sets whether items are only created when they are requested or not
+        If True, searches only resolve item paths and items are created by the viewer model when they are displayed
+        :param flag: bool
+        """
+
+        self._lazy = flag
+        self.clear()
+
     def fields(self):
         """
         Returns all the fields for the library
@@ -346,6 +555,41 @@ class Library(QObject, object):
 
         return self._fields
 
+    def storage(self):
+        """
+        Returns the storage used to read and write the data base located in data_path()
+        :return: LibraryStorage
+        """
+
+        data_path = path_utils.normalize_path(self.data_path())
+        if self._storage is None or self._storage_data_path != data_path:
+            if self._storage is not None:
+                self._storage.close()
+            if self.STORAGE_CLASS:
+                self._storage = self.STORAGE_CLASS(data_path)
+            else:
+                self._storage = storage.storage_from_path(data_path, migrate=self.MIGRATE_JSON_STORAGE)
+            self._storage_data_path = data_path
+
+        return self._storage
+
+    def index(self):
+        """
+        Returns the inverted index used to resolve search queries
+        :return: LibraryIndex
+        """
+
+        return self._index
+
+    def metadata_store(self):
+        """
+        Returns the columnar store that holds the metadata of the library items
+        Items of this library read their data from it
+        :return: LibraryMetadataStore
+        """
+
+        return self._metadata_store
+
     def is_dirty(self):
         """
         Returns whether the data has changed on disk or not
@@ -367,31 +611,56 @@ class Library(QObject, object):
 
     def read(self):
         """
-        Read the data from disk and returns it a dictionary object
-        :return: dict
+        Read the data from disk and returns it
+        Data is only kept in the metadata store, so a read only view of it is returned. Use the library functions
+        (update_paths, remove_paths ...) to modify it
+        :return: LibraryRecords, read only mapping of path -> record
         """
 
         if not self.path():
             tpQtLib.logger.info('No path set for reading the data from disk')
-            return self._data
+            return self._metadata_store.records()
 
         if self.is_dirty():
-            self._data = utils.read_json(self.data_path())
+            mtime = self.mtime()
+            if self._data_mtime is None or self._data_mtime != mtime:
+                self._index.set_data(self.storage().read())
+                self._data_mtime = mtime
+                self._paths_order = None
+                self._index.set_mtime(mtime)
             self.set_dirty(False)
 
-        return self._data
+        return self._metadata_store.records()
 
     def save(self, data):
         """
-        Write the given data dict object to the data on disk
+        Write the given data dict object to the data on disk, replacing all the previous data
         :param data: dict
         """
 
         if not self.path():
             tpQtLib.logger.info('No path set for saving the data to disk')
 
-        utils.save_json(self.data_path(), data)
-        self.set_dirty(True)
+        data = dict((path, dict(record)) for path, record in data.items())
+        self._index.set_data(data)
+        self.storage().write(data)
+        self._update_data_mtime()
+
+    def save_paths(self, paths=None, removed=None):
+        """
+        Writes the data of the given paths and deletes the removed ones from the data base
+        Only the given paths are written, the rest of the data base is not modified
+        :param paths: list(str) or None
+        :param removed: list(str) or None
+        """
+
+        if not self.path():
+            tpQtLib.logger.info('No path set for saving the data to disk')
+
+        store = self._metadata_store
+        records = dict((path, store.record(path)) for path in paths or list() if path in store)
+        self.storage().update(records, removed=removed)
+        self._update_data_mtime()
 
     def is_search_enabled(self):
         """
@@ -450,16 +719,23 @@ class Library(QObject, object):
 
         tpQtLib.logger.debug('Saving Items: {}'.format(items))
 
-        data_ = self.read()
+        paths = list()
+        added = list()
+        self.read()
         for item in items:
             path = item.path()
-            data = item.item_data()
-            data_.setdefault(path, {})
-            data_[path].update(data)
+            if path not in self._metadata_store:
+                added.append(path)
+            record = self._metadata_store.record(path) or dict()
+            record.update(item.item_data())
+            self._index.update(path, record)
+            paths.append(path)
 
-        self.save(data_)
+        self.save_paths(paths)
 
         if emit_data_changed:
+            if added:
+                self.pathsChanged.emit({'moved': dict(), 'copied': dict(), 'added': added, 'removed': list()})
             self.search()
             self.dataChanged.emit()
 
@@ -471,11 +747,10 @@ class Library(QObject, object):
 
         tpQtLib.logger.debug('Loading item data: {}'.format(items))
 
-        data = self.read()
+        self.read()
         for item in items:
-            key = item.id()
-            if key in data:
-                item.set_item_data(data[key])
+            if item.id() in self._metadata_store:
+                item.set_item_data(None)
 
     def update_paths(self, paths, data):
         """
@@ -484,15 +759,14 @@ class Library(QObject, object):
         :param data: dict
         """
 
-        data_ = self.read()
+        self.read()
         paths = path_utils.normalize_paths(paths)
         for path in paths:
-            if path in data_:
-                data_[path].update(data)
-            else:
-                data_[path] = data
+            record = self._metadata_store.record(path) or dict()
+            record.update(data)
+            self._index.update(path, record)
 
-        self.save(data_)
+        self.save_paths(paths)
 
     def add_paths(self, paths, data=None):
         """
@@ -537,6 +811,129 @@ class Library(QObject, object):
 
         return target
 
+    def move_items(self, items, target_folder, copy=False, force=False):
+        """
+        Moves, or copies, the given items into the given folder with a single data base write
+        Items whose class overrides LibraryItem rename or copy functions are moved with them instead
+        :param items: list(LibraryItem)
+        :param target_folder: str
+        :param copy: bool
+        :param force: bool, whether items are renamed with a unique name if the target folder already contains them
+        :return: dict, changes done (see apply_operations)
+        """
+
+        kind = library_operations.LibraryOperation.Copy if copy else library_operations.LibraryOperation.Move
+        function_name = 'copy' if copy else 'rename'
+        target_folder = path_utils.normalize_path(target_folder)
+
+        operations = list()
+        sources = list()
+        for item in items:
+            target = target_folder + '/' + (item.name() or os.path.basename(item.path()))
+            if item.overrides(function_name):
+                if force:
+                    target = utils.generate_unique_path(target)
+                getattr(item, function_name)(target)
+                continue
+            operations.extend(item.operations(kind, target))
+            sources.append((item, item.path()))
+
+        batch_items = [item for item, _ in sources]
+        changes = self.apply_operations(operations, force=force, items=None if copy else batch_items)
+        for item, source in sources:
+            if copy and source in changes['copied']:
+                item.copied.emit(item, source, changes['copied'][source])
+            elif not copy and item.path() != source:
+                item.renamed.emit(item, source, item.path())
+
+        return changes
+
+    def rename_items(self, renames, force=False):
+        """
+        Renames the given items with a single data base write
+        Items whose class overrides LibraryItem rename function are renamed with it instead
+        :param renames: list(tuple(LibraryItem, str)), items and their new paths or names
+        :param force: bool, whether items are renamed with a unique name if their new path already exists
+        :return: dict, changes done (see apply_operations)
+        """
+
+        operations = list()
+        sources = list()
+        for item, target in renames:
+            if item.overrides('rename'):
+                item.rename(target)
+                continue
+            source = item.path()
+            if '/' not in target:
+                target = os.path.dirname(source) + '/' + target
+            if item.extension() and not target.endswith(item.extension()):
+                target += item.extension()
+            operations.extend(item.operations(library_operations.LibraryOperation.Move, target))
+            sources.append((item, source))
+
+        changes = self.apply_operations(operations, force=force, items=[item for item, _ in sources])
+        for item, source in sources:
+            if item.path() != source:
+                item.renamed.emit(item, source, item.path())
+
+        return changes
+
+    def delete_items(self, items):
+        """
+        Deletes the given items from disk and from the data base with a single data base write
+        Items whose class overrides LibraryItem delete function are deleted with it instead
+        :param items: list(LibraryItem)
+        :return: dict, changes done (see apply_operations)
+        """
+
+        operations = list()
+        batch_items = list()
+        for item in items:
+            if item.overrides('delete'):
+                item.delete()
+                continue
+            operations.extend(item.operations(library_operations.LibraryOperation.Delete))
+            batch_items.append(item)
+
+        try:
+            changes = self.apply_operations(operations)
+        finally:
+            for item in batch_items:
+                if not os.path.exists(item.path()):
+                    item.deleted.emit(item)
+
+        return changes
+
+    def apply_operations(self, operations, force=False, items=None):
+        """
+        Applies the given file system operations and commits all the data base changes in a single write
+        File system operations are done in worker threads. If a move or a copy fails, the ones already done are
+        reverted. A single pathsChanged and dataChanged notification is emitted for the whole batch
+        :param operations: list(LibraryOperation)
+        :param force: bool, whether existing targets are renamed with a unique name instead of raising an error
+        :param items: list(LibraryItem) or None, items whose paths are updated if they are moved
+        :return: dict, with 'moved' and 'copied' dicts (source path -> target path) and 'removed' paths
+        """
+
+        self.read()
+        operations = library_operations.resolve_targets(operations, force=force)
+        failed = library_operations.run(operations)
+
+        done = [operation for operation in operations if operation.done]
+        changes = self._commit_operations(done, items=items)
+        if done:
+            self.pathsChanged.emit(changes)
+            self.search()
+            self.dataChanged.emit()
+
+        if failed:
+            raise exceptions.LibraryOperationError(
+                'Cannot apply {} of {} operations:\n{}'.format(
+                    len(failed), len(operations), '\n'.join('{}: {}'.format(op, op.error) for op in failed)),
+                operations=failed)
+
+        return changes
+
     def rename_path(self, source, target):
         """
         Renames the suorce path to the given target name
@@ -545,8 +942,13 @@ class Library(QObject, object):
         :return: str
         """
 
-        utils.rename_path_in_file(self.data_path(), source, target)
-        self.set_dirty(True)
+        source = path_utils.normalize_path(source)
+        target = path_utils.normalize_path(target)
+
+        self.read()
+        self.storage().rename(source, target)
+        self._index.rename(source, target)
+        self._update_data_mtime()
 
         return target
 
@@ -564,13 +966,12 @@ class Library(QObject, object):
         :param paths: list(str)
         """
 
-        data = self.read()
+        self.read()
         paths = path_utils.normalize_paths(paths)
         for path in paths:
-            if path in data:
-                del data[path]
+            self._index.remove(path)
 
-        self.save(data)
+        self.save_paths(removed=paths)
 
     def find_items(self, queries):
         """
@@ -579,7 +980,6 @@ class Library(QObject, object):
         :return: list(LibraryItem)
         """
 
-        fields = list()
         results = list()
 
         queries = copy.copy(queries)
@@ -589,19 +989,120 @@ class Library(QObject, object):
         if not items:
             return results
 
-        for item in items:
-            match = self.match(item.item_data(), queries)
-            if match:
-                results.append(item)
-            fields.extend(item.item_data().keys())
+        self._fields = self._index.fields()
 
-        self._fields = list(set(fields))
+        paths = self._index.search(queries)
+        results = [self._items_by_path[path] for path in paths if path in self._items_by_path]
 
         if self.sort_by():
-            results = self.sorted(results, self.sort_by())
+            ranks = self._sorter.ranks(self.sort_by())
+            results.sort(key=lambda item: ranks.get(item.id(), len(ranks)))
+        else:
+            results.sort(key=lambda item: self._items_order.get(item.id(), 0))
 
         return results
 
+    def filter_paths(self, paths, queries):
+        """
+        Returns the given paths that match the given queries, without searching the rest of the library
+        :param paths: list(str)
+        :param queries: list(dict)
+        :return: list(str)
+        """
+
+        queries = copy.copy(queries)
+        queries.extend(self._global_queries.values())
+
+        self.read()
+
+        return [path for path in paths if self.match(self._index.record(path) or dict(), queries)]
+
+    def find_paths(self, queries):
+        """
+        Get the item paths that match the given queries without creating any item
+        :param queries: list(dict)
+        :return: list(str)
+        """
+
+        queries = copy.copy(queries)
+        queries.extend(self._global_queries.values())
+
+        if not self.read():
+            return list()
+
+        self._fields = self._index.fields()
+        self.paths_order()
+
+        return self.resolve_search(queries, self.sort_by())[0]
+
+    def resolve_search(self, queries, sort_by, group_by=None, is_canceled=lambda: False, results_callback=None):
+        """
+        Resolves the given queries, including global ones, into sorted and grouped paths
+        Only reads from the library index, so it can be called from a thread once the data has been read
+        :param queries: list(dict)
+        :param sort_by: list(str)
+        :param group_by: list(str) or None
+        :param is_canceled: fn() -> bool, called between steps to stop the search
+        :param results_callback: fn(list(str), dict), called with the first sorted results before grouping
+        :return: tuple(list(str), dict) or None if search was canceled
+        """
+
+        paths = self._index.search(queries)
+        if is_canceled():
+            return None
+
+        paths_order = self._paths_order or dict()
+        stream_count = consts.LIBRARY_DEFAULT_STREAM_RESULTS
+
+        if not sort_by and results_callback and len(paths) > stream_count:
+            first_paths = heapq.nsmallest(stream_count, paths, key=lambda path: paths_order.get(path, 0))
+            results_callback(first_paths, self.group_paths(first_paths, group_by))
+            if is_canceled():
+                return None
+
+        if sort_by:
+            paths = self.sorted_paths(paths, sort_by)
+        else:
+            paths = sorted(paths, key=lambda path: paths_order.get(path, 0))
+        if is_canceled():
+            return None
+
+        if sort_by and results_callback and len(paths) > stream_count:
+            first_paths = paths[:stream_count]
+            results_callback(first_paths, self.group_paths(first_paths, group_by))
+            if is_canceled():
+                return None
+
+        return paths, self.group_paths(paths, group_by)
+
+    def paths_order(self):
+        """
+        Returns the position of each path in the library data, used when no sort field is set
+        :return: dict(str, int)
+        """
+
+        if self._paths_order is None:
+            self._paths_order = dict((path, i) for i, path in enumerate(self.read()))
+
+        return self._paths_order
+
+    def item_from_path(self, path):
+        """
+        Creates a new item for the given path and loads its library data
+        :param path: str
+        :return: LibraryItem or None
+        """
+
+        item = self._library_window.manager().item_from_path(
+            path, library=self, library_window=self._library_window)
+        if item is None:
+            return None
+
+        if path in self._metadata_store:
+            item.set_item_data(None)
+
+        return item
+
     def find_items_by_path(self, item_path):
         """
         Returns item with given path
@@ -614,9 +1115,9 @@ class Library(QObject, object):
         if not items:
             return found_items
 
-        for item in items:
-            if item.path() == item_path:
-                found_items.append(item)
+        item = self._items_by_path.get(item_path)
+        if item is not None and item.path() == item_path:
+            found_items.append(item)
 
         return found_items
 
@@ -688,30 +1189,116 @@ class Library(QObject, object):
 
         t = time.time()
         tpQtLib.logger.debug('Searching items ...')
+        self.cancel_search()
         self.searchStarted.emit()
-        self._results = self.find_items(self.queries())
-        self._grouped_results = self.group_items(self._results, self.group_by())
+        if self.is_lazy():
+            paths = self.find_paths(self.queries())
+            self._set_search_results(paths, self.group_paths(paths, self.group_by()))
+        else:
+            self._results = self.find_items(self.queries())
+            self._grouped_results = self.group_items(self._results, self.group_by())
+            self._result_paths = [item.id() for item in self._results]
+            self._grouped_result_paths = sorter.map_groups(
+                self._grouped_results, lambda items: [item.id() for item in items])
         self.searchFinished.emit()
         self._search_time = time.time() - t
         self.searchTimeFinished.emit()
         tpQtLib.logger.debug('Search time: {}'.format(self._search_time))
 
+    def search_async(self):
+        """
+        Run a search using the queries added to library data in a thread
+        searchResultsAvailable is emitted when the first results are found and searchFinished when all results are
+        found. A search in progress is canceled when a new one starts
+        """
+
+        if not self.is_search_enabled():
+            return
+
+        self.cancel_search()
+
+        self._search_start_time = time.time()
+        tpQtLib.logger.debug('Searching items in thread ...')
+        self.searchStarted.emit()
+
+        # Data is read and items are created in the main thread, so the thread only reads the index
+        if self.is_lazy():
+            self.read()
+        elif not self.create_items():
+            self._set_search_results(list(), dict())
+            self.searchFinished.emit()
+            return
+        self._fields = self._index.fields()
+        self.paths_order()
+
+        queries = copy.copy(self.queries())
+        queries.extend(self._global_queries.values())
+
+        self._search_thread = LibrarySearchThread(
+            self, queries, list(self.sort_by()), list(self.group_by()), parent=self)
+        self._search_thread.resultsAvailable.connect(self._on_search_results_available)
+        self._search_thread.finished.connect(self._on_search_thread_finished)
+        self._search_thread.start()
+
+    def is_searching(self):
+        """
+        Returns whether a threaded search is in progress or not
+        :return: bool
+        """
+
+        return self._search_thread is not None
+
+    def cancel_search(self):
+        """
+        Cancels the threaded search in progress, if any
+        """
+
+        if self._search_thread is not None:
+            self._search_thread.cancel()
+            self._search_thread = None
+
     def results(self):
         """
         Return the items found after a search is executed
+        If the library is lazy, items are created when this function is called
         :return: list(LibraryItem)
         """
 
+        if self.is_lazy() and self._result_paths and not self._results:
+            self._results = self._items_from_paths(self._result_paths)
+
         return self._results
 
     def grouped_results(self):
         """
         Return the results grouped after a search is executed
+        If the library is lazy, items are created when this function is called
         :return: dict
         """
 
+        if self.is_lazy() and self._grouped_result_paths and not self._grouped_results:
+            items_by_path = dict((item.id(), item) for item in self.results())
+            self._grouped_results = sorter.map_groups(
+                self._grouped_result_paths, lambda paths: [items_by_path[p] for p in paths if p in items_by_path])
+
         return self._grouped_results
 
+    def result_paths(self):
+        """
+        Return the item paths found after a search is executed
+        :return: list(str)
+        """
+
+        return self._result_paths
+
+    def grouped_result_paths(self):
+        """
+        Return the item paths grouped after a search is executed
+        :return: dict(str, list(str))
+        """
+
+        return self._grouped_result_paths
+
     def search_time(self):
         """
         Return the time taken to run a search
@@ -720,40 +1307,416 @@ class Library(QObject, object):
 
         return self._search_time
 
-    def sync(self, percent_callback=lambda message, percent: None):
+    def sync(self, percent_callback=lambda message, percent: None, incremental=True):
         """
         Sync the file sytem wit hthe library data
+        :param percent_callback: fn(str, float)
+        :param incremental: bool, whether to scan only the folders modified since last sync or not
+        :return: bool, False if sync was canceled
         """
 
         if not self.path():
             tpQtLib.logger.warning('No path set for syncing data')
-            return
+            return False
 
-        data = self.read()
+        result = self.scan(percent_callback=percent_callback, incremental=incremental)
+        if result is None:
+            self.update_queued_folders()
+            return False
 
-        for path in data.keys():
-            if not os.path.exists(path):
-                del data[path]
+        self.apply_scan(result, percent_callback=percent_callback)
+
+        return True
+
+    def scan(self, percent_callback=lambda message, percent: None, incremental=True, storage_exists=None):
+        """
+        Walks the library file system looking for items. Each top level folder is scanned in its own thread.
+        If incremental, only folders modified since last sync are listed, the rest are resolved using the
+        folders cache stored in sync_cache_path()
+        This function does not modify the library, so it can be called from a thread other than the main one
+        The library is syncing until the result is applied with apply_scan, so changes found meanwhile are queued
+        :param percent_callback: fn(str, float)
+        :param incremental: bool
+        :param storage_exists: bool or None, whether the data base exists. Storage is only accessed to check it if
+            None, so it must be given when scanning from other thread
+        :return: dict or None, scan result to pass to apply_scan or None if the scan was canceled
+        """
+
+        if not self.path():
+            tpQtLib.logger.warning('No path set for syncing data')
+            return None
+
+        if storage_exists is None:
+            storage_exists = self.storage().exists()
+
+        cache = dict()
+        if incremental and storage_exists and os.path.isfile(self.sync_cache_path()):
+            try:
+                cache = utils.read_json(self.sync_cache_path())
+            except Exception as exc:
+                tpQtLib.logger.warning('Impossible to read library sync cache: {}'.format(exc))
 
+        progress = LibrarySyncProgress(expected=len(cache))
+        self._sync_progress = progress
+        manager = self.manager()
         depth = self.recursive_depth()
-        items = list(self._library_window.manager().find_items(self.path(), depth=depth))
-        count = len(items)
-        for i, item in enumerate(items):
-            percent = (float(i+1)/float(count))
-            percent_callback('', percent)
+        root_path = path_utils.normalize_path(self.path())
+
+        percent_callback('Syncing', 0.0)
+        progress.add_pending(1)
+        found_entries, found_paths = manager.scan_folder(
+            root_path, depth=depth, cache=cache, recursive=False, progress=progress)
+
+        folders = six.moves.queue.Queue()
+        top_folders = cache.get(root_path, dict()).get('folders', list()) if depth != 1 else list()
+        progress.add_pending(len(top_folders))
+        for folder in top_folders:
+            folders.put(folder)
+
+        def _scan():
+            while not progress.is_canceled():
+                try:
+                    folder = folders.get_nowait()
+                except six.moves.queue.Empty:
+                    return
+                try:
+                    result = manager.scan_folder(folder, depth=depth, cache=cache, level=1, progress=progress)
+                except Exception as exc:
+                    tpQtLib.logger.error('Error while scanning folder "{}": {}'.format(folder, exc))
+                    progress.add_done(1)
+                    continue
+                found_entries.extend(result[0])
+                found_paths.extend(result[1])
+
+        threads = list()
+        for i in range(min(len(top_folders), consts.DEFAULT_SYNC_THREADS)):
+            thread = threading.Thread(target=_scan)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.1)
+                percent_callback('Syncing', progress.percent())
+
+        if progress.is_canceled():
+            self._sync_progress = None
+            percent_callback('Sync canceled', -1)
+            return None
+
+        # Remove cached folders that are not reachable from library root anymore
+        valid_folders = set()
+        folders_to_check = [root_path]
+        while folders_to_check:
+            folder = folders_to_check.pop()
+            if folder in valid_folders or folder not in cache:
+                continue
+            valid_folders.add(folder)
+            folders_to_check.extend(cache[folder].get('folders', list()))
+        for folder in list(cache.keys()):
+            if folder not in valid_folders:
+                del cache[folder]
+
+        percent_callback('Syncing', 1.0)
+
+        return {'entries': found_entries, 'paths': found_paths, 'cache': cache}
+
+    def apply_scan(self, result, percent_callback=lambda message, percent: None):
+        """
+        Updates library data with the given scan result, saves it and emits dataChanged signal
+        Items of the found entries are created here, so this function must be called from the main thread
+        Folders changed while syncing are updated once the scan result is applied
+        :param result: dict, result returned by scan function
+        :param percent_callback: fn(str, float)
+        """
+
+        # Sync replaces all the data, so it is copied into a dictionary that can be modified by post_sync
+        data = dict((path, dict(record)) for path, record in self.read().items())
+
+        found = set()
+        for item in self.manager().items_from_entries(result.get('entries', list())):
             path = item.path()
+            found.add(path)
             item_data = data.get(path, {})
             item_data.update(item.item_data())
             data[path] = item_data
 
+        missing_paths = [path for path in result.get('paths', list()) if path not in data]
+        found.update(result.get('paths', list()))
+        for item in self.manager().items_from_paths(missing_paths):
+            data[item.path()] = dict(item.item_data())
+
+        for path in list(data.keys()):
+            if path not in found and not os.path.exists(path):
+                del data[path]
+
         percent_callback('Post Sync', -1)
         self.post_sync(data)
 
         percent_callback('Saving Cache', -1)
         self.save(data)
+        utils.save_json(self.sync_cache_path(), result.get('cache', dict()))
+
+        self._sync_progress = None
+        self.dataChanged.emit()
+        self.update_queued_folders()
+
+    def sync_cache_path(self):
+        """
+        Returns path where folders modification times of the last sync are stored
+        :return: str
+        """
+
+        return os.path.splitext(self.data_path())[0] + consts.SYNC_CACHE_SUFFIX
+
+    def thumbnail_cache_path(self):
+        """
+        Returns folder where pre-scaled item thumbnails are cached
+        :return: str
+        """
+
+        return os.path.splitext(self.data_path())[0] + consts.THUMBNAIL_CACHE_SUFFIX
+
+    def is_syncing(self):
+        """
+        Returns whether a sync scan is running or not
+        :return: bool
+        """
+
+        return self._sync_progress is not None
+
+    def queued_folders(self):
+        """
+        Returns the changed folders found by the watcher while syncing that are not updated yet
+        :return: list(str)
+        """
+
+        return sorted(self._queued_folders)
+
+    def update_queued_folders(self):
+        """
+        Updates the folders changed while syncing. Nothing is done if a sync is still running
+        :return: dict, changes returned by update_folders
+        """
+
+        if self.is_syncing() or not self._queued_folders:
+            return {'moved': dict(), 'copied': dict(), 'added': list(), 'removed': list()}
+
+        folders = sorted(self._queued_folders)
+        self._queued_folders = set()
+
+        return self._update_changed_folders(folders)
+
+    def cancel_sync(self):
+        """
+        Cancels current sync scan
+        """
+
+        if self._sync_progress:
+            self._sync_progress.cancel()
+
+    def watcher(self):
+        """
+        Returns the watcher used to find changes done on disk outside the library
+        :return: LibraryWatcher or None, None if watching is disabled
+        """
+
+        return self._watcher
+
+    def is_watching(self):
+        """
+        Returns whether file system changes are applied to the library as they happen
+        :return: bool
+        """
+
+        return self._watcher is not None
+
+    def set_watching(self, flag):
+        """
+        Sets whether file system changes are applied to the library as they happen
+        The library root and the watched folders are watched. Changes are applied with update_folders
+        :param flag: bool
+        """
 
+        if bool(flag) == self.is_watching():
+            return
+
+        if flag:
+            self._watcher = watcher.LibraryWatcher(parent=self)
+            self._watcher.foldersChanged.connect(self._on_watched_folders_changed)
+            self._update_watched_paths()
+        else:
+            self._watcher.clear()
+            self._watcher.deleteLater()
+            self._watcher = None
+
+    def watched_folders(self):
+        """
+        Returns the folders watched besides the library root
+        :return: list(str)
+        """
+
+        return self._watched_folders
+
+    def set_watched_folders(self, folders):
+        """
+        Sets the folders watched besides the library root, such as the ones displayed in the sidebar
+        :param folders: list(str)
+        """
+
+        self._watched_folders = list(folders)
+        self._update_watched_paths()
+
+    def update_folders(self, folders):
+        """
+        Lists again only the entries of the given folders and applies the added and removed paths to the data base
+        and the index with a single write. Current search results are updated without searching again
+        New folders found are scanned recursively. Folders outside the library are ignored
+        :param folders: list(str)
+        :return: dict, with 'added' and 'removed' paths (and empty 'moved' and 'copied' dicts)
+        """
+
+        changes = {'moved': dict(), 'copied': dict(), 'added': list(), 'removed': list()}
+        manager = self.manager()
+        if not self.path() or not manager:
+            return changes
+
+        root_path = path_utils.normalize_path(self.path())
+        depth = self.recursive_depth()
+        max_level = 0 if depth == 1 else depth
+        folders = set(path_utils.normalize_path(folder) for folder in folders)
+        folders = [folder for folder in folders if folder == root_path or folder.startswith(root_path + '/')]
+        if not folders:
+            return changes
+
+        items_valid = bool(self._items) and not self.is_dirty()
+        data = self.read()
+
+        children = dict((folder, set()) for folder in folders)
+        for path in data:
+            parent = path.rpartition('/')[0]
+            if parent in children:
+                children[parent].add(path)
+
+        found_entries = list()
+        deleted = set()
+        for folder in folders:
+            level = folder[len(root_path):].count('/')
+            if level > max_level:
+                continue
+            if not os.path.isdir(folder):
+                deleted.add(folder)
+                continue
+            found = set()
+            for cls, path in manager.scan_folder(folder, depth=depth, level=level, recursive=False)[0]:
+                found.add(path)
+                if path in data:
+                    continue
+                found_entries.append((cls, path))
+                if cls.EnableNestedItems and level < max_level and os.path.isdir(path):
+                    found_entries.extend(manager.scan_folder(path, depth=depth, level=level + 1)[0])
+            deleted.update(children[folder] - found)
+
+        removed = [path for path in data if utils.find_parent_path(path, deleted)] if deleted else list()
+        records = dict(
+            (item.path(), dict(item.item_data())) for item in manager.items_from_entries(found_entries))
+        if not records and not removed:
+            return changes
+
+        with self.storage().batch():
+            for path in removed:
+                self._index.remove(path)
+            for path, record in records.items():
+                self._index.update(path, record)
+            self.storage().update(records, removed=removed)
+        self._update_data_mtime()
+
+        changes['added'] = list(records)
+        changes['removed'] = removed
+
+        # Items of unchanged paths are kept, so the ones already displayed are not created again
+        if items_valid:
+            self._update_items(changes['added'], removed)
+            self.set_dirty(False)
+        if items_valid or self.is_lazy():
+            self._update_results(changes['added'], removed)
+        else:
+            self.search()
+        self.pathsChanged.emit(changes)
         self.dataChanged.emit()
 
+        return changes
+
+    def _on_data_changed(self):
+        """
+        Internal callback function that is called when library data changes
+        """
+
+        self._facets_cache = dict()
+
+    def _on_watched_folders_changed(self, folders):
+        """
+        Internal callback function that is called when the library watcher finds changes in the watched folders
+        Changes found while syncing are queued, because the scan may have listed those folders before they changed
+        :param folders: list(str)
+        """
+
+        if self.is_syncing():
+            self._queued_folders.update(folders)
+            return
+
+        self._update_changed_folders(folders)
+
+    def _update_changed_folders(self, folders):
+        """
+        Internal function that updates the given changed folders logging any error
+        :param folders: list(str)
+        :return: dict, changes returned by update_folders
+        """
+
+        try:
+            return self.update_folders(folders)
+        except Exception as exc:
+            tpQtLib.logger.error('Error while updating changed folders {}: {}'.format(folders, exc))
+            return {'moved': dict(), 'copied': dict(), 'added': list(), 'removed': list()}
+
+    def _on_search_results_available(self, paths, grouped_paths):
+        """
+        Internal callback function that is called when the search thread finds its first results
+        :param paths: list(str)
+        :param grouped_paths: dict(str, list(str))
+        """
+
+        if self.sender() is not self._search_thread:
+            return
+
+        self._set_search_results(paths, grouped_paths)
+        self.searchResultsAvailable.emit()
+
+    def _on_search_thread_finished(self):
+        """
+        Internal callback function that is called when the search thread finishes
+        """
+
+        thread = self.sender()
+        thread.deleteLater()
+        if thread is not self._search_thread:
+            return
+
+        self._search_thread = None
+        result = thread.result()
+        if result is None:
+            # Search failed and the error was already logged, so current results are kept
+            self.searchFinished.emit()
+            return
+
+        self._set_search_results(*result)
+        self.searchFinished.emit()
+        self._search_time = time.time() - self._search_start_time
+        self.searchTimeFinished.emit()
+        tpQtLib.logger.debug('Search time: {}'.format(self._search_time))
+
     def post_sync(self, data):
         """
         This function is called after a data sync, but before save and dataChanged signal is emitted
@@ -779,16 +1742,197 @@ class Library(QObject, object):
                 library_window=self._library_window
             )
             self._items = list(items)
+            self._items_by_path = dict((item.id(), item) for item in self._items)
+            self._items_order = dict((item.id(), i) for i, item in enumerate(self._items))
             self.load_item_data(self._items)
+            # Facets count only the created items, so cached counts are not valid anymore
+            self._facets_cache = dict()
 
         return self._items
 
+    def _set_search_results(self, paths, grouped_paths):
+        """
+        Internal function that stores the given search results
+        If the library is not lazy, the items of the given paths are also stored
+        :param paths: list(str)
+        :param grouped_paths: dict(str, list(str))
+        """
+
+        self._result_paths = paths
+        self._grouped_result_paths = grouped_paths
+        if self.is_lazy():
+            self._results = list()
+            self._grouped_results = dict()
+            return
+
+        items_by_path = self._items_by_path
+        self._results = [items_by_path[path] for path in paths if path in items_by_path]
+        self._grouped_results = sorter.map_groups(
+            grouped_paths, lambda group_paths: [items_by_path[p] for p in group_paths if p in items_by_path])
+
+    def _update_watched_paths(self):
+        """
+        Internal function that updates the folders watched by the library watcher
+        """
+
+        if not self._watcher:
+            return
+
+        self._watcher.set_paths([self.path()] + self._watched_folders if self.path() else list())
+
+    def _update_items(self, added, removed):
+        """
+        Internal function that updates the created items with the given added and removed paths
+        :param added: list(str)
+        :param removed: list(str)
+        """
+
+        self._facets_cache = dict()
+        if removed:
+            removed = set(removed)
+            self._items = [item for item in self._items if item.id() not in removed]
+            for path in removed:
+                self._items_by_path.pop(path, None)
+                self._items_order.pop(path, None)
+
+        order = max(self._items_order.values()) + 1 if self._items_order else 0
+        for item in self._items_from_paths(added):
+            self._items.append(item)
+            self._items_by_path[item.id()] = item
+            self._items_order[item.id()] = order
+            order += 1
+
+    def _update_results(self, added, removed):
+        """
+        Internal function that updates the current search results with the given added and removed paths without
+        searching again. Only the added paths are matched against the current queries
+        :param added: list(str)
+        :param removed: list(str)
+        """
+
+        if not self.is_search_enabled():
+            return
+
+        # A threaded search in progress may have missed the changes, so it is started again
+        if self.is_searching():
+            self.search_async()
+            return
+
+        queries = copy.copy(self.queries())
+        queries.extend(self._global_queries.values())
+
+        removed = set(removed)
+        data = self.read()
+        paths = [path for path in self._result_paths if path not in removed]
+        paths.extend(path for path in added if path in data and self.match(data[path], queries))
+
+        # New paths are appended to the data, so they already are in data order if no sort field is set
+        if self.sort_by():
+            paths = self.sorted_paths(paths, self.sort_by())
+
+        self._set_search_results(paths, self.group_paths(paths, self.group_by()))
+        self.resultsChanged.emit()
+
+    def _items_from_paths(self, paths):
+        """
+        Internal function that creates the items of the given paths
+        :param paths: list(str)
+        :return: list(LibraryItem)
+        """
+
+        items = list()
+        for path in paths:
+            item = self.item_from_path(path)
+            if item is not None:
+                items.append(item)
+
+        return items
+
+    def _commit_operations(self, operations, items=None):
+        """
+        Internal function that applies to the library data the given operations, already done on disk
+        Moved paths are renamed with a single pass over the data and all the changes are written in one batch
+        :param operations: list(LibraryOperation)
+        :param items: list(LibraryItem) or None, items whose paths are updated if they are moved
+        :return: dict
+        """
+
+        moved = dict()
+        copied = dict()
+        deleted = set()
+        for operation in operations:
+            if operation.kind == library_operations.LibraryOperation.Move:
+                moved[operation.source] = operation.target
+            elif operation.kind == library_operations.LibraryOperation.Copy:
+                copied[operation.source] = operation.target
+            else:
+                deleted.add(operation.source)
+
+        changes = {'moved': moved, 'copied': copied, 'removed': list()}
+        if not operations:
+            return changes
+
+        data = self.read()
+        records = dict()
+        removed = [path for path in data if utils.find_parent_path(path, deleted)] if deleted else list()
+        if copied:
+            for path, record in data.items():
+                new_path = utils.rename_paths_value(path, copied)
+                if new_path != path:
+                    records[new_path] = dict((k, utils.rename_paths_value(v, copied)) for k, v in record.items())
+            for target in copied.values():
+                records.setdefault(target, dict())
+
+        with self.storage().batch():
+            if moved:
+                self.storage().rename_paths(moved)
+                self._index.rename_paths(moved)
+            for path in removed:
+                self._index.remove(path)
+            for item in items or list():
+                source = item.path()
+                target = utils.rename_paths_value(source, moved)
+                if target == source:
+                    continue
+                item.set_path(target)
+                record = dict(data.get(target, dict()))
+                record.update(item.create_item_data())
+                records[target] = record
+                item.set_item_data(None)
+            for path, record in records.items():
+                merged = self._metadata_store.record(path) or dict()
+                merged.update(record)
+                records[path] = merged
+                self._index.update(path, merged)
+            self.storage().update(records, removed=removed)
+
+        self._update_data_mtime()
+        changes['removed'] = removed
+
+        return changes
+
+    def _update_data_mtime(self):
+        """
+        Internal function that marks in memory data and index as synced with the data base after a write
+        Items are flagged as dirty, so they are created again next time they are requested
+        """
+
+        mtime = self.mtime()
+        self._data_mtime = mtime
+        self._index.set_mtime(mtime)
+        self._paths_order = None
+        self.set_dirty(True)
+
     def clear(self):
         """
         Clear all the item data
         """
 
         self._items = list()
+        self._items_by_path = dict()
+        self._items_order = dict()
         self._results = list()
         self._grouped_results = dict()
+        self._result_paths = list()
+        self._grouped_result_paths = dict()
         self.dataChanged.emit()
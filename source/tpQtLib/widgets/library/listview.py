@@ -46,6 +46,7 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         self.setDragDropMode(QAbstractItemView.DragDrop)
 
         self._tree_widget = None
+        self._item_model = None
         self._rubber_band = None
         self._rubber_band_start_pos = None
         self._rubber_band_color = QColor(Qt.white)
@@ -65,6 +66,23 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
     ##########################################################################################
     """
 
+    def paintEvent(self, event):
+        """
+        Overrides base QListView paintEvent function
+        :param event: QPaintEvent
+        """
+
+        paint_profiler = self.paint_profiler()
+        if paint_profiler is None:
+            QListView.paintEvent(self, event)
+            return
+
+        paint_profiler.begin_frame(self)
+        try:
+            QListView.paintEvent(self, event)
+        finally:
+            paint_profiler.end_frame()
+
     def mousePressEvent(self, event):
         """
         Overrides base QListView mousePressEvent function
@@ -78,7 +96,8 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         mixin.LibraryViewWidgetMixin.mousePressEvent(self, event)
         if event.isAccepted():
             QListView.mousePressEvent(self, event)
-            self.viewer().tree_widget().setItemSelected(item, True)
+            if self._item_model is None:
+                self.viewer().tree_widget().setItemSelected(item, True)
 
         self.endDrag()
         self._drag_start_pos = event.pos()
@@ -366,12 +385,38 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         self.setModel(tree_widget.model())
         self.setSelectionModel(tree_widget.selectionModel())
 
+    def item_model(self):
+        """
+        Returns the lazy item model displayed by the view, if any
+        :return: LibraryItemModel or None
+        """
+
+        return self._item_model
+
+    def set_item_model(self, item_model):
+        """
+        Sets the lazy item model displayed by the view
+        If None, view displays the items of the tree widget again
+        :param item_model: LibraryItemModel or None
+        """
+
+        self._item_model = item_model
+        if item_model is None:
+            self.setModel(self.tree_widget().model())
+            self.setSelectionModel(self.tree_widget().selectionModel())
+        else:
+            self.setModel(item_model)
+            self.selectionModel().selectionChanged.connect(self._on_model_selection_changed)
+
     def items(self):
         """
         Return all the items
         :return: list(LibraryItem)
         """
 
+        if self._item_model is not None:
+            return self._item_model.items()
+
         return self.tree_widget().items()
 
     def item_at(self, pos):
@@ -391,6 +436,10 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         :return: QTreeWidgetItem
         """
 
+        if self._item_model is not None:
+            items = self.selected_items()
+            return items[-1] if items else None
+
         return self.tree_widget().selected_item()
 
     def selected_items(self):
@@ -399,6 +448,9 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         :return: list(QTreeWidgetItem)
         """
 
+        if self._item_model is not None:
+            return self._item_model.items_from_indexes(self.selectionModel().selectedIndexes())
+
         return self.tree_widget().selectedItems()
 
     def insert_item(self, row, item):
@@ -440,6 +492,12 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         :param value: bool
         """
 
+        if self._item_model is not None:
+            flag = QItemSelectionModel.Select if value else QItemSelectionModel.Deselect
+            for item in items:
+                self.selectionModel().select(self._item_model.index_from_item(item), flag)
+            return
+
         self.tree_widget().blockSignals(True)
         try:
             for item in items:
@@ -468,6 +526,9 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         :return: QModelIndex
         """
 
+        if self._item_model is not None:
+            return self._item_model.index_from_item(item)
+
         return self.tree_widget().indexFromItem(item)
 
     def item_from_index(self, index):
@@ -477,6 +538,9 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         :return: LibraryItem
         """
 
+        if self._item_model is not None:
+            return self._item_model.item_from_index(index)
+
         return self.tree_widget().itemFromIndex(index)
 
     """
@@ -555,3 +619,19 @@ class LibraryListView(mixin.LibraryViewWidgetMixin, QListView):
         self.set_items_selected([item], True)
         item.double_clicked()
         self.itemDoubleClicked.emit(item)
+
+    def _on_model_selection_changed(self, selected, deselected):
+        """
+        Callback function that is called when the selection of the lazy item model changes
+        Selected items are pinned, so the model does not release them, and tree widget selection signal is emitted
+        :param selected: QItemSelection
+        :param deselected: QItemSelection
+        """
+
+        paths = list()
+        for index in self.selectionModel().selectedIndexes():
+            path = self._item_model.path_from_index(index)
+            if path:
+                paths.append(path)
+        self._item_model.set_pinned_paths(paths)
+        self.tree_widget().itemSelectionChanged.emit()
@@ -8,6 +8,7 @@ Module that contains manager object for libraries
 from __future__ import print_function, division, absolute_import
 
 import os
+import re
 from collections import OrderedDict
 
 from tpPyUtils import fileio, folder, settings, osplatform, path as path_utils
@@ -18,9 +19,9 @@ import tpQtLib
 from tpQtLib.widgets.library import items
 
 try:
-    from tpPyUtils.externals.scandir import walk
+    from os import scandir
 except ImportError:
-    from os import walk
+    from tpPyUtils.externals.scandir import scandir
 
 
 class LibraryManager(object):
@@ -34,6 +35,10 @@ class LibraryManager(object):
         self._library_window = None
         self._settings = settings
         self._item_classes = OrderedDict()
+        self._registered_items = None
+        self._dispatch_table = None
+        self._ignore_matcher = None
+        self._ignore_paths = None
 
         self.register_item(items.LibraryFolderItem)
 
@@ -76,6 +81,8 @@ class LibraryManager(object):
         """
 
         self._item_classes[cls.__name__] = cls
+        self._registered_items = None
+        self._dispatch_table = None
 
     def registered_items(self):
         """
@@ -83,10 +90,12 @@ class LibraryManager(object):
         :return: list(LibraryItem)
         """
 
-        def key(cls):
-            return cls.RegisterOrder
+        if self._registered_items is None:
+            def key(cls):
+                return cls.RegisterOrder
+            self._registered_items = sorted(self._item_classes.values(), key=key)
 
-        return sorted(self._item_classes.values(), key=key)
+        return list(self._registered_items)
 
     def clear_registered_items(self):
         """
@@ -94,6 +103,61 @@ class LibraryManager(object):
         """
 
         self._item_classes = OrderedDict()
+        self._registered_items = None
+        self._dispatch_table = None
+
+    def dispatch_table(self):
+        """
+        Returns the table used to find the item class of a path without checking all registered classes
+        Classes that use the default extension matching are stored by extension. Classes that override match are
+        checked for every path. The table is computed again only when the registered classes change
+        :return: tuple(dict(str, list(tuple)), list(int), list(tuple)), classes are stored as (order, class, custom match)
+        """
+
+        if self._dispatch_table is None:
+            extensions = dict()
+            custom = list()
+            default_match = items.LibraryItem.match.__func__
+            for index, cls in enumerate(self.registered_items()):
+                if getattr(cls.match, '__func__', None) is default_match:
+                    for extension in cls.Extensions:
+                        extensions.setdefault(extension, list()).append((index, cls, False))
+                else:
+                    custom.append((index, cls, True))
+            lengths = sorted(set(len(extension) for extension in extensions), reverse=True)
+            self._dispatch_table = (extensions, lengths, custom)
+
+        return self._dispatch_table
+
+    def item_class_from_path(self, path, is_dir=None):
+        """
+        Returns the registered item class that supports the given path
+        :param path: str
+        :param is_dir: bool or None, whether the path is a directory. If None, classes will check it if they need it
+        :return: LibraryItem or None
+        """
+
+        extensions, lengths, custom = self.dispatch_table()
+
+        candidates = list(custom)
+        for length in lengths:
+            classes = extensions.get(path[-length:] if length else '')
+            if classes:
+                candidates.extend(classes)
+        if not candidates:
+            return None
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        for index, cls, custom_match in candidates:
+            if not custom_match:
+                return cls
+            if is_dir is None:
+                if cls.match(path):
+                    return cls
+            elif cls.match_entry(path, is_dir):
+                return cls
+
+        return None
 
     def get_ignore_paths(self):
         """
@@ -104,6 +168,24 @@ class LibraryManager(object):
 
         return list()
 
+    def ignore_matcher(self):
+        """
+        Returns a function that checks whether a path contains any of the paths returned by get_ignore_paths
+        The regular expression used by the function is compiled again only when the ignored paths change
+        :return: callable or None, None if there are no paths to ignore
+        """
+
+        ignore_paths = tuple(self.get_ignore_paths() or ())
+        if ignore_paths != self._ignore_paths:
+            self._ignore_paths = ignore_paths
+            if ignore_paths:
+                pattern = re.compile('|'.join(re.escape(ignore_path) for ignore_path in ignore_paths))
+                self._ignore_matcher = pattern.search
+            else:
+                self._ignore_matcher = None
+
+        return self._ignore_matcher
+
     def is_type_registered(self, data_type):
         """
         Returns whether there are classes that supports given data type
@@ -154,15 +236,13 @@ class LibraryManager(object):
         else:
             full_path = path_utils.normalize_path(path)
         path = path_utils.normalize_path(path)
-        for ignore in self.get_ignore_paths():
-            if ignore in full_path:
-                return None
+        ignore = self.ignore_matcher()
+        if ignore and ignore(full_path):
+            return None
 
-        for cls in self.registered_items():
-            if cls.match(full_path):
-                lib_win = kwargs.get('library_window', self.library_window())
-                kwargs['library_window'] = lib_win
-                return cls(path, **kwargs)
+        cls = self.item_class_from_path(full_path)
+        if cls:
+            return self._create_item(cls, path, kwargs)
 
     def items_from_paths(self, paths, **kwargs):
         """
@@ -177,6 +257,18 @@ class LibraryManager(object):
             if item:
                 yield item
 
+    def items_from_entries(self, entries, **kwargs):
+        """
+        Return new item instances for the given entries found by scan_folder
+        Items are Qt objects, so this function must be called from the main thread
+        :param entries: list(tuple(LibraryItem, str)), item class and path of each entry
+        :param kwargs: dict
+        :return: Iterable(LibraryItem)
+        """
+
+        for cls, path in entries:
+            yield self._create_item(cls, path, dict(kwargs))
+
     def items_from_urls(self, urls, **kwargs):
         """
         Return new item instances for the given QUrl objects
@@ -221,30 +313,9 @@ class LibraryManager(object):
         :return: Iterable(LibraryItem)
         """
 
-        path = path_utils.normalize_path(path)
-        max_depth = depth
-        start_depth = path.count(os.path.sep)
-
-        for root, dirs, files in walk(path, followlinks=True):
-            files.extend(dirs)
-            for filename in files:
-                remove = False
-                path = os.path.join(root, filename)
-                item = self.item_from_path(path, **kwargs)
-                if item:
-                    yield item
-                    if not item.EnableNestedItems:
-                        remove = True
-                if remove and filename in dirs:
-                    dirs.remove(filename)
-
-            if depth == 1:
-                break
-
-            # Stop walking the directory if the maximum depth has been reached
-            current_depth = root.count(os.path.sep)
-            if (current_depth - start_depth) >= max_depth:
-                del dirs[:]
+        for entries, paths in self._walk_folder(path, depth=depth):
+            for item in self.items_from_entries(entries, **kwargs):
+                yield item
 
     def find_items_in_folders(self, folders, depth=3, **kwargs):
         """
@@ -259,6 +330,119 @@ class LibraryManager(object):
             for item in self.find_items(folder, depth=depth, **kwargs):
                 yield item
 
+    def scan_folder(self, path, depth=3, cache=None, level=0, recursive=True, progress=None):
+        """
+        Walks the given path and resolves the item classes only for the entries of the folders that changed since
+        they were cached. Items of unchanged folders are returned by path using the given cache.
+        No items are created, so this function can be called from a thread other than the main one. Use
+        items_from_entries to create the items of the found entries.
+        Cache is updated in place and it has the following format:
+        >>> {folder_path: {'mtime': float, 'items': list(str), 'folders': list(str)}}
+        :param path: str
+        :param depth: int
+        :param cache: dict or None
+        :param level: int, depth level of the given path relative to the library root
+        :param recursive: bool, whether to walk sub folders or not
+        :param progress: LibrarySyncProgress or None, used to report scanned folders and to check cancellation.
+            The given path must be already added as pending
+        :return: tuple(list(tuple(LibraryItem, str)), list(str)), item class and path of the entries found in
+            changed folders and item paths found in unchanged folders
+        """
+
+        found_entries = list()
+        found_paths = list()
+        for entries, paths in self._walk_folder(
+                path, depth=depth, cache=cache, level=level, recursive=recursive, progress=progress):
+            found_entries.extend(entries)
+            found_paths.extend(paths)
+
+        return found_entries, found_paths
+
+    def _create_item(self, cls, path, kwargs):
+        """
+        Internal function that creates a new instance of the given item class
+        :param cls: LibraryItem
+        :param path: str
+        :param kwargs: dict
+        :return: LibraryItem
+        """
+
+        kwargs['library_window'] = kwargs.get('library_window', self.library_window())
+
+        return cls(path, **kwargs)
+
+    def _walk_folder(self, path, depth=3, cache=None, level=0, recursive=True, progress=None):
+        """
+        Internal function that walks the given path and resolves the item classes of the entries of each folder
+        Entries types are taken from scandir, so no extra stat calls are needed to know whether an entry is a folder.
+        Folders matching the ignored paths are not walked. Folders whose modification time did not change since they
+        were cached are not listed again: their item paths are returned instead. No items are created, so it can be
+        used from any thread. Cache is updated in place, see scan_folder for its format
+        :param path: str
+        :param depth: int
+        :param cache: dict or None
+        :param level: int, depth level of the given path relative to the library root
+        :param recursive: bool, whether to walk sub folders or not
+        :param progress: LibrarySyncProgress or None, used to report walked folders and to check cancellation
+        :return: Iterable(tuple(list(tuple(LibraryItem, str)), list(str))), item class and path of the entries found
+            in each changed folder and item paths of each unchanged folder
+        """
+
+        ignore = self.ignore_matcher()
+        max_level = 0 if depth == 1 else depth
+        folders = [(path_utils.normalize_path(path), level)]
+
+        while folders:
+            if progress and progress.is_canceled():
+                return
+
+            folder_path, folder_level = folders.pop()
+            try:
+                mtime = os.path.getmtime(folder_path) if cache is not None else None
+            except OSError:
+                if progress:
+                    progress.add_done(1)
+                continue
+
+            folder_cache = cache.get(folder_path) if cache is not None else None
+            if folder_cache and folder_cache.get('mtime') == mtime:
+                found_entries = list()
+                found_paths = folder_cache.get('items', list())
+                sub_folders = folder_cache.get('folders', list())
+            else:
+                found_entries = list()
+                found_paths = list()
+                sub_folders = list()
+                try:
+                    entries = list(scandir(folder_path))
+                except OSError:
+                    entries = list()
+                for entry in entries:
+                    entry_path = folder_path + '/' + entry.name
+                    if ignore and ignore(entry_path):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    cls = self.item_class_from_path(entry_path, is_dir=is_dir)
+                    if cls:
+                        found_entries.append((cls, entry_path))
+                    if is_dir and (not cls or cls.EnableNestedItems):
+                        sub_folders.append(entry_path)
+                if cache is not None:
+                    cache[folder_path] = {
+                        'mtime': mtime, 'items': [entry[1] for entry in found_entries], 'folders': sub_folders}
+
+            if recursive and folder_level < max_level:
+                folders.extend((sub_folder, folder_level + 1) for sub_folder in reversed(sub_folders))
+                if progress:
+                    progress.add_pending(len(sub_folders))
+            if progress:
+                progress.add_done(1)
+
+            yield found_entries, found_paths
+
 
 class LibraryDataFolder(fileio.FileManager, object):
     def __init__(self, name, file_path, data_path=None):
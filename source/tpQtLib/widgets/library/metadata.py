@@ -0,0 +1,405 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains columnar store used by libraries to keep the metadata of their items
+"""
+
+from __future__ import print_function, division, absolute_import
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from tpPyUtils.externals import six
+
+# Value stored in the rows that do not define a field
+_MISSING = object()
+
+
+class LibraryRecord(Mapping):
+    """
+    Read only view of the record stored in a row of a metadata store. Values are read from the store columns when
+    they are accessed, so no dictionary is built. A view is only valid until its record is removed
+    """
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, field):
+        column = self._store._columns.get(field)
+        if column is None or column[self._row] is _MISSING:
+            raise KeyError(field)
+
+        return column[self._row]
+
+    def __iter__(self):
+        row = self._row
+        return iter([field for field, column in self._store._columns.items() if column[row] is not _MISSING])
+
+    def __len__(self):
+        row = self._row
+        return sum(1 for column in self._store._columns.values() if column[row] is not _MISSING)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def get(self, field, default=None):
+        column = self._store._columns.get(field)
+        if column is None:
+            return default
+
+        value = column[self._row]
+
+        return default if value is _MISSING else value
+
+
+class LibraryRecords(Mapping):
+    """
+    Read only view of all the records of a metadata store by path
+    """
+
+    __slots__ = ('_store',)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, path):
+        record = self._store.view(path)
+        if record is None:
+            raise KeyError(path)
+
+        return record
+
+    def __iter__(self):
+        return iter(self._store.paths())
+
+    def __len__(self):
+        return len(self._store)
+
+    def __contains__(self, path):
+        return path in self._store
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class LibraryMetadataStore(object):
+    """
+    Columnar store of library item metadata. Each path is given a row id and each field is stored as a list with
+    the value of every row, so records do not need a dictionary each. Strings are interned, so values repeated by
+    many items (folders, categories, types, users ...) are stored only once. Interned strings are counted, so they
+    are dropped once no record uses them
+    """
+
+    def __init__(self):
+        super(LibraryMetadataStore, self).__init__()
+
+        self._rows = dict()
+        self._paths = list()
+        self._free_rows = list()
+        self._columns = dict()
+        self._counts = dict()
+        self._strings = dict()
+        self._string_counts = dict()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, path):
+        return path in self._rows
+
+    def clear(self):
+        """
+        Removes all the records and interned strings
+        """
+
+        self._rows = dict()
+        self._paths = list()
+        self._free_rows = list()
+        self._columns = dict()
+        self._counts = dict()
+        self._strings = dict()
+        self._string_counts = dict()
+
+    def intern(self, value):
+        """
+        Returns the stored instance of the given value if it is already stored, so equal strings share the same
+        object. Values are not stored by this function
+        :param value: variant
+        :return: variant
+        """
+
+        if isinstance(value, six.string_types):
+            return self._strings.get(value, value)
+
+        return value
+
+    def paths(self):
+        """
+        Returns the paths of all the stored records
+        :return: list(str)
+        """
+
+        return list(self._rows)
+
+    def fields(self):
+        """
+        Returns the fields defined by at least one record
+        :return: list(str)
+        """
+
+        return list(self._columns)
+
+    def row(self, path):
+        """
+        Returns the row id of the given path
+        :param path: str
+        :return: int or None
+        """
+
+        return self._rows.get(path)
+
+    def path(self, row):
+        """
+        Returns the path stored in the given row id
+        :param row: int
+        :return: str or None
+        """
+
+        if 0 <= row < len(self._paths):
+            return self._paths[row]
+
+        return None
+
+    def get(self, path, field, default=None):
+        """
+        Returns the value of the given field for the given path
+        :param path: str
+        :param field: str
+        :param default: variant, value returned if the path does not exist or does not define the field
+        :return: variant
+        """
+
+        row = self._rows.get(path)
+        column = self._columns.get(field)
+        if row is None or column is None:
+            return default
+
+        value = column[row]
+
+        return default if value is _MISSING else value
+
+    def record(self, path):
+        """
+        Returns a new dictionary with the data of the given path
+        Use view or get to read values without building a dictionary
+        :param path: str
+        :return: dict or None
+        """
+
+        row = self._rows.get(path)
+        if row is None:
+            return None
+
+        return self._record(row)
+
+    def view(self, path):
+        """
+        Returns a read only view of the data of the given path
+        :param path: str
+        :return: LibraryRecord or None
+        """
+
+        row = self._rows.get(path)
+        if row is None:
+            return None
+
+        return LibraryRecord(self, row)
+
+    def records(self):
+        """
+        Returns a read only view of the data of all the paths
+        :return: LibraryRecords
+        """
+
+        return LibraryRecords(self)
+
+    def column(self, field):
+        """
+        Returns the paths that define the given field and their values
+        :param field: str
+        :return: dict(str, variant)
+        """
+
+        column = self._columns.get(field)
+        if column is None:
+            return dict()
+
+        return dict((path, column[row]) for path, row in self._rows.items() if column[row] is not _MISSING)
+
+    def set(self, path, data):
+        """
+        Stores the given data as the record of the given path, replacing its previous data
+        :param path: str
+        :param data: dict
+        :return: dict, stored data with interned keys and values
+        """
+
+        row = self._rows.get(path)
+        if row is None:
+            row = self._new_row(path)
+        else:
+            self._clear_row(row)
+
+        record = dict()
+        for field, value in data.items():
+            field = self._acquire(field)
+            value = self._acquire(value)
+            column = self._columns.get(field)
+            if column is None:
+                column = self._columns[field] = [_MISSING] * len(self._paths)
+                self._counts[field] = 0
+            column[row] = value
+            self._counts[field] += 1
+            record[field] = value
+
+        return record
+
+    def remove(self, path):
+        """
+        Removes the record of the given path
+        :param path: str
+        :return: dict or None, removed data
+        """
+
+        row = self._rows.pop(path, None)
+        if row is None:
+            return None
+
+        record = self._record(row)
+        self._clear_row(row)
+        self._release(self._paths[row])
+        self._paths[row] = None
+        self._free_rows.append(row)
+
+        return record
+
+    def rename(self, source, target):
+        """
+        Moves the record of the given source path to the given target path. Values are not modified
+        :param source: str
+        :param target: str
+        """
+
+        row = self._rows.pop(source, None)
+        if row is None:
+            return
+
+        self.remove(target)
+        self._release(self._paths[row])
+        target = self._acquire(target)
+        self._rows[target] = row
+        self._paths[row] = target
+
+    def stats(self):
+        """
+        Returns the number of records, fields and interned strings
+        :return: dict
+        """
+
+        return {
+            'records': len(self._rows),
+            'rows': len(self._paths),
+            'fields': len(self._columns),
+            'strings': len(self._strings)
+        }
+
+    def _record(self, row):
+        """
+        Internal function that returns a new dictionary with the data of the given row
+        :param row: int
+        :return: dict
+        """
+
+        record = dict()
+        for field, column in self._columns.items():
+            value = column[row]
+            if value is not _MISSING:
+                record[field] = value
+
+        return record
+
+    def _new_row(self, path):
+        """
+        Internal function that returns a row for the given path, reusing rows of removed records
+        :param path: str
+        :return: int
+        """
+
+        path = self._acquire(path)
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self._paths[row] = path
+        else:
+            row = len(self._paths)
+            self._paths.append(path)
+            for column in self._columns.values():
+                column.append(_MISSING)
+        self._rows[path] = row
+
+        return row
+
+    def _clear_row(self, row):
+        """
+        Internal function that removes the values of the given row. Columns without values are dropped
+        :param row: int
+        """
+
+        for field in list(self._columns):
+            column = self._columns[field]
+            if column[row] is _MISSING:
+                continue
+            self._release(column[row])
+            column[row] = _MISSING
+            self._counts[field] -= 1
+            self._release(field)
+            if not self._counts[field]:
+                del self._columns[field]
+                del self._counts[field]
+
+    def _acquire(self, value):
+        """
+        Internal function that returns the stored instance of the given value, storing it if needed, and counts
+        one more use of it
+        :param value: variant
+        :return: variant
+        """
+
+        if not isinstance(value, six.string_types):
+            return value
+
+        value = self._strings.setdefault(value, value)
+        self._string_counts[value] = self._string_counts.get(value, 0) + 1
+
+        return value
+
+    def _release(self, value):
+        """
+        Internal function that counts one use less of the given value. Strings are dropped when they are not used
+        :param value: variant
+        """
+
+        if not isinstance(value, six.string_types):
+            return
+
+        count = self._string_counts.get(value, 0) - 1
+        if count > 0:
+            self._string_counts[value] = count
+        else:
+            self._string_counts.pop(value, None)
+            self._strings.pop(value, None)
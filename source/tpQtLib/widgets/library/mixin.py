@@ -239,6 +239,19 @@ class LibraryViewWidgetMixin(object):
 
         return self.parent()
 
+    def paint_profiler(self):
+        """
+        Returns the paint profiler of the viewer if paint profiling is enabled
+        :return: PaintProfiler or None
+        """
+
+        viewer = self.viewer()
+        paint_profiler = viewer.paint_profiler() if hasattr(viewer, 'paint_profiler') else None
+        if paint_profiler is None or not paint_profiler.is_enabled():
+            return None
+
+        return paint_profiler
+
     def is_control_modifier(self):
         """
         Returns whether control modifier is active or not
@@ -0,0 +1,556 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains lazy library item model implementation
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from collections import OrderedDict
+
+from Qt.QtCore import *
+
+from tpQtLib.widgets.library import consts, sorter
+
+
+class LibraryItemModel(QAbstractItemModel, object):
+    """
+    Flat item model that displays library search results. Nested groups are displayed as group rows of increasing level
+    Each row only stores the item path (or the group name for group rows) and item data is read from the
+    library index. LibraryItem objects are only created for rows that are painted, selected or dragged and
+    only a limited number of them (not counting selected ones) are kept alive
+    """
+
+    PathRole = Qt.UserRole
+    GroupRole = Qt.UserRole + 1
+    LevelRole = Qt.UserRole + 2
+
+    MAX_ITEMS = consts.MODEL_DEFAULT_MAX_ITEMS
+
+    def __init__(self, parent=None):
+        super(LibraryItemModel, self).__init__(parent)
+
+        self._library = None
+        self._viewer = None
+        self._columns = list()
+        self._rows = list()
+        self._rows_by_path = dict()
+        self._items = OrderedDict()
+        self._pinned = dict()
+
+    """
+    ##########################################################################################
+    OVERRIDES
+    ##########################################################################################
+    """
+
+    def index(self, row, column, parent=QModelIndex()):
+        """
+        Overrides base QAbstractItemModel index function
+        :param row: int
+        :param column: int
+        :param parent: QModelIndex
+        :return: QModelIndex
+        """
+
+        if parent.isValid() or row < 0 or row >= len(self._rows) or column < 0 or column >= self.columnCount():
+            return QModelIndex()
+
+        return self.createIndex(row, column)
+
+    def parent(self, *args):
+        """
+        Overrides base QAbstractItemModel parent function
+        Model is flat, so items never have a parent
+        :return: QModelIndex
+        """
+
+        if not args:
+            return super(LibraryItemModel, self).parent()
+
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        """
+        Overrides base QAbstractItemModel rowCount function
+        :param parent: QModelIndex
+        :return: int
+        """
+
+        if parent.isValid():
+            return 0
+
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        """
+        Overrides base QAbstractItemModel columnCount function
+        :param parent: QModelIndex
+        :return: int
+        """
+
+        return max(1, len(self._columns))
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+        Overrides base QAbstractItemModel data function
+        Data is read from the library index, so no item is created
+        :param index: QModelIndex
+        :param role: int
+        :return: variant
+        """
+
+        if not index.isValid():
+            return None
+
+        path, group, level = self._rows[index.row()]
+        if role == self.PathRole:
+            return path
+        elif role == self.GroupRole:
+            return group
+        elif role == self.LevelRole:
+            return level
+        elif role in (Qt.DisplayRole, Qt.ToolTipRole):
+            if group is not None:
+                return group if index.column() == 0 else None
+            label = self._columns[index.column()] if self._columns else 'name'
+            value = self.value(path, label)
+            return None if value is None else str(value)
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """
+        Overrides base QAbstractItemModel headerData function
+        :param section: int
+        :param orientation: Qt.Orientation
+        :param role: int
+        :return: variant
+        """
+
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and section < len(self._columns):
+            return self._columns[section]
+
+        return None
+
+    def flags(self, index):
+        """
+        Overrides base QAbstractItemModel flags function
+        :param index: QModelIndex
+        :return: Qt.ItemFlags
+        """
+
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+
+        if self._rows[index.row()][1] is not None:
+            return Qt.ItemIsEnabled
+
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsDragEnabled
+
+    def mimeTypes(self):
+        """
+        Overrides base QAbstractItemModel mimeTypes function
+        :return: list(str)
+        """
+
+        return ['text/uri-list']
+
+    def mimeData(self, indexes):
+        """
+        Overrides base QAbstractItemModel mimeData function
+        :param indexes: list(QModelIndex)
+        :return: QMimeData
+        """
+
+        paths = list()
+        for index in indexes:
+            path = self.path_from_index(index)
+            if path and path not in paths:
+                paths.append(path)
+
+        mime_data = QMimeData()
+        mime_data.setUrls([QUrl.fromLocalFile(path) for path in paths])
+        mime_data.setText('\n'.join(paths))
+
+        return mime_data
+
+    """
+    ##########################################################################################
+    BASE
+    ##########################################################################################
+    """
+
+    def library(self):
+        """
+        Returns the library whose results are displayed by the model
+        :return: Library
+        """
+
+        return self._library
+
+    def set_library(self, library):
+        """
+        Sets the library whose results are displayed by the model
+        :param library: Library
+        """
+
+        self._library = library
+        self.clear()
+
+    def viewer(self):
+        """
+        Returns the viewer that displays the model
+        :return: LibraryViewer
+        """
+
+        return self._viewer
+
+    def set_viewer(self, viewer):
+        """
+        Sets the viewer that displays the model. Created items are attached to it
+        :param viewer: LibraryViewer
+        """
+
+        self._viewer = viewer
+
+    def columns(self):
+        """
+        Returns the labels of the model columns
+        :return: list(str)
+        """
+
+        return self._columns
+
+    def set_columns(self, labels):
+        """
+        Sets the labels of the model columns
+        :param labels: list(str)
+        """
+
+        self.beginResetModel()
+        self._columns = list(labels)
+        self.endResetModel()
+
+    def set_results(self, grouped_paths):
+        """
+        Sets the rows of the model from the given grouped search results
+        :param grouped_paths: dict, group name and paths in that group (or its subgroups)
+        """
+
+        self.beginResetModel()
+        self._rows = self._rows_from_results(grouped_paths)
+        self._update_rows_by_path()
+        self.endResetModel()
+
+    def update_results(self, grouped_paths):
+        """
+        Updates the rows of the model from the given grouped search results notifying only the inserted and removed
+        rows, so views keep their selection and scroll position. If rows kept by the new results are displayed in
+        a different order, the model is reset as in set_results
+        :param grouped_paths: dict, group name and paths in that group (or its subgroups)
+        """
+
+        rows = self._rows_from_results(grouped_paths)
+        old_keys = self._row_keys(self._rows)
+        new_keys = self._row_keys(rows)
+        old_set = set(old_keys)
+        new_set = set(new_keys)
+        if [key for key in old_keys if key in new_set] != [key for key in new_keys if key in old_set]:
+            self.set_results(grouped_paths)
+            return
+
+        # Group items are cached by row, so they are released before rows are moved
+        for key in list(self._items.keys()):
+            if isinstance(key, tuple):
+                del self._items[key]
+
+        row = len(old_keys) - 1
+        while row >= 0:
+            if old_keys[row] in new_set:
+                row -= 1
+                continue
+            last = row
+            while row >= 0 and old_keys[row] not in new_set:
+                row -= 1
+            self.beginRemoveRows(QModelIndex(), row + 1, last)
+            del self._rows[row + 1:last + 1]
+            self.endRemoveRows()
+
+        row = 0
+        while row < len(new_keys):
+            if new_keys[row] in old_set:
+                row += 1
+                continue
+            first = row
+            while row < len(new_keys) and new_keys[row] not in old_set:
+                row += 1
+            self.beginInsertRows(QModelIndex(), first, row - 1)
+            self._rows[first:first] = rows[first:row]
+            self.endInsertRows()
+
+        self._rows = rows
+        self._update_rows_by_path()
+
+    def clear(self):
+        """
+        Removes all the rows and releases all the created items
+        """
+
+        self.beginResetModel()
+        self._rows = list()
+        self._rows_by_path = dict()
+        self._items = OrderedDict()
+        self._pinned = dict()
+        self.endResetModel()
+
+    def paths(self):
+        """
+        Returns the paths of all the item rows
+        :return: list(str)
+        """
+
+        return [row[0] for row in self._rows if row[0] is not None]
+
+    def record(self, path):
+        """
+        Returns the library data of the given path. Data must not be modified
+        :param path: str
+        :return: dict or LibraryRecord
+        """
+
+        if not self._library:
+            return dict()
+
+        return self._library.index().record(path) or dict()
+
+    def value(self, path, field):
+        """
+        Returns the library value of the given field for the given path
+        :param path: str
+        :param field: str
+        :return: variant
+        """
+
+        if not self._library:
+            return None
+
+        return self._library.index().value(path, field)
+
+    def path_from_index(self, index):
+        """
+        Returns the item path of the given index
+        :param index: QModelIndex
+        :return: str or None
+        """
+
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+
+        return self._rows[index.row()][0]
+
+    def index_from_path(self, path, column=0):
+        """
+        Returns the index of the row that displays the given path
+        :param path: str
+        :param column: int
+        :return: QModelIndex
+        """
+
+        row = self._rows_by_path.get(path)
+        if row is None:
+            return QModelIndex()
+
+        return self.index(row, column)
+
+    def index_from_item(self, item, column=0):
+        """
+        Returns the index of the row that displays the given item
+        :param item: LibraryItem
+        :param column: int
+        :return: QModelIndex
+        """
+
+        if item is None:
+            return QModelIndex()
+
+        for key, cached_item in self._items.items():
+            if isinstance(key, tuple) and cached_item is item:
+                return self.index(key[1], column)
+
+        return self.index_from_path(item.id(), column)
+
+    """
+    ##########################################################################################
+    ITEMS
+    ##########################################################################################
+    """
+
+    def item_count(self):
+        """
+        Returns the number of items currently created by the model
+        :return: int
+        """
+
+        return len(self._items) + len(self._pinned)
+
+    def item_from_index(self, index):
+        """
+        Returns the item displayed in the given index. Item is created if it does not exist yet
+        :param index: QModelIndex
+        :return: LibraryItem or None
+        """
+
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+
+        path, group, level = self._rows[index.row()]
+        if path is None:
+            return self._group_item(index.row(), group, level)
+
+        return self.item_from_path(path)
+
+    def item_from_path(self, path):
+        """
+        Returns the item of the given path. Item is created if it does not exist yet
+        :param path: str
+        :return: LibraryItem or None
+        """
+
+        item = self._pinned.get(path)
+        if item is not None:
+            return item
+
+        item = self._items.pop(path, None)
+        if item is None:
+            if not self._library:
+                return None
+            item = self._library.item_from_path(path)
+            if item is None:
+                return None
+            item.set_viewer(self._viewer)
+
+        self._items[path] = item
+        self._evict()
+
+        return item
+
+    def items(self):
+        """
+        Returns the items of all the item rows
+        All the items are created, so it should be avoided with big libraries
+        :return: list(LibraryItem)
+        """
+
+        return [self.item_from_path(path) for path in self.paths()]
+
+    def items_from_indexes(self, indexes):
+        """
+        Returns the items displayed in the given indexes
+        :param indexes: list(QModelIndex)
+        :return: list(LibraryItem)
+        """
+
+        items = list()
+        for index in indexes:
+            item = self.item_from_index(index)
+            if item is not None and item not in items:
+                items.append(item)
+
+        return items
+
+    def set_pinned_paths(self, paths):
+        """
+        Sets the paths whose items are never released, such as selected or dragged ones
+        :param paths: list(str)
+        """
+
+        pinned = dict()
+        for path in paths:
+            item = self.item_from_path(path)
+            self._items.pop(path, None)
+            if item is not None:
+                pinned[path] = item
+
+        for path, item in self._pinned.items():
+            if path not in pinned:
+                self._items[path] = item
+
+        self._pinned = pinned
+        self._evict()
+
+    def _rows_from_results(self, grouped_paths):
+        """
+        Internal function that returns the rows that display the given grouped search results
+        :param grouped_paths: dict
+        :return: list(tuple(str, str, int)), path (None for group rows), group name and level of each row
+        """
+
+        return [(path, group, level) for level, group, path in sorter.flatten_groups(grouped_paths)]
+
+    def _row_keys(self, rows):
+        """
+        Internal function that returns a unique key for each of the given rows. Group rows are identified by the
+        names of their group and parent groups
+        :param rows: list(tuple(str, str, int))
+        :return: list
+        """
+
+        keys = list()
+        group_path = list()
+        for path, group, level in rows:
+            if path is None:
+                group_path[level:] = [group]
+                keys.append(tuple(group_path))
+            else:
+                keys.append(path)
+
+        return keys
+
+    def _update_rows_by_path(self):
+        """
+        Internal function that indexes the item rows by path and releases the items that are not displayed anymore
+        """
+
+        self._rows_by_path = dict()
+        for row, (path, group, level) in enumerate(self._rows):
+            if path is not None:
+                self._rows_by_path[path] = row
+
+        # Group items and items of paths that are not displayed anymore are released
+        for key in list(self._items.keys()):
+            if isinstance(key, tuple) or key not in self._rows_by_path:
+                del self._items[key]
+        for path in list(self._pinned.keys()):
+            if path not in self._rows_by_path:
+                del self._pinned[path]
+
+    def _group_item(self, row, name, level):
+        """
+        Internal function that returns the group item displayed in the given row
+        :param row: int
+        :param name: str
+        :param level: int
+        :return: LibraryGroupItem
+        """
+
+        key = ('group', row)
+        item = self._items.pop(key, None)
+        if item is None:
+            item = self._viewer.create_group_item(name)
+            item.set_level(level)
+            item.set_viewer(self._viewer)
+
+        self._items[key] = item
+        self._evict()
+
+        return item
+
+    def _evict(self):
+        """
+        Internal function that releases the least recently used items until the maximum number of items is reached
+        """
+
+        while len(self._items) > self.MAX_ITEMS:
+            self._items.popitem(last=False)
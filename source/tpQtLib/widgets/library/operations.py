@@ -0,0 +1,175 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains file system operations applied in batches by libraries
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import shutil
+import threading
+
+from tpPyUtils import path as path_utils
+from tpPyUtils.externals import six
+
+import tpQtLib
+from tpQtLib.widgets.library import consts, utils, exceptions
+
+
+class LibraryOperation(object):
+    """
+    File system operation over a library path. Moves are also used to rename paths
+    """
+
+    Move = 'move'
+    Copy = 'copy'
+    Delete = 'delete'
+
+    def __init__(self, kind, source, target=None):
+        super(LibraryOperation, self).__init__()
+
+        self.kind = kind
+        self.source = path_utils.normalize_path(source)
+        self.target = path_utils.normalize_path(target) if target else None
+        self.done = False
+        self.error = None
+
+    def __repr__(self):
+        return '{}({}, {}, {})'.format(type(self).__name__, self.kind, self.source, self.target)
+
+    def run(self):
+        """
+        Applies the operation on disk
+        """
+
+        if self.kind == self.Delete:
+            utils.remove_path(self.source)
+        else:
+            if not os.path.exists(self.source):
+                raise exceptions.MovePathError('No such file or directory: {}'.format(self.source))
+            dirname = os.path.dirname(self.target)
+            if not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname)
+                except OSError:
+                    # Other worker thread may have created it
+                    if not os.path.isdir(dirname):
+                        raise
+            if self.kind == self.Copy:
+                if os.path.isfile(self.source):
+                    shutil.copy(self.source, self.target)
+                else:
+                    shutil.copytree(self.source, self.target)
+            else:
+                shutil.move(self.source, self.target)
+        self.done = True
+
+    def undo(self):
+        """
+        Reverts the operation on disk. Deletions cannot be reverted
+        """
+
+        if not self.done or self.kind == self.Delete:
+            return
+
+        if self.kind == self.Copy:
+            utils.remove_path(self.target)
+        else:
+            shutil.move(self.target, self.source)
+        self.done = False
+
+
+def resolve_targets(operations, force=False):
+    """
+    Checks the given operations and makes their targets unique before anything is done on disk
+    Operations over paths inside the source path of another operation are dropped, because that operation
+    already moves, copies or deletes them
+    :param operations: list(LibraryOperation)
+    :param force: bool, whether existing targets are renamed with a unique name or raise an error
+    :return: list(LibraryOperation), operations to run
+    """
+
+    sources = set(operation.source for operation in operations)
+    operations = [
+        op for op in operations if utils.find_parent_path(os.path.dirname(op.source), sources) is None]
+
+    reserved = set()
+    for operation in operations:
+        if operation.kind == LibraryOperation.Delete:
+            continue
+        if operation.source == operation.target:
+            raise exceptions.RenamePathError(
+                'The source path and destination path are the same: {}'.format(operation.source))
+        if os.path.exists(operation.target) or operation.target in reserved:
+            if not force:
+                raise exceptions.RenamePathError('Cannot save over an existing path: "{}"'.format(operation.target))
+            operation.target = utils.generate_unique_path(operation.target, exclude=reserved)
+        reserved.add(operation.target)
+
+    return operations
+
+
+def run(operations, threads=consts.DEFAULT_OPERATION_THREADS):
+    """
+    Applies the given operations on disk using worker threads
+    Moves and copies are done first. If any of them fails, the ones already done are reverted and deletions are not
+    done. Deletions cannot be reverted, so the ones that succeed are kept even if others fail
+    :param operations: list(LibraryOperation)
+    :param threads: int, maximum number of worker threads
+    :return: list(LibraryOperation), failed operations
+    """
+
+    reversible = [op for op in operations if op.kind != LibraryOperation.Delete]
+    deletions = [op for op in operations if op.kind == LibraryOperation.Delete]
+
+    failed = _run_in_threads(reversible, threads)
+    if failed:
+        for operation in reversed(reversible):
+            try:
+                operation.undo()
+            except Exception as exc:
+                tpQtLib.logger.error('Cannot revert {}: {}'.format(operation, exc))
+        return failed
+
+    return _run_in_threads(deletions, threads)
+
+
+def _run_in_threads(operations, threads):
+    """
+    Internal function that runs the given operations in worker threads
+    :param operations: list(LibraryOperation)
+    :param threads: int
+    :return: list(LibraryOperation), failed operations
+    """
+
+    if not operations:
+        return list()
+
+    queue = six.moves.queue.Queue()
+    for operation in operations:
+        queue.put(operation)
+
+    def _run():
+        while True:
+            try:
+                operation = queue.get_nowait()
+            except six.moves.queue.Empty:
+                return
+            try:
+                operation.run()
+            except Exception as exc:
+                operation.error = exc
+                tpQtLib.logger.error('Error while applying {}: {}'.format(operation, exc))
+
+    workers = list()
+    for i in range(max(1, min(len(operations), threads))):
+        worker = threading.Thread(target=_run)
+        worker.daemon = True
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+
+    return [operation for operation in operations if operation.error is not None]
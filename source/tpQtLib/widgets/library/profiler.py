@@ -0,0 +1,487 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains paint profiler used to instrument library viewers
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import json
+import time
+from collections import deque
+
+from Qt.QtCore import *
+from Qt.QtWidgets import *
+from Qt.QtGui import *
+
+from tpQtLib.widgets.library import consts
+
+clock = time.perf_counter if hasattr(time, 'perf_counter') else time.time
+
+
+class PaintProfiler(QObject, object):
+    """
+    Class that records how long a LibraryViewer takes to paint its views
+    A frame is a paint event of the viewport of the current view. For each frame the profiler stores its duration,
+    the items painted, the time spent per item type and column, content and thumbnail cache hits and the depth of
+    the thumbnail decode queue. Thumbnail callbacks run between frames, so they are accounted in the next frame
+    """
+
+    frameRecorded = Signal(object)
+
+    def __init__(self, viewer, max_frames=consts.PAINT_PROFILER_MAX_FRAMES,
+                 frame_budget=consts.PAINT_PROFILER_FRAME_BUDGET, parent=None):
+        super(PaintProfiler, self).__init__(parent)
+
+        self._viewer = viewer
+        self._enabled = False
+        self._frame_budget = frame_budget
+        self._frames = deque(maxlen=max_frames)
+        self._frame = None
+        self._frame_depth = 0
+        self._frame_index = 0
+        self._start_time = clock()
+        self._thumbnail_stats = None
+        self._column_labels = list()
+        self._callbacks = self._new_callbacks()
+
+    """
+    ##########################################################################################
+    BASE
+    ##########################################################################################
+    """
+
+    def viewer(self):
+        """
+        Returns the viewer that is profiled
+        :return: LibraryViewer
+        """
+
+        return self._viewer
+
+    def is_enabled(self):
+        """
+        Returns whether paint events are recorded or not
+        :return: bool
+        """
+
+        return self._enabled
+
+    def set_enabled(self, flag):
+        """
+        Sets whether paint events are recorded or not
+        :param flag: bool
+        """
+
+        self._enabled = bool(flag)
+        self._frame = None
+        self._frame_depth = 0
+        self._thumbnail_stats = None
+
+    def frame_budget(self):
+        """
+        Returns the maximum duration, in seconds, of a frame that does not make scrolling janky
+        :return: float
+        """
+
+        return self._frame_budget
+
+    def set_frame_budget(self, seconds):
+        """
+        Sets the maximum duration, in seconds, of a frame that does not make scrolling janky
+        :param seconds: float
+        """
+
+        self._frame_budget = seconds
+
+    def frames(self):
+        """
+        Returns the recorded frames, oldest first
+        :return: list(dict)
+        """
+
+        return list(self._frames)
+
+    def last_frame(self):
+        """
+        Returns the last recorded frame
+        :return: dict or None
+        """
+
+        return self._frames[-1] if self._frames else None
+
+    def reset(self):
+        """
+        Removes all the recorded frames
+        """
+
+        self._frames.clear()
+        self._frame = None
+        self._frame_depth = 0
+        self._frame_index = 0
+        self._start_time = clock()
+        self._thumbnail_stats = None
+        self._callbacks = self._new_callbacks()
+
+    """
+    ##########################################################################################
+    RECORDING
+    ##########################################################################################
+    """
+
+    def begin_frame(self, view):
+        """
+        Starts recording a frame painted by the given view
+        :param view: QAbstractItemView
+        """
+
+        self._frame_depth += 1
+        if self._frame_depth > 1:
+            return
+
+        self._frame = {
+            'index': self._frame_index,
+            'view': type(view).__name__,
+            'start': clock(),
+            'items': 0,
+            'rows': 0,
+            'paintTime': 0.0,
+            'lookupTime': 0.0,
+            'rowTime': 0.0,
+            'contentCacheHits': 0,
+            'contentCacheMisses': 0,
+            'types': dict(),
+            'rowTypes': dict(),
+            'columns': dict()
+        }
+        self._column_labels = self._viewer.column_labels()
+
+    def end_frame(self):
+        """
+        Finishes recording the current frame and stores it
+        :return: dict or None, recorded frame
+        """
+
+        self._frame_depth = max(0, self._frame_depth - 1)
+        frame = self._frame
+        if self._frame_depth or frame is None:
+            return None
+
+        self._frame = None
+        end = clock()
+        frame['duration'] = end - frame.pop('start')
+        frame['time'] = end - self._start_time
+        frame.update(self._callbacks)
+        frame.update(self._thumbnail_state())
+        self._callbacks = self._new_callbacks()
+        self._frame_index += 1
+        self._frames.append(frame)
+        self.frameRecorded.emit(frame)
+
+        return frame
+
+    def record_paint(self, item, column, duration):
+        """
+        Records the time spent painting a cell of the given item
+        :param item: LibraryItem
+        :param column: int
+        :param duration: float
+        """
+
+        frame = self._frame
+        if frame is None:
+            return
+
+        frame['items'] += 1
+        frame['paintTime'] += duration
+        self._add_timing(frame['types'], type(item).__name__, duration)
+        self._add_timing(frame['columns'], self._column_label(column), duration)
+
+    def record_lookup(self, duration):
+        """
+        Records the time spent finding the item of a model index
+        :param duration: float
+        """
+
+        if self._frame is not None:
+            self._frame['lookupTime'] += duration
+
+    def record_row(self, item, duration):
+        """
+        Records the time spent drawing a row of the tree widget
+        :param item: LibraryItem
+        :param duration: float
+        """
+
+        frame = self._frame
+        if frame is None:
+            return
+
+        frame['rows'] += 1
+        frame['rowTime'] += duration
+        self._add_timing(frame['rowTypes'], type(item).__name__, duration)
+
+    def record_content_cache(self, hit):
+        """
+        Records whether the pre-rendered content of a cell was found in the item content cache or not
+        :param hit: bool
+        """
+
+        frame = self._frame
+        if frame is None:
+            return
+
+        if hit:
+            frame['contentCacheHits'] += 1
+        else:
+            frame['contentCacheMisses'] += 1
+
+    def record_thumbnail_callback(self, duration):
+        """
+        Records the time spent by the main thread handling a loaded thumbnail
+        :param duration: float
+        """
+
+        self._callbacks['thumbnailCallbacks'] += 1
+        self._callbacks['thumbnailCallbackTime'] += duration
+
+    """
+    ##########################################################################################
+    REPORT
+    ##########################################################################################
+    """
+
+    def summary(self):
+        """
+        Returns statistics of the recorded frames
+        :return: dict
+        """
+
+        frames = list(self._frames)
+        durations = sorted(frame['duration'] for frame in frames)
+        count = len(durations)
+
+        types = dict()
+        row_types = dict()
+        columns = dict()
+        for frame in frames:
+            self._merge_timings(types, frame['types'])
+            self._merge_timings(row_types, frame['rowTypes'])
+            self._merge_timings(columns, frame['columns'])
+        for timings in (types, row_types, columns):
+            for timing in timings.values():
+                timing['mean'] = timing['time'] / timing['count'] if timing['count'] else 0.0
+
+        hits = sum(frame['contentCacheHits'] for frame in frames)
+        misses = sum(frame['contentCacheMisses'] for frame in frames)
+        thumbnail_hits = sum(frame['thumbnailCacheHits'] for frame in frames)
+        thumbnail_misses = sum(frame['thumbnailCacheMisses'] for frame in frames)
+
+        return {
+            'frames': count,
+            'frameBudget': self._frame_budget,
+            'jankyFrames': len([d for d in durations if d > self._frame_budget]),
+            'meanDuration': sum(durations) / count if count else 0.0,
+            'medianDuration': durations[count // 2] if count else 0.0,
+            'p95Duration': durations[min(count - 1, int(count * 0.95))] if count else 0.0,
+            'maxDuration': durations[-1] if count else 0.0,
+            'items': sum(frame['items'] for frame in frames),
+            'contentCacheHitRatio': hits / (hits + misses) if hits + misses else None,
+            'thumbnailCacheHitRatio': (
+                thumbnail_hits / (thumbnail_hits + thumbnail_misses) if thumbnail_hits + thumbnail_misses else None),
+            'thumbnailCallbacks': sum(frame['thumbnailCallbacks'] for frame in frames),
+            'thumbnailCallbackTime': sum(frame['thumbnailCallbackTime'] for frame in frames),
+            'maxThumbnailQueue': max([frame['thumbnailQueue'] for frame in frames] or [0]),
+            'types': types,
+            'rowTypes': row_types,
+            'columns': columns
+        }
+
+    def report(self):
+        """
+        Returns the summary and the recorded frames
+        :return: dict
+        """
+
+        return {'summary': self.summary(), 'frames': self.frames()}
+
+    def to_json(self, indent=2):
+        """
+        Returns the report as a JSON string
+        :param indent: int
+        :return: str
+        """
+
+        return json.dumps(self.report(), indent=indent, sort_keys=True)
+
+    def export(self, path):
+        """
+        Writes the report into the given JSON file
+        :param path: str
+        """
+
+        with open(path, 'w') as f:
+            f.write(self.to_json())
+
+    """
+    ##########################################################################################
+    INTERNAL
+    ##########################################################################################
+    """
+
+    @staticmethod
+    def _new_callbacks():
+        """
+        Internal function that returns the counters of the work done between frames
+        :return: dict
+        """
+
+        return {'thumbnailCallbacks': 0, 'thumbnailCallbackTime': 0.0}
+
+    @staticmethod
+    def _add_timing(timings, key, duration):
+        """
+        Internal function that adds the given duration to the timing stored with the given key
+        :param timings: dict
+        :param key: str
+        :param duration: float
+        """
+
+        timing = timings.get(key)
+        if timing is None:
+            timings[key] = {'count': 1, 'time': duration, 'max': duration}
+        else:
+            timing['count'] += 1
+            timing['time'] += duration
+            if duration > timing['max']:
+                timing['max'] = duration
+
+    @staticmethod
+    def _merge_timings(timings, frame_timings):
+        """
+        Internal function that accumulates the timings of a frame
+        :param timings: dict
+        :param frame_timings: dict
+        """
+
+        for key, frame_timing in frame_timings.items():
+            timing = timings.setdefault(key, {'count': 0, 'time': 0.0, 'max': 0.0})
+            timing['count'] += frame_timing['count']
+            timing['time'] += frame_timing['time']
+            timing['max'] = max(timing['max'], frame_timing['max'])
+
+    def _column_label(self, column):
+        """
+        Internal function that returns the label of the given column
+        :param column: int
+        :return: str
+        """
+
+        labels = self._column_labels
+        if 0 <= column < len(labels):
+            return labels[column]
+
+        return str(column)
+
+    def _thumbnail_state(self):
+        """
+        Internal function that returns the thumbnail queue depth and the thumbnail cache hits since last frame
+        :return: dict
+        """
+
+        scheduler = self._viewer.thumbnail_scheduler()
+        state = {
+            'thumbnailQueue': scheduler.pending_count() if scheduler else 0,
+            'thumbnailRunning': scheduler.running_count() if scheduler else 0,
+            'thumbnailCacheHits': 0,
+            'thumbnailCacheMisses': 0
+        }
+
+        cache = scheduler.cache() if scheduler else None
+        if cache is not None:
+            stats = cache.stats()
+            if self._thumbnail_stats is not None:
+                state['thumbnailCacheHits'] = max(0, stats['hits'] - self._thumbnail_stats['hits'])
+                state['thumbnailCacheMisses'] = max(0, stats['misses'] - self._thumbnail_stats['misses'])
+            self._thumbnail_stats = stats
+
+        return state
+
+
+class PaintProfilerOverlay(QLabel, object):
+    """
+    Small opaque label that displays the statistics of a paint profiler over the viewer
+    It is refreshed with a timer instead of on every frame, so showing it does not trigger new paint events
+    """
+
+    def __init__(self, profiler, parent=None):
+        super(PaintProfilerOverlay, self).__init__(parent)
+
+        self._profiler = profiler
+
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setAutoFillBackground(True)
+        self.setMargin(4)
+        self.setStyleSheet('background-color: rgb(20, 20, 20); color: rgb(220, 220, 220);')
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(consts.PAINT_PROFILER_OVERLAY_INTERVAL)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        """
+        Overrides base QLabel showEvent function
+        :param event: QShowEvent
+        """
+
+        super(PaintProfilerOverlay, self).showEvent(event)
+        self.refresh()
+        self._refresh_timer.start()
+
+    def hideEvent(self, event):
+        """
+        Overrides base QLabel hideEvent function
+        :param event: QHideEvent
+        """
+
+        super(PaintProfilerOverlay, self).hideEvent(event)
+        self._refresh_timer.stop()
+
+    def profiler(self):
+        """
+        Returns the profiler whose statistics are displayed
+        :return: PaintProfiler
+        """
+
+        return self._profiler
+
+    def refresh(self):
+        """
+        Updates the displayed statistics and moves the overlay to the top right corner of its parent
+        """
+
+        frame = self._profiler.last_frame()
+        if frame is None:
+            text = 'Paint profiler: no frames'
+        else:
+            summary = self._profiler.summary()
+            hits = frame['contentCacheHits']
+            total = hits + frame['contentCacheMisses']
+            text = '\n'.join([
+                'Frame {:.1f} ms  (p95 {:.1f} ms, max {:.1f} ms)'.format(
+                    frame['duration'] * 1000, summary['p95Duration'] * 1000, summary['maxDuration'] * 1000),
+                'Janky {} / {} frames'.format(summary['jankyFrames'], summary['frames']),
+                'Items {}  cache {}'.format(
+                    frame['items'], '{:.0%}'.format(hits / total) if total else '-'),
+                'Thumbnails queued {}  running {}'.format(frame['thumbnailQueue'], frame['thumbnailRunning'])
+            ])
+
+        if text != self.text():
+            self.setText(text)
+            self.adjustSize()
+
+        parent = self.parentWidget()
+        if parent is not None:
+            self.move(parent.width() - self.width() - 20, 4)
+        self.raise_()
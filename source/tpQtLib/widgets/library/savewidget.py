@@ -17,7 +17,7 @@ from Qt.QtGui import *
 
 import tpQtLib
 import tpDccLib as tp
-from tpQtLib.core import base, qtutils
+from tpQtLib.core import base, qtutils, image
 from tpQtLib.widgets import directory, formwidget, messagebox
 from tpQtLib.widgets.library import widgets
 
@@ -26,6 +26,10 @@ if tp.is_maya():
 
 
 class SaveWidget(base.BaseWidget, object):
+
+    # Whether captured image sequences are also written as a single pack file that is faster to play or not
+    PACK_SEQUENCES = True
+
     def __init__(self, item, settings, temp_path=None, parent=None):
 
         self._item = None
@@ -339,6 +343,26 @@ class SaveWidget(base.BaseWidget, object):
 
         if sequence:
             self.set_sequence_path(source)
+            if self.PACK_SEQUENCES:
+                self.pack_sequence(os.path.dirname(source))
+
+    def pack_sequence(self, dirname):
+        """
+        Writes the frames of the image sequence in the given folder into a pack file stored in the same folder
+        :param dirname: str
+        :return: str or None, pack file path
+        """
+
+        try:
+            pack_path = image.ImageSequencePack.write_from_dirname(dirname)
+        except Exception as exc:
+            tpQtLib.logger.warning('Cannot pack image sequence "{}": {}'.format(dirname, exc))
+            return None
+
+        if pack_path:
+            self._thumbnail_btn.set_dirname(pack_path)
+
+        return pack_path
 
     def save_settings(self):
         """
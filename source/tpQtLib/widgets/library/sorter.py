@@ -0,0 +1,262 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains sort and group implementation used by libraries to order search results
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import numbers
+from collections import OrderedDict
+
+from tpPyUtils.externals import six
+
+
+class ReversedValue(object):
+    """
+    Wraps a value so it is sorted in descending order inside an ascending composite key
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __ne__(self, other):
+        return self.value != other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __gt__(self, other):
+        return other.value > self.value
+
+    def __le__(self, other):
+        return other.value <= self.value
+
+    def __ge__(self, other):
+        return other.value >= self.value
+
+    def __hash__(self):
+        return hash(self.value)
+
+
+def parse_fields(fields):
+    """
+    Returns the field names and whether they are sorted in descending order
+    >>> parse_fields(['name:asc', 'type:dsc'])
+    [('name', False), ('type', True)]
+    :param fields: list(str)
+    :return: list(tuple(str, bool))
+    """
+
+    parsed = list()
+    for field in fields or list():
+        tokens = field.split(':')
+        reverse = len(tokens) > 1 and tokens[1] != 'asc'
+        parsed.append((tokens[0], reverse))
+
+    return parsed
+
+
+def sort_value(value):
+    """
+    Returns a value that can be compared with the sort value of any other value
+    Missing values are sorted first, then numbers, then strings and then any other value
+    :param value: variant
+    :return: tuple
+    """
+
+    if value is None or value == '':
+        return 0, 0, ''
+    elif isinstance(value, bool):
+        return 1, 0, int(value)
+    elif isinstance(value, numbers.Number):
+        return 1, 0, value
+    elif isinstance(value, six.string_types):
+        return 1, 1, value
+
+    return 1, 2, repr(value)
+
+
+def sort_key(data, parsed_fields):
+    """
+    Returns the composite key used to sort the given data by all the given fields in a single pass
+    :param data: dict
+    :param parsed_fields: list(tuple(str, bool)), as returned by parse_fields
+    :return: tuple
+    """
+
+    key = list()
+    for field, reverse in parsed_fields:
+        value = sort_value(data.get(field))
+        key.append(ReversedValue(value) if reverse else value)
+
+    return tuple(key)
+
+
+def group(objects, fields, data_fn):
+    """
+    Groups the given objects by the given fields. Each field adds a nesting level, so grouping by two fields
+    returns group -> subgroup -> objects. Objects keep their order inside each group
+    Objects without a value for a group field are not included
+    :param objects: list
+    :param fields: list(str)
+    :param data_fn: fn(object) -> dict, returns the data of an object
+    :return: OrderedDict
+    """
+
+    parsed_fields = parse_fields(fields)
+    if not parsed_fields:
+        return {'None': objects}
+
+    results = OrderedDict()
+    for obj in objects:
+        data = data_fn(obj)
+        values = [data.get(field) for field, _ in parsed_fields]
+        if not all(values):
+            continue
+        level = results
+        for value in values[:-1]:
+            level = level.setdefault(value, OrderedDict())
+        level.setdefault(values[-1], list()).append(obj)
+
+    return _sort_groups(results, parsed_fields)
+
+
+def flatten_groups(grouped, level=0):
+    """
+    Returns the given nested groups as a flat list of group headers and objects, in display order
+    >>> flatten_groups({'anim': {'walk': [a, b]}})
+    [(0, 'anim', None), (1, 'walk', None), (2, None, a), (2, None, b)]
+    :param grouped: dict, as returned by group
+    :param level: int
+    :return: list(tuple(int, str or None, object or None))
+    """
+
+    rows = list()
+    for name, children in grouped.items():
+        if name != 'None':
+            rows.append((level, name, None))
+            child_level = level + 1
+        else:
+            child_level = level
+        if isinstance(children, dict):
+            rows.extend(flatten_groups(children, child_level))
+        else:
+            rows.extend((child_level, None, obj) for obj in children)
+
+    return rows
+
+
+def map_groups(grouped, fn):
+    """
+    Returns the given nested groups with the objects list of each group replaced by fn(objects)
+    :param grouped: dict, as returned by group
+    :param fn: fn(list) -> list
+    :return: OrderedDict
+    """
+
+    results = OrderedDict()
+    for name, children in grouped.items():
+        if isinstance(children, dict):
+            results[name] = map_groups(children, fn)
+        else:
+            results[name] = fn(children)
+
+    return results
+
+
+def _sort_groups(groups, parsed_fields):
+    """
+    Internal function that sorts the given nested groups by their names, following each level sort order
+    :param groups: OrderedDict
+    :param parsed_fields: list(tuple(str, bool))
+    :return: OrderedDict
+    """
+
+    reverse = parsed_fields[0][1]
+    results = OrderedDict()
+    for name in sorted(groups.keys(), key=sort_value, reverse=reverse):
+        children = groups[name]
+        if len(parsed_fields) > 1:
+            children = _sort_groups(children, parsed_fields[1:])
+        results[name] = children
+
+    return results
+
+
+class LibrarySorter(object):
+    """
+    Sorts library paths using the data stored in a library index
+    Composite sort keys are computed once for all the indexed paths and the resulting ordering is cached until
+    the index data or the sort fields change, so sorting search results only compares integers
+    """
+
+    def __init__(self, index):
+        super(LibrarySorter, self).__init__()
+
+        self._index = index
+        self._version = None
+        self._ranks = dict()
+
+    def clear(self):
+        """
+        Removes all cached orderings
+        """
+
+        self._version = None
+        self._ranks = dict()
+
+    def ranks(self, sort_by):
+        """
+        Returns the position of every indexed path when sorted by the given fields
+        :param sort_by: list(str)
+        :return: dict(str, int)
+        """
+
+        # Index lock keeps index data and version consistent while keys are computed from a search thread
+        with self._index.lock():
+            if self._version != self._index.version():
+                self._ranks = dict()
+                self._version = self._index.version()
+
+            cache_key = tuple(sort_by)
+            ranks = self._ranks.get(cache_key)
+            if ranks is None:
+                parsed_fields = parse_fields(sort_by)
+                keys = dict(
+                    (path, sort_key(self._index.record(path) or dict(), parsed_fields))
+                    for path in self._index.paths())
+                ranks = dict((path, i) for i, path in enumerate(sorted(keys, key=keys.__getitem__)))
+                self._ranks[cache_key] = ranks
+
+        return ranks
+
+    def sort(self, paths, sort_by):
+        """
+        Returns the given paths sorted by the given fields
+        :param paths: list(str)
+        :param sort_by: list(str)
+        :return: list(str)
+        """
+
+        ranks = self.ranks(sort_by)
+        last = len(ranks)
+
+        return sorted(paths, key=lambda path: ranks.get(path, last))
+
+    def group(self, paths, group_by):
+        """
+        Groups the given paths by the given fields
+        :param paths: list(str)
+        :param group_by: list(str)
+        :return: OrderedDict
+        """
+
+        with self._index.lock():
+            return group(paths, group_by, lambda path: self._index.record(path) or dict())
@@ -0,0 +1,516 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains storage backends used by libraries to persist their data base
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import json
+import sqlite3
+import threading
+import contextlib
+
+from tpPyUtils import decorators, path as path_utils
+
+from tpQtLib.widgets.library import utils
+
+
+class LibraryStorage(object):
+    """
+    Base class for library data base storages.
+    Data is a dictionary where each key is an item path and each value is the item data dictionary
+    """
+
+    Extensions = list()
+
+    def __init__(self, path):
+        super(LibraryStorage, self).__init__()
+
+        self._path = path_utils.normalize_path(path)
+        self._batch_depth = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def match(cls, path):
+        """
+        Returns whether the given data base path can be handled by this storage
+        :param path: str
+        :return: bool
+        """
+
+        for ext in cls.Extensions:
+            if path.lower().endswith(ext):
+                return True
+
+        return False
+
+    @decorators.abstractmethod
+    def mtime(self):
+        """
+        Returns a value that changes every time data is modified
+        :return: float or int or None
+        """
+
+        raise NotImplementedError('LibraryStorage mtime() not implemented!')
+
+    @decorators.abstractmethod
+    def read(self):
+        """
+        Returns all the data stored. Returned records are copies, so modifying them does not modify the storage
+        :return: dict
+        """
+
+        raise NotImplementedError('LibraryStorage read() not implemented!')
+
+    @decorators.abstractmethod
+    def write(self, data):
+        """
+        Replaces all the stored data with the given one
+        :param data: dict
+        """
+
+        raise NotImplementedError('LibraryStorage write() not implemented!')
+
+    @decorators.abstractmethod
+    def update(self, records=None, removed=None):
+        """
+        Inserts or replaces the given records and deletes the given paths
+        >>> update({'/lib/test.anim': {'name': 'test.anim'}}, removed=['/lib/old.anim'])
+        :param records: dict or None
+        :param removed: list(str) or None
+        """
+
+        raise NotImplementedError('LibraryStorage update() not implemented!')
+
+    @decorators.abstractmethod
+    def rename(self, source, target):
+        """
+        Renames the given source path, and all its children paths, to the given target path
+        :param source: str
+        :param target: str
+        """
+
+        raise NotImplementedError('LibraryStorage rename() not implemented!')
+
+    def rename_paths(self, renames):
+        """
+        Renames all the given source paths, and their children paths, to their target paths in a single batch
+        :param renames: dict(str, str), source path -> target path
+        """
+
+        with self.batch():
+            for source, target in renames.items():
+                self.rename(source, target)
+
+    def path(self):
+        """
+        Returns path where data base is located
+        :return: str
+        """
+
+        return self._path
+
+    def exists(self):
+        """
+        Returns whether data base exists on disk or not
+        :return: bool
+        """
+
+        return os.path.exists(self._path)
+
+    def is_batching(self):
+        """
+        Returns whether a batch of operations is being recorded
+        :return: bool
+        """
+
+        return self._batch_depth > 0
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager that groups all the operations done inside it in a single atomic write
+        >>> with storage.batch():
+        >>>     storage.update({path: data})
+        >>>     storage.rename(source, target)
+        """
+
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            except Exception:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._rollback()
+                raise
+            else:
+                self._batch_depth -= 1
+                if not self._batch_depth:
+                    self._commit()
+
+    def import_json(self, path):
+        """
+        Replaces the stored data with the data of the given JSON data base
+        :param path: str
+        """
+
+        self.write(utils.read_json(path))
+
+    def export_json(self, path):
+        """
+        Writes all the stored data into the given JSON data base
+        :param path: str
+        """
+
+        utils.save_json(path, self.read())
+
+    def close(self):
+        """
+        Releases any resource opened by the storage
+        """
+
+        pass
+
+    def _commit(self):
+        """
+        Internal function that writes pending operations to disk
+        Called when the outer most operation or batch finishes
+        """
+
+        pass
+
+    def _rollback(self):
+        """
+        Internal function that discards pending operations
+        Called when an exception is raised inside a batch
+        """
+
+        pass
+
+
+class JSONLibraryStorage(LibraryStorage):
+    """
+    Storage that keeps the whole data base in a single JSON file.
+    Every commit rewrites the whole file, so it should be used for small libraries or as an exchange format
+    """
+
+    Extensions = ['.json']
+
+    def __init__(self, path):
+        super(JSONLibraryStorage, self).__init__(path)
+
+        self._data = None
+        self._mtime = None
+        self._pending = False
+
+    def mtime(self):
+        """
+        Overrides base LibraryStorage mtime function
+        Returns the modification time of the JSON file
+        :return: float or None
+        """
+
+        if not self.exists():
+            return None
+
+        return os.path.getmtime(self._path)
+
+    def read(self):
+        """
+        Overrides base LibraryStorage read function
+        :return: dict
+        """
+
+        with self._lock:
+            return dict((path, dict(record)) for path, record in self._cached_data().items())
+
+    def write(self, data):
+        """
+        Overrides base LibraryStorage write function
+        :param data: dict
+        """
+
+        with self.batch():
+            self._data = dict(data)
+            self._pending = True
+
+    def update(self, records=None, removed=None):
+        """
+        Overrides base LibraryStorage update function
+        :param records: dict or None
+        :param removed: list(str) or None
+        """
+
+        with self.batch():
+            data = self._cached_data()
+            data.update(records or dict())
+            for path in removed or list():
+                data.pop(path, None)
+            self._pending = True
+
+    def rename(self, source, target):
+        """
+        Overrides base LibraryStorage rename function
+        :param source: str
+        :param target: str
+        """
+
+        with self.batch():
+            utils.rename_path_in_data(self._cached_data(), source, target)
+            self._pending = True
+
+    def rename_paths(self, renames):
+        """
+        Overrides base LibraryStorage rename_paths function
+        Data is walked only once for all the renamed paths
+        :param renames: dict(str, str)
+        """
+
+        with self.batch():
+            utils.rename_paths_in_data(self._cached_data(), renames)
+            self._pending = True
+
+    def _cached_data(self):
+        """
+        Internal function that returns the data parsed from the JSON file
+        File is only parsed again if it was modified after last read
+        :return: dict
+        """
+
+        mtime = self.mtime()
+        if self._data is None or (not self._pending and mtime != self._mtime):
+            self._data = utils.read_json(self._path) if mtime is not None else dict()
+            self._mtime = mtime
+
+        return self._data
+
+    def _commit(self):
+        """
+        Overrides base LibraryStorage _commit function
+        """
+
+        if not self._pending:
+            return
+
+        utils.save_json(self._path, self._data)
+        self._mtime = self.mtime()
+        self._pending = False
+
+    def _rollback(self):
+        """
+        Overrides base LibraryStorage _rollback function
+        """
+
+        self._data = None
+        self._mtime = None
+        self._pending = False
+
+
+class SQLiteLibraryStorage(LibraryStorage):
+    """
+    Storage that keeps each item data in its own row of a SQLite data base.
+    Upserts, deletes and renames only touch the affected rows and every batch is a single transaction
+    """
+
+    Extensions = ['.db', '.sqlite', '.sqlite3']
+
+    def __init__(self, path):
+        super(SQLiteLibraryStorage, self).__init__(path)
+
+        self._connection = None
+
+    def mtime(self):
+        """
+        Overrides base LibraryStorage mtime function
+        Returns the revision stored in the data base, which is incremented by every commit. A counter is used
+        instead of the commit time, so it never repeats or goes backwards if the system clock changes
+        :return: int or None
+        """
+
+        if not self.exists():
+            return None
+
+        with self._lock:
+            row = self._cursor().execute('SELECT value FROM meta WHERE key = ?', ('revision',)).fetchone()
+
+        return int(row[0]) if row else None
+
+    def read(self):
+        """
+        Overrides base LibraryStorage read function
+        :return: dict
+        """
+
+        if not self.exists():
+            return dict()
+
+        with self._lock:
+            rows = self._cursor().execute('SELECT path, data FROM items').fetchall()
+
+        return dict((path, json.loads(data)) for path, data in rows)
+
+    def write(self, data):
+        """
+        Overrides base LibraryStorage write function
+        :param data: dict
+        """
+
+        with self.batch():
+            cursor = self._cursor()
+            cursor.execute('DELETE FROM items')
+            cursor.executemany(
+                'INSERT INTO items (path, data) VALUES (?, ?)',
+                [(path, json.dumps(record)) for path, record in data.items()])
+
+    def update(self, records=None, removed=None):
+        """
+        Overrides base LibraryStorage update function
+        :param records: dict or None
+        :param removed: list(str) or None
+        """
+
+        with self.batch():
+            cursor = self._cursor()
+            if records:
+                cursor.executemany(
+                    'INSERT OR REPLACE INTO items (path, data) VALUES (?, ?)',
+                    [(path, json.dumps(record)) for path, record in records.items()])
+            if removed:
+                cursor.executemany('DELETE FROM items WHERE path = ?', [(path,) for path in removed])
+
+    def rename(self, source, target):
+        """
+        Overrides base LibraryStorage rename function
+        :param source: str
+        :param target: str
+        """
+
+        source_prefix = source if source.endswith('/') else source + '/'
+
+        with self.batch():
+            cursor = self._cursor()
+            rows = cursor.execute(
+                'SELECT path, data FROM items WHERE path = ? OR substr(path, 1, ?) = ?',
+                (source, len(source_prefix), source_prefix)).fetchall()
+            cursor.executemany('DELETE FROM items WHERE path = ?', [(path,) for path, _ in rows])
+            renamed = list()
+            for path, data in rows:
+                record = dict(
+                    (k, utils.rename_path_value(v, source, target)) for k, v in json.loads(data).items())
+                renamed.append((utils.rename_path_value(path, source, target), json.dumps(record)))
+            cursor.executemany('INSERT OR REPLACE INTO items (path, data) VALUES (?, ?)', renamed)
+
+    def close(self):
+        """
+        Overrides base LibraryStorage close function
+        """
+
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _cursor(self):
+        """
+        Internal function that returns a cursor of the data base connection
+        Data base and its tables are created the first time this function is called
+        :return: sqlite3.Cursor
+        """
+
+        if self._connection is None:
+            dirname = os.path.dirname(self._path)
+            if dirname and not os.path.exists(dirname):
+                os.makedirs(dirname)
+            self._connection = sqlite3.connect(self._path, check_same_thread=False)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS items (path TEXT PRIMARY KEY, data TEXT)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            self._connection.commit()
+
+        return self._connection.cursor()
+
+    def _commit(self):
+        """
+        Overrides base LibraryStorage _commit function
+        """
+
+        if self._connection is None:
+            return
+
+        self._connection.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', ('revision', 0))
+        self._connection.execute(
+            'UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = ?', ('revision',))
+        self._connection.commit()
+
+    def _rollback(self):
+        """
+        Overrides base LibraryStorage _rollback function
+        """
+
+        if self._connection is not None:
+            self._connection.rollback()
+
+
+def storage_classes():
+    """
+    Returns all the available storage classes
+    :return: list(class)
+    """
+
+    return [SQLiteLibraryStorage, JSONLibraryStorage]
+
+
+def storage_from_path(path, migrate=False):
+    """
+    Returns a new storage instance that can handle the given data base path
+    JSON storage is used when no storage matches the given path
+    :param path: str
+    :param migrate: bool, whether JSON data bases are migrated to SQLite (see migrate_json_storage)
+    :return: LibraryStorage
+    """
+
+    if migrate and JSONLibraryStorage.match(path):
+        return migrate_json_storage(path)
+
+    for storage_class in storage_classes():
+        if storage_class.match(path):
+            return storage_class(path)
+
+    return JSONLibraryStorage(path)
+
+
+def migrated_path(path):
+    """
+    Returns the path of the SQLite data base a JSON data base is migrated to
+    :param path: str
+    :return: str
+    """
+
+    return os.path.splitext(path)[0] + SQLiteLibraryStorage.Extensions[0]
+
+
+def migrate_json_storage(path):
+    """
+    Returns a SQLite storage next to the given JSON data base. The first time it is called, the JSON data is
+    imported into it. Data is imported into a temporary file that is renamed when done, so an interrupted migration
+    is started again the next time. JSON data base is not modified, so it is kept as a backup
+    :param path: str
+    :return: SQLiteLibraryStorage
+    """
+
+    db_path = migrated_path(path)
+    if not os.path.exists(db_path) and os.path.isfile(path):
+        temp_path = db_path + '.migrating'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        temp_storage = SQLiteLibraryStorage(temp_path)
+        try:
+            temp_storage.import_json(path)
+        finally:
+            temp_storage.close()
+        os.rename(temp_path, db_path)
+
+    return SQLiteLibraryStorage(db_path)
@@ -0,0 +1,317 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains library table view implementation
+"""
+
+from __future__ import print_function, division, absolute_import
+
+from Qt.QtCore import *
+from Qt.QtWidgets import *
+
+from tpQtLib.widgets.library import mixin, profiler
+
+
+class LibraryTableView(mixin.LibraryViewWidgetMixin, QTreeView):
+    """
+    Class that implements the view that displays the lazy item model of a library in table mode
+    Items are only created for the rows that are painted, selected or dragged, so big libraries can be displayed
+    without creating all their items. This class is used by LibraryViewer class
+    """
+
+    itemClicked = Signal(object)
+    itemDoubleClicked = Signal(object)
+
+    def __init__(self, parent=None):
+        QTreeView.__init__(self, parent)
+        mixin.LibraryViewWidgetMixin.__init__(self)
+
+        self._tree_widget = None
+        self._item_model = None
+
+        self.setAutoScroll(False)
+        self.setMouseTracking(True)
+        self.setSortingEnabled(False)
+        self.setRootIsDecorated(False)
+        self.setItemsExpandable(False)
+        self.setUniformRowHeights(True)
+        self.setIndentation(0)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setDragEnabled(True)
+        self.setDragDropMode(QAbstractItemView.DragOnly)
+
+        self.clicked.connect(self._on_index_clicked)
+        self.doubleClicked.connect(self._on_index_double_clicked)
+
+    """
+    ##########################################################################################
+    OVERRIDES
+    ##########################################################################################
+    """
+
+    def paintEvent(self, event):
+        """
+        Overrides base QTreeView paintEvent function
+        :param event: QPaintEvent
+        """
+
+        paint_profiler = self.paint_profiler()
+        if paint_profiler is None:
+            QTreeView.paintEvent(self, event)
+            return
+
+        paint_profiler.begin_frame(self)
+        try:
+            QTreeView.paintEvent(self, event)
+        finally:
+            paint_profiler.end_frame()
+
+    def drawRow(self, painter, options, index):
+        """
+        Overrides base QTreeView drawRow function
+        Rows are not attached to a tree widget, so their cells are painted by the delegate
+        :param painter: QPainter
+        :param options: QStyleOption
+        :param index: QModelIndex
+        """
+
+        paint_profiler = self.paint_profiler()
+        if paint_profiler is None:
+            QTreeView.drawRow(self, painter, options, index)
+            return
+
+        start = profiler.clock()
+        QTreeView.drawRow(self, painter, options, index)
+        item = self.item_from_index(index)
+        if item is not None:
+            paint_profiler.record_row(item, profiler.clock() - start)
+
+    def mouseMoveEvent(self, event):
+        """
+        Overrides base QTreeView mouseMoveEvent function
+        :param event: QMouseEvent
+        """
+
+        mixin.LibraryViewWidgetMixin.mouseMoveEvent(self, event)
+        QTreeView.mouseMoveEvent(self, event)
+
+    def mouseReleaseEvent(self, event):
+        """
+        Overrides base QTreeView mouseReleaseEvent function
+        :param event: QMouseEvent
+        """
+
+        mixin.LibraryViewWidgetMixin.mouseReleaseEvent(self, event)
+        QTreeView.mouseReleaseEvent(self, event)
+
+    """
+    ##########################################################################################
+    BASE
+    ##########################################################################################
+    """
+
+    def tree_widget(self):
+        """
+        Return the tree widget that displays the items of libraries that are not lazy
+        :return: LibraryTreeWidget
+        """
+
+        return self._tree_widget
+
+    def set_tree_widget(self, tree_widget):
+        """
+        Set the tree widget that displays the items of libraries that are not lazy
+        Its columns layout is used by this view and its selection signal is emitted when the selection changes
+        :param tree_widget: LibraryTreeWidget
+        """
+
+        self._tree_widget = tree_widget
+
+    def item_model(self):
+        """
+        Returns the lazy item model displayed by the view
+        :return: LibraryItemModel or None
+        """
+
+        return self._item_model
+
+    def set_item_model(self, item_model):
+        """
+        Sets the lazy item model displayed by the view
+        :param item_model: LibraryItemModel
+        """
+
+        if item_model is self._item_model:
+            return
+
+        self._item_model = item_model
+        self.setModel(item_model)
+        self.selectionModel().selectionChanged.connect(self._on_model_selection_changed)
+
+    def update_columns(self):
+        """
+        Updates the width and the hidden state of the columns from the ones of the tree widget
+        """
+
+        if not self._tree_widget:
+            return
+
+        header = self.header()
+        for column in range(min(self._tree_widget.columnCount(), header.count())):
+            self.setColumnHidden(column, self._tree_widget.isColumnHidden(column))
+            self.setColumnWidth(column, self._tree_widget.columnWidth(column))
+
+    def items(self):
+        """
+        Return all the items
+        All the items are created, so it should be avoided with big libraries
+        :return: list(LibraryItem)
+        """
+
+        if self._item_model is None:
+            return list()
+
+        return self._item_model.items()
+
+    def item_at(self, pos):
+        """
+        Returns the item at the given position
+        The coordinates are relative to the view's viewport
+        :param pos: QPoint
+        :return: LibraryItem
+        """
+
+        return self.item_from_index(self.indexAt(pos))
+
+    def selected_item(self):
+        """
+        Returns the last selected item
+        :return: LibraryItem or None
+        """
+
+        items = self.selected_items()
+
+        return items[-1] if items else None
+
+    def selected_items(self):
+        """
+        Returns a list of all selected items
+        :return: list(LibraryItem)
+        """
+
+        if self._item_model is None:
+            return list()
+
+        indexes = [index for index in self.selectionModel().selectedIndexes() if index.column() == 0]
+
+        return self._item_model.items_from_indexes(indexes)
+
+    def set_items_selected(self, items, value):
+        """
+        Sets the selected state for the given items
+        :param items: list(LibraryItem)
+        :param value: bool
+        """
+
+        if self._item_model is None:
+            return
+
+        flag = QItemSelectionModel.Select if value else QItemSelectionModel.Deselect
+        for item in items:
+            self.selectionModel().select(self._item_model.index_from_item(item), flag | QItemSelectionModel.Rows)
+
+    def index_from_item(self, item):
+        """
+        Returns QModelIndex associated with the given item
+        :param item: LibraryItem
+        :return: QModelIndex
+        """
+
+        if self._item_model is None:
+            return QModelIndex()
+
+        return self._item_model.index_from_item(item)
+
+    def item_from_index(self, index):
+        """
+        Return the LibraryItem associated with the given model index
+        :param index: QModelIndex
+        :return: LibraryItem or None
+        """
+
+        if self._item_model is None:
+            return None
+
+        return self._item_model.item_from_index(index)
+
+    def visual_item_rect(self, item):
+        """
+        Returns the visual rect of the row of the given item
+        :param item: LibraryItem
+        :return: QRect
+        """
+
+        return self.visualRect(self.index_from_item(item))
+
+    def scroll_to_item(self, item, pos=None):
+        """
+        Ensures that the item is visible
+        :param item: LibraryItem
+        :param pos: QAbstractItemView.ScrollHint or None
+        """
+
+        index = self.index_from_item(item)
+        pos = pos or QAbstractItemView.PositionAtCenter
+
+        self.scrollTo(index, pos)
+
+    """
+    ##########################################################################################
+    CALLBACKS
+    ##########################################################################################
+    """
+
+    def _on_index_clicked(self, index):
+        """
+        Internal callback function that is called when the user clicks on a row
+        :param index: QModelIndex
+        """
+
+        item = self.item_from_index(index)
+        if item is None:
+            return
+
+        item.clicked()
+        self.itemClicked.emit(item)
+
+    def _on_index_double_clicked(self, index):
+        """
+        Internal callback function that is called when the user double clicks on a row
+        :param index: QModelIndex
+        """
+
+        item = self.item_from_index(index)
+        if item is None:
+            return
+
+        item.double_clicked()
+        self.itemDoubleClicked.emit(item)
+
+    def _on_model_selection_changed(self, selected, deselected):
+        """
+        Internal callback function that is called when the selection of the lazy item model changes
+        Selected items are pinned, so the model does not release them, and tree widget selection signal is emitted
+        :param selected: QItemSelection
+        :param deselected: QItemSelection
+        """
+
+        paths = list()
+        for index in self.selectionModel().selectedIndexes():
+            path = self._item_model.path_from_index(index)
+            if path and path not in paths:
+                paths.append(path)
+        self._item_model.set_pinned_paths(paths)
+        if self._tree_widget:
+            self._tree_widget.itemSelectionChanged.emit()
@@ -0,0 +1,812 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains process wide thumbnail cache used by library items
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import time
+import heapq
+import hashlib
+import threading
+from collections import OrderedDict
+
+from Qt.QtCore import *
+from Qt.QtGui import *
+
+import tpQtLib
+from tpQtLib.core import image as image_utils
+from tpQtLib.widgets.library import consts, profiler
+
+
+class ThumbnailWorker(QRunnable, object):
+    """
+    Class that loads a thumbnail through the thumbnail cache in a thread
+    """
+
+    class ThumbnailWorkerSignals(QObject, object):
+        triggered = Signal(object)
+
+    def __init__(self, cache, path, size, cache_path=None, *args):
+        super(ThumbnailWorker, self).__init__(*args)
+
+        self._cache = cache
+        self._path = path
+        self._size = QSize(size)
+        self._cache_path = cache_path
+        self.signals = ThumbnailWorker.ThumbnailWorkerSignals()
+
+    def path(self):
+        """
+        Returns the path of the image being loaded
+        :return: str
+        """
+
+        return self._path
+
+    def size(self):
+        """
+        Returns the size the image is loaded at
+        :return: QSize
+        """
+
+        return self._size
+
+    def run(self):
+        """
+        Overrides base QRunnable run function
+        This is the starting point for the thread
+        """
+
+        try:
+            self._cache.load(self._path, self._size, cache_path=self._cache_path)
+        except Exception as exc:
+            tpQtLib.logger.error('Cannot load thumbnail image "{}": {}'.format(self._path, exc))
+        self.signals.triggered.emit(self)
+
+
+class ThumbnailScheduler(QObject, object):
+    """
+    Class that schedules thumbnail loading for the items displayed by a LibraryViewer
+    Pending requests are ordered by their distance to the visible area of the viewer, items one screen ahead in
+    the scroll direction are prefetched and requests of items outside that window are dropped
+    """
+
+    def __init__(self, viewer, cache, thread_pool, parent=None):
+        super(ThumbnailScheduler, self).__init__(parent)
+
+        self._viewer = viewer
+        self._cache = cache
+        self._thread_pool = thread_pool
+        self._requests = dict()
+        self._running = dict()
+        self._running_items = dict()
+        self._scroll_value = 0
+        self._scroll_direction = 1
+        self._updating = False
+
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(0)
+        self._update_timer.timeout.connect(self._on_update)
+
+    def viewer(self):
+        """
+        Returns the viewer whose items thumbnails are loaded
+        :return: LibraryViewer
+        """
+
+        return self._viewer
+
+    def cache(self):
+        """
+        Returns the cache where thumbnails are loaded
+        :return: ThumbnailCache
+        """
+
+        return self._cache
+
+    def pending_count(self):
+        """
+        Returns the number of thumbnail requests waiting to be loaded
+        :return: int
+        """
+
+        return len(self._requests)
+
+    def running_count(self):
+        """
+        Returns the number of thumbnails being loaded
+        :return: int
+        """
+
+        return len(self._running)
+
+    def max_running_count(self):
+        """
+        Returns the maximum number of thumbnails loaded at the same time
+        :return: int
+        """
+
+        return max(1, self._thread_pool.maxThreadCount())
+
+    def request(self, item, path, size, cache_path=None):
+        """
+        Requests the thumbnail of the given path to be loaded for the given item
+        :param item: LibraryItem
+        :param path: str
+        :param size: QSize
+        :param cache_path: str or None
+        """
+
+        key = (path, size.width(), size.height())
+        if key in self._running:
+            if item not in self._running_items[key]:
+                self._running_items[key].append(item)
+            return
+
+        request = self._requests.get(key)
+        if request is None:
+            request = {'path': path, 'size': QSize(size), 'cachePath': cache_path, 'items': list()}
+            self._requests[key] = request
+        if item not in request['items']:
+            request['items'].append(item)
+
+        self.schedule()
+
+    def schedule(self):
+        """
+        Requests pending thumbnails to be prioritized and started in the next event loop iteration
+        """
+
+        if not self._updating:
+            self._update_timer.start()
+
+    def set_scroll_value(self, value):
+        """
+        Updates the scroll position of the viewer, used to know in which direction thumbnails are prefetched
+        :param value: int
+        """
+
+        if value != self._scroll_value:
+            self._scroll_direction = 1 if value > self._scroll_value else -1
+        self._scroll_value = value
+        self.schedule()
+
+    def clear(self):
+        """
+        Drops all pending thumbnail requests
+        Thumbnails already being loaded are not canceled
+        """
+
+        self._requests = dict()
+
+    def visible_rect(self):
+        """
+        Returns the visible rect of the viewer in viewport coordinates
+        :return: QRect
+        """
+
+        return self._viewer.current_view().viewport().rect()
+
+    def prefetch_rect(self):
+        """
+        Returns the rect, in viewport coordinates, whose items thumbnails should be loaded
+        Visible rect is extended one screen in the scroll direction
+        :return: QRect
+        """
+
+        visible_rect = self.visible_rect()
+        prefetch_rect = QRect(visible_rect)
+        if self._scroll_direction > 0:
+            prefetch_rect.setBottom(visible_rect.bottom() + visible_rect.height())
+        else:
+            prefetch_rect.setTop(visible_rect.top() - visible_rect.height())
+
+        return prefetch_rect
+
+    def item_rect(self, item):
+        """
+        Returns the rect of the given item in viewport coordinates
+        :param item: LibraryItem
+        :return: QRect
+        """
+
+        index = self._viewer.index_from_item(item)
+        if not index.isValid():
+            return QRect()
+
+        return self._viewer.current_view().visualRect(index)
+
+    def _rows_in_rect(self, view, rect):
+        """
+        Internal function that returns the first and last model rows intersecting given rect
+        Rows are laid out in order, so both rows are found using a binary search
+        :param view: QAbstractItemView
+        :param rect: QRect
+        :return: tuple(int, int)
+        """
+
+        model = view.model()
+        count = model.rowCount()
+
+        def _first_row(fn):
+            low, high = 0, count
+            while low < high:
+                middle = (low + high) // 2
+                if fn(view.visualRect(model.index(middle, 0))):
+                    high = middle
+                else:
+                    low = middle + 1
+            return low
+
+        first = _first_row(lambda r: r.bottom() >= rect.top())
+        last = _first_row(lambda r: r.top() > rect.bottom()) - 1
+
+        return first, min(last, first + consts.THUMBNAIL_MAX_PREFETCH_ITEMS)
+
+    def _prefetch(self, view, rect):
+        """
+        Internal function that requests the thumbnails of the items inside the given rect
+        :param view: QAbstractItemView
+        :param rect: QRect
+        """
+
+        model = view.model()
+        first, last = self._rows_in_rect(view, rect)
+        for row in range(first, last + 1):
+            item = self._viewer.item_from_index(model.index(row, 0))
+            if item:
+                item.load_thumbnail()
+
+    def _start(self, key, request):
+        """
+        Internal function that starts loading the thumbnail of the given request
+        :param key: tuple
+        :param request: dict
+        """
+
+        worker = ThumbnailWorker(self._cache, request['path'], request['size'], cache_path=request['cachePath'])
+        worker.setAutoDelete(False)
+        worker.signals.triggered.connect(self._on_worker_finished)
+        self._running[key] = worker
+        self._running_items[key] = request['items']
+        self._thread_pool.start(worker)
+
+    def _on_update(self):
+        """
+        Internal callback function that drops requests outside the prefetch window and starts the closest ones
+        """
+
+        view = self._viewer.current_view()
+        visible_rect = self.visible_rect()
+        prefetch_rect = self.prefetch_rect()
+
+        self._updating = True
+        try:
+            self._prefetch(view, prefetch_rect)
+        finally:
+            self._updating = False
+
+        queue = list()
+        for key, request in list(self._requests.items()):
+            distance = None
+            for item in request['items']:
+                rect = self.item_rect(item)
+                if not rect.isValid() or not rect.intersects(prefetch_rect):
+                    continue
+                if rect.intersects(visible_rect):
+                    item_distance = 0
+                elif rect.top() > visible_rect.bottom():
+                    item_distance = rect.top() - visible_rect.bottom()
+                else:
+                    item_distance = visible_rect.top() - rect.bottom()
+                distance = item_distance if distance is None else min(distance, item_distance)
+            if distance is None:
+                del self._requests[key]
+            else:
+                queue.append((distance, key))
+
+        heapq.heapify(queue)
+        while queue and len(self._running) < self.max_running_count():
+            distance, key = heapq.heappop(queue)
+            self._start(key, self._requests.pop(key))
+
+    def _on_worker_finished(self, worker):
+        """
+        Internal callback function that is called when a thumbnail worker finishes
+        :param worker: ThumbnailWorker
+        """
+
+        paint_profiler = self._viewer.paint_profiler()
+        start = profiler.clock() if paint_profiler.is_enabled() else None
+
+        key = (worker.path(), worker.size().width(), worker.size().height())
+        self._running.pop(key, None)
+        for item in self._running_items.pop(key, list()):
+            item.invalidate_content()
+        self._viewer.current_view().viewport().update()
+        if self._requests:
+            self.schedule()
+
+        if start is not None:
+            paint_profiler.record_thumbnail_callback(profiler.clock() - start)
+
+
+class ThumbnailCache(object):
+    """
+    Process wide LRU cache of thumbnails keyed by (path, mtime, size)
+    Decoded images are kept in memory up to a byte budget and pre-scaled thumbnails are stored on disk, so
+    images do not need to be decoded again next time they are requested. Disk cache folders are pruned by size and
+    age the first time they are used and after a number of writes
+    QImages can be loaded from any thread, QPixmaps must only be requested from the main thread
+    """
+
+    def __init__(
+            self, max_bytes=consts.THUMBNAIL_CACHE_MAX_BYTES, max_paths=consts.THUMBNAIL_CACHE_MAX_PATHS,
+            max_disk_bytes=consts.THUMBNAIL_DISK_CACHE_MAX_BYTES, max_disk_age=consts.THUMBNAIL_DISK_CACHE_MAX_AGE,
+            prune_writes=consts.THUMBNAIL_DISK_CACHE_PRUNE_WRITES):
+        super(ThumbnailCache, self).__init__()
+
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._failed = OrderedDict()
+        self._mtimes = OrderedDict()
+        self._bytes = 0
+        self._max_bytes = max_bytes
+        self._max_paths = max_paths
+        self._max_disk_bytes = max_disk_bytes
+        self._max_disk_age = max_disk_age
+        self._prune_writes = prune_writes
+        self._disk_writes_count = dict()
+        self._pruning = set()
+        self._disk_removed = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_hits = 0
+        self._disk_writes = 0
+
+    @staticmethod
+    def byte_count(value):
+        """
+        Returns the number of bytes used by the given image or pixmap
+        :param value: QImage or QPixmap
+        :return: int
+        """
+
+        return value.width() * value.height() * max(value.depth(), 8) // 8
+
+    @staticmethod
+    def disk_path(cache_path, key):
+        """
+        Returns the path where the thumbnail with the given key is stored in the given disk cache folder
+        :param cache_path: str
+        :param key: tuple
+        :return: str
+        """
+
+        name = hashlib.md5(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(cache_path, name[:2], '{}.{}'.format(name, consts.THUMBNAIL_CACHE_FORMAT))
+
+    def max_bytes(self):
+        """
+        Returns the maximum number of bytes that decoded thumbnails can use
+        :return: int
+        """
+
+        return self._max_bytes
+
+    def set_max_bytes(self, max_bytes):
+        """
+        Sets the maximum number of bytes that decoded thumbnails can use
+        :param max_bytes: int
+        """
+
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+
+    def max_paths(self):
+        """
+        Returns the maximum number of paths whose modification time and failed state are kept
+        :return: int
+        """
+
+        return self._max_paths
+
+    def set_max_paths(self, max_paths):
+        """
+        Sets the maximum number of paths whose modification time and failed state are kept
+        :param max_paths: int
+        """
+
+        with self._lock:
+            self._max_paths = max_paths
+            self._evict_paths()
+
+    def mtime(self, path):
+        """
+        Returns the modification time of the given path
+        Modification time is cached until refresh is called for the path or until it is the least recently used one
+        and the maximum number of paths is reached
+        :param path: str
+        :return: float or None
+        """
+
+        with self._lock:
+            if path in self._mtimes:
+                mtime = self._mtimes.pop(path)
+            else:
+                try:
+                    mtime = os.path.getmtime(path)
+                except (OSError, TypeError):
+                    mtime = None
+            self._mtimes[path] = mtime
+            self._evict_paths()
+
+            return mtime
+
+    def key(self, path, size):
+        """
+        Returns the cache key of the given path and size
+        :param path: str
+        :param size: QSize
+        :return: tuple
+        """
+
+        return path, self.mtime(path), size.width(), size.height()
+
+    def contains(self, path, size):
+        """
+        Returns whether a thumbnail for the given path and size is in memory
+        :param path: str
+        :param size: QSize
+        :return: bool
+        """
+
+        with self._lock:
+            return self.key(path, size) in self._entries
+
+    def is_failed(self, path, size):
+        """
+        Returns whether the given path and size could not be loaded
+        :param path: str
+        :param size: QSize
+        :return: bool
+        """
+
+        with self._lock:
+            return self.key(path, size) in self._failed
+
+    def image(self, path, size):
+        """
+        Returns the thumbnail image stored in memory for the given path and size
+        Must be called from main thread
+        :param path: str
+        :param size: QSize
+        :return: QImage or None
+        """
+
+        value = self._get(self.key(path, size))
+        if isinstance(value, QPixmap):
+            value = value.toImage()
+
+        return value
+
+    def pixmap(self, path, size):
+        """
+        Returns the thumbnail pixmap stored in memory for the given path and size
+        Must be called from main thread
+        :param path: str
+        :param size: QSize
+        :return: QPixmap or None
+        """
+
+        key = self.key(path, size)
+        value = self._get(key)
+        if isinstance(value, QImage):
+            value = QPixmap.fromImage(value)
+            self._insert(key, value)
+
+        return value
+
+    def insert(self, path, size, value):
+        """
+        Stores the given image or pixmap as the thumbnail of the given path and size
+        :param path: str
+        :param size: QSize
+        :param value: QImage or QPixmap
+        """
+
+        self._insert(self.key(path, size), value)
+
+    def load(self, path, size, cache_path=None):
+        """
+        Loads into memory the thumbnail image of the given path scaled to fit the given size
+        Image is looked up in memory, then in the given disk cache folder and finally decoded from the given path
+        This function can be called from any thread
+        :param path: str
+        :param size: QSize
+        :param cache_path: str or None, folder where pre-scaled thumbnails are stored
+        :return: bool, whether the thumbnail is available in memory or not
+        """
+
+        key = self.key(path, size)
+        if self._get(key) is not None:
+            return True
+
+        with self._lock:
+            if key in self._failed:
+                return False
+
+        image = None
+        disk_path = None
+        if cache_path:
+            disk_path = self.disk_path(cache_path, key)
+            self._schedule_prune(cache_path)
+        if disk_path and os.path.isfile(disk_path):
+            image = QImage(disk_path)
+            if image.isNull():
+                image = None
+            else:
+                self._touch_disk(disk_path)
+                with self._lock:
+                    self._disk_hits += 1
+
+        if image is None:
+            image = self.decode(path, size)
+            if image is None:
+                with self._lock:
+                    self._failed[key] = None
+                    self._evict_paths()
+                return False
+            if disk_path and self._write_disk(disk_path, image):
+                with self._lock:
+                    self._disk_writes_count[cache_path] = self._disk_writes_count.get(cache_path, 0) + 1
+
+        self._insert(key, image)
+
+        return True
+
+    def decode(self, path, size):
+        """
+        Decodes the image of the given path scaled to fit the given size
+        Formats that support it (such as JPEG) are decoded directly at the scaled size
+        :param path: str
+        :param size: QSize
+        :return: QImage or None
+        """
+
+        return image_utils.read_image(path, size)
+
+    def refresh(self, path):
+        """
+        Forgets the cached modification time of the given path, so changes on disk are detected on next access
+        :param path: str
+        """
+
+        with self._lock:
+            self._mtimes.pop(path, None)
+
+    def remove(self, path):
+        """
+        Removes all the thumbnails of the given path from memory
+        :param path: str
+        """
+
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                value, count = self._entries.pop(key)
+                self._bytes -= count
+            for key in [k for k in self._failed if k[0] == path]:
+                self._failed.pop(key)
+            self._mtimes.pop(path, None)
+
+    def clear(self):
+        """
+        Removes all the thumbnails from memory
+        """
+
+        with self._lock:
+            self._entries = OrderedDict()
+            self._failed = OrderedDict()
+            self._mtimes = OrderedDict()
+            self._bytes = 0
+
+    def prune_disk(self, cache_path):
+        """
+        Removes from the given disk cache folder the thumbnails that were not used for longer than the maximum age
+        and the least recently used ones until the folder fits in the disk byte budget
+        :param cache_path: str
+        :return: int, number of removed thumbnails
+        """
+
+        files = list()
+        for root, dirs, names in os.walk(cache_path):
+            for name in names:
+                if not name.endswith('.' + consts.THUMBNAIL_CACHE_FORMAT):
+                    continue
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, file_path))
+
+        files.sort()
+        total = sum(file_size for _, file_size, _ in files)
+        min_mtime = time.time() - self._max_disk_age if self._max_disk_age else None
+        removed = 0
+        for file_mtime, file_size, file_path in files:
+            if total <= self._max_disk_bytes and (min_mtime is None or file_mtime >= min_mtime):
+                break
+            try:
+                os.remove(file_path)
+            except OSError as exc:
+                tpQtLib.logger.warning('Impossible to remove thumbnail cache "{}": {}'.format(file_path, exc))
+                continue
+            total -= file_size
+            removed += 1
+
+        with self._lock:
+            self._disk_removed += removed
+
+        return removed
+
+    def stats(self):
+        """
+        Returns cache statistics
+        :return: dict
+        """
+
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'diskHits': self._disk_hits,
+                'diskWrites': self._disk_writes,
+                'diskRemoved': self._disk_removed,
+                'count': len(self._entries),
+                'bytes': self._bytes,
+                'maxBytes': self._max_bytes
+            }
+
+    def reset_stats(self):
+        """
+        Resets cache statistics counters
+        """
+
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._disk_hits = 0
+            self._disk_writes = 0
+            self._disk_removed = 0
+
+    def _get(self, key):
+        """
+        Internal function that returns the value stored with the given key and marks it as recently used
+        :param key: tuple
+        :return: QImage or QPixmap or None
+        """
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries[key] = entry
+            self._hits += 1
+
+            return entry[0]
+
+    def _insert(self, key, value):
+        """
+        Internal function that stores the given value with the given key and evicts least recently used entries
+        :param key: tuple
+        :param value: QImage or QPixmap
+        """
+
+        count = self.byte_count(value)
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry:
+                self._bytes -= old_entry[1]
+            self._entries[key] = (value, count)
+            self._bytes += count
+            self._evict()
+
+    def _evict(self):
+        """
+        Internal function that removes least recently used entries until cache fits in its byte budget
+        Most recently used entry is never evicted
+        """
+
+        while self._bytes > self._max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry[1]
+            self._evictions += 1
+
+    def _evict_paths(self):
+        """
+        Internal function that forgets the least recently used modification times and failed thumbnails until their
+        number fits in the maximum number of paths. Forgotten ones are checked again next time they are requested
+        """
+
+        while len(self._mtimes) > self._max_paths:
+            self._mtimes.popitem(last=False)
+        while len(self._failed) > self._max_paths:
+            self._failed.popitem(last=False)
+
+    def _schedule_prune(self, cache_path):
+        """
+        Internal function that prunes the given disk cache folder in a background thread the first time it is used
+        and after the given number of writes in it
+        :param cache_path: str
+        """
+
+        with self._lock:
+            count = self._disk_writes_count.get(cache_path)
+            if count is not None and count < self._prune_writes:
+                return
+            if cache_path in self._pruning:
+                return
+            self._disk_writes_count[cache_path] = 0
+            self._pruning.add(cache_path)
+
+        def _prune():
+            try:
+                self.prune_disk(cache_path)
+            except Exception as exc:
+                tpQtLib.logger.warning('Impossible to prune thumbnail cache "{}": {}'.format(cache_path, exc))
+            finally:
+                with self._lock:
+                    self._pruning.discard(cache_path)
+
+        thread = threading.Thread(target=_prune)
+        thread.daemon = True
+        thread.start()
+
+    def _write_disk(self, disk_path, image):
+        """
+        Internal function that stores the given thumbnail image in the disk cache
+        :param disk_path: str
+        :param image: QImage
+        :return: bool, whether the thumbnail was written or not
+        """
+
+        try:
+            dirname = os.path.dirname(disk_path)
+            if not os.path.isdir(dirname):
+                try:
+                    os.makedirs(dirname)
+                except OSError:
+                    # Folder can be created by other thread at the same time
+                    if not os.path.isdir(dirname):
+                        raise
+            if image.save(disk_path):
+                with self._lock:
+                    self._disk_writes += 1
+                return True
+        except (OSError, IOError) as exc:
+            tpQtLib.logger.warning('Impossible to write thumbnail cache "{}": {}'.format(disk_path, exc))
+
+        return False
+
+    def _touch_disk(self, disk_path):
+        """
+        Internal function that updates the modification time of the given disk cache thumbnail, so thumbnails that
+        are still used are the last ones to be pruned
+        :param disk_path: str
+        """
+
+        try:
+            os.utime(disk_path, None)
+        except OSError:
+            pass
@@ -7,6 +7,7 @@ Module that contains library item widget implementation
 
 from __future__ import print_function, division, absolute_import
 
+import bisect
 from functools import partial
 
 from Qt.QtCore import *
@@ -14,7 +15,7 @@ from Qt.QtWidgets import *
 from Qt.QtGui import *
 
 import tpQtLib
-from tpQtLib.widgets.library import consts, mixin, items
+from tpQtLib.widgets.library import consts, mixin, items, profiler
 
 
 class LibraryTreeWidget(mixin.LibraryViewWidgetMixin, QTreeWidget):
@@ -76,6 +77,23 @@ class LibraryTreeWidget(mixin.LibraryViewWidgetMixin, QTreeWidget):
     ##########################################################################################
     """
 
+    def paintEvent(self, event):
+        """
+        Overrides base QTreeWidget paintEvent function
+        :param event: QPaintEvent
+        """
+
+        paint_profiler = self.paint_profiler()
+        if paint_profiler is None:
+            QTreeWidget.paintEvent(self, event)
+            return
+
+        paint_profiler.begin_frame(self)
+        try:
+            QTreeWidget.paintEvent(self, event)
+        finally:
+            paint_profiler.end_frame()
+
     def drawRow(self, painter, options, index):
         """
         Overrides base QTreeWidget drawDrow function
@@ -85,7 +103,14 @@ class LibraryTreeWidget(mixin.LibraryViewWidgetMixin, QTreeWidget):
         """
 
         item = self.itemFromIndex(index)
+        paint_profiler = self.paint_profiler()
+        if paint_profiler is None:
+            item.paint_row(painter, options, index)
+            return
+
+        start = profiler.clock()
         item.paint_row(painter, options, index)
+        paint_profiler.record_row(item, profiler.clock() - start)
 
     def setColumnHidden(self, column, value):
         """
@@ -177,14 +202,50 @@ class LibraryTreeWidget(mixin.LibraryViewWidgetMixin, QTreeWidget):
 
     def set_items(self, items):
         """
-        Add given items to the tree, clearing the tree first
+        Sets the given items as the top level items of the tree
+        Only the rows that changed are updated: items that keep their relative order are not touched, the rest are
+        removed and consecutive new items are inserted at once. QTreeWidget can only take rows one by one, which
+        notifies the view once per row, so if most of the rows change or many rows are removed, all the rows are
+        taken and inserted again at once
         :param items: list(LibraryItem)
         """
 
+        current = [self.topLevelItem(i) for i in range(self.topLevelItemCount())]
+        keep = self._stable_rows(current, items)
+        removed = len(current) - len(keep)
+        changes = removed + (len(items) - len(keep))
+        if not changes:
+            return
+
         selected_items = self.selectedItems()
-        self.take_top_level_items()
-        self.addTopLevelItems(items)
-        self.set_items_selected(selected_items, True)
+        root = self.invisibleRootItem()
+        self.setUpdatesEnabled(False)
+        try:
+            if changes > max(len(current), len(items)) * consts.TREE_WIDGET_MAX_DIFF_RATIO or \
+                    removed > consts.TREE_WIDGET_MAX_TAKEN_ROWS:
+                keep = set()
+                root.takeChildren()
+            else:
+                for row in reversed(range(len(current))):
+                    if row not in keep:
+                        self.takeTopLevelItem(row)
+
+            kept_items = set(id(current[row]) for row in keep)
+            row = 0
+            while row < len(items):
+                if id(items[row]) in kept_items:
+                    row += 1
+                    continue
+                start = row
+                while row < len(items) and id(items[row]) not in kept_items:
+                    row += 1
+                root.insertChildren(start, items[start:row])
+        finally:
+            self.setUpdatesEnabled(True)
+
+        moved_items = [item for item in selected_items if id(item) not in kept_items and item.treeWidget() is self]
+        if moved_items:
+            self.set_items_selected(moved_items, True)
 
     def set_items_selected(self, items, value, scroll_to=True):
         """
@@ -413,6 +474,40 @@ class LibraryTreeWidget(mixin.LibraryViewWidgetMixin, QTreeWidget):
 
         return self.findItems('*', Qt.MatchWildcard | Qt.MatchRecursive)
 
+    def _stable_rows(self, current, items):
+        """
+        Internal function that returns the rows of the current items that can stay in place when the given items
+        are set, which are the ones of the longest subsequence of items that keep their relative order
+        :param current: list(LibraryItem)
+        :param items: list(LibraryItem)
+        :return: set(int)
+        """
+
+        rows = dict((id(item), row) for row, item in enumerate(current))
+        sequence = [rows[id(item)] for item in items if id(item) in rows]
+
+        # Longest increasing subsequence of the current rows, in O(n log n)
+        tails = list()
+        tails_index = list()
+        previous = [-1] * len(sequence)
+        for i, row in enumerate(sequence):
+            position = bisect.bisect_left(tails, row)
+            if position == len(tails):
+                tails.append(row)
+                tails_index.append(i)
+            else:
+                tails[position] = row
+                tails_index[position] = i
+            previous[i] = tails_index[position - 1] if position else -1
+
+        stable = set()
+        i = tails_index[-1] if tails_index else -1
+        while i >= 0:
+            stable.add(sequence[i])
+            i = previous[i]
+
+        return stable
+
     def _remove_duplicates(self, labels):
         """
         Internal function that removes dupñlicates from a list (preserving its order)
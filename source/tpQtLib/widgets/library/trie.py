@@ -0,0 +1,227 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains path trie implementation used to store library folder hierarchies
+"""
+
+from __future__ import print_function, division, absolute_import
+
+
+class PathTrieNode(object):
+    """
+    Node of a path trie. Stores one path token and the children tokens below it
+    """
+
+    __slots__ = ('name', 'path', 'parent', 'children', 'data', 'explicit')
+
+    def __init__(self, name, path, parent=None):
+        self.name = name
+        self.path = path
+        self.parent = parent
+        self.children = dict()
+        self.data = dict()
+        self.explicit = False
+
+    def sorted_children(self):
+        """
+        Returns the children of the node sorted by name
+        :return: list(PathTrieNode)
+        """
+
+        return [self.children[name] for name in sorted(self.children)]
+
+
+class PathTrie(object):
+    """
+    Prefix tree of paths. Paths below the root path are split by the separator, so each folder is stored once
+    no matter how many paths share it. Adding, removing or renaming a path only touches the nodes of that path
+    """
+
+    def __init__(self, root='', separator='/'):
+        super(PathTrie, self).__init__()
+
+        self._root = root or ''
+        self._separator = separator
+        self._nodes = dict()
+        self._paths = dict()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, path):
+        return path in self._paths
+
+    def root(self):
+        """
+        Returns the root path. Paths inside the root are displayed below a single top level node
+        :return: str
+        """
+
+        return self._root
+
+    def separator(self):
+        """
+        Returns the separator used to split paths
+        :return: str
+        """
+
+        return self._separator
+
+    def top_level_nodes(self):
+        """
+        Returns the nodes without parent
+        :return: list(PathTrieNode)
+        """
+
+        return list(self._nodes.values())
+
+    def paths(self):
+        """
+        Returns all the paths added to the trie, as stored in their nodes. Intermediate folders are not included
+        :return: list(str)
+        """
+
+        return list(self._paths.keys())
+
+    def keys(self, path):
+        """
+        Returns the tokens of the given path. Root path is returned as a single token
+        :param path: str
+        :return: list(str)
+        """
+
+        separator = self._separator
+        if self._root and (path == self._root or path.startswith(self._root + separator)):
+            return [self._root] + [key for key in path[len(self._root):].split(separator) if key]
+
+        return [key for key in path.split(separator) if key]
+
+    def node(self, path):
+        """
+        Returns the node of the given path
+        :param path: str
+        :return: PathTrieNode or None
+        """
+
+        node = self._paths.get(path)
+        if node is not None:
+            return node
+
+        keys = self.keys(path)
+        if not keys:
+            return None
+
+        node = self._nodes.get(keys[0])
+        for key in keys[1:]:
+            if node is None:
+                return None
+            node = node.children.get(key)
+
+        return node
+
+    def walk(self, node):
+        """
+        Returns the given node and all its descendants, parents first
+        :param node: PathTrieNode
+        :return: Iterable(PathTrieNode)
+        """
+
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            yield node
+            nodes.extend(node.children.values())
+
+    def add(self, path, data=None):
+        """
+        Adds the given path to the trie
+        :param path: str
+        :param data: dict or None, data stored in the path node
+        :return: list(PathTrieNode), nodes created to store the path, parents first
+        """
+
+        keys = self.keys(path)
+        if not keys:
+            return list()
+
+        created = list()
+        children = self._nodes
+        node = None
+        for key in keys:
+            child = children.get(key)
+            if child is None:
+                if node is not None:
+                    child_path = self._separator.join([node.path, key])
+                elif key != self._root and path.startswith(self._separator):
+                    child_path = self._separator + key
+                else:
+                    child_path = key
+                child = PathTrieNode(key, child_path, parent=node)
+                children[key] = child
+                created.append(child)
+            node = child
+            children = node.children
+
+        node.explicit = True
+        if data is not None:
+            node.data = data
+        self._paths[node.path] = node
+
+        return created
+
+    def remove(self, path):
+        """
+        Removes the given path from the trie. Its node is kept while it has children
+        :param path: str
+        :return: PathTrieNode or None, topmost node that has been removed from the trie
+        """
+
+        node = self.node(path)
+        if node is None or not node.explicit:
+            return None
+
+        self._paths.pop(node.path, None)
+        node.explicit = False
+        node.data = dict()
+
+        return self._prune(node)
+
+    def remove_tree(self, path):
+        """
+        Removes the given path and all the paths below it from the trie
+        :param path: str
+        :return: tuple(PathTrieNode or None, dict), topmost removed node and data of the removed paths
+        """
+
+        node = self.node(path)
+        if node is None:
+            return None, dict()
+
+        removed = dict()
+        for child in self.walk(node):
+            if child.explicit:
+                self._paths.pop(child.path, None)
+                removed[child.path] = child.data
+            child.explicit = False
+        node.children = dict()
+
+        return self._prune(node), removed
+
+    def _prune(self, node):
+        """
+        Internal function that removes the given node and its parents while they are empty intermediate nodes
+        :param node: PathTrieNode
+        :return: PathTrieNode or None, topmost removed node
+        """
+
+        removed = None
+        while node is not None and not node.explicit and not node.children:
+            if node.parent is None:
+                self._nodes.pop(node.name, None)
+            else:
+                node.parent.children.pop(node.name, None)
+            removed = node
+            node = node.parent
+
+        return removed
@@ -22,7 +22,7 @@ from tpPyUtils import python, decorators, fileio, path as path_utils
 
 import tpQtLib
 import tpDccLib as tp
-from tpQtLib.widgets.library import exceptions
+from tpQtLib.widgets.library import consts, exceptions
 
 if tp.is_maya():
     from tpMayaLib.core import decorators as maya_decorators
@@ -595,19 +595,21 @@ def replace_json(path, old, new, count=-1):
     return data
 
 
-def generate_unique_path(path, max_attempts=1000):
+def generate_unique_path(path, max_attempts=1000, exclude=None):
     """
     Generates a unique path on disk
     :param path: str
     :param max_attempts: int
+    :param exclude: set(str) or None, paths that are not considered unique even if they do not exist yet
     :return: str
     """
 
     attempt = 1
+    exclude = exclude or set()
     dirname, name, extension = path_utils.split_path(path)
     path_ = '{dirname}/{name} ({number}){extension}'
 
-    while os.path.exists(path):
+    while os.path.exists(path) or path in exclude:
         attempt += 1
         path = path_.format(name=name, number=attempt, dirname=dirname, extension=extension)
         if attempt >= max_attempts:
@@ -644,6 +646,154 @@ def rename_path_in_file(path, source, target):
     replace_json(path, source2, target2)
 
 
+def rename_path_value(value, source, target):
+    """
+    Returns the given value with the source path renamed to the target path
+    Only the given path itself and its children paths are renamed
+    :param value: variant
+    :param source: str
+    :param target: str
+    :return: variant
+    """
+
+    if not isinstance(value, six.string_types):
+        return value
+
+    source_prefix = source if source.endswith('/') else source + '/'
+    target_prefix = target if target.endswith('/') else target + '/'
+
+    if value == source:
+        return target
+    if value.startswith(source_prefix):
+        return target_prefix + value[len(source_prefix):]
+
+    return value
+
+
+def rename_path_in_data(data, source, target):
+    """
+    Renames the given source path, and all its children paths, to the given target path in the given data base dict
+    Path values stored in the renamed item data are also renamed
+    :param data: dict
+    :param source: str
+    :param target: str
+    :return: dict
+    """
+
+    for path in list(data.keys()):
+        new_path = rename_path_value(path, source, target)
+        if new_path == path:
+            continue
+        item_data = data.pop(path)
+        data[new_path] = dict((k, rename_path_value(v, source, target)) for k, v in item_data.items())
+
+    return data
+
+
+def find_parent_path(path, paths):
+    """
+    Returns the given path or its closest parent path that is in the given paths
+    :param path: str
+    :param paths: set(str) or dict(str, variant)
+    :return: str or None
+    """
+
+    while path:
+        if path in paths:
+            return path
+        index = path.rfind('/')
+        if index <= 0:
+            return None
+        path = path[:index]
+
+    return None
+
+
+def is_network_path(path):
+    """
+    Returns whether the given path is in a network mount. File system notifications are not reliable in network
+    mounts, so they need to be polled
+    :param path: str
+    :return: bool
+    """
+
+    path = path_utils.normalize_path(os.path.abspath(path))
+    if path.startswith('//'):
+        return True
+
+    if os.name == 'nt':
+        try:
+            import ctypes
+            drive = os.path.splitdrive(path)[0]
+            # DRIVE_REMOTE
+            return bool(drive) and ctypes.windll.kernel32.GetDriveTypeW(drive + '/') == 4
+        except Exception:
+            return False
+
+    mounts = '/proc/mounts'
+    if not os.path.isfile(mounts):
+        return False
+
+    mount_type = None
+    mount_point = ''
+    try:
+        with open(mounts) as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                point = fields[1].replace('\\040', ' ')
+                if len(point) > len(mount_point) and (
+                        path == point or path.startswith(point.rstrip('/') + '/')):
+                    mount_point = point
+                    mount_type = fields[2]
+    except (IOError, OSError):
+        return False
+
+    return mount_type in consts.WATCHER_NETWORK_FILESYSTEMS
+
+
+def rename_paths_value(value, renames):
+    """
+    Same as rename_path_value but renames the given value with the closest of the given source paths
+    :param value: variant
+    :param renames: dict(str, str), source path -> target path
+    :return: variant
+    """
+
+    if not renames or not isinstance(value, six.string_types):
+        return value
+
+    source = find_parent_path(value, renames)
+    if source is None:
+        return value
+
+    return renames[source] + value[len(source):]
+
+
+def rename_paths_in_data(data, renames):
+    """
+    Same as rename_path_in_data but renames all the given source paths walking the data base only once
+    :param data: dict
+    :param renames: dict(str, str), source path -> target path
+    :return: dict
+    """
+
+    if not renames:
+        return data
+
+    renamed = dict()
+    for path in list(data.keys()):
+        new_path = rename_paths_value(path, renames)
+        if new_path == path:
+            continue
+        item_data = data.pop(path)
+        renamed[new_path] = dict((k, rename_paths_value(v, renames)) for k, v in item_data.items())
+    data.update(renamed)
+
+    return data
+
+
 def rename_path(source, target, extension=None, force=False):
     """
     Renames the given source path to the given destination path
@@ -12,9 +12,9 @@ from Qt.QtWidgets import *
 from Qt.QtGui import *
 
 import tpQtLib
-from tpQtLib.core import base
+from tpQtLib.core import base, theme
 from tpQtLib.widgets import toast, action
-from tpQtLib.widgets.library import consts, treewidget, listview, items
+from tpQtLib.widgets.library import consts, treewidget, listview, tableview, items, thumbnail, model, sorter, profiler
 
 
 class LibraryViewerDelegate(QStyledItemDelegate, object):
@@ -42,6 +42,10 @@ class LibraryViewerDelegate(QStyledItemDelegate, object):
         :return: QSize
         """
 
+        # Lazy model rows are sized without creating their items
+        if self.viewer().is_lazy_view() and index.data(model.LibraryItemModel.GroupRole) is None:
+            return self.viewer().item_size_hint()
+
         item = self.viewer().item_from_index(index)
         if isinstance(item, items.LibraryGroupItem):
             return item.sizeHint()
@@ -57,8 +61,20 @@ class LibraryViewerDelegate(QStyledItemDelegate, object):
         :param index: QModelIndex
         """
 
+        paint_profiler = self.viewer().paint_profiler()
+        if not paint_profiler.is_enabled():
+            item = self.viewer().item_from_index(index)
+            if item is not None:
+                item.paint(painter, option, index)
+            return
+
+        start = profiler.clock()
         item = self.viewer().item_from_index(index)
-        item.paint(painter, option, index)
+        paint_start = profiler.clock()
+        paint_profiler.record_lookup(paint_start - start)
+        if item is not None:
+            item.paint(painter, option, index)
+            paint_profiler.record_paint(item, index.column(), profiler.clock() - paint_start)
 
     """
     ##########################################################################################
@@ -108,6 +124,7 @@ class LibraryViewer(base.BaseWidget, object):
 
     TREE_WIDGET_CLASS = treewidget.LibraryTreeWidget
     LIST_VIEW_CLASS = listview.LibraryListView
+    TABLE_VIEW_CLASS = tableview.LibraryTableView
     DELEGATE_CLASS = LibraryViewerDelegate
 
     itemClicked = Signal(object)
@@ -120,11 +137,18 @@ class LibraryViewer(base.BaseWidget, object):
 
         self._dpi = 1
         self._padding = self.DEFAULT_PADDING
+        self._content_revision = 0
 
         self._library = None
         self._tree_widget = None
         self._list_widget = None
+        self._table_view = None
         self._delegate = None
+        self._item_model = None
+        self._group_items = dict()
+        self._thumbnail_scheduler = None
+        self._paint_profiler = None
+        self._paint_profiler_overlay = None
         self._is_item_text_visible = True
         self._toast_enabled = True
 
@@ -140,6 +164,9 @@ class LibraryViewer(base.BaseWidget, object):
 
         super(LibraryViewer, self).__init__(parent=parent)
 
+        # Item colors are pushed by the window when its theme changes
+        theme.subscribe(self)
+
     def get_main_layout(self):
         main_layout = QHBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
@@ -153,15 +180,30 @@ class LibraryViewer(base.BaseWidget, object):
         self._list_view = self.LIST_VIEW_CLASS(self)
         self._list_view.set_tree_widget(self._tree_widget)
 
+        self._item_model = model.LibraryItemModel(self)
+        self._item_model.set_viewer(self)
+
+        # Lazy libraries are displayed in table mode by this view, so their items are not created for all the rows
+        self._table_view = self.TABLE_VIEW_CLASS(self)
+        self._table_view.set_tree_widget(self._tree_widget)
+        self._table_view.set_item_model(self._item_model)
+        self._table_view.hide()
+
         self._delegate = self.DELEGATE_CLASS()
         self._delegate.set_viewer(self)
         self._list_view.setItemDelegate(self._delegate)
         self._tree_widget.setItemDelegate(self._delegate)
+        self._table_view.setItemDelegate(self._delegate)
 
         self._toast_widget = toast.ToastWidget(self)
         self._toast_widget.hide()
 
+        self._thumbnail_scheduler = thumbnail.ThumbnailScheduler(
+            self, items.LibraryItem.ThumbnailCache, items.LibraryItem.ThreadPool, parent=self)
+        self._paint_profiler = profiler.PaintProfiler(self, parent=self)
+
         self.main_layout.addWidget(self._tree_widget)
+        self.main_layout.addWidget(self._table_view)
         self.main_layout.addWidget(self._list_view)
 
         self.itemMoved = self._list_view.itemMoved
@@ -175,6 +217,11 @@ class LibraryViewer(base.BaseWidget, object):
         self._list_view.itemDoubleClicked.connect(self._on_item_double_clicked)
         self._tree_widget.itemClicked.connect(self._on_item_clicked)
         self._tree_widget.itemDoubleClicked.connect(self._on_item_double_clicked)
+        self._table_view.itemClicked.connect(self._on_item_clicked)
+        self._table_view.itemDoubleClicked.connect(self._on_item_double_clicked)
+        self._list_view.verticalScrollBar().valueChanged.connect(self._thumbnail_scheduler.set_scroll_value)
+        self._tree_widget.verticalScrollBar().valueChanged.connect(self._thumbnail_scheduler.set_scroll_value)
+        self._table_view.verticalScrollBar().valueChanged.connect(self._thumbnail_scheduler.set_scroll_value)
 
     def wheelEvent(self, event):
         """
@@ -203,6 +250,19 @@ class LibraryViewer(base.BaseWidget, object):
         point = QCursor.pos()
         return menu.exec_(point)
 
+    def resizeEvent(self, event):
+        """
+        Overrides base resizeEvent function
+        Thumbnails are scheduled again because the visible items may have changed
+        :param event: QResizeEvent
+        """
+
+        super(LibraryViewer, self).resizeEvent(event)
+        if self._thumbnail_scheduler:
+            self._thumbnail_scheduler.schedule()
+        if self._paint_profiler_overlay and self._paint_profiler_overlay.isVisible():
+            self._paint_profiler_overlay.refresh()
+
     """
     ##########################################################################################
     BASE
@@ -224,8 +284,11 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._library = library
+        self._item_model.set_library(library)
         self.set_column_labels(library.Fields)
         library.searchFinished.connect(self._on_update_items)
+        library.searchResultsAvailable.connect(self._on_update_items)
+        library.resultsChanged.connect(self._on_results_changed)
 
     def is_icon_view(self):
         """
@@ -235,13 +298,24 @@ class LibraryViewer(base.BaseWidget, object):
 
         return not self._list_view.isHidden()
 
+    def is_lazy_view(self):
+        """
+        Returns whether the current view displays the lazy item model instead of the tree widget items
+        :return: bool
+        """
+
+        if self.is_icon_view():
+            return self._list_view.item_model() is not None
+
+        return not self._table_view.isHidden()
+
     def is_table_view(self):
         """
         Returns whether widget is in list mode or not
         :return: bool
         """
 
-        return not self._tree_widget.isHidden()
+        return not self._tree_widget.isHidden() or not self._table_view.isHidden()
 
     def set_view_mode(self, mode):
         """
@@ -260,8 +334,9 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._list_view.hide()
-        self._tree_widget.show()
-        self._tree_widget.setFocus()
+        self.invalidate_content()
+        self._show_table_view(bool(self.library() and self.library().is_lazy()))
+        self._thumbnail_scheduler.schedule()
 
     def set_icon_mode(self):
         """
@@ -269,8 +344,11 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._tree_widget.hide()
+        self._table_view.hide()
+        self.invalidate_content()
         self._list_view.show()
         self._list_view.setFocus()
+        self._thumbnail_scheduler.schedule()
 
     def zoom_amount(self):
         """
@@ -300,19 +378,39 @@ class LibraryViewer(base.BaseWidget, object):
         column_width = value * dpi + self.item_text_height()
         self._tree_widget.setIndentation(0)
         self._tree_widget.setColumnWidth(0, column_width)
+        self._table_view.setColumnWidth(0, column_width)
         self.scroll_to_selected_item()
+        self._thumbnail_scheduler.schedule()
         self.show_toast_message('Size: {}%'.format(value))
 
+    def current_view(self):
+        """
+        Returns the view that is currently displaying the items
+        :return: LibraryListView or LibraryTreeWidget
+        """
+
+        if self.is_icon_view():
+            return self.list_view()
+        elif self.is_lazy_view():
+            return self.table_view()
+        else:
+            return self.tree_widget()
+
+    def thumbnail_scheduler(self):
+        """
+        Returns the scheduler that loads the thumbnails of the items displayed by the viewer
+        :return: ThumbnailScheduler
+        """
+
+        return self._thumbnail_scheduler
+
     def vertical_scrollbar(self):
         """
         Returns the active vertical scroll bar
         :return: QScrollBar
         """
 
-        if self.is_table_view():
-            return self.tree_widget().verticalScrollBar()
-        else:
-            return self.list_view().verticalScrollBar()
+        return self.current_view().verticalScrollBar()
 
     def visual_item_rect(self, item):
         """
@@ -321,10 +419,12 @@ class LibraryViewer(base.BaseWidget, object):
         :return: QRect
         """
 
-        if self.is_table_view():
+        if self.is_lazy_view() and self.is_table_view():
+            visual_rect = self.table_view().visual_item_rect(item)
+        elif self.is_table_view():
             visual_rect = self.tree_widget().visual_item_rect(item)
         else:
-            index = self.tree_widget().index_from_item(item)
+            index = self.index_from_item(item)
             visual_rect = self.list_view().visualRect(index)
 
         return visual_rect
@@ -350,10 +450,12 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         position = QAbstractItemView.PositionAtCenter
-        if self.is_table_view():
-            self.tree_widget().scroll_to_item(item, position)
-        elif self.is_icon_view():
+        if self.is_icon_view():
             self.list_view().scroll_to_item(item, position)
+        elif self.is_lazy_view():
+            self.table_view().scroll_to_item(item, position)
+        elif self.is_table_view():
+            self.tree_widget().scroll_to_item(item, position)
 
     def scroll_to_selected_item(self):
         """
@@ -373,6 +475,8 @@ class LibraryViewer(base.BaseWidget, object):
 
         if self.is_icon_view():
             return self.list_view().item_at(pos)
+        elif self.is_lazy_view():
+            return self.table_view().item_at(pos)
         else:
             return self.tree_widget().item_at(pos)
 
@@ -505,6 +609,7 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._is_item_text_visible = flag
+        self.invalidate_content()
         self.refresh_size()
 
     def column_labels_from_items(self):
@@ -545,6 +650,7 @@ class LibraryViewer(base.BaseWidget, object):
             self._padding = value
         else:
             self._padding = value + 1
+        self.invalidate_content()
         self.repaint()
         self.show_toast_message('Border: {}'.format(value))
 
@@ -571,6 +677,7 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._icon_size = size
+        self.invalidate_content()
         if self.is_item_text_visible():
             w = size.width()
             h = size.width() + self.item_text_height()
@@ -580,6 +687,7 @@ class LibraryViewer(base.BaseWidget, object):
 
         self.list_view().setIconSize(size)
         self.tree_widget().setIconSize(size)
+        self.table_view().setIconSize(size)
 
     def wheel_scroll_step(self):
         """
@@ -622,8 +730,80 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._dpi = dpi
+        self.invalidate_content()
         self.refresh_size()
 
+    """
+    ##########################################################################################
+    PAINT PROFILER
+    ##########################################################################################
+    """
+
+    def paint_profiler(self):
+        """
+        Returns the profiler that records paint timings of the viewer
+        :return: PaintProfiler
+        """
+
+        return self._paint_profiler
+
+    def is_paint_profiling_enabled(self):
+        """
+        Returns whether paint timings are recorded or not
+        :return: bool
+        """
+
+        return self._paint_profiler.is_enabled()
+
+    def set_paint_profiling_enabled(self, flag):
+        """
+        Sets whether paint timings are recorded or not. Profiling is disabled by default
+        :param flag: bool
+        """
+
+        self._paint_profiler.set_enabled(flag)
+        if not flag:
+            self.set_paint_profiler_overlay_visible(False)
+
+    def is_paint_profiler_overlay_visible(self):
+        """
+        Returns whether the paint profiler statistics are displayed over the viewer or not
+        :return: bool
+        """
+
+        return bool(self._paint_profiler_overlay and self._paint_profiler_overlay.isVisible())
+
+    def set_paint_profiler_overlay_visible(self, flag):
+        """
+        Sets whether the paint profiler statistics are displayed over the viewer or not
+        Showing the overlay enables paint profiling
+        :param flag: bool
+        """
+
+        if flag:
+            self._paint_profiler.set_enabled(True)
+            if not self._paint_profiler_overlay:
+                self._paint_profiler_overlay = profiler.PaintProfilerOverlay(self._paint_profiler, parent=self)
+            self._paint_profiler_overlay.show()
+        elif self._paint_profiler_overlay:
+            self._paint_profiler_overlay.hide()
+
+    def paint_profile(self):
+        """
+        Returns the paint profiler summary and recorded frames
+        :return: dict
+        """
+
+        return self._paint_profiler.report()
+
+    def export_paint_profile(self, path):
+        """
+        Writes the paint profiler summary and recorded frames into the given JSON file
+        :param path: str
+        """
+
+        self._paint_profiler.export(path)
+
     """
     ##########################################################################################
     SETTINGS
@@ -717,6 +897,14 @@ class LibraryViewer(base.BaseWidget, object):
 
         return self._tree_widget
 
+    def table_view(self):
+        """
+        Returns the view that displays the items of lazy libraries in table mode
+        :return: LibraryTableView
+        """
+
+        return self._table_view
+
     def column_from_label(self, *args):
         """
         Returns column from given label text
@@ -733,6 +921,7 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self.tree_widget().setColumnHidden(column, hidden)
+        self.table_view().update_columns()
 
     def column_labels(self):
         """
@@ -752,6 +941,9 @@ class LibraryViewer(base.BaseWidget, object):
         set_add = labels_set.add
         labels = [x for x in labels if x.strip() and not (x in labels_set or set_add(x))]
         self.tree_widget().setHeaderLabels(labels)
+        self._item_model.set_columns(labels)
+        self.table_view().update_columns()
+        self.invalidate_content()
 
     def index_from_item(self, item):
         """
@@ -760,7 +952,10 @@ class LibraryViewer(base.BaseWidget, object):
         :return: QModelIndex
         """
 
-        return self._tree_widget.index_from_item(item)
+        if self.is_lazy_view():
+            return self._lazy_view().index_from_item(item)
+
+        return self._tree_widget.indexFromItem(item)
 
     def items(self):
         """
@@ -768,6 +963,9 @@ class LibraryViewer(base.BaseWidget, object):
         :return: list(Item)
         """
 
+        if self.is_lazy_view():
+            return self._lazy_view().items()
+
         return self._tree_widget.items()
 
     def item_from_index(self, index):
@@ -777,6 +975,9 @@ class LibraryViewer(base.BaseWidget, object):
         :return: QTreeWidgetItem
         """
 
+        if self.is_lazy_view():
+            return self._lazy_view().item_from_index(index)
+
         return self.tree_widget().itemFromIndex(index)
 
     def text_from_items(self, *args, **kwargs):
@@ -817,6 +1018,9 @@ class LibraryViewer(base.BaseWidget, object):
         :return: LibraryItem
         """
 
+        if self.is_lazy_view():
+            return self._lazy_view().selected_item()
+
         return self._tree_widget.selected_item()
 
     def selected_items(self):
@@ -825,6 +1029,9 @@ class LibraryViewer(base.BaseWidget, object):
         :return: list(QTreeWidgetItem)
         """
 
+        if self.is_lazy_view():
+            return self._lazy_view().selected_items()
+
         return self._tree_widget.selectedItems()
 
     def set_item_hidden(self, item, value):
@@ -865,6 +1072,14 @@ class LibraryViewer(base.BaseWidget, object):
         :param paths: list(str)
         """
 
+        if self.is_lazy_view():
+            for path in paths:
+                index = self._item_model.index_from_path(path)
+                if index.isValid():
+                    self._lazy_view().selectionModel().select(
+                        index, QItemSelectionModel.Select | QItemSelectionModel.Rows)
+            return
+
         for item in self.items():
             path = item.id()
             if path in paths:
@@ -884,6 +1099,10 @@ class LibraryViewer(base.BaseWidget, object):
         Cleras the user selection
         """
 
+        if self.is_lazy_view():
+            self._lazy_view().clearSelection()
+            return
+
         self._tree_widget.clearSelection()
 
     def selection_model(self):
@@ -892,6 +1111,9 @@ class LibraryViewer(base.BaseWidget, object):
         :return: QItemSelectionModel
         """
 
+        if self.is_lazy_view():
+            return self._lazy_view().selectionModel()
+
         return self._tree_widget.selectionModel()
 
     def model(self):
@@ -900,8 +1122,19 @@ class LibraryViewer(base.BaseWidget, object):
         :return: QAbstractItemModel
         """
 
+        if self.is_lazy_view():
+            return self._item_model
+
         return self._tree_widget.model()
 
+    def item_model(self):
+        """
+        Returns the lazy item model used to display the items of lazy libraries
+        :return: LibraryItemModel
+        """
+
+        return self._item_model
+
     def update_items(self):
         """
         Sets the items to the viewer
@@ -909,33 +1142,111 @@ class LibraryViewer(base.BaseWidget, object):
 
         selected_items = self.selected_items()
         self.clear_selection()
+        self._thumbnail_scheduler.clear()
+
+        if self.library().is_lazy():
+            self._item_model.set_results(self.library().grouped_result_paths())
+            if self._list_view.item_model() is None:
+                self._list_view.set_item_model(self._item_model)
+            self.tree_widget().clear()
+            self._group_items = dict()
+        else:
+            if self._list_view.item_model() is not None:
+                self._list_view.set_item_model(None)
+                self._item_model.clear()
+            self._update_tree_items()
+        if self.is_table_view():
+            self._show_table_view(self.library().is_lazy())
 
-        results = self.library().grouped_results()
-
-        items = list()
-
-        for group in results:
-            if group != 'None':
-                group_item = self.create_group_item(group)
-                items.append(group_item)
-            items.extend(results[group])
-
-        self.tree_widget().set_items(items)
+        self._thumbnail_scheduler.schedule()
 
         if selected_items:
             self.select_items(selected_items)
             self.scroll_to_selected_item()
 
+    def update_results(self):
+        """
+        Updates the displayed items with the current library results when only some paths were added or removed
+        Only the rows that changed are updated, so selection, scroll position and scheduled thumbnails are kept
+        """
+
+        if self.library().is_lazy() and self._list_view.item_model() is not None:
+            self._item_model.update_results(self.library().grouped_result_paths())
+        elif not self.library().is_lazy() and self._list_view.item_model() is None:
+            self._update_tree_items()
+        else:
+            self.update_items()
+            return
+
+        self._thumbnail_scheduler.schedule()
+
     def clear(self):
         """
         Clear all elements in tree widget
         """
 
         self.tree_widget().clear()
+        self._group_items = dict()
+        self._item_model.clear()
+
+    def _lazy_view(self):
+        """
+        Internal function that returns the view that displays the lazy item model in the current mode
+        :return: LibraryListView or LibraryTableView
+        """
+
+        if self.is_icon_view():
+            return self._list_view
+
+        return self._table_view
+
+    def _show_table_view(self, lazy):
+        """
+        Internal function that shows the view used in table mode. Lazy libraries are displayed by the table view,
+        so their items are not created for all the rows, and the rest by the tree widget
+        :param lazy: bool
+        """
+
+        shown, hidden = (self._table_view, self._tree_widget) if lazy else (self._tree_widget, self._table_view)
+        if lazy:
+            self._table_view.update_columns()
+        hidden.hide()
+        if shown.isHidden():
+            shown.show()
+            shown.setFocus()
+
+    def _update_tree_items(self):
+        """
+        Internal function that adds the library search results to the tree widget
+        """
+
+        results = self.library().grouped_results()
+
+        items = list()
+
+        # Group items are reused between searches, so groups that are still displayed keep their rows
+        group_items = dict()
+        group_path = list()
+        for level, group, item in sorter.flatten_groups(results):
+            if group is not None:
+                group_path[level:] = [group]
+                key = tuple(group_path)
+                group_item = self._group_items.get(key) or self.create_group_item(group)
+                group_item.set_level(level)
+                group_items[key] = group_item
+                items.append(group_item)
+            else:
+                items.append(item)
+        self._group_items = group_items
+
+        self.tree_widget().set_items(items)
 
     def _on_update_items(self):
         self.update_items()
 
+    def _on_results_changed(self):
+        self.update_results()
+
     """
     ##########################################################################################
     LIST WIDGET
@@ -1126,6 +1437,22 @@ class LibraryViewer(base.BaseWidget, object):
     ##########################################################################################
     """
 
+    def content_revision(self):
+        """
+        Returns a number that changes every time a viewer setting painted by the items changes
+        Items use it to know when their pre-rendered text and icon must be rendered again
+        :return: int
+        """
+
+        return self._content_revision
+
+    def invalidate_content(self):
+        """
+        Forces the text and the icon of all the items to be rendered again next time they are painted
+        """
+
+        self._content_revision += 1
+
     def text_color(self):
         """
         Returns the item text color
@@ -1141,6 +1468,7 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._text_color = color
+        self.invalidate_content()
 
     def text_selected_color(self):
         """
@@ -1157,6 +1485,7 @@ class LibraryViewer(base.BaseWidget, object):
         """
 
         self._text_selected_color = color
+        self.invalidate_content()
 
     def background_color(self):
         """
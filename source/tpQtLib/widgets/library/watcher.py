@@ -0,0 +1,317 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Module that contains file system watcher used by libraries to find changes done outside the library
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import os
+
+from Qt.QtCore import *
+
+from tpPyUtils import path as path_utils
+
+import tpQtLib
+from tpQtLib.widgets.library import consts, utils
+
+
+class LibraryWatcher(QObject, object):
+    """
+    Watches folders for changes using QFileSystemWatcher. Folders in network mounts, where file system
+    notifications are not reliable, and folders the system refuses to watch are polled instead.
+    Changes are coalesced, so a burst of events results in a single foldersChanged signal. Changes are always
+    notified before the max latency is reached, even if events keep coming
+    """
+
+    foldersChanged = Signal(object)
+
+    def __init__(self, parent=None):
+        super(LibraryWatcher, self).__init__(parent)
+
+        self._enabled = True
+        self._force_polling = False
+        self._paths = set()
+        self._polled = dict()
+        self._pending = set()
+        self._coalesce_interval = consts.WATCHER_COALESCE_INTERVAL
+        self._max_latency = consts.WATCHER_MAX_LATENCY
+        self._pending_time = QElapsedTimer()
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+
+        self._coalesce_timer = QTimer(self)
+        self._coalesce_timer.setSingleShot(True)
+        self._coalesce_timer.timeout.connect(self.flush)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(consts.WATCHER_POLL_INTERVAL)
+        self._poll_timer.timeout.connect(self._on_poll_timeout)
+
+    """
+    ##########################################################################################
+    BASE
+    ##########################################################################################
+    """
+
+    def is_enabled(self):
+        """
+        Returns whether changes are notified or not
+        :return: bool
+        """
+
+        return self._enabled
+
+    def set_enabled(self, flag):
+        """
+        Sets whether changes are notified or not. Changes done while disabled are discarded
+        :param flag: bool
+        """
+
+        self._enabled = bool(flag)
+        if not self._enabled:
+            self._pending = set()
+            self._coalesce_timer.stop()
+        self._update_poll_timer()
+
+    def is_polling_forced(self):
+        """
+        Returns whether all the folders are polled instead of watched
+        :return: bool
+        """
+
+        return self._force_polling
+
+    def set_polling_forced(self, flag):
+        """
+        Sets whether all the folders are polled instead of watched
+        :param flag: bool
+        """
+
+        self._force_polling = bool(flag)
+        paths = self.paths()
+        self.clear()
+        self.set_paths(paths)
+
+    def coalesce_interval(self):
+        """
+        Returns the time, in milliseconds, changes are collected before being notified
+        :return: int
+        """
+
+        return self._coalesce_interval
+
+    def set_coalesce_interval(self, msecs):
+        """
+        Sets the time, in milliseconds, changes are collected before being notified
+        :param msecs: int
+        """
+
+        self._coalesce_interval = msecs
+
+    def max_latency(self):
+        """
+        Returns the maximum time, in milliseconds, a change can wait before being notified
+        :return: int
+        """
+
+        return self._max_latency
+
+    def set_max_latency(self, msecs):
+        """
+        Sets the maximum time, in milliseconds, a change can wait before being notified
+        :param msecs: int
+        """
+
+        self._max_latency = msecs
+
+    def poll_interval(self):
+        """
+        Returns the time, in milliseconds, between checks of polled folders
+        :return: int
+        """
+
+        return self._poll_timer.interval()
+
+    def set_poll_interval(self, msecs):
+        """
+        Sets the time, in milliseconds, between checks of polled folders
+        :param msecs: int
+        """
+
+        self._poll_timer.setInterval(msecs)
+
+    def paths(self):
+        """
+        Returns all the watched and polled folders
+        :return: list(str)
+        """
+
+        return sorted(self._paths)
+
+    def polled_paths(self):
+        """
+        Returns the folders that are polled instead of watched
+        :return: list(str)
+        """
+
+        return sorted(self._polled)
+
+    def set_paths(self, paths):
+        """
+        Sets the folders to watch. Only folders that were not watched yet are added
+        :param paths: list(str)
+        """
+
+        paths = set(path_utils.normalize_path(path) for path in paths if path)
+        self.remove_paths(self._paths - paths)
+        self.add_paths(paths - self._paths)
+
+    def add_paths(self, paths):
+        """
+        Adds the given folders to the watched ones
+        :param paths: list(str)
+        """
+
+        for path in paths:
+            path = path_utils.normalize_path(path)
+            if path in self._paths or not os.path.isdir(path):
+                continue
+            self._paths.add(path)
+            if self._force_polling or utils.is_network_path(path) or not self._watcher.addPath(path):
+                self._polled[path] = self._mtime(path)
+
+        self._update_poll_timer()
+
+    def remove_paths(self, paths):
+        """
+        Removes the given folders from the watched ones
+        :param paths: list(str)
+        """
+
+        watched = list()
+        for path in paths:
+            path = path_utils.normalize_path(path)
+            if path not in self._paths:
+                continue
+            self._paths.discard(path)
+            if self._polled.pop(path, None) is None:
+                watched.append(path)
+        if watched:
+            self._watcher.removePaths(watched)
+
+        self._update_poll_timer()
+
+    def clear(self):
+        """
+        Stops watching all folders and discards pending changes
+        """
+
+        self.remove_paths(list(self._paths))
+        self._pending = set()
+        self._coalesce_timer.stop()
+
+    def pending_paths(self):
+        """
+        Returns the changed folders that are not notified yet
+        :return: list(str)
+        """
+
+        return sorted(self._pending)
+
+    def flush(self):
+        """
+        Notifies the pending changes right away
+        """
+
+        self._coalesce_timer.stop()
+        if not self._pending:
+            return
+
+        folders = sorted(self._pending)
+        self._pending = set()
+        tpQtLib.logger.debug('Watched folders changed: {}'.format(folders))
+        self.foldersChanged.emit(folders)
+
+    """
+    ##########################################################################################
+    INTERNAL
+    ##########################################################################################
+    """
+
+    def _mtime(self, path):
+        """
+        Internal function that returns the modification time of the given folder
+        :param path: str
+        :return: float or None, None if the folder does not exist
+        """
+
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def _add_pending(self, path):
+        """
+        Internal function that stores the given changed folder and restarts the coalesce timer
+        The timer never goes beyond the max latency counted from the oldest pending change
+        :param path: str
+        """
+
+        if not self._enabled:
+            return
+
+        if not self._pending:
+            self._pending_time.start()
+        self._pending.add(path_utils.normalize_path(path))
+        remaining = self._max_latency - self._pending_time.elapsed()
+        self._coalesce_timer.start(max(0, min(self._coalesce_interval, remaining)))
+
+    def _update_poll_timer(self):
+        """
+        Internal function that starts the poll timer only if there are folders to poll
+        """
+
+        if self._enabled and self._polled:
+            if not self._poll_timer.isActive():
+                self._poll_timer.start()
+        else:
+            self._poll_timer.stop()
+
+    """
+    ##########################################################################################
+    CALLBACKS
+    ##########################################################################################
+    """
+
+    def _on_path_changed(self, path):
+        """
+        Internal callback function that is called when a watched folder changes
+        Removed folders are not watched anymore by QFileSystemWatcher, so they are forgotten
+        :param path: str
+        """
+
+        path = path_utils.normalize_path(path)
+        if not os.path.isdir(path):
+            self._paths.discard(path)
+        self._add_pending(path)
+
+    def _on_poll_timeout(self):
+        """
+        Internal callback function that is called periodically to check the polled folders
+        """
+
+        for path, mtime in list(self._polled.items()):
+            current_mtime = self._mtime(path)
+            if current_mtime == mtime:
+                continue
+            if current_mtime is None:
+                del self._polled[path]
+                self._paths.discard(path)
+            else:
+                self._polled[path] = current_mtime
+            self._add_pending(path)
+
+        self._update_poll_timer()
@@ -7,6 +7,7 @@ Module that contains different widgets used in libraries
 
 from __future__ import print_function, division, absolute_import
 
+import os
 import traceback
 from functools import partial
 from collections import OrderedDict
@@ -18,6 +19,7 @@ from Qt.QtGui import *
 import tpQtLib
 from tpQtLib.core import animation, image, icon, qtutils, color, pixmap, statusbar
 from tpQtLib.widgets import progressbar, toolbar, action, buttons
+from tpQtLib.widgets.library import trie
 
 
 class LibraryImageSequenceWidget(QToolButton, object):
@@ -128,6 +130,17 @@ class LibraryImageSequenceWidget(QToolButton, object):
         self._image_sequence.pause()
         animation.fade_out_widget(self._toolbar, duration=300)
 
+    def hideEvent(self, event):
+        """
+        Overrides base QToolButton hideEvent function
+        Stops playing and releases the decoded frames while the widget is not visible
+        :param event: QHideEvent
+        """
+
+        super(LibraryImageSequenceWidget, self).hideEvent(event)
+        self._image_sequence.stop()
+        self._image_sequence.clear_cache()
+
     def mouseMoveEvent(self, event):
         """
         Overrides base QToolButton mouseMoveEvent function
@@ -138,8 +151,7 @@ class LibraryImageSequenceWidget(QToolButton, object):
             percent = 1.0 - (float(self.width() - event.pos().x()) / float(self.width()))
             frame = int(self._image_sequence.frame_count() * percent)
             self._image_sequence.jump_to_frame(frame)
-            frame_icon = self._image_sequence.current_icon()
-            self.setIcon(frame_icon)
+            self.update_icon()
 
     def paintEvent(self, event):
         """
@@ -208,13 +220,14 @@ class LibraryImageSequenceWidget(QToolButton, object):
         self._size = QSize(w, h)
         self.setIconSize(self._size)
         self.setFixedSize(self._size)
+        self._image_sequence.set_frame_size(self._size)
 
     def update_icon(self):
         """
         Updates the icon for the current frame
         """
 
-        if self._image_sequence.frames():
+        if self._image_sequence.frames() and self._image_sequence.current_pixmap() is not None:
             frame_icon = self._image_sequence.current_icon()
             self.setIcon(frame_icon)
 
@@ -237,14 +250,15 @@ class LibraryImageSequenceWidget(QToolButton, object):
         :param frame: int or None
         """
 
+        # While scrubbing, frames are updated by mouseMoveEvent
         if not qtutils.is_control_modifier():
-            frame_icon = self._image_sequence.current_icon()
-            self.setIcon(frame_icon)
+            self.update_icon()
 
 
 class LibrarySearchWidget(QLineEdit, object):
     SPACE_OPEARTOR = 'and'
     PLACEHOLDER_TEXT = 'Search'
+    DEBOUNCE_TIME = 250
 
     searchChanged = Signal()
 
@@ -253,6 +267,10 @@ class LibrarySearchWidget(QLineEdit, object):
 
         self._library = None
         self._space_operator = 'and'
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.DEBOUNCE_TIME)
+        self._search_timer.timeout.connect(self.search)
         search_icon = tpQtLib.resource.icon('search', theme='black')
         self._icon_btn = buttons.IconButton(search_icon, icon_padding=2, parent=self)
         self._icon_btn.clicked.connect(self._on_icon_clicked)
@@ -373,11 +391,13 @@ class LibrarySearchWidget(QLineEdit, object):
     def search(self):
         """
         Run the search query on the library
+        Search is run in a thread, results are displayed when the library emits its search signals
         """
 
+        self._search_timer.stop()
         if self.library():
             self.library().add_query(self.query())
-            self.library().search()
+            self.library().search_async()
         else:
             tpQtLib.logger.info('No library found for the search widget')
 
@@ -451,9 +471,11 @@ class LibrarySearchWidget(QLineEdit, object):
     def _on_text_changed(self):
         """
         Internal callback function that is triggered when the text changes
+        Search is delayed until the user stops typing
         """
 
-        self.search()
+        self.update_clear_button()
+        self._search_timer.start()
 
 
 class LibraryStatusWidget(statusbar.StatusWidget, object):
@@ -583,9 +605,23 @@ class LibrarySideBarWidgetItem(QTreeWidgetItem, object):
         self._text_color = None
         self._expanded_icon_path = None
         self._collapsed_icon_path = None
+        self._populated = False
 
         self._settings = dict()
 
+    def setExpanded(self, expand):
+        """
+        Overrides base QTreeWidgetItem setExpanded function
+        Children items are created before the item is expanded
+        :param expand: bool
+        """
+
+        tree_widget = self.treeWidget()
+        if expand and tree_widget and hasattr(tree_widget, 'populate_item'):
+            tree_widget.populate_item(self)
+
+        super(LibrarySideBarWidgetItem, self).setExpanded(expand)
+
     def setSelected(self, select):
         """
         Overrides base LibrarySideBarWidget setSelected function
@@ -612,6 +648,30 @@ class LibrarySideBarWidgetItem(QTreeWidgetItem, object):
 
         self._path = path
 
+    def is_populated(self):
+        """
+        Returns whether the children items of the item have been created or not
+        :return: bool
+        """
+
+        return self._populated
+
+    def set_populated(self, flag):
+        """
+        Sets whether the children items of the item have been created or not
+        :param flag: bool
+        """
+
+        self._populated = flag
+
+    def has_children(self):
+        """
+        Returns whether the item has children, created or not
+        :return: bool
+        """
+
+        return self.childCount() > 0 or self.childIndicatorPolicy() == QTreeWidgetItem.ShowIndicator
+
     def default_icon_path(self):
         """
         Returns the default icon path
@@ -839,7 +899,7 @@ class LibrarySideBarWidgetItem(QTreeWidgetItem, object):
         if is_selected:
             self.setSelected(is_selected)
         is_expanded = settings.get('expanded')
-        if is_expanded and self.childCount() > 0:
+        if is_expanded and self.has_children():
             self.setExpanded(is_expanded)
         bold = settings.get('bold')
         if bold:
@@ -897,22 +957,14 @@ class LibrarySidebarWidget(QTreeWidget, object):
         if not paths:
             return
 
-        path = paths[0]
-        result = None
+        # The common prefix of all the paths is the common prefix of the lexicographically first and last ones
         separator = separator or cls.DEFAULT_SEPARATOR
-        tokens = path.split(separator)
-        for i, token in enumerate(tokens):
-            root = separator.join(tokens[:i + 1])
-            match = True
-            for path in paths:
-                if not path.startswith(root + separator):
-                    match = False
-                    break
-            if not match:
-                break
-            result = root
-
-        return result
+        prefix = os.path.commonprefix([min(paths), max(paths)])
+        index = prefix.rfind(separator)
+        if index < 0:
+            return None
+
+        return prefix[:index]
 
     def __init__(self, *args):
         super(LibrarySidebarWidget, self).__init__(*args)
@@ -920,6 +972,7 @@ class LibrarySidebarWidget(QTreeWidget, object):
         self._dpi = 1
         self._items = list()
         self._index = dict()
+        self._trie = trie.PathTrie(separator=self.DEFAULT_SEPARATOR)
         self._locked = False
         self._library = None
         self._recursive = True
@@ -942,8 +995,8 @@ class LibrarySidebarWidget(QTreeWidget, object):
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
 
-        self.itemExpanded.connect(self.update)
-        self.itemCollapsed.connect(self.update)
+        self.itemExpanded.connect(self._on_item_expanded)
+        self.itemCollapsed.connect(self._on_item_collapsed)
 
     def update(self, *args):
         """
@@ -1022,19 +1075,28 @@ class LibrarySidebarWidget(QTreeWidget, object):
     def set_data(self, data, root='', split=None):
         """
         Sets the items to the given items
-        :param data: list(str)
+        Only the paths that are not already displayed are added and only the ones that are not in the given data
+        are removed, so items state (expanded, selected, ...) is kept
+        :param data: dict(str, dict), paths and their item settings
         :param root: str
         :param split: str
         """
 
-        settings = self.settings()
         self.blockSignals(True)
         try:
-            self.clear()
             if not root:
-                root = self.find_root(data.keys(), self.separator())
-            self.add_paths(data, root=root, split=split)
-            self.set_settings(settings)
+                root = self.find_root(list(data.keys()), split or self.separator())
+            root = root or ''
+            split = split or self.separator()
+            if root != self._trie.root() or split != self._trie.separator():
+                settings = self.settings()
+                self.clear()
+                self._trie = trie.PathTrie(root=root, separator=split)
+                self.add_paths(data)
+                self.set_settings(settings)
+            else:
+                self.remove_paths([path for path in self._trie.paths() if path not in data])
+                self.add_paths(data)
         except Exception as e:
             tpQtLib.logger.error('{} | {}'.format(e, traceback.format_exc()))
         finally:
@@ -1042,52 +1104,122 @@ class LibrarySidebarWidget(QTreeWidget, object):
 
     def add_paths(self, paths, root='', split=None):
         """
-        Set the given items as a flat list
+        Adds the given paths to the tree. Items are only created for paths whose parent item is expanded
+        :param paths: list(str) or dict(str, dict), paths or paths and their item settings
+        :param root: str or None, root path used if the tree is empty
+        :param split: str or None, separator used if the tree is empty
+        """
+
+        if not len(self._trie) and (root or split):
+            self.clear()
+            self._trie = trie.PathTrie(root=root or self._trie.root(), separator=split or self._trie.separator())
+
+        for path in paths:
+            settings = paths.get(path) if isinstance(paths, dict) else None
+            node = self._trie.node(path)
+            if node is not None and node.explicit and settings is None:
+                continue
+            for created_node in self._trie.add(path, data=settings):
+                self._create_node_item(created_node)
+            node = self._trie.node(path)
+            item = self._index.get(node.path) if node else None
+            if item and settings:
+                item.set_settings(settings)
+
+    def remove_paths(self, paths):
+        """
+        Removes the given paths from the tree. Folders are kept while they contain other paths
         :param paths: list(str)
-        :param root: str or None
-        :param split: str or None
         """
 
-        data = self.paths_to_dict(paths, root=root, separator=split)
-        self.create_items(data, split=split)
-        if isinstance(paths, dict):
-            self.set_settings(paths)
+        for path in paths:
+            self._remove_node_item(self._trie.remove(path))
+
+    def rename_path(self, source, target):
+        """
+        Renames the given path and all the paths below it, keeping their items state
+        :param source: str
+        :param target: str
+        """
+
+        settings = dict()
+        item = self.item_from_path(source, create=False)
+        if item:
+            for child_item in [item] + self._child_items(item):
+                item_settings = child_item.settings()
+                if item_settings:
+                    settings[target + child_item.path()[len(source):]] = item_settings
+
+        removed_node, removed_paths = self._trie.remove_tree(source)
+        self._remove_node_item(removed_node)
+        self.add_paths(dict((target + path[len(source):], data) for path, data in removed_paths.items()))
+        for path in sorted(settings):
+            self.set_path_settings(path, settings[path])
+
+    def copy_path(self, source, target):
+        """
+        Adds the given target path and a copy of all the paths below the source path to it
+        :param source: str
+        :param target: str
+        """
+
+        self.add_paths([target + path[len(source):] for path in self.child_paths(source)])
+
+    def child_paths(self, path):
+        """
+        Returns the given path and all the paths below it that are added to the tree
+        :param path: str
+        :return: list(str)
+        """
+
+        node = self._trie.node(path)
+        if node is None:
+            return list()
+
+        return [child.path for child in self._trie.walk(node) if child.explicit]
 
     def create_items(self, data, split=None):
         """
         Creates the items from the given data dict
-        :param data: dict
+        :param data: dict, nested dict as returned by paths_to_dict
         :param split: str or None
         """
 
         split = split or self.DEFAULT_SEPARATOR
-        self._index = dict()
+        paths = list()
+
+        def _recursive(path, children):
+            paths.append(path)
+            for text, val in children.items():
+                _recursive(split.join([path, text]), val)
+
         for key in data:
-            path = split.join([key])
-            item = LibrarySideBarWidgetItem(self)
-            item.setText(0, str(key))
-            item.set_path(path)
-            self._index[path] = item
-            if self.root_text():
-                item.setText(0, self.root_text())
-                item.set_bold(True)
-                item.set_icon_path('none')
-                item.setExpanded(True)
+            _recursive(key, data[key])
+
+        self.add_paths(paths)
 
-            def _recursive(parent, children, split=None):
-                for text, val in sorted(children.iteritems()):
-                    p = parent.path()
-                    p = split.join([p, text])
-                    child = LibrarySideBarWidgetItem()
-                    child.setText(0, str(text))
-                    child.set_path(p)
-                    parent.addChild(child)
-                    self._index[p] = child
-                    _recursive(child, val, split=split)
+    def populate_item(self, item):
+        """
+        Creates the children items of the given item if they are not created yet
+        :param item: LibrarySideBarWidgetItem
+        """
 
-            _recursive(item, data[key], split=split)
+        if item.is_populated():
+            return
 
-        self.update()
+        item.set_populated(True)
+        item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+        node = self._trie.node(item.path())
+        if node is None:
+            return
+
+        # Children are created in order, so each one is appended after the previous one
+        position = 0
+        for child_node in node.sorted_children():
+            if child_node.path not in self._index:
+                self._create_node_item(child_node, position=position)
+            if child_node.path in self._index:
+                position += 1
 
     def library(self):
         """
@@ -1247,12 +1379,13 @@ class LibrarySidebarWidget(QTreeWidget, object):
         """
 
         paths = self._normalize_paths(paths)
-        items = self.items()
-        for item in items:
-            if item.path() in paths:
-                item.setSelected(True)
-            else:
+        for item in self.selectedItems():
+            if item.path() not in paths:
                 item.setSelected(False)
+        for path in paths:
+            item = self.item_from_path(path)
+            if item:
+                item.setSelected(True)
 
     def select_url(self, url):
         """
@@ -1291,14 +1424,34 @@ class LibrarySidebarWidget(QTreeWidget, object):
             if url == item.url():
                 return item
 
-    def item_from_path(self, path):
+    def item_from_path(self, path, create=True):
         """
         Returns the item for the given path
         :param path: str
+        :param create: bool, whether to create the item and its parents if they are not created yet or not
         :return: QTreeWidgetItem
         """
 
-        return self._index.get(path)
+        item = self._index.get(path)
+        if item is not None or not create:
+            return item
+
+        node = self._trie.node(path)
+        if node is None:
+            return None
+
+        parents = list()
+        parent = node.parent
+        while parent is not None:
+            parents.insert(0, parent)
+            parent = parent.parent
+        for parent in parents:
+            parent_item = self._index.get(parent.path)
+            if parent_item is None:
+                return None
+            self.populate_item(parent_item)
+
+        return self._index.get(node.path)
 
     def expanded_items(self):
         """
@@ -1319,6 +1472,22 @@ class LibrarySidebarWidget(QTreeWidget, object):
         for item in self.expanded_items():
             yield item.url()
 
+    def displayed_paths(self):
+        """
+        Returns the paths of the items that are displayed, that is, the ones whose parent items are all expanded
+        :return: list(str)
+        """
+
+        paths = list()
+        for path, item in self._index.items():
+            parent = item.parent()
+            while parent is not None and parent.isExpanded():
+                parent = parent.parent()
+            if parent is None:
+                paths.append(path)
+
+        return paths
+
     def set_expanded_paths(self, paths):
         """
         Stes the given paths as expanded
@@ -1364,6 +1533,7 @@ class LibrarySidebarWidget(QTreeWidget, object):
 
         self._items = list()
         self._index = dict()
+        self._trie = trie.PathTrie(root=self._trie.root(), separator=self._trie.separator())
         super(LibrarySidebarWidget, self).clear()
 
     def _normalize_paths(self, paths):
@@ -1375,6 +1545,127 @@ class LibrarySidebarWidget(QTreeWidget, object):
 
         return [path.replace('\\', '/') for path in paths]
 
+    def _create_node_item(self, node, position=None):
+        """
+        Internal function that creates the item of the given trie node if its parent item is expanded
+        :param node: PathTrieNode
+        :param position: int or None, index of the item in its parent. If None, the sorted position is searched
+        :return: LibrarySideBarWidgetItem or None
+        """
+
+        if node.path in self._index:
+            return self._index[node.path]
+
+        if node.parent is None:
+            item = LibrarySideBarWidgetItem(self)
+        else:
+            parent_item = self._index.get(node.parent.path)
+            if parent_item is None:
+                return None
+            if not parent_item.is_populated():
+                parent_item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+                return None
+            item = LibrarySideBarWidgetItem()
+            if position is None:
+                position = self._child_position(parent_item, node.name)
+            parent_item.insertChild(position, item)
+
+        item.setText(0, str(node.name))
+        item.set_path(node.path)
+        self._index[node.path] = item
+        if node.children:
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ShowIndicator)
+        if node.parent is None and self.root_text() and node.path == self._trie.root():
+            item.setText(0, self.root_text())
+            item.set_bold(True)
+            item.set_icon_path('none')
+            item.setExpanded(True)
+        else:
+            item.update()
+        if node.data:
+            item.set_settings(node.data)
+
+        return item
+
+    def _child_position(self, parent_item, name):
+        """
+        Internal function that returns the index where a child with the given name must be inserted to keep the
+        children of the given item sorted. Only the texts of the compared children are read
+        :param parent_item: LibrarySideBarWidgetItem
+        :param name: str
+        :return: int
+        """
+
+        low, high = 0, parent_item.childCount()
+        while low < high:
+            middle = (low + high) // 2
+            if name < parent_item.child(middle).text(0):
+                high = middle
+            else:
+                low = middle + 1
+
+        return low
+
+    def _remove_node_item(self, node):
+        """
+        Internal function that removes the item of the given trie node and all its children items
+        :param node: PathTrieNode or None
+        """
+
+        if node is None:
+            return
+
+        item = self._index.get(node.path)
+        if item is None:
+            if node.parent is not None:
+                parent_item = self._index.get(node.parent.path)
+                if parent_item and not parent_item.is_populated() and not node.parent.children:
+                    parent_item.setChildIndicatorPolicy(QTreeWidgetItem.DontShowIndicatorWhenChildless)
+            return
+
+        for removed_item in [item] + self._child_items(item):
+            self._index.pop(removed_item.path(), None)
+
+        parent_item = item.parent()
+        if parent_item:
+            parent_item.removeChild(item)
+        else:
+            self.takeTopLevelItem(self.indexOfTopLevelItem(item))
+
+    def _child_items(self, item):
+        """
+        Internal function that returns all the created children items of the given item
+        :param item: LibrarySideBarWidgetItem
+        :return: list(LibrarySideBarWidgetItem)
+        """
+
+        children = list()
+        items = [item]
+        while items:
+            item = items.pop()
+            for i in range(item.childCount()):
+                children.append(item.child(i))
+                items.append(item.child(i))
+
+        return children
+
+    def _on_item_expanded(self, item):
+        """
+        Internal callback function that is triggered when an item is expanded
+        :param item: LibrarySideBarWidgetItem
+        """
+
+        self.populate_item(item)
+        item.update()
+
+    def _on_item_collapsed(self, item):
+        """
+        Internal callback function that is triggered when an item is collapsed
+        :param item: LibrarySideBarWidgetItem
+        """
+
+        item.update()
+
     def _on_data_changed(self):
         """
         Internal callback function that is triggered when the library data changes
@@ -1660,7 +1951,7 @@ class FilterByMenu(QMenu, object):
 
         field = self._options.get('field')
         queries = self.library().queries(exclude=self.name())
-        self._facets = self.library().distinct(field, queries=queries)
+        self._facets = self.library().facets([field], queries=queries)[field]
         separator_action = action.SeparatorAction('Show {}'.format(field.title()), self)
         self.addAction(separator_action)
         label_action = action.LabelAction('Show All', self)
@@ -23,7 +23,7 @@ import tpDccLib as tp
 import tpQtLib
 from tpQtLib.core import base, icon, menu, qtutils, animation
 from tpQtLib.widgets import stack, messagebox, action
-from tpQtLib.widgets.library import consts, utils, library, viewer, widgets
+from tpQtLib.widgets.library import consts, library, viewer, widgets
 
 if tp.is_maya():
     from tpMayaLib.core import decorators as maya_decorators
@@ -62,6 +62,8 @@ class LibraryWindow(tpQtLib.Window, object):
     GROUPBY_MENU_CLASS = widgets.GroupByMenu
     FILTERBY_MENU_CLASS = widgets.FilterByMenu
     PROGRESS_BAR_VISIBLE = consts.PROGRESS_BAR_VISIBLE
+    WATCHER_ENABLED = consts.WATCHER_ENABLED
+    SIDEBAR_QUERIES = [{'filters': [('type', 'is', 'Folder')]}]
 
     globalSignal = GlobalSignal()
     loaded = Signal()
@@ -81,6 +83,9 @@ class LibraryWindow(tpQtLib.Window, object):
         self._preview_widget = None
         self._new_item_widget = None
         self._progress_bar = None
+        self._sync_thread = None
+        self._sync_start_time = 0
+        self._sidebar_paths_updated = False
         self._current_item = None
         self._library = None
         self._refresh_enabled = False
@@ -146,7 +151,9 @@ class LibraryWindow(tpQtLib.Window, object):
 
         lib = self.LIBRARY_CLASS(library_window=self)
         lib.dataChanged.connect(self.refresh)
+        lib.pathsChanged.connect(self._on_library_paths_changed)
         lib.searchTimeFinished.connect(self._on_search_finished)
+        lib.set_watching(self.WATCHER_ENABLED)
 
         self._sidebar_frame = SidebarFrame(self)
         sidebar_frame_lyt = QVBoxLayout(self)
@@ -228,9 +235,28 @@ class LibraryWindow(tpQtLib.Window, object):
         self._sidebar_widget.itemDropped.connect(self._on_item_dropped)
         self._sidebar_widget.itemSelectionChanged.connect(self._on_folder_selection_changed)
         self._sidebar_widget.customContextMenuRequested.connect(self._on_show_folder_menu)
+        self._sidebar_widget.itemExpanded.connect(self._on_folder_expanded_changed)
+        self._sidebar_widget.itemCollapsed.connect(self._on_folder_expanded_changed)
 
         self.folderSelectionChanged.connect(self.update_lock)
 
+    def _sidebar_data(self, paths):
+        """
+        Internal function that returns the sidebar item settings of the given folder paths
+        :param paths: list(str)
+        :return: dict(str, dict)
+        """
+
+        data = dict()
+        trash_icon_path = tpQtLib.resource.get('icons', 'black', 'trash')
+        for path in paths:
+            if path.endswith('Trash'):
+                data[path] = {'iconPath': trash_icon_path}
+            else:
+                data[path] = dict()
+
+        return data
+
     def _setup_menubar(self):
         icon_color = self.icon_color()
         name = 'New Item'
@@ -274,7 +300,7 @@ class LibraryWindow(tpQtLib.Window, object):
         name = 'Sync Items'
         icon = tpQtLib.resource.icon('sync', theme='black')
         icon.set_color(icon_color)
-        tip = 'Sync with the filesystem'
+        tip = 'Sync with the filesystem\nShift + click will scan all the folders again.'
         self.add_menubar_action(name, icon, tip, callback=self._on_sync)
 
         name = 'Settings'
@@ -528,7 +554,7 @@ class LibraryWindow(tpQtLib.Window, object):
 
         library = self.library()
         library.set_path(path)
-        if not os.path.exists(library.data_path()):
+        if not library.storage().exists():
             library.sync()
 
         if self.stack.currentIndex() != 0:
@@ -826,21 +852,13 @@ class LibraryWindow(tpQtLib.Window, object):
         self.viewer().clear_selection()
         moved_items = list()
         try:
-            self.library().blockSignals(True)
-            for item in items:
-                path = target_folder + '/' + item.name()
-                if force:
-                    path = utils.generate_unique_path(path)
-                if copy:
-                    item.copy(path)
-                else:
-                    item.rename(path)
-                moved_items.append(item)
+            # Library applies the operations returned by the items with a single data base write. Items that
+            # override their rename or copy functions are still moved with them
+            self.library().move_items(items, target_folder, copy=copy, force=force)
+            moved_items = list(items)
         except Exception as e:
             self.show_exception_dialog('Move Error', e)
         finally:
-            self.library().blockSignals(False)
-
             self.refresh()
             self.select_items(moved_items)
             self.scroll_to_selected_item()
@@ -1076,29 +1094,58 @@ class LibraryWindow(tpQtLib.Window, object):
             elif not os.path.exists(path):
                 return self.show_path_error_dialog()
 
-            self.update_sidebar()
+            # Changed paths were already applied to the sidebar, so its folders are not found again
+            if self._sidebar_paths_updated:
+                self._sidebar_paths_updated = False
+            else:
+                self.update_sidebar()
 
     def update_sidebar(self):
         """
         Update the folders to be shown in the folders widget
         """
 
-        data = dict()
         root = self.path()
 
-        queries = [{'filters': [('type', 'is', 'Folder')]}]
+        # Only paths are needed, so folders are resolved from the library index without creating their items
+        paths = self.library().find_paths(self.SIDEBAR_QUERIES)
 
-        items = self.library().find_items(queries)
-        trash_icon_path = tpQtLib.resource.get('icons', 'black', 'trash')
+        self.sidebar_widget().set_data(self._sidebar_data(paths), root=root)
+        self.update_watched_folders()
 
-        for item in items:
-            path = item.path()
-            if item.path().endswith('Trash'):
-                data[path] = {'iconPath': trash_icon_path}
-            else:
-                data[path] = dict()
+    def update_sidebar_paths(self, changes):
+        """
+        Applies the given library paths changes to the folders of the sidebar without finding all of them again,
+        so the state of the items (expanded, selected, ...) is kept
+        :param changes: dict, with 'moved' and 'copied' dicts (source path -> target path) and 'added' and 'removed'
+            paths, as emitted by the library pathsChanged signal
+        """
+
+        sidebar = self.sidebar_widget()
+        changed = list()
+        for source, target in changes.get('moved', dict()).items():
+            sidebar.rename_path(source, target)
+            changed.extend(sidebar.child_paths(target))
+        for source, target in changes.get('copied', dict()).items():
+            sidebar.copy_path(source, target)
+            changed.extend(sidebar.child_paths(target))
+        sidebar.remove_paths(changes.get('removed', list()))
+
+        # Moved and copied folders are removed if they do not match the queries anymore, such as the ones moved
+        # to the trash while it is hidden
+        added = changes.get('added', list())
+        visible = set(self.library().filter_paths(changed + added, self.SIDEBAR_QUERIES))
+        sidebar.remove_paths([path for path in changed if path not in visible])
+        sidebar.add_paths(self._sidebar_data([path for path in added if path in visible]))
+        self.update_watched_folders()
+
+    def update_watched_folders(self):
+        """
+        Updates the folders watched by the library with the ones displayed in the sidebar, so changes done on disk
+        in those folders are displayed without syncing the library
+        """
 
-        self.sidebar_widget().set_data(data, root=root)
+        self.library().set_watched_folders(self.sidebar_widget().displayed_paths())
 
     def selected_folder_path(self):
         """
@@ -1574,23 +1621,33 @@ class LibraryWindow(tpQtLib.Window, object):
 
         self.reload_stylesheet()
 
-    @show_wait_cursor_decorator
-    def sync(self, force_start=False):
+    def sync(self, force_start=False, incremental=True):
         """
         Sync any data that might be out of date with the model
+        If force_start is False, file system is scanned in a background thread and sync can be canceled
+        :param force_start: bool, whether to sync in the main thread or not
+        :param incremental: bool, whether to scan only the folders modified since last sync or not
         """
 
+        if self.is_syncing():
+            tpQtLib.logger.warning('Library is already syncing!')
+            return
+
         @show_wait_cursor_decorator
         def _sync():
             elapsed_time = time.time()
-            self.library().sync(percent_callback=self.set_progress_bar_value)
+            self.library().sync(percent_callback=self.set_progress_bar_value, incremental=incremental)
             elapsed_time = time.time() - elapsed_time
             self.status_widget().show_info_message('Synced items in {0:.3f} seconds'.format(elapsed_time))
             self.set_progress_bar_value('Done')
-            if force_start:
-                progress_bar.close()
-            else:
-                animation.fade_out_widget(progress_bar, duration=500, on_finished=progress_bar.close)
+            progress_bar.close()
+
+        def _start_sync_thread():
+            self._sync_start_time = time.time()
+            self._sync_thread = library.LibrarySyncThread(self.library(), incremental=incremental, parent=self)
+            self._sync_thread.progressChanged.connect(self.set_progress_bar_value)
+            self._sync_thread.finished.connect(self._on_sync_finished)
+            self._sync_thread.start()
 
         progress_bar = self.status_widget().progress_bar()
         if self.PROGRESS_BAR_VISIBLE:
@@ -1600,7 +1657,23 @@ class LibraryWindow(tpQtLib.Window, object):
         if force_start:
             _sync()
         else:
-            animation.fade_in_widget(progress_bar, duration=1, on_finished=_sync)
+            animation.fade_in_widget(progress_bar, duration=1, on_finished=_start_sync_thread)
+
+    def is_syncing(self):
+        """
+        Returns whether a background sync is running or not
+        :return: bool
+        """
+
+        return self._sync_thread is not None
+
+    def cancel_sync(self):
+        """
+        Cancels the background sync if it is running
+        """
+
+        if self._sync_thread:
+            self._sync_thread.cancel()
 
     def set_progress_bar_value(self, label, value=-1):
         """
@@ -1690,7 +1763,7 @@ class LibraryWindow(tpQtLib.Window, object):
         Show long the current refresh took
         """
 
-        item_count = len(self.library().results())
+        item_count = len(self.library().result_paths())
         elapsed_time = self.library().search_time()
 
         plural = ''
@@ -1963,6 +2036,9 @@ class LibraryWindow(tpQtLib.Window, object):
         sync_action = context_menu.addAction('Sync')
         sync_action.triggered.connect(self.sync)
 
+        full_sync_action = context_menu.addAction('Full Sync')
+        full_sync_action.triggered.connect(self._on_full_sync)
+
         context_menu.addSeparator()
 
         if consts.DPI_ENABLED:
@@ -2067,6 +2143,19 @@ class LibraryWindow(tpQtLib.Window, object):
     def _on_search_finished(self):
         self.show_refresh_message()
 
+    def _on_library_paths_changed(self, changes):
+        """
+        Internal callback function that is called when paths are added, moved, copied or removed from the library
+        The data changed notification that follows does not update the sidebar again
+        :param changes: dict
+        """
+
+        if not self.path():
+            return
+
+        self.update_sidebar_paths(changes)
+        self._sidebar_paths_updated = self.is_refresh_enabled()
+
     def _on_show_items_context_menu(self, pos=None):
         """
         Internal callback function that is called when user right clicks on muscle viewer
@@ -2090,10 +2179,47 @@ class LibraryWindow(tpQtLib.Window, object):
     def _on_sync(self):
         """
         Internal callback function that is executed when the user selects the Sync
-        context menu action
+        context menu action. If a sync is already running, it is canceled
+        Shift + click scans all the folders again instead of only the ones modified since last sync
         """
 
-        self.sync()
+        if self.is_syncing():
+            self.cancel_sync()
+        else:
+            self.sync(incremental=not qtutils.is_shift_modifier())
+
+    def _on_full_sync(self):
+        """
+        Internal callback function that is executed when the user selects the Full Sync context menu action
+        All the folders are scanned again, so changes that do not modify folders modification times are found
+        """
+
+        if not self.is_syncing():
+            self.sync(incremental=False)
+
+    @show_wait_cursor_decorator
+    def _on_sync_finished(self):
+        """
+        Internal callback function that is called when the background sync thread finishes
+        Scanned data is applied in the main thread
+        """
+
+        sync_thread = self._sync_thread
+        self._sync_thread = None
+        progress_bar = self.status_widget().progress_bar()
+
+        result = sync_thread.result()
+        if result is None:
+            self.status_widget().show_warning_message('Sync canceled')
+            self.library().update_queued_folders()
+        else:
+            self.library().apply_scan(result, percent_callback=self.set_progress_bar_value)
+            elapsed_time = time.time() - self._sync_start_time
+            self.status_widget().show_info_message('Synced items in {0:.3f} seconds'.format(elapsed_time))
+            self.set_progress_bar_value('Done')
+
+        sync_thread.deleteLater()
+        animation.fade_out_widget(progress_bar, duration=500, on_finished=progress_bar.close)
 
     def _on_show_new_menu(self):
         """
@@ -2206,6 +2332,14 @@ class LibraryWindow(tpQtLib.Window, object):
         self.folderSelectionChanged.emit(path)
         self.globalSignal.folderSelectionChanged.emit(self, path)
 
+    def _on_folder_expanded_changed(self, item):
+        """
+        Internal callback function that is triggered when a folder is expanded or collapsed
+        :param item: LibrarySideBarWidgetItem
+        """
+
+        self.update_watched_folders()
+
     def _on_show_folder_menu(self, pos=None):
         """
         Internal callback function that is triggered when the user left click on sidebar widget
@@ -0,0 +1,44 @@
+import os
+import sys
+import logging
+
+import pytest
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source'))
+
+# Some modules create pixmaps and fonts when they are imported, so the application is created before any test
+# module is imported
+try:
+    from Qt.QtWidgets import QApplication
+except ImportError:
+    _app = None
+else:
+    _app = QApplication.instance() or QApplication(sys.argv)
+
+# tpDccLib must be initialized before library modules are imported by the tests
+try:
+    import tpDccLib
+    import tpQtLib
+except ImportError:
+    tpDccLib = None
+else:
+    if tpDccLib.Dcc is None:
+        tpDccLib.init()
+    if tpQtLib.logger is None:
+        try:
+            tpQtLib.init(lazy=True)
+        except Exception:
+            # Installed tpPyUtils importer is not compatible, so only the parts of init used by the tests are done
+            tpQtLib.logger = logging.getLogger('tpQtLib')
+            tpQtLib.resource = tpQtLib.tpQtLibResource
+            tpQtLib.init_lazy()
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """
+    Returns the QApplication used by the tests that need one
+    """
+
+    return _app
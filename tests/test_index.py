@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from tpQtLib.widgets.library import index, library
+
+
+def _data(count=200, seed=0):
+    rnd = random.Random(seed)
+    data = dict()
+    for i in range(count):
+        path = '/root/folder{}/item{}'.format(i % 7, i)
+        data[path] = {
+            'name': 'Item{}'.format(i),
+            'folder': '/root/folder{}'.format(i % 7),
+            'type': rnd.choice(['Anim', 'Pose', 'Mirror']),
+            'category': rnd.choice(['body', 'face', None]),
+            'frames': rnd.randint(0, 20),
+            'tags': ['a', 'b'] if i % 11 == 0 else None,
+        }
+
+    return data
+
+
+QUERIES = [
+    [],
+    [{'filters': []}],
+    [{'filters': [('*', 'contains', 'item1')]}],
+    [{'filters': [('*', 'contains', 'ITEM2')]}],
+    [{'filters': [('*', 'not_contains', 'pose')]}],
+    [{'filters': [('*', 'contains', "'name': 'item3")]}],
+    [{'filters': [('type', 'is', 'anim')]}],
+    [{'filters': [('type', 'not', 'anim')]}],
+    [{'filters': [('name', 'startswith', 'item1')]}],
+    [{'filters': [('category', 'contains', 'o')]}],
+    [{'filters': [('frames', 'is', 3)]}],
+    [{'filters': [('tags', 'contains', 'a')]}],
+    [{'filters': [('type', 'is', 'anim'), ('type', 'is', 'pose')], 'operator': 'or'}],
+    [{'filters': [('type', 'is', 'anim'), ('category', 'is', 'body')], 'operator': 'and'}],
+    [{'filters': [('*', 'contains', 'item1')]}, {'filters': [('type', 'not', 'mirror')]}],
+    [{'filters': [('folder', 'is', '/root/folder3')]}, {'filters': [('*', 'contains', 'face')]}],
+]
+
+
+def _matches(data, queries):
+    return set(path for path, record in data.items() if library.Library.match(record, queries))
+
+
+@pytest.mark.parametrize('queries', QUERIES)
+def test_search_matches_library_match(queries):
+    data = _data()
+    library_index = index.LibraryIndex()
+    library_index.set_data(data)
+
+    assert library_index.search(queries) == _matches(data, queries)
+
+
+@pytest.mark.parametrize('queries', QUERIES)
+def test_search_matches_library_match_after_changes(queries):
+    data = _data()
+    library_index = index.LibraryIndex()
+    library_index.set_data(data)
+    library_index.search(queries)
+
+    data['/root/folder0/item0'] = dict(data['/root/folder0/item0'], type='Mirror', name='Renamed')
+    library_index.update('/root/folder0/item0', data['/root/folder0/item0'])
+    library_index.remove('/root/folder1/item1')
+    del data['/root/folder1/item1']
+    library_index.rename('/root/folder2/item2', '/root/folder2/item200')
+    data['/root/folder2/item200'] = data.pop('/root/folder2/item2')
+
+    assert library_index.search(queries) == _matches(data, queries)
+
+
+def test_filter_cache_is_not_used_after_changes():
+    library_index = index.LibraryIndex()
+    library_index.set_data({'/a': {'type': 'anim'}})
+    assert library_index.filter('type', 'is', 'anim') == {'/a'}
+
+    library_index.update('/b', {'type': 'anim'})
+    assert library_index.filter('type', 'is', 'anim') == {'/a', '/b'}
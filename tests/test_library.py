@@ -0,0 +1,229 @@
+import os
+
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+library = pytest.importorskip('tpQtLib.widgets.library.library')
+manager = pytest.importorskip('tpQtLib.widgets.library.manager')
+
+
+class AnimItem(object):
+
+    RegisterOrder = 0
+    EnableNestedItems = False
+
+    def __init__(self, path, library_window=None):
+        self._path = path
+
+    @classmethod
+    def match(cls, path):
+        return path.endswith('.anim')
+
+    @classmethod
+    def match_entry(cls, path, is_dir):
+        return not is_dir and cls.match(path)
+
+    def path(self):
+        return self._path
+
+    def item_data(self):
+        return {'name': os.path.basename(self._path), 'folder': os.path.dirname(self._path), 'path': self._path}
+
+
+class LibraryWindow(object):
+
+    def __init__(self):
+        self._manager = manager.LibraryManager()
+        self._manager.clear_registered_items()
+        self._manager.register_item(AnimItem)
+
+    def manager(self):
+        return self._manager
+
+
+class TestLibrary(library.Library):
+
+    def __init__(self, path, data_path):
+        self._data_path = data_path
+        super(TestLibrary, self).__init__(path, library_window=LibraryWindow())
+
+    def data_path(self):
+        return self._data_path
+
+    def search(self):
+        pass
+
+
+@pytest.fixture
+def root(tmpdir):
+    for path in ('a/one.anim', 'a/two.anim', 'b/three.anim'):
+        tmpdir.join('lib', path).write(path, ensure=True)
+
+    return str(tmpdir.join('lib')).replace('\\', '/')
+
+
+@pytest.fixture
+def test_library(qapp, root):
+    test_library = TestLibrary(root, os.path.join(os.path.dirname(root), 'library.json'))
+    yield test_library
+    test_library.storage().close()
+
+
+def test_changes_during_sync_are_queued(test_library, root):
+    result = test_library.scan(incremental=False)
+    assert test_library.is_syncing()
+
+    # Change found by the watcher after its folder was scanned
+    with open(root + '/a/four.anim', 'w') as fh:
+        fh.write('a/four.anim')
+    os.remove(root + '/b/three.anim')
+    test_library._on_watched_folders_changed([root + '/a', root + '/b'])
+    assert test_library.queued_folders() == [root + '/a', root + '/b']
+    assert root + '/a/four.anim' not in test_library.read()
+
+    test_library.apply_scan(result)
+
+    assert not test_library.is_syncing()
+    assert test_library.queued_folders() == list()
+    assert sorted(test_library.read()) == [root + '/a/four.anim', root + '/a/one.anim', root + '/a/two.anim']
+
+
+def test_changes_are_updated_when_sync_is_canceled(test_library, root):
+    test_library.sync(incremental=False)
+    with open(root + '/b/four.anim', 'w') as fh:
+        fh.write('b/four.anim')
+
+    def _cancel(message, percent):
+        if test_library.is_syncing():
+            test_library._on_watched_folders_changed([root + '/b'])
+            test_library.cancel_sync()
+
+    assert not test_library.sync(percent_callback=_cancel)
+
+    assert not test_library.is_syncing()
+    assert test_library.queued_folders() == list()
+    assert root + '/b/four.anim' in test_library.read()
+
+
+def test_changes_are_updated_when_not_syncing(test_library, root):
+    test_library.sync(incremental=False)
+    with open(root + '/b/four.anim', 'w') as fh:
+        fh.write('b/four.anim')
+
+    test_library._on_watched_folders_changed([root + '/b'])
+
+    assert test_library.queued_folders() == list()
+    assert root + '/b/four.anim' in test_library.read()
+
+
+def _touch_folder(path):
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+
+
+def test_incremental_scan_only_lists_changed_folders(test_library, root):
+    assert test_library.sync(incremental=False)
+    paths = sorted(test_library.read())
+
+    result = test_library.scan()
+    test_library.apply_scan(result)
+    assert result['entries'] == list()
+    assert sorted(result['paths']) == paths
+    assert sorted(test_library.read()) == paths
+
+    with open(root + '/a/four.anim', 'w') as fh:
+        fh.write('a/four.anim')
+    _touch_folder(root + '/a')
+
+    result = test_library.scan()
+    test_library.apply_scan(result)
+    assert sorted(path for _, path in result['entries']) == [
+        root + '/a/four.anim', root + '/a/one.anim', root + '/a/two.anim']
+    assert result['paths'] == [root + '/b/three.anim']
+    assert root + '/a/four.anim' in test_library.read()
+
+
+def test_full_scan_lists_all_folders(test_library, root):
+    assert test_library.sync(incremental=False)
+
+    result = test_library.scan(incremental=False)
+    test_library.apply_scan(result)
+    assert len(result['entries']) == 3
+    assert result['paths'] == list()
+
+    # Cache is not used if the data base is missing
+    result = test_library.scan(storage_exists=False)
+    test_library.apply_scan(result)
+    assert len(result['entries']) == 3
+
+
+def test_scan_cache_removes_deleted_folders(test_library, root):
+    assert test_library.sync(incremental=False)
+    result = test_library.scan()
+    test_library.apply_scan(result)
+    assert root + '/b' in result['cache']
+
+    os.remove(root + '/b/three.anim')
+    os.rmdir(root + '/b')
+    _touch_folder(root)
+
+    result = test_library.scan()
+    test_library.apply_scan(result)
+    assert root + '/b' not in result['cache']
+    assert sorted(test_library.read()) == [root + '/a/one.anim', root + '/a/two.anim']
+
+
+def test_manager_find_items_and_scan_folder_walk_the_same_entries(root):
+    library_manager = LibraryWindow().manager()
+    os.makedirs(root + '/a/deep/deeper')
+    with open(root + '/a/deep/deeper/five.anim', 'w') as fh:
+        fh.write('a/deep/deeper/five.anim')
+
+    found = [item.path() for item in library_manager.find_items(root, depth=2)]
+    entries, paths = library_manager.scan_folder(root, depth=2)
+
+    assert found == [path for _, path in entries]
+    assert paths == list()
+    assert sorted(found) == [root + '/a/one.anim', root + '/a/two.anim', root + '/b/three.anim']
+    assert root + '/a/deep/deeper/five.anim' in [item.path() for item in library_manager.find_items(root, depth=3)]
+
+
+def test_manager_scan_folder_uses_cache(root):
+    library_manager = LibraryWindow().manager()
+    cache = dict()
+
+    entries, paths = library_manager.scan_folder(root, cache=cache)
+    assert len(entries) == 3
+    assert sorted(cache) == [root, root + '/a', root + '/b']
+
+    entries, paths = library_manager.scan_folder(root, cache=cache)
+    assert entries == list()
+    assert sorted(paths) == [root + '/a/one.anim', root + '/a/two.anim', root + '/b/three.anim']
+
+
+def test_filter_paths_uses_global_queries(test_library, root):
+    test_library.sync(incremental=False)
+    paths = [root + '/a/one.anim', root + '/b/three.anim', root + '/missing.anim']
+
+    assert test_library.filter_paths(paths, [{'filters': [('name', 'contains', 'anim')]}]) == paths[:2]
+
+    test_library.add_to_global_query({'name': 'folder', 'filters': [('folder', 'is', root + '/a')]})
+    assert test_library.filter_paths(paths, [{'filters': [('name', 'contains', 'anim')]}]) == paths[:1]
+
+
+def test_save_item_data_emits_added_paths(test_library, root):
+    test_library.sync(incremental=False)
+    changes = list()
+    test_library.pathsChanged.connect(changes.append)
+    with open(root + '/b/four.anim', 'w') as fh:
+        fh.write('b/four.anim')
+
+    test_library.save_item_data([AnimItem(root + '/a/one.anim'), AnimItem(root + '/b/four.anim')])
+
+    assert changes == [{'moved': dict(), 'copied': dict(), 'added': [root + '/b/four.anim'], 'removed': list()}]
+
+    test_library.save_item_data([AnimItem(root + '/b/four.anim')])
+    assert len(changes) == 1
@@ -0,0 +1,132 @@
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from tpQtLib.widgets.library import metadata
+
+
+def _store():
+    store = metadata.LibraryMetadataStore()
+    store.set('/lib/a.anim', {'name': 'a', 'folder': '/lib', 'frames': 10})
+    store.set('/lib/b.pose', {'name': 'b', 'folder': '/lib', 'tags': ['x']})
+
+    return store
+
+
+def test_set_and_get():
+    store = _store()
+
+    assert len(store) == 2
+    assert '/lib/a.anim' in store
+    assert store.get('/lib/a.anim', 'frames') == 10
+    assert store.get('/lib/a.anim', 'tags', 'default') == 'default'
+    assert store.get('/lib/missing', 'name') is None
+    assert store.record('/lib/b.pose') == {'name': 'b', 'folder': '/lib', 'tags': ['x']}
+    assert store.record('/lib/missing') is None
+    assert sorted(store.fields()) == ['folder', 'frames', 'name', 'tags']
+    assert store.column('frames') == {'/lib/a.anim': 10}
+
+
+def test_set_replaces_previous_data():
+    store = _store()
+    store.set('/lib/a.anim', {'name': 'a2'})
+
+    assert store.record('/lib/a.anim') == {'name': 'a2'}
+    assert 'frames' not in store.fields()
+
+
+def test_strings_are_interned():
+    store = metadata.LibraryMetadataStore()
+    store.set('/lib/a', {'folder': ''.join(['/li', 'b'])})
+    store.set('/lib/b', {'folder': ''.join(['/l', 'ib'])})
+
+    assert store.get('/lib/a', 'folder') is store.get('/lib/b', 'folder')
+    assert store.intern(''.join(['/l', 'ib'])) is store.get('/lib/a', 'folder')
+    assert store.intern('not stored') == 'not stored'
+    # Both paths, the field name and the shared folder value
+    assert store.stats()['strings'] == 4
+
+
+def test_strings_are_released():
+    store = _store()
+    store.rename('/lib/a.anim', '/lib/c.anim')
+    store.set('/lib/b.pose', {'name': 'b2'})
+    store.remove('/lib/c.anim')
+    store.remove('/lib/b.pose')
+
+    assert len(store) == 0
+    assert store.fields() == list()
+    assert store.stats()['strings'] == 0
+    assert store._string_counts == dict()
+
+
+def test_remove_reuses_rows():
+    store = _store()
+    row = store.row('/lib/a.anim')
+
+    assert store.remove('/lib/a.anim') == {'name': 'a', 'folder': '/lib', 'frames': 10}
+    assert store.remove('/lib/a.anim') is None
+    assert store.path(row) is None
+
+    store.set('/lib/c.anim', {'name': 'c'})
+    assert store.row('/lib/c.anim') == row
+    assert store.record('/lib/c.anim') == {'name': 'c'}
+    assert store.stats()['rows'] == 2
+
+
+def test_rename():
+    store = _store()
+    row = store.row('/lib/a.anim')
+    store.rename('/lib/a.anim', '/lib/b.pose')
+
+    assert '/lib/a.anim' not in store
+    assert store.row('/lib/b.pose') == row
+    assert store.path(row) == '/lib/b.pose'
+    assert store.record('/lib/b.pose') == {'name': 'a', 'folder': '/lib', 'frames': 10}
+    assert len(store) == 1
+
+    store.rename('/lib/missing', '/lib/other')
+    assert '/lib/other' not in store
+
+
+def test_views():
+    store = _store()
+    view = store.view('/lib/a.anim')
+
+    assert dict(view) == {'name': 'a', 'folder': '/lib', 'frames': 10}
+    assert view['name'] == 'a'
+    assert view.get('tags') is None
+    assert len(view) == 3
+    with pytest.raises(KeyError):
+        view['tags']
+    assert store.view('/lib/missing') is None
+
+    # Views read the values stored in the store when they are accessed
+    store.set('/lib/a.anim', {'name': 'a2'})
+    assert dict(view) == {'name': 'a2'}
+
+
+def test_records():
+    store = _store()
+    records = store.records()
+
+    assert len(records) == 2
+    assert sorted(records) == ['/lib/a.anim', '/lib/b.pose']
+    assert '/lib/a.anim' in records
+    assert dict(records['/lib/b.pose']) == store.record('/lib/b.pose')
+    assert records.get('/lib/missing') is None
+    with pytest.raises(KeyError):
+        records['/lib/missing']
+
+    store.remove('/lib/a.anim')
+    assert sorted(records) == ['/lib/b.pose']
+
+
+def test_clear():
+    store = _store()
+    store.clear()
+
+    assert len(store) == 0
+    assert store.stats() == {'records': 0, 'rows': 0, 'fields': 0, 'strings': 0}
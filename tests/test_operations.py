@@ -0,0 +1,110 @@
+import os
+
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from tpQtLib.widgets.library import operations, exceptions
+
+Move = operations.LibraryOperation.Move
+Copy = operations.LibraryOperation.Copy
+Delete = operations.LibraryOperation.Delete
+
+
+@pytest.fixture
+def root(tmpdir):
+    for path in ('a/one.anim', 'a/two.anim', 'b/three.pose', 'c/four.pose'):
+        tmpdir.join(path).write(path, ensure=True)
+
+    return str(tmpdir).replace('\\', '/')
+
+
+def _read(path):
+    with open(path) as fh:
+        return fh.read()
+
+
+def test_resolve_targets_drops_operations_inside_other_sources(root):
+    ops = [
+        operations.LibraryOperation(Move, root + '/a', root + '/moved'),
+        operations.LibraryOperation(Move, root + '/a/one.anim', root + '/b/one.anim'),
+        operations.LibraryOperation(Delete, root + '/a/two.anim'),
+        operations.LibraryOperation(Delete, root + '/c/four.pose'),
+    ]
+
+    resolved = operations.resolve_targets(ops)
+
+    assert [(op.kind, op.source) for op in resolved] == [(Move, root + '/a'), (Delete, root + '/c/four.pose')]
+
+
+def test_resolve_targets_existing_target(root):
+    ops = [operations.LibraryOperation(Move, root + '/a/one.anim', root + '/b/three.pose')]
+
+    with pytest.raises(exceptions.RenamePathError):
+        operations.resolve_targets(ops)
+
+    resolved = operations.resolve_targets(ops, force=True)
+    target = resolved[0].target
+    assert target != root + '/b/three.pose'
+    assert os.path.dirname(target) == root + '/b'
+    assert not os.path.exists(target)
+
+
+def test_resolve_targets_reserves_targets(root):
+    ops = [
+        operations.LibraryOperation(Copy, root + '/a/one.anim', root + '/c/copy.anim'),
+        operations.LibraryOperation(Copy, root + '/a/two.anim', root + '/c/copy.anim'),
+    ]
+
+    with pytest.raises(exceptions.RenamePathError):
+        operations.resolve_targets(ops)
+
+    resolved = operations.resolve_targets(ops, force=True)
+    assert resolved[0].target == root + '/c/copy.anim'
+    assert resolved[1].target != resolved[0].target
+
+
+def test_resolve_targets_same_source_and_target(root):
+    ops = [operations.LibraryOperation(Move, root + '/a/one.anim', root + '/a/one.anim')]
+
+    with pytest.raises(exceptions.RenamePathError):
+        operations.resolve_targets(ops, force=True)
+
+
+def test_run(root):
+    ops = operations.resolve_targets([
+        operations.LibraryOperation(Move, root + '/a/one.anim', root + '/new/one.anim'),
+        operations.LibraryOperation(Copy, root + '/b', root + '/b_copy'),
+        operations.LibraryOperation(Delete, root + '/c'),
+    ])
+
+    assert operations.run(ops, threads=2) == list()
+    assert all(op.done for op in ops)
+    assert _read(root + '/new/one.anim') == 'a/one.anim'
+    assert not os.path.exists(root + '/a/one.anim')
+    assert _read(root + '/b_copy/three.pose') == 'b/three.pose'
+    assert os.path.exists(root + '/b/three.pose')
+    assert not os.path.exists(root + '/c')
+
+
+def test_run_reverts_moves_and_copies_if_any_fails(root):
+    ops = operations.resolve_targets([
+        operations.LibraryOperation(Move, root + '/a/one.anim', root + '/new/one.anim'),
+        operations.LibraryOperation(Copy, root + '/b/three.pose', root + '/new/three.pose'),
+        operations.LibraryOperation(Move, root + '/a/missing.anim', root + '/new/missing.anim'),
+        operations.LibraryOperation(Delete, root + '/c'),
+    ])
+
+    failed = operations.run(ops, threads=2)
+
+    assert [op.source for op in failed] == [root + '/a/missing.anim']
+    assert isinstance(failed[0].error, exceptions.MovePathError)
+    assert not any(op.done for op in ops)
+    assert _read(root + '/a/one.anim') == 'a/one.anim'
+    assert os.path.exists(root + '/b/three.pose')
+    assert not os.path.exists(root + '/new/one.anim')
+    assert not os.path.exists(root + '/new/three.pose')
+    # Deletions are not done, because they cannot be reverted
+    assert os.path.exists(root + '/c/four.pose')
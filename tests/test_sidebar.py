@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+widgets = pytest.importorskip('tpQtLib.widgets.library.widgets')
+
+ROOT = '/lib'
+PATHS = [ROOT + '/anim', ROOT + '/anim/walk', ROOT + '/anim/walk/cycle', ROOT + '/pose']
+
+
+@pytest.fixture
+def sidebar(qapp):
+    sidebar = widgets.LibrarySidebarWidget()
+    sidebar.set_data(dict((path, dict()) for path in PATHS), root=ROOT)
+    yield sidebar
+    sidebar.clear()
+
+
+def test_child_paths(sidebar):
+    assert sorted(sidebar.child_paths(ROOT + '/anim')) == PATHS[:3]
+    assert sidebar.child_paths(ROOT + '/pose') == [ROOT + '/pose']
+    assert sidebar.child_paths(ROOT + '/missing') == list()
+
+
+def test_rename_path_keeps_items_state(sidebar):
+    sidebar.item_from_path(ROOT + '/anim').setExpanded(True)
+    sidebar.item_from_path(ROOT + '/anim/walk').setExpanded(True)
+    sidebar.item_from_path(ROOT + '/anim/walk/cycle').setSelected(True)
+
+    sidebar.rename_path(ROOT + '/anim', ROOT + '/motion')
+
+    assert sidebar.item_from_path(ROOT + '/anim', create=False) is None
+    assert sorted(sidebar.child_paths(ROOT + '/motion')) == [
+        ROOT + '/motion', ROOT + '/motion/walk', ROOT + '/motion/walk/cycle']
+    assert sidebar.item_from_path(ROOT + '/motion').isExpanded()
+    assert sidebar.item_from_path(ROOT + '/motion/walk').isExpanded()
+    assert sidebar.selected_paths() == [ROOT + '/motion/walk/cycle']
+
+
+def test_copy_path(sidebar):
+    sidebar.item_from_path(ROOT + '/anim').setExpanded(True)
+
+    sidebar.copy_path(ROOT + '/anim', ROOT + '/pose/anim')
+
+    assert sorted(sidebar.child_paths(ROOT + '/anim')) == PATHS[:3]
+    assert sorted(sidebar.child_paths(ROOT + '/pose/anim')) == [
+        ROOT + '/pose/anim', ROOT + '/pose/anim/walk', ROOT + '/pose/anim/walk/cycle']
+    assert sidebar.item_from_path(ROOT + '/anim').isExpanded()
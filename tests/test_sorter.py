@@ -0,0 +1,125 @@
+import random
+
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from tpQtLib.widgets.library import index, sorter
+
+
+def _data(count=100, seed=0):
+    rnd = random.Random(seed)
+    data = dict()
+    for i in range(count):
+        data['/lib/item{}'.format(i)] = {
+            'name': rnd.choice(['a', 'b', 'c', 'd', None]),
+            'type': rnd.choice(['anim', 'pose', '']),
+            'frames': rnd.choice([1, 2.5, 3, None]),
+        }
+
+    return data
+
+
+def _multi_pass_sorted(paths, data, sort_by):
+    """
+    Sorts the given paths one field at a time, from the last field to the first one, relying on sort stability
+    """
+
+    paths = list(paths)
+    for field, reverse in reversed(sorter.parse_fields(sort_by)):
+        paths = sorted(paths, key=lambda path: sorter.sort_value(data[path].get(field)), reverse=reverse)
+
+    return paths
+
+
+SORT_BY = [
+    ['name:asc'],
+    ['name:dsc'],
+    ['type:asc', 'name:dsc'],
+    ['type:dsc', 'frames:asc', 'name:asc'],
+    ['frames:dsc', 'type:dsc'],
+]
+
+
+def test_parse_fields():
+    assert sorter.parse_fields(['name:asc', 'type:dsc', 'frames']) == [
+        ('name', False), ('type', True), ('frames', False)]
+    assert sorter.parse_fields(None) == list()
+
+
+def test_sort_value_order():
+    values = ['b', 2, None, 'a', True, 1.5, '', (1, 2)]
+    ordered = sorted(values, key=sorter.sort_value)
+
+    assert ordered[:2] in ([None, ''], ['', None])
+    assert ordered[2:5] == [True, 1.5, 2]
+    assert ordered[5:] == ['a', 'b', (1, 2)]
+
+
+def test_reversed_value():
+    assert sorter.ReversedValue(2) < sorter.ReversedValue(1)
+    assert sorter.ReversedValue(1) > sorter.ReversedValue(2)
+    assert sorter.ReversedValue(1) == sorter.ReversedValue(1)
+    assert sorted([1, 3, 2], key=sorter.ReversedValue) == [3, 2, 1]
+
+
+@pytest.mark.parametrize('sort_by', SORT_BY)
+def test_composite_key_matches_multi_pass_sort(sort_by):
+    data = _data()
+    parsed_fields = sorter.parse_fields(sort_by)
+    paths = sorted(data)
+
+    result = sorted(paths, key=lambda path: sorter.sort_key(data[path], parsed_fields))
+
+    assert result == _multi_pass_sorted(paths, data, sort_by)
+
+
+@pytest.mark.parametrize('sort_by', SORT_BY)
+def test_library_sorter(sort_by):
+    data = _data()
+    library_index = index.LibraryIndex()
+    library_index.set_data(data)
+    library_sorter = sorter.LibrarySorter(library_index)
+
+    paths = sorted(data)[::3]
+    expected = [tuple(sorter.sort_key(data[path], sorter.parse_fields(sort_by))) for path in paths]
+    result = [tuple(sorter.sort_key(data[path], sorter.parse_fields(sort_by)))
+              for path in library_sorter.sort(paths, sort_by)]
+
+    assert result == sorted(expected)
+
+
+def test_library_sorter_is_updated_with_index():
+    library_index = index.LibraryIndex()
+    library_index.set_data({'/a': {'name': 'b'}, '/b': {'name': 'a'}})
+    library_sorter = sorter.LibrarySorter(library_index)
+    assert library_sorter.sort(['/a', '/b'], ['name:asc']) == ['/b', '/a']
+
+    library_index.update('/b', {'name': 'c'})
+    assert library_sorter.sort(['/a', '/b'], ['name:asc']) == ['/a', '/b']
+
+    # Paths that are not indexed are sorted last
+    assert library_sorter.sort(['/c', '/b', '/a'], ['name:asc']) == ['/a', '/b', '/c']
+
+
+def test_group():
+    data = {
+        'x': {'type': 'pose', 'category': 'face'},
+        'y': {'type': 'anim', 'category': 'body'},
+        'z': {'type': 'pose', 'category': 'body'},
+        'w': {'type': 'anim'},
+        'v': {'type': 'pose', 'category': 'face'},
+    }
+
+    grouped = sorter.group(['x', 'y', 'z', 'w', 'v'], ['type:asc', 'category:dsc'], data.get)
+
+    assert list(grouped.keys()) == ['anim', 'pose']
+    assert list(grouped['pose'].keys()) == ['face', 'body']
+    assert grouped['pose']['face'] == ['x', 'v']
+    assert grouped['anim'] == {'body': ['y']}
+    assert sorter.flatten_groups(grouped) == [
+        (0, 'anim', None), (1, 'body', None), (2, None, 'y'),
+        (0, 'pose', None), (1, 'face', None), (2, None, 'x'), (2, None, 'v'), (1, 'body', None), (2, None, 'z')]
+    assert sorter.group(['x', 'y'], list(), data.get) == {'None': ['x', 'y']}
@@ -0,0 +1,153 @@
+import os
+
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from tpQtLib.widgets.library import storage
+
+
+DATA = {
+    '/lib/folder/a.anim': {'name': 'a', 'folder': '/lib/folder', 'frames': 10},
+    '/lib/folder/b.pose': {'name': 'b', 'folder': '/lib/folder', 'tags': ['x', 'y']},
+    '/lib/other/c.pose': {'name': 'c', 'folder': '/lib/other'},
+}
+
+
+@pytest.fixture(params=['library.json', 'library.db'])
+def library_storage(request, tmpdir):
+    library_storage = storage.storage_from_path(str(tmpdir.join(request.param)))
+    yield library_storage
+    library_storage.close()
+
+
+def test_storage_from_path(tmpdir):
+    assert isinstance(storage.storage_from_path(str(tmpdir.join('a.json'))), storage.JSONLibraryStorage)
+    assert isinstance(storage.storage_from_path(str(tmpdir.join('a.db'))), storage.SQLiteLibraryStorage)
+    assert isinstance(storage.storage_from_path(str(tmpdir.join('a.txt'))), storage.JSONLibraryStorage)
+
+
+def test_round_trip(library_storage):
+    assert library_storage.read() == dict()
+    assert library_storage.mtime() is None
+
+    library_storage.write(DATA)
+    assert library_storage.exists()
+    assert library_storage.read() == DATA
+
+    reopened = storage.storage_from_path(library_storage.path())
+    try:
+        assert reopened.read() == DATA
+    finally:
+        reopened.close()
+
+
+def test_read_returns_copies(library_storage):
+    library_storage.write(DATA)
+    library_storage.read()['/lib/folder/a.anim']['name'] = 'changed'
+
+    assert library_storage.read() == DATA
+
+
+def test_update(library_storage):
+    library_storage.write(DATA)
+    library_storage.update(
+        records={'/lib/folder/a.anim': {'name': 'a2'}, '/lib/new.anim': {'name': 'new'}},
+        removed=['/lib/other/c.pose'])
+
+    data = library_storage.read()
+    assert data['/lib/folder/a.anim'] == {'name': 'a2'}
+    assert data['/lib/new.anim'] == {'name': 'new'}
+    assert '/lib/other/c.pose' not in data
+    assert data['/lib/folder/b.pose'] == DATA['/lib/folder/b.pose']
+
+
+def test_rename_folder(library_storage):
+    library_storage.write(DATA)
+    library_storage.rename('/lib/folder', '/lib/renamed')
+
+    data = library_storage.read()
+    assert sorted(data) == ['/lib/other/c.pose', '/lib/renamed/a.anim', '/lib/renamed/b.pose']
+    assert data['/lib/renamed/a.anim']['folder'] == '/lib/renamed'
+    assert data['/lib/other/c.pose'] == DATA['/lib/other/c.pose']
+
+
+def test_rename_does_not_rename_siblings_with_same_prefix(library_storage):
+    data = dict(DATA)
+    data['/lib/folder2/d.pose'] = {'name': 'd', 'folder': '/lib/folder2'}
+    library_storage.write(data)
+    library_storage.rename('/lib/folder', '/lib/renamed')
+
+    assert library_storage.read()['/lib/folder2/d.pose'] == data['/lib/folder2/d.pose']
+
+
+def test_rename_paths(library_storage):
+    library_storage.write(DATA)
+    library_storage.rename_paths({'/lib/folder/a.anim': '/lib/a.anim', '/lib/other': '/lib/moved'})
+
+    assert sorted(library_storage.read()) == ['/lib/a.anim', '/lib/folder/b.pose', '/lib/moved/c.pose']
+
+
+def test_batch_commits_once(library_storage):
+    library_storage.write(DATA)
+    mtime = library_storage.mtime()
+
+    with library_storage.batch():
+        library_storage.update(records={'/lib/new.anim': {'name': 'new'}})
+        library_storage.rename('/lib/other', '/lib/moved')
+        assert library_storage.is_batching()
+
+    assert not library_storage.is_batching()
+    assert '/lib/moved/c.pose' in library_storage.read()
+    if isinstance(library_storage, storage.SQLiteLibraryStorage):
+        assert library_storage.mtime() == mtime + 1
+
+
+def test_batch_rollback(library_storage):
+    library_storage.write(DATA)
+
+    with pytest.raises(ValueError):
+        with library_storage.batch():
+            library_storage.update(removed=list(DATA))
+            raise ValueError()
+
+    assert library_storage.read() == DATA
+
+
+def test_export_import_json(library_storage, tmpdir):
+    library_storage.write(DATA)
+    path = str(tmpdir.join('exported.json'))
+    library_storage.export_json(path)
+
+    imported = storage.SQLiteLibraryStorage(str(tmpdir.join('imported.db')))
+    try:
+        imported.import_json(path)
+        assert imported.read() == DATA
+    finally:
+        imported.close()
+
+
+def test_migrate_json_storage(tmpdir):
+    json_path = str(tmpdir.join('library.json'))
+    json_storage = storage.JSONLibraryStorage(json_path)
+    json_storage.write(DATA)
+
+    migrated = storage.storage_from_path(json_path, migrate=True)
+    try:
+        assert isinstance(migrated, storage.SQLiteLibraryStorage)
+        assert migrated.path() == storage.migrated_path(json_path).replace('\\', '/')
+        assert migrated.read() == DATA
+        migrated.update(removed=['/lib/other/c.pose'])
+    finally:
+        migrated.close()
+
+    # JSON data base is kept as a backup and it is not imported again
+    assert json_storage.read() == DATA
+    migrated = storage.storage_from_path(json_path, migrate=True)
+    try:
+        assert '/lib/other/c.pose' not in migrated.read()
+    finally:
+        migrated.close()
+    assert not os.path.exists(storage.migrated_path(json_path) + '.migrating')
@@ -0,0 +1,86 @@
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+tableview = pytest.importorskip('tpQtLib.widgets.library.tableview')
+model = pytest.importorskip('tpQtLib.widgets.library.model')
+
+
+class Item(object):
+
+    def __init__(self, path):
+        self._path = path
+
+    def id(self):
+        return self._path
+
+    def set_viewer(self, viewer):
+        pass
+
+    def selection_changed(self):
+        pass
+
+
+class Index(object):
+
+    def value(self, path, field):
+        return path.rpartition('/')[2] if field == 'name' else None
+
+    def record(self, path):
+        return {'name': self.value(path, 'name')}
+
+
+class Library(object):
+
+    def __init__(self):
+        self.created = list()
+        self._index = Index()
+
+    def index(self):
+        return self._index
+
+    def item_from_path(self, path):
+        self.created.append(path)
+        return Item(path)
+
+
+@pytest.fixture
+def table_view(qapp):
+    item_model = model.LibraryItemModel()
+    item_model.set_library(Library())
+    item_model.set_columns(['name', 'type'])
+    item_model.set_results({'None': ['/lib/{}.anim'.format(i) for i in range(1000)]})
+    table_view = tableview.LibraryTableView()
+    table_view.set_item_model(item_model)
+
+    return table_view
+
+
+def test_rows_are_read_from_the_model(table_view):
+    item_model = table_view.item_model()
+
+    assert item_model.rowCount() == 1000
+    assert item_model.columnCount() == 2
+    assert item_model.data(item_model.index(5, 0)) == '5.anim'
+    assert table_view.model() is item_model
+    assert item_model.library().created == list()
+
+
+def test_selection_only_creates_selected_items(table_view):
+    item_model = table_view.item_model()
+    items = [item_model.item_from_path('/lib/3.anim'), item_model.item_from_path('/lib/7.anim')]
+
+    table_view.set_items_selected(items, True)
+
+    assert [item.id() for item in table_view.selected_items()] == ['/lib/3.anim', '/lib/7.anim']
+    assert table_view.selected_item().id() == '/lib/7.anim'
+    assert sorted(item_model.library().created) == ['/lib/3.anim', '/lib/7.anim']
+    # Selected items are pinned, so they are kept even if many other items are created
+    for i in range(100, 100 + item_model.MAX_ITEMS * 2):
+        item_model.item_from_path('/lib/{}.anim'.format(i))
+    assert table_view.selected_items() == items
+
+    table_view.set_items_selected(items[:1], False)
+    assert table_view.selected_items() == items[1:]
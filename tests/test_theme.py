@@ -0,0 +1,117 @@
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from Qt.QtCore import QCoreApplication, QEvent
+from Qt.QtWidgets import QWidget
+
+from tpQtLib.core import theme
+
+OPTIONS = dict((option, 'rgb(10, 20, 30)') for _, option in theme.SUBSCRIBER_SETTERS)
+
+
+class ColorWidget(QWidget):
+
+    def __init__(self, parent=None):
+        super(ColorWidget, self).__init__(parent)
+
+        self.colors = dict()
+        self.updates = 0
+
+    def set_text_color(self, color):
+        self.colors['text'] = color
+
+    def set_background_color(self, color):
+        self.colors['background'] = color
+
+    def update(self):
+        self.updates += 1
+
+
+def test_subscribe_needs_setters(qapp):
+    registry = theme.ThemeSubscribers()
+
+    assert not registry.subscribe(QWidget())
+    assert len(registry) == 0
+
+
+def test_publish_only_updates_root_subscribers(qapp):
+    registry = theme.ThemeSubscribers()
+    root = QWidget()
+    other_root = QWidget()
+    widget = ColorWidget(QWidget(root))
+    other_widget = ColorWidget(other_root)
+    assert registry.subscribe(widget)
+    assert registry.subscribe(other_widget)
+
+    assert registry.publish(OPTIONS, root=root) == 1
+    assert widget.colors['text'].getRgb()[:3] == (10, 20, 30)
+    assert 'background' in widget.colors
+    assert not other_widget.colors
+    assert registry.subscribers(root) == [widget]
+    assert registry.subscribers(other_root) == [other_widget]
+
+    assert registry.publish(OPTIONS) == 2
+
+
+def test_subscribe_with_root(qapp):
+    registry = theme.ThemeSubscribers()
+    root = QWidget()
+    widget = ColorWidget()
+    registry.subscribe(widget, root=root)
+
+    assert registry.publish(OPTIONS, root=root) == 1
+    assert widget.colors
+
+
+def test_subscribe_again_after_moving_to_other_root(qapp):
+    registry = theme.ThemeSubscribers()
+    root = QWidget()
+    other_root = QWidget()
+    widget = ColorWidget(root)
+    registry.subscribe(widget)
+    registry.publish(OPTIONS, root=root)
+
+    widget.setParent(other_root)
+    registry.subscribe(widget)
+
+    assert registry.publish(OPTIONS, root=root) == 0
+    assert registry.publish(OPTIONS, root=other_root) == 1
+
+
+def test_repaints_are_coalesced(qapp):
+    registry = theme.ThemeSubscribers()
+    root = QWidget()
+    widget = ColorWidget(root)
+    registry.subscribe(widget)
+
+    registry.publish(OPTIONS, root=root)
+    registry.publish(OPTIONS, root=root)
+    assert widget.updates == 0
+
+    registry.flush()
+    assert widget.updates == 1
+    registry.flush()
+    assert widget.updates == 1
+
+
+def test_destroyed_subscribers_are_discarded(qapp):
+    registry = theme.ThemeSubscribers()
+    root = QWidget()
+    widget = ColorWidget(root)
+    registry.subscribe(widget)
+    registry.publish(OPTIONS, root=root)
+
+    registry.unsubscribe(widget)
+    assert not registry.is_subscribed(widget)
+    assert registry.publish(OPTIONS, root=root) == 0
+
+    registry.subscribe(widget)
+    widget.deleteLater()
+    widget = None
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    assert len(registry) == 0
+    assert registry.publish(OPTIONS, root=root) == 0
@@ -0,0 +1,110 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from Qt.QtCore import QSize
+from Qt.QtGui import QImage
+
+thumbnail = pytest.importorskip('tpQtLib.widgets.library.thumbnail')
+
+SIZE = QSize(8, 8)
+
+
+class ThumbnailCache(thumbnail.ThumbnailCache):
+
+    def __init__(self, *args, **kwargs):
+        super(ThumbnailCache, self).__init__(*args, **kwargs)
+
+        self.pruned = list()
+
+    def decode(self, path, size):
+        if not path.endswith('.png'):
+            return None
+        image = QImage(size, QImage.Format_RGB32)
+        image.fill(0)
+        return image
+
+    def prune_disk(self, cache_path):
+        self.pruned.append(cache_path)
+        return super(ThumbnailCache, self).prune_disk(cache_path)
+
+
+def _write(path, size, age):
+    with open(path, 'wb') as fh:
+        fh.write(b'0' * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def _wait_pruning(cache):
+    for _ in range(200):
+        with cache._lock:
+            if not cache._pruning:
+                return
+        time.sleep(0.01)
+
+
+def test_paths_are_bounded(qapp, tmpdir):
+    cache = ThumbnailCache(max_paths=2)
+
+    for name in ('a', 'b', 'c'):
+        assert not cache.load(str(tmpdir.join(name + '.jpg')), SIZE)
+
+    assert list(cache._mtimes) == [str(tmpdir.join(name + '.jpg')) for name in ('b', 'c')]
+    assert len(cache._failed) == 2
+    assert not cache.is_failed(str(tmpdir.join('a.jpg')), SIZE)
+    assert cache.is_failed(str(tmpdir.join('c.jpg')), SIZE)
+
+    cache.set_max_paths(1)
+    assert len(cache._mtimes) == 1
+    assert len(cache._failed) == 1
+
+
+def test_remove_forgets_failed_paths(qapp, tmpdir):
+    cache = ThumbnailCache()
+    path = str(tmpdir.join('a.jpg'))
+    cache.load(path, SIZE)
+
+    cache.remove(path)
+
+    assert not cache._failed
+    assert path not in cache._mtimes
+
+
+def test_prune_disk_removes_old_and_least_recently_used_thumbnails(qapp, tmpdir):
+    cache = ThumbnailCache(max_disk_bytes=250, max_disk_age=60)
+    cache_path = tmpdir.join('cache').ensure(dir=True)
+    cache_path.join('ab').ensure(dir=True)
+    _write(str(cache_path.join('ab', 'old.png')), 10, 120)
+    _write(str(cache_path.join('ab', 'one.png')), 100, 30)
+    _write(str(cache_path.join('ab', 'two.png')), 100, 20)
+    _write(str(cache_path.join('ab', 'three.png')), 100, 10)
+    _write(str(cache_path.join('ab', 'other.txt')), 100, 120)
+
+    assert cache.prune_disk(str(cache_path)) == 2
+
+    assert sorted(os.listdir(str(cache_path.join('ab')))) == ['other.txt', 'three.png', 'two.png']
+    assert cache.stats()['diskRemoved'] == 2
+
+
+def test_disk_cache_is_pruned_on_first_use_and_after_writes(qapp, tmpdir):
+    cache = ThumbnailCache(prune_writes=2)
+    cache_path = str(tmpdir.join('cache'))
+
+    cache.load(str(tmpdir.join('a.png')), SIZE, cache_path=cache_path)
+    _wait_pruning(cache)
+    assert cache.pruned == [cache_path]
+
+    cache.load(str(tmpdir.join('b.png')), SIZE, cache_path=cache_path)
+    _wait_pruning(cache)
+    assert cache.pruned == [cache_path]
+
+    cache.load(str(tmpdir.join('c.png')), SIZE, cache_path=cache_path)
+    _wait_pruning(cache)
+    assert cache.pruned == [cache_path, cache_path]
+    assert cache.stats()['diskWrites'] == 3
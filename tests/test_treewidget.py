@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from Qt.QtWidgets import QTreeWidgetItem
+
+treewidget = pytest.importorskip('tpQtLib.widgets.library.treewidget')
+consts = pytest.importorskip('tpQtLib.widgets.library.consts')
+
+
+@pytest.fixture
+def tree(qapp):
+    tree = treewidget.LibraryTreeWidget()
+    tree.removed_rows = list()
+    tree.model().rowsRemoved.connect(lambda parent, first, last: tree.removed_rows.append((first, last)))
+    yield tree
+    tree.clear()
+
+
+def _items(count):
+    return [QTreeWidgetItem([str(i)]) for i in range(count)]
+
+
+def _top_level_items(tree):
+    return [tree.topLevelItem(i) for i in range(tree.topLevelItemCount())]
+
+
+def test_stable_rows(tree):
+    current = _items(6)
+    items = [current[i] for i in (1, 0, 2, 5, 3)] + _items(1)
+
+    assert tree._stable_rows(current, items) in ({1, 2, 3}, {0, 2, 3}, {1, 2, 5}, {0, 2, 5})
+    assert tree._stable_rows(current, current) == set(range(6))
+    assert tree._stable_rows(current, list()) == set()
+
+
+def test_set_items_only_updates_changed_rows(tree):
+    current = _items(100)
+    tree.set_items(current)
+    del tree.removed_rows[:]
+
+    items = [item for i, item in enumerate(current) if i not in (10, 50)] + _items(3)
+    items.insert(20, current[10])
+    tree.set_items(items)
+
+    assert _top_level_items(tree) == items
+    # Only the moved row and the removed one are taken, kept rows are not touched
+    assert sorted(tree.removed_rows) == [(10, 10), (50, 50)]
+
+
+def test_set_items_replaces_all_rows_if_many_rows_are_removed(tree):
+    current = _items(consts.TREE_WIDGET_MAX_TAKEN_ROWS * 4)
+    tree.set_items(current)
+    del tree.removed_rows[:]
+
+    # Less than half of the rows change, but they are too many to be taken one by one
+    items = [item for i, item in enumerate(current) if i % 3]
+    tree.set_items(items)
+
+    assert _top_level_items(tree) == items
+    assert tree.removed_rows == [(0, len(current) - 1)]
+
+
+def test_set_items_without_changes(tree):
+    current = _items(10)
+    tree.set_items(current)
+    del tree.removed_rows[:]
+
+    tree.set_items(list(current))
+
+    assert _top_level_items(tree) == current
+    assert tree.removed_rows == list()
@@ -0,0 +1,116 @@
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from tpQtLib.widgets.library import trie
+
+
+def _trie():
+    path_trie = trie.PathTrie(root='/lib/root')
+    path_trie.add('/lib/root/anim/walk', data={'icon': 'walk'})
+    path_trie.add('/lib/root/anim/run')
+    path_trie.add('/lib/root/pose')
+    path_trie.add('/other/folder')
+
+    return path_trie
+
+
+def test_keys():
+    path_trie = _trie()
+
+    assert path_trie.keys('/lib/root') == ['/lib/root']
+    assert path_trie.keys('/lib/root/anim/walk') == ['/lib/root', 'anim', 'walk']
+    assert path_trie.keys('/lib/rootless/anim') == ['lib', 'rootless', 'anim']
+    assert path_trie.keys('') == list()
+
+
+def test_add_creates_shared_nodes_once():
+    path_trie = trie.PathTrie(root='/lib/root')
+
+    created = path_trie.add('/lib/root/anim/walk')
+    assert [node.path for node in created] == ['/lib/root', '/lib/root/anim', '/lib/root/anim/walk']
+
+    created = path_trie.add('/lib/root/anim/run')
+    assert [node.path for node in created] == ['/lib/root/anim/run']
+    assert path_trie.add('/lib/root/anim/run') == list()
+
+
+def test_nodes():
+    path_trie = _trie()
+
+    assert len(path_trie) == 4
+    assert '/lib/root/anim/walk' in path_trie
+    assert '/lib/root/anim' not in path_trie
+    assert sorted(path_trie.paths()) == [
+        '/lib/root/anim/run', '/lib/root/anim/walk', '/lib/root/pose', '/other/folder']
+    assert sorted(node.path for node in path_trie.top_level_nodes()) == ['/lib/root', '/other']
+
+    walk = path_trie.node('/lib/root/anim/walk')
+    assert walk.data == {'icon': 'walk'}
+    assert walk.explicit
+    assert walk.parent is path_trie.node('/lib/root/anim')
+    assert not walk.parent.explicit
+    assert [node.name for node in walk.parent.sorted_children()] == ['run', 'walk']
+    assert path_trie.node('/lib/root/missing') is None
+    assert path_trie.node('/missing/folder') is None
+
+
+def test_walk():
+    path_trie = _trie()
+    paths = [node.path for node in path_trie.walk(path_trie.node('/lib/root'))]
+
+    assert paths[0] == '/lib/root'
+    assert paths.index('/lib/root/anim') < paths.index('/lib/root/anim/walk')
+    assert sorted(paths) == [
+        '/lib/root', '/lib/root/anim', '/lib/root/anim/run', '/lib/root/anim/walk', '/lib/root/pose']
+
+
+def test_remove_prunes_empty_parents():
+    path_trie = _trie()
+
+    removed = path_trie.remove('/lib/root/anim/walk')
+    assert removed.path == '/lib/root/anim/walk'
+    assert path_trie.node('/lib/root/anim/walk') is None
+    assert path_trie.node('/lib/root/anim') is not None
+
+    removed = path_trie.remove('/lib/root/anim/run')
+    assert removed.path == '/lib/root/anim'
+    assert path_trie.node('/lib/root/anim') is None
+    assert path_trie.node('/lib/root/pose') is not None
+
+    removed = path_trie.remove('/other/folder')
+    assert removed.path == '/other'
+    assert sorted(node.path for node in path_trie.top_level_nodes()) == ['/lib/root']
+
+
+def test_remove_keeps_nodes_with_children():
+    path_trie = _trie()
+    path_trie.add('/lib/root/anim')
+
+    assert path_trie.remove('/lib/root/anim') is None
+    assert path_trie.node('/lib/root/anim') is not None
+    assert '/lib/root/anim' not in path_trie
+    assert path_trie.remove('/lib/root/anim') is None
+    assert path_trie.remove('/lib/root/missing') is None
+
+
+def test_remove_tree():
+    path_trie = _trie()
+
+    removed_node, removed = path_trie.remove_tree('/lib/root/anim')
+    assert removed_node.path == '/lib/root/anim'
+    assert removed == {'/lib/root/anim/walk': {'icon': 'walk'}, '/lib/root/anim/run': dict()}
+    assert sorted(path_trie.paths()) == ['/lib/root/pose', '/other/folder']
+    assert path_trie.node('/lib/root/anim') is None
+
+    assert path_trie.remove_tree('/lib/root/missing') == (None, dict())
+
+
+def test_paths_without_root():
+    path_trie = trie.PathTrie()
+    path_trie.add('C:/lib/anim')
+
+    assert path_trie.node('C:/lib/anim').path == 'C:/lib/anim'
+    assert [node.path for node in path_trie.top_level_nodes()] == ['C:']
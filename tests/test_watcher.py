@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+pytest.importorskip('Qt')
+pytest.importorskip('tpPyUtils')
+pytest.importorskip('tpDccLib')
+
+from Qt.QtCore import QCoreApplication
+
+from tpQtLib.widgets.library import watcher
+
+
+def _wait(msecs):
+    end = time.time() + msecs / 1000.0
+    while time.time() < end:
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def library_watcher(qapp):
+    library_watcher = watcher.LibraryWatcher()
+    library_watcher.notified = list()
+    library_watcher.foldersChanged.connect(library_watcher.notified.append)
+    yield library_watcher
+    library_watcher.clear()
+
+
+def test_changes_are_coalesced(library_watcher):
+    library_watcher.set_coalesce_interval(50)
+    library_watcher._add_pending('/lib/b')
+    library_watcher._add_pending('/lib/a')
+    library_watcher._add_pending('/lib/b')
+
+    assert library_watcher.pending_paths() == ['/lib/a', '/lib/b']
+    assert library_watcher.notified == list()
+
+    _wait(200)
+    assert library_watcher.notified == [['/lib/a', '/lib/b']]
+    assert library_watcher.pending_paths() == list()
+
+
+def test_changes_are_notified_before_max_latency(library_watcher):
+    library_watcher.set_coalesce_interval(100)
+    library_watcher.set_max_latency(250)
+    assert library_watcher.coalesce_interval() == 100
+    assert library_watcher.max_latency() == 250
+
+    # Events keep coming faster than the coalesce interval, so only the max latency can flush them
+    start = time.time()
+    while not library_watcher.notified and time.time() - start < 2.0:
+        library_watcher._add_pending('/lib/a')
+        _wait(20)
+
+    assert library_watcher.notified == [['/lib/a']]
+    assert time.time() - start < 1.0
+    assert library_watcher.coalesce_interval() == 100
+
+
+def test_flush_and_disable(library_watcher):
+    library_watcher._add_pending('/lib/a')
+    library_watcher.flush()
+    assert library_watcher.notified == [['/lib/a']]
+
+    library_watcher.flush()
+    assert library_watcher.notified == [['/lib/a']]
+
+    library_watcher._add_pending('/lib/b')
+    library_watcher.set_enabled(False)
+    library_watcher._add_pending('/lib/c')
+    assert library_watcher.pending_paths() == list()